@@ -9,7 +9,7 @@ from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 import psycopg2
 import os
@@ -17,6 +17,7 @@ import os
 # Spirit Score 모듈 임포트
 from spirit_score_engine import SpiritScoreEngine
 from activity_tracker import ActivityTracker
+from leaderboard_index import LeaderboardIndex
 
 # ============================================
 # FastAPI 앱 초기화
@@ -51,18 +52,33 @@ def get_db_connection():
         password=os.getenv("DB_PASSWORD", "")
     )
 
+# 리더보드 인덱스 스냅샷 (빈 값이면 끔)
+LEADERBOARD_SNAPSHOT_PATH = os.getenv("LEADERBOARD_SNAPSHOT_PATH", "")
+LEADERBOARD_SNAPSHOT_INTERVAL = float(os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", "60"))
+LEADERBOARD_CATCHUP_MARGIN = timedelta(minutes=5)  # 스냅샷 이후 변경 재조회 시 시계 오차 여유
+
 # 글로벌 인스턴스
 db_conn = None
 spirit_engine = None
 activity_tracker = None
+leaderboard = None
 
 @app.on_event("startup")
 async def startup_event():
     """앱 시작 시 초기화"""
-    global db_conn, spirit_engine, activity_tracker
+    global db_conn, spirit_engine, activity_tracker, leaderboard
     
     db_conn = get_db_connection()
-    spirit_engine = SpiritScoreEngine(db_conn)
+    
+    # 리더보드 인덱스: 스냅샷이 있으면 스냅샷 + 이후 변경분만, 없으면 users 전체 적재
+    leaderboard = LeaderboardIndex()
+    saved_at = leaderboard.load_snapshot(LEADERBOARD_SNAPSHOT_PATH) if LEADERBOARD_SNAPSHOT_PATH else None
+    spirit_engine = SpiritScoreEngine(db_conn, leaderboard=leaderboard)
+    if saved_at is not None:
+        spirit_engine.load_leaderboard(since=datetime.fromtimestamp(saved_at) - LEADERBOARD_CATCHUP_MARGIN)
+    if LEADERBOARD_SNAPSHOT_PATH:
+        leaderboard.start_snapshots(LEADERBOARD_SNAPSHOT_PATH, LEADERBOARD_SNAPSHOT_INTERVAL)
+    
     activity_tracker = ActivityTracker(spirit_engine)
     
     print("✅ Spirit Score API 시작됨")
@@ -72,6 +88,9 @@ async def shutdown_event():
     """앱 종료 시 정리"""
     global db_conn
     
+    if leaderboard is not None:
+        leaderboard.stop_snapshots(LEADERBOARD_SNAPSHOT_PATH or None)
+    
     if db_conn:
         db_conn.close()
     
@@ -137,6 +156,9 @@ class LeaderboardEntry(BaseModel):
     role: str
     spirit_score: float
 
+class UserRankResponse(LeaderboardEntry):
+    total_users: int
+
 # ============================================
 # API Endpoints
 # ============================================
@@ -176,6 +198,26 @@ async def get_leaderboard(limit: int = 10):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/users/{user_id}/rank", response_model=UserRankResponse)
+async def get_user_rank(user_id: str):
+    """
+    내 순위 조회
+    """
+    rank = spirit_engine.get_user_rank(user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    return rank
+
+@app.get("/api/leaderboard/around/{user_id}", response_model=List[LeaderboardEntry])
+async def get_leaderboard_around(user_id: str, radius: int = 5):
+    """
+    내 앞뒤 순위 조회
+    """
+    window = spirit_engine.get_leaderboard_around(user_id, min(max(radius, 0), 50))
+    if not window:
+        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    return window
+
 # ──────────────────────────────────────────
 # Activity Recording APIs
 # ──────────────────────────────────────────
@@ -312,10 +312,11 @@ class SpiritScoreEngineWithRealtime:
     실시간 업데이트가 통합된 Spirit Score Engine
     """
     
-    def __init__(self, db_connection, redis_host="localhost"):
+    def __init__(self, db_connection, redis_host="localhost", leaderboard=None):
         from spirit_score_engine import SpiritScoreEngine
         
-        self.engine = SpiritScoreEngine(db_connection)
+        # leaderboard 인덱스를 넘기면 활동마다 발행하는 리더보드가 DB 정렬 없이 만들어짐
+        self.engine = SpiritScoreEngine(db_connection, leaderboard=leaderboard)
         self.realtime = SpiritScoreRealtime(redis_host=redis_host)
     
     def record_activity(self, user_id: str, activity_type: str, **kwargs):
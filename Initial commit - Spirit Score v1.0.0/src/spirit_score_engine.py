@@ -48,12 +48,18 @@ class SpiritScoreEngine:
     # 상부상조 기여 점수 (₩1000당 +0.001)
     MUTUAL_AID_SCORE_PER_1K = Decimal('0.001')
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, leaderboard=None):
         """
         Args:
             db_connection: PostgreSQL 연결 객체
+            leaderboard: 메모리 리더보드 인덱스 (leaderboard_index.LeaderboardIndex, 선택)
+                         비어 있으면 users 테이블에서 적재
         """
         self.db = db_connection
+        self.leaderboard = leaderboard
+        self._profiles: Dict[str, Dict] = {}  # user_id → username, display_name, role
+        if leaderboard is not None and len(leaderboard) == 0:
+            self.load_leaderboard()
     
     def calculate_score_change(
         self, 
@@ -126,10 +132,13 @@ class SpiritScoreEngine:
         
         # 자동 승인이면 즉시 점수 업데이트
         if auto_approve:
-            self._update_user_score(user_id, score_change, activity_id)
+            new_score = self._update_user_score(user_id, score_change, activity_id)
         
         self.db.commit()
         
+        if auto_approve:
+            self._index_score(user_id, new_score)
+        
         return {
             'activity_id': result[0],
             'score_change': float(score_change),
@@ -142,7 +151,7 @@ class SpiritScoreEngine:
         user_id: str, 
         score_change: Decimal,
         activity_id: Optional[str] = None
-    ):
+    ) -> Decimal:
         """
         사용자 Spirit Score 업데이트 (내부 함수)
         
@@ -150,6 +159,9 @@ class SpiritScoreEngine:
             user_id: 사용자 ID
             score_change: 점수 변화량
             activity_id: 관련 활동 ID
+        
+        Returns:
+            새 점수 (커밋 후 리더보드에 반영)
         """
         cursor = self.db.cursor()
         
@@ -182,6 +194,8 @@ class SpiritScoreEngine:
                       WHERE user_id = %s
                   )
             """, (activity_id, user_id, user_id))
+        
+        return new_score
     
     def approve_manual_activity(
         self, 
@@ -224,9 +238,10 @@ class SpiritScoreEngine:
         """, (approved_by, activity_id))
         
         # 점수 업데이트
-        self._update_user_score(user_id, Decimal(str(score_change)), activity_id)
+        new_score = self._update_user_score(user_id, Decimal(str(score_change)), activity_id)
         
         self.db.commit()
+        self._index_score(user_id, new_score)
         
         return {
             'message': 'Approved',
@@ -280,6 +295,9 @@ class SpiritScoreEngine:
         Returns:
             리더보드 순위 리스트
         """
+        if self.leaderboard is not None:
+            return [self._leaderboard_row(entry) for entry in self.leaderboard.top(limit)]
+        
         cursor = self.db.cursor()
         cursor.execute("""
             SELECT 
@@ -304,6 +322,126 @@ class SpiritScoreEngine:
             for row in cursor.fetchall()
         ]
     
+    def get_user_rank(self, user_id: str) -> Optional[Dict]:
+        """
+        사용자 순위 조회 ("내 순위")
+        
+        Args:
+            user_id: 사용자 ID
+        
+        Returns:
+            순위 정보 (없는 사용자면 None)
+        """
+        if self.leaderboard is not None:
+            window = self.leaderboard.around(user_id, radius=0)
+            if not window:
+                return None
+            return {**self._leaderboard_row(window[0]), 'total_users': len(self.leaderboard)}
+        
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT 
+                u.username,
+                u.display_name,
+                u.role,
+                u.spirit_score,
+                (SELECT COUNT(*) FROM users o WHERE o.spirit_score > u.spirit_score) + 1 as rank,
+                (SELECT COUNT(*) FROM users) as total_users
+            FROM users u
+            WHERE u.user_id = %s
+        """, (user_id,))
+        
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        return {
+            'rank': row[4],
+            'username': row[0],
+            'display_name': row[1],
+            'role': row[2],
+            'spirit_score': float(row[3]),
+            'total_users': row[5]
+        }
+    
+    def get_leaderboard_around(self, user_id: str, radius: int = 5) -> List[Dict]:
+        """
+        내 앞뒤 radius명 리더보드 (리더보드 인덱스 필요)
+        
+        Args:
+            user_id: 사용자 ID
+            radius: 앞뒤 인원 수
+        
+        Returns:
+            리더보드 구간 (없는 사용자면 빈 리스트)
+        """
+        if self.leaderboard is None:
+            raise RuntimeError("leaderboard index is not enabled")
+        return [self._leaderboard_row(entry) for entry in self.leaderboard.around(user_id, radius)]
+    
+    def load_leaderboard(self, since: Optional[datetime] = None) -> int:
+        """
+        리더보드 인덱스 적재
+        
+        Args:
+            since: 스냅샷 저장 시각. 주면 그 이후 바뀐 사용자만 반영
+                   (users.updated_at 트리거 기준), 없으면 전체 교체
+        
+        Returns:
+            반영한 사용자 수
+        """
+        cursor = self.db.cursor()
+        if since is None:
+            cursor.execute("SELECT user_id, username, display_name, role, spirit_score FROM users")
+        else:
+            cursor.execute("""
+                SELECT user_id, username, display_name, role, spirit_score
+                FROM users
+                WHERE updated_at >= %s
+            """, (since,))
+        rows = cursor.fetchall()
+        
+        for row in rows:
+            self._profiles[str(row[0])] = {'username': row[1], 'display_name': row[2], 'role': row[3]}
+        
+        if since is None:
+            return self.leaderboard.load((str(row[0]), float(row[4])) for row in rows)
+        for row in rows:
+            self.leaderboard.update(str(row[0]), float(row[4]))
+        return len(rows)
+    
+    def _index_score(self, user_id: str, new_score: Decimal):
+        """커밋된 새 점수를 리더보드 인덱스에 반영"""
+        if self.leaderboard is not None:
+            self.leaderboard.update(str(user_id), float(new_score))
+    
+    def _leaderboard_row(self, entry) -> Dict:
+        """리더보드 인덱스 항목 → get_leaderboard 형식 (순위는 RANK()와 같이 동점 공동)"""
+        profile = self._profile(entry.member_id)
+        return {
+            'rank': entry.rank,
+            'username': profile['username'],
+            'display_name': profile['display_name'],
+            'role': profile['role'],
+            'spirit_score': entry.score
+        }
+    
+    def _profile(self, user_id: str) -> Dict:
+        """사용자 표시 정보 (처음 한 번만 조회 후 캐시)"""
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            cursor = self.db.cursor()
+            cursor.execute(
+                "SELECT username, display_name, role FROM users WHERE user_id = %s",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+            profile = {'username': row[0], 'display_name': row[1], 'role': row[2]} if row else {
+                'username': user_id, 'display_name': user_id, 'role': ''
+            }
+            self._profiles[user_id] = profile
+        return profile
+    
     def record_mutual_aid(
         self, 
         user_id: str, 
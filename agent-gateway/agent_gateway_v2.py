@@ -20,26 +20,40 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import bisect
+import functools
+import gzip
 import hashlib
+import heapq
 import hmac
+import io
 import json
 import logging
+import math
 import os
 import re
 import secrets
+import shutil
+import sqlite3
+import struct
 import time
+import unicodedata
 import uuid
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path, PurePosixPath
-from threading import Lock
-from typing import Any, Literal
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Literal, Protocol
 
 import requests
-from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, field_validator
 
 
 VERSION = "2.0.0"
@@ -62,6 +76,10 @@ PASSPORT_SIGNING_KEY: str = required_env("PASSPORT_SIGNING_KEY")
 MANDATE_SIGNING_KEY: str = required_env("MANDATE_SIGNING_KEY")
 APPROVAL_SIGNING_KEY: str = required_env("APPROVAL_SIGNING_KEY")
 
+# Optional: previous key kept valid for Kakao webhook signatures during rotation.
+PASSPORT_SIGNING_KEY_PREVIOUS: str = os.environ.get("PASSPORT_SIGNING_KEY_PREVIOUS", "")
+KAKAO_MAX_BODY_BYTES = int(os.environ.get("KAKAO_MAX_BODY_BYTES", str(64 * 1024)))
+
 AUDIT_FILE = Path(os.environ.get("AUDIT_FILE", "audit.jsonl"))
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 
@@ -102,6 +120,64 @@ def verify_token(token: str, key: str) -> dict:
     return payload
 
 
+# ---------------------------------------------------------------------------
+# Webhook signature verifier (pre-keyed HMAC, rotation-aware)
+# ---------------------------------------------------------------------------
+
+class HmacVerifier:
+    """Verifies hex HMAC-SHA256 body signatures against up to two secrets.
+
+    Keying HMAC hashes the ipad/opad blocks, so each secret is keyed once with
+    ``hmac.new`` and every request works on a ``copy()`` of it. Oversized
+    bodies and anything other than exactly 64 lowercase hex characters are
+    rejected before hashing. Same behaviour as ``src/signature_verifier.py``,
+    kept here so the gateway deploys on its own.
+    """
+
+    _WELL_FORMED = re.compile(r"[0-9a-f]{64}").fullmatch
+
+    def __init__(
+        self,
+        secret: str,
+        previous: str = "",
+        *,
+        max_body_bytes: int = 64 * 1024,
+        offload_threshold_bytes: int = 16 * 1024,
+    ) -> None:
+        self.max_body_bytes = max_body_bytes
+        self.offload_threshold_bytes = offload_threshold_bytes
+        self.rotate(secret, previous)
+
+    def rotate(self, secret: str, previous: str = "") -> None:
+        """Replace the accepted secrets with ``secret`` (and ``previous`` during a grace period)."""
+        self._keyed = [hmac.new(key.encode(), digestmod=hashlib.sha256) for key in (secret, previous) if key]
+
+    def verify(self, body: bytes, signature: str) -> bool:
+        if len(body) > self.max_body_bytes:
+            return False
+        if not isinstance(signature, str) or not self._WELL_FORMED(signature):
+            return False
+        expected = bytes.fromhex(signature)
+        for keyed in self._keyed:
+            mac = keyed.copy()
+            mac.update(body)
+            if hmac.compare_digest(mac.digest(), expected):
+                return True
+        return False
+
+    async def verify_async(self, body: bytes, signature: str) -> bool:
+        """Large bodies are hashed in a worker thread (hashlib releases the GIL)."""
+        if self.offload_threshold_bytes <= len(body) <= self.max_body_bytes:
+            return await asyncio.to_thread(self.verify, body, signature)
+        return self.verify(body, signature)
+
+
+kakao_verifier = HmacVerifier(
+    PASSPORT_SIGNING_KEY,
+    PASSPORT_SIGNING_KEY_PREVIOUS,
+    max_body_bytes=KAKAO_MAX_BODY_BYTES,
+)
+
 # ---------------------------------------------------------------------------
 # Domain models
 # ---------------------------------------------------------------------------
@@ -111,6 +187,7 @@ class Actor:
     agent_id: str
     passport_id: str
     roles: tuple[str, ...]
+    permissions: frozenset[str] = frozenset()
 
 
 @dataclass(frozen=True)
@@ -122,35 +199,768 @@ class Mandate:
     max_calls: int
     max_amount_krw: int
     human_approval_over_krw: int
+    expires_at: float = 0.0
 
 
 # ---------------------------------------------------------------------------
-# Expiring in-memory store (single-process; swap for Redis in multi-replica)
+# Expiring in-memory store (single-process; see StateBackend for multi-replica)
 # ---------------------------------------------------------------------------
 
+NONCE_STORE_CAPACITY = int(os.environ.get("NONCE_STORE_CAPACITY", "1000000"))
+APPROVAL_STORE_CAPACITY = int(os.environ.get("APPROVAL_STORE_CAPACITY", "100000"))
+
+
+class StoreFull(Exception):
+    """A bounded store has no room for another live key; routes answer 503."""
+
+
 class ExpiringStore:
-    def __init__(self) -> None:
+    """Set of keys with per-key expiry: O(1) ``contains``, O(log n) ``add``.
+
+    A dict maps key -> expiry and a min-heap orders ``(expiry, key)``. Each call
+    pops at most ``evict_batch`` expired heap entries, so expiry work is spread
+    across requests instead of rebuilding the dict. Heap entries left behind by
+    a re-added key are skipped when popped and compacted away if they pile up.
+
+    ``capacity`` is a hard cap. Dropping a live nonce or approval early would
+    let it be replayed or forged, so when the store is still full after every
+    expired entry is purged, a new key raises ``StoreFull`` and is counted in
+    ``stats["rejected_capacity"]``.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        *,
+        evict_batch: int = 64,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.evict_batch = evict_batch
+        self._clock = clock
         self._store: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
         self._lock = Lock()
+        self.stats = {"added": 0, "expired": 0, "rejected_capacity": 0}
 
     def add(self, key: str, ttl: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            self._insert(key, now, ttl)
+
+    def add_if_absent(self, key: str, ttl: float) -> bool:
+        """Atomic ``contains`` + ``add``; False if ``key`` is already live.
+
+        Raises ``StoreFull`` rather than make room by dropping a live key.
+        """
+        now = self._clock()
         with self._lock:
-            self._store[key] = time.time() + ttl
-            self._evict()
+            self._evict(now)
+            expires_at = self._store.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._insert(key, now, ttl)
+            return True
 
     def contains(self, key: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            expires_at = self._store.get(key)
+            return expires_at is not None and expires_at > now
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def metrics(self) -> dict:
         with self._lock:
-            self._evict()
-            return key in self._store
+            return {**self.stats, "size": len(self._store), "capacity": self.capacity}
+
+    def _insert(self, key: str, now: float, ttl: float) -> None:
+        if key not in self._store and len(self._store) >= self.capacity:
+            self._evict(now, drain=True)
+            if len(self._store) >= self.capacity:
+                self.stats["rejected_capacity"] += 1
+                raise StoreFull(f"store full ({self.capacity} live keys)")
+        expires_at = now + ttl
+        self._store[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+        self.stats["added"] += 1
+        if len(self._heap) > 2 * len(self._store) + self.evict_batch:
+            self._compact()
+
+    def _evict(self, now: float, *, drain: bool = False) -> None:
+        """Drop up to ``evict_batch`` expired entries (all of them with ``drain``) from the heap head."""
+        heap, store = self._heap, self._store
+        budget = len(heap) if drain else self.evict_batch
+        for _ in range(budget):
+            if not heap or heap[0][0] > now:
+                return
+            expires_at, key = heapq.heappop(heap)
+            if store.get(key) == expires_at:
+                del store[key]
+                self.stats["expired"] += 1
+
+    def _compact(self) -> None:
+        self._heap = [(expires_at, key) for key, expires_at in self._store.items()]
+        heapq.heapify(self._heap)
+
+
+# ---------------------------------------------------------------------------
+# Bounded state store (idempotency results; call counters of the memory backend)
+# ---------------------------------------------------------------------------
+
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "")
+STATE_STRIPES = int(os.environ.get("STATE_STRIPES", "16"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "100000"))
+IDEMPOTENCY_MAX_BYTES = int(os.environ.get("IDEMPOTENCY_MAX_BYTES", str(64 * 1024 * 1024)))
+CALL_COUNTER_MAX_ENTRIES = int(os.environ.get("CALL_COUNTER_MAX_ENTRIES", "200000"))
+
+
+class _Stripe:
+    __slots__ = ("lock", "entries", "bytes")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.entries: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self.bytes = 0
+
+
+class StateStore:
+    """Bounded LRU cache whose entries expire at an absolute time.
+
+    Keys are spread over ``stripes`` independently locked LRU segments so the
+    sync-route threadpool does not serialize on one lock. Each stripe holds at
+    most ``max_entries / stripes`` entries and ``max_bytes / stripes`` of
+    JSON-encoded values; the least recently used entries go first.
+
+    With ``db_path`` every write also goes to a SQLite (WAL) table and memory
+    misses fall back to it, so evicted or pre-restart entries are not lost.
+    Without it an entry evicted while still live is gone and is counted in
+    ``stats["evicted_live"]`` -- fine for cached results, not for call
+    counters, where a forgotten count lets ``max_calls`` be exceeded. With
+    ``evict_live=False`` a full stripe first drops its expired entries and then
+    refuses new keys with ``StoreFull`` (``stats["rejected_full"]``) rather
+    than evict a live one.
+
+    SQLite calls block (commits, busy waits), so async callers use the
+    ``*_async`` methods, which run on one dedicated thread when the store is
+    persistent and inline otherwise.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int,
+        max_bytes: int | None = None,
+        stripes: int = 16,
+        db_path: str | Path | None = None,
+        evict_live: bool = True,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < stripes or stripes < 1:
+            raise ValueError("need 1 <= stripes <= max_entries")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._stripe_entries = max_entries // stripes
+        self._stripe_bytes = max_bytes // stripes if max_bytes else None
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._clock = clock
+        self.stats = {
+            "hits": 0, "misses": 0, "expired": 0, "evicted_live": 0, "rejected_full": 0, "too_large": 0, "db_reads": 0,
+        }
+
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = Lock()
+        self._db_writes = 0
+        self._evict_live = evict_live or bool(db_path)
+        self._executor: ThreadPoolExecutor | None = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS gateway_state "
+                "(store TEXT, key TEXT, value TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (store, key))"
+            )
+            self._db.commit()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"state-{name}")
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    # -- public API ---------------------------------------------------------
+
+    def get(self, key: str) -> Any | None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            value, _ = self._lookup(stripe, key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            self._put(stripe, key, value, expires_at, len(encoded))
+            self._persist(key, encoded, expires_at)
+
+    def incr(self, key: str, expires_at: float) -> int:
+        """Atomically add one to a counter that lives until ``expires_at``."""
+        stripe = self._stripe(key)
+        with stripe.lock:
+            count, _ = self._lookup(stripe, key)
+            count = (count or 0) + 1
+            self._put(stripe, key, count, expires_at, 8)
+            self._persist(key, str(count), expires_at)
+        return count
+
+    async def get_async(self, key: str) -> Any | None:
+        return await self._offload(self.get, key)
+
+    async def set_async(self, key: str, value: Any, expires_at: float) -> None:
+        await self._offload(self.set, key, value, expires_at)
+
+    async def incr_async(self, key: str, expires_at: float) -> int:
+        return await self._offload(self.incr, key, expires_at)
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "size": len(self),
+            "bytes": sum(stripe.bytes for stripe in self._stripes),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "persistent": self._db is not None,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # -- internals (caller holds the stripe lock) ---------------------------
+
+    def _lookup(self, stripe: _Stripe, key: str) -> tuple[Any | None, float]:
+        now = self._clock()
+        entry = stripe.entries.get(key)
+        if entry is not None:
+            value, expires_at, size = entry
+            if expires_at > now:
+                stripe.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value, expires_at
+            del stripe.entries[key]
+            stripe.bytes -= size
+            self.stats["expired"] += 1
+
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM gateway_state WHERE store = ? AND key = ? AND expires_at > ?",
+                    (self.name, key, now),
+                ).fetchone()
+            if row is not None:
+                self.stats["db_reads"] += 1
+                value = json.loads(row[0])
+                self._put(stripe, key, value, row[1], len(row[0]))
+                return value, row[1]
+
+        self.stats["misses"] += 1
+        return None, 0.0
+
+    def _put(self, stripe: _Stripe, key: str, value: Any, expires_at: float, size: int) -> None:
+        if not self._evict_live and key not in stripe.entries and len(stripe.entries) >= self._stripe_entries:
+            self._drop_expired(stripe)
+            if len(stripe.entries) >= self._stripe_entries:
+                self.stats["rejected_full"] += 1
+                raise StoreFull(f"{self.name} store full ({self.max_entries} live keys)")
+        old = stripe.entries.pop(key, None)
+        if old is not None:
+            stripe.bytes -= old[2]
+        if self._stripe_bytes is not None and size > self._stripe_bytes:
+            self.stats["too_large"] += 1
+            return
+        stripe.entries[key] = (value, expires_at, size)
+        stripe.bytes += size
+
+        now = self._clock()
+        while len(stripe.entries) > self._stripe_entries or (
+            self._stripe_bytes is not None and stripe.bytes > self._stripe_bytes
+        ):
+            _, (_, lru_expires_at, lru_size) = stripe.entries.popitem(last=False)
+            stripe.bytes -= lru_size
+            if lru_expires_at > now and self._db is None:
+                self.stats["evicted_live"] += 1
+
+    def _drop_expired(self, stripe: _Stripe) -> None:
+        now = self._clock()
+        for key in [key for key, (_, expires_at, _) in stripe.entries.items() if expires_at <= now]:
+            stripe.bytes -= stripe.entries.pop(key)[2]
+            self.stats["expired"] += 1
+
+    def _persist(self, key: str, encoded: str, expires_at: float) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO gateway_state (store, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, encoded, expires_at),
+            )
+            self._db_writes += 1
+            if self._db_writes % 1000 == 0:
+                self._db.execute(
+                    "DELETE FROM gateway_state WHERE store = ? AND expires_at <= ?", (self.name, self._clock())
+                )
+            self._db.commit()
+
+
+idempotency_store = StateStore(
+    "idempotency",
+    max_entries=IDEMPOTENCY_MAX_ENTRIES,
+    max_bytes=IDEMPOTENCY_MAX_BYTES,
+    stripes=STATE_STRIPES,
+    db_path=STATE_DB_PATH or None,
+)
+
+# ---------------------------------------------------------------------------
+# Shared state backend (nonces, approvals, mandate quotas, agent rate limits)
+# ---------------------------------------------------------------------------
+
+STATE_BACKEND_URL = os.environ.get("STATE_BACKEND_URL", "memory://")
+NONCE_TTL_SECONDS = 300
+APPROVAL_TTL_SECONDS = 600
+AGENT_RATE_PER_SECOND = float(os.environ.get("AGENT_RATE_PER_SECOND", "20"))
+AGENT_RATE_BURST = int(os.environ.get("AGENT_RATE_BURST", "40"))
+
+
+def gcra(tat: float | None, now: float, rate: float, burst: int) -> tuple[bool, float, float]:
+    """Token bucket as GCRA: one stored timestamp per bucket.
+
+    Returns ``(allowed, new_tat, retry_after)``; ``tat`` is the bucket's
+    theoretical arrival time (``None`` for a full bucket).
+    """
+    interval = 1.0 / rate
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - burst * interval
+    if allow_at > now:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+class StateBackend:
+    """Guard state shared by every replica/worker pointed at the same backend.
+
+    Each method is one atomic step, so two replicas can never both accept the
+    same nonce or both take the last call of a mandate.
+    """
+
+    name = "abstract"
+
+    async def add_nonce(self, nonce: str, ttl: float) -> bool:
+        """Record ``nonce``; False if it is already live (replay)."""
+        raise NotImplementedError
+
+    async def add_approval(self, token: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def approval_valid(self, token: str) -> bool:
+        raise NotImplementedError
+
+    async def incr_quota(self, key: str, expires_at: float) -> int:
+        """Add one call to ``key`` (reset once ``expires_at`` passes); returns the new count."""
+        raise NotImplementedError
+
+    async def take_token(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        """Take one token from ``key``'s bucket; returns ``(allowed, retry_after_seconds)``."""
+        raise NotImplementedError
+
+    def metrics(self) -> dict:
+        return {"backend": self.name}
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessStateBackend(StateBackend):
+    """Single-process backend on the in-memory stores (the default)."""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        *,
+        nonce_capacity: int = 1_000_000,
+        approval_capacity: int = 100_000,
+        quota_entries: int = 200_000,
+        stripes: int = 16,
+        db_path: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._clock = clock
+        self.nonces = ExpiringStore(nonce_capacity, clock=clock)
+        self.approvals = ExpiringStore(approval_capacity, clock=clock)
+        self.quotas = StateStore("call_counters", max_entries=quota_entries, stripes=stripes, db_path=db_path,
+                                 evict_live=False, clock=clock)
+        self.buckets = StateStore("rate_buckets", max_entries=quota_entries, stripes=stripes, clock=clock)
+        self._bucket_lock = Lock()
 
-    def _evict(self) -> None:
-        now = time.time()
-        self._store = {k: v for k, v in self._store.items() if v > now}
+    async def add_nonce(self, nonce: str, ttl: float) -> bool:
+        return self.nonces.add_if_absent(nonce, ttl)
 
+    async def add_approval(self, token: str, ttl: float) -> None:
+        self.approvals.add(token, ttl)
 
-nonce_store = ExpiringStore()
-idempotency_store: dict[str, dict] = {}
-approval_store = ExpiringStore()
+    async def approval_valid(self, token: str) -> bool:
+        return self.approvals.contains(token)
+
+    async def incr_quota(self, key: str, expires_at: float) -> int:
+        return await self.quotas.incr_async(key, expires_at)
+
+    async def take_token(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        with self._bucket_lock:
+            allowed, tat, retry_after = gcra(self.buckets.get(key), self._clock(), rate, burst)
+            if allowed:
+                self.buckets.set(key, tat, expires_at=tat)
+        return allowed, retry_after
+
+    def metrics(self) -> dict:
+        return {
+            "backend": self.name,
+            "nonce": self.nonces.metrics(),
+            "approval": self.approvals.metrics(),
+            "call_counters": self.quotas.metrics(),
+            "rate_buckets": self.buckets.metrics(),
+        }
+
+    async def close(self) -> None:
+        self.quotas.close()
+
+
+class SqliteStateBackend(StateBackend):
+    """One SQLite file in WAL mode shared by the workers of a single host.
+
+    Nonce and quota updates are single upsert statements; the token bucket
+    read-modify-write runs inside ``BEGIN IMMEDIATE``. Expired rows are purged
+    every ``purge_every`` writes.
+
+    sqlite3 blocks (up to the 5 s busy timeout when another process holds the
+    write lock), so every statement runs on one dedicated worker thread. That
+    thread owns the connection and serializes access; the event loop only
+    awaits the result.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str | Path, *, purge_every: int = 1000, clock: Callable[[], float] = time.time) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.purge_every = purge_every
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-state")
+        self._writes = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS guard_keys "
+            "(kind TEXT, key TEXT, expires_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS guard_counters "
+            "(key TEXT PRIMARY KEY, value REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.stats = {"ops": 0, "purged": 0}
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # -- worker thread ------------------------------------------------------
+
+    def _write(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        cursor = self._db.execute(sql, params)
+        self._writes += 1
+        self.stats["ops"] += 1
+        if self._writes % self.purge_every == 0:
+            self._purge()
+        return cursor
+
+    def _purge(self) -> None:
+        now = self._clock()
+        purged = self._db.execute("DELETE FROM guard_keys WHERE expires_at <= ?", (now,)).rowcount
+        purged += self._db.execute("DELETE FROM guard_counters WHERE expires_at <= ?", (now,)).rowcount
+        self.stats["purged"] += purged
+
+    def _add_nonce(self, nonce: str, ttl: float) -> bool:
+        now = self._clock()
+        cursor = self._write(
+            "INSERT INTO guard_keys (kind, key, expires_at) VALUES ('nonce', ?, ?) "
+            "ON CONFLICT (kind, key) DO UPDATE SET expires_at = excluded.expires_at "
+            "WHERE guard_keys.expires_at <= ?",
+            (nonce, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    def _add_approval(self, token: str, ttl: float) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO guard_keys (kind, key, expires_at) VALUES ('approval', ?, ?)",
+            (token, self._clock() + ttl),
+        )
+
+    def _approval_valid(self, token: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM guard_keys WHERE kind = 'approval' AND key = ? AND expires_at > ?",
+            (token, self._clock()),
+        ).fetchone()
+        return row is not None
+
+    def _incr_quota(self, key: str, expires_at: float) -> int:
+        cursor = self._write(
+            "INSERT INTO guard_counters (key, value, expires_at) VALUES (?, 1, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "value = CASE WHEN guard_counters.expires_at <= ? THEN 1 ELSE guard_counters.value + 1 END, "
+            "expires_at = excluded.expires_at RETURNING value",
+            ("quota:" + key, expires_at, self._clock()),
+        )
+        return int(cursor.fetchone()[0])
+
+    def _take_token(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        key = "rate:" + key
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT value FROM guard_counters WHERE key = ?", (key,)).fetchone()
+            allowed, tat, retry_after = gcra(row[0] if row else None, self._clock(), rate, burst)
+            if allowed:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO guard_counters (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, tat, tat),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self.stats["ops"] += 1
+        return allowed, retry_after
+
+    # -- StateBackend -------------------------------------------------------
+
+    async def add_nonce(self, nonce: str, ttl: float) -> bool:
+        return await self._run(self._add_nonce, nonce, ttl)
+
+    async def add_approval(self, token: str, ttl: float) -> None:
+        await self._run(self._add_approval, token, ttl)
+
+    async def approval_valid(self, token: str) -> bool:
+        return await self._run(self._approval_valid, token)
+
+    async def incr_quota(self, key: str, expires_at: float) -> int:
+        return await self._run(self._incr_quota, key, expires_at)
+
+    async def take_token(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        return await self._run(self._take_token, key, rate, burst)
+
+    def metrics(self) -> dict:
+        return {"backend": self.name, "path": self.path, **self.stats}
+
+    async def close(self) -> None:
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=False)
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RespClient:
+    """Minimal asyncio RESP2 client with pipelining.
+
+    Connections belong to the event loop that opened them, so each loop gets
+    its own idle pool. A connection is checked out for one whole exchange,
+    which keeps WATCH/MULTI state private to the caller.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, *, max_idle: int = 16) -> None:
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self._idle: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @asynccontextmanager
+    async def connection(self):
+        pool = self._idle.setdefault(asyncio.get_running_loop(), [])
+        conn = pool.pop() if pool else await asyncio.open_connection(self.host, self.port)
+        try:
+            yield conn
+        except BaseException:
+            conn[1].close()
+            raise
+        if len(pool) < self.max_idle:
+            pool.append(conn)
+        else:
+            conn[1].close()
+
+    @staticmethod
+    def pack(*args: Any) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    async def send(self, conn: tuple, *commands: tuple) -> list[Any]:
+        reader, writer = conn
+        writer.write(b"".join(self.pack(*command) for command in commands))
+        await writer.drain()
+        replies = [await self._read(reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def execute(self, *commands: tuple) -> list[Any]:
+        async with self.connection() as conn:
+            return await self.send(conn, *commands)
+
+    async def _read(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("RESP connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [await self._read(reader) for _ in range(length)]
+        raise RespError(f"Unknown RESP type: {line!r}")
+
+    async def close(self) -> None:
+        for pool in list(self._idle.values()):
+            while pool:
+                pool.pop()[1].close()
+
+
+class RedisStateBackend(StateBackend):
+    """Redis-protocol backend for multi-replica deployments.
+
+    Uses only plain atomic commands (no Lua): ``SET NX PX`` for nonces,
+    pipelined ``INCR`` + ``PEXPIREAT`` for quotas, and an optimistic
+    ``WATCH``/``MULTI``/``EXEC`` loop for the GCRA bucket. Bucket times come
+    from the replica clocks, so keep replicas NTP-synced.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        *,
+        prefix: str = "mulberry:gw:",
+        max_bucket_retries: int = 8,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.client = RespClient(host, port)
+        self.prefix = prefix
+        self.max_bucket_retries = max_bucket_retries
+        self._clock = clock
+        self.stats = {"ops": 0, "bucket_conflicts": 0}
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.prefix}{kind}:{key}"
+
+    async def add_nonce(self, nonce: str, ttl: float) -> bool:
+        self.stats["ops"] += 1
+        reply, = await self.client.execute(("SET", self._key("nonce", nonce), 1, "NX", "PX", int(ttl * 1000)))
+        return reply == "OK"
+
+    async def add_approval(self, token: str, ttl: float) -> None:
+        self.stats["ops"] += 1
+        await self.client.execute(("SET", self._key("approval", token), 1, "PX", int(ttl * 1000)))
+
+    async def approval_valid(self, token: str) -> bool:
+        self.stats["ops"] += 1
+        reply, = await self.client.execute(("EXISTS", self._key("approval", token)))
+        return reply == 1
+
+    async def incr_quota(self, key: str, expires_at: float) -> int:
+        self.stats["ops"] += 1
+        redis_key = self._key("quota", key)
+        count, _ = await self.client.execute(("INCR", redis_key), ("PEXPIREAT", redis_key, int(expires_at * 1000)))
+        return count
+
+    async def take_token(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        self.stats["ops"] += 1
+        redis_key = self._key("rate", key)
+        async with self.client.connection() as conn:
+            for _ in range(self.max_bucket_retries):
+                _, raw = await self.client.send(conn, ("WATCH", redis_key), ("GET", redis_key))
+                now = self._clock()
+                allowed, tat, retry_after = gcra(float(raw) if raw else None, now, rate, burst)
+                if not allowed:
+                    await self.client.send(conn, ("UNWATCH",))
+                    return False, retry_after
+                ttl_ms = max(1, int((tat - now) * 1000) + 1)
+                *_, committed = await self.client.send(
+                    conn, ("MULTI",), ("SET", redis_key, repr(tat), "PX", ttl_ms), ("EXEC",)
+                )
+                if committed is not None:
+                    return True, 0.0
+                self.stats["bucket_conflicts"] += 1
+        raise HTTPException(status_code=503, detail="Rate limiter contention")
+
+    def metrics(self) -> dict:
+        return {"backend": self.name, "server": f"{self.client.host}:{self.client.port}", **self.stats}
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def make_state_backend(url: str) -> StateBackend:
+    """``memory://``, ``sqlite:///path/to/state.db`` or ``redis://host:port[/prefix]``."""
+    if url.startswith("memory://"):
+        return InProcessStateBackend(
+            nonce_capacity=NONCE_STORE_CAPACITY,
+            approval_capacity=APPROVAL_STORE_CAPACITY,
+            quota_entries=CALL_COUNTER_MAX_ENTRIES,
+            stripes=STATE_STRIPES,
+            db_path=STATE_DB_PATH or None,
+        )
+    if url.startswith("sqlite://"):
+        return SqliteStateBackend(url[len("sqlite://"):])
+    if url.startswith("redis://"):
+        address, _, prefix = url[len("redis://"):].partition("/")
+        host, _, port = address.partition(":")
+        return RedisStateBackend(host or "127.0.0.1", int(port or 6379), prefix=prefix or "mulberry:gw:")
+    raise RuntimeError(f"[STARTUP BLOCKED] Unsupported STATE_BACKEND_URL: {url}")
+
+
+state_backend = make_state_backend(STATE_BACKEND_URL)
 
 # ---------------------------------------------------------------------------
 # Risk classification
@@ -171,25 +981,456 @@ def risk_for(action: str, amount_krw: int = 0) -> Literal["low", "medium", "high
 # Audit writer
 # ---------------------------------------------------------------------------
 
+AUDIT_BUFFER_SIZE = int(os.environ.get("AUDIT_BUFFER_SIZE", "65536"))
+AUDIT_FLUSH_EVERY = int(os.environ.get("AUDIT_FLUSH_EVERY", "256"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.environ.get("AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_ROTATE_BYTES = int(os.environ.get("AUDIT_ROTATE_BYTES", str(128 * 1024 * 1024)))
+AUDIT_ROTATE_SECONDS = int(os.environ.get("AUDIT_ROTATE_SECONDS", str(24 * 3600)))
+AUDIT_INDEX_EVERY = int(os.environ.get("AUDIT_INDEX_EVERY", "256"))
+AUDIT_FSYNC_EVENTS = frozenset(
+    e for e in os.environ.get("AUDIT_FSYNC_EVENTS", "APPROVED,REJECTED").split(",") if e
+)
+
+
 class AuditWriter:
-    def __init__(self, path: Path) -> None:
+    """Buffered JSONL audit trail written by one background thread.
+
+    ``write()`` only timestamps the record and appends it to a bounded ring
+    buffer; it never touches the file. The writer thread keeps one handle open
+    and drains the buffer every ``flush_every`` records or ``flush_interval_ms``,
+    whichever comes first. Records whose event is in ``fsync_events`` or whose
+    risk is ``high`` wake the writer immediately and the batch is fsynced.
+
+    When the buffer is full new records are dropped and counted in
+    ``stats["dropped"]``. The active file rotates by size or age; closed
+    segments are renamed ``<stem>.<UTC stamp><suffix>`` and gzipped in the
+    background. ``close()`` drains everything and fsyncs before returning.
+
+    Every ``index_every`` records the writer appends ``(byte offset, epoch)``
+    of the next line to a ``.idx`` sidecar (offsets are into the uncompressed
+    segment); ``AuditQuery`` uses it to seek by time. On rotation a closing
+    entry ``(_AUDIT_INDEX_END, epoch of the last record)`` is appended, so a
+    query can tell when a rotated segment ends without opening it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        buffer_size: int = 65536,
+        flush_every: int = 256,
+        flush_interval_ms: int = 200,
+        rotate_bytes: int = 128 * 1024 * 1024,
+        rotate_seconds: float = 24 * 3600,
+        fsync_events: frozenset[str] = frozenset({"APPROVED", "REJECTED"}),
+        compress: bool = True,
+        index_every: int = 256,
+    ) -> None:
         self._path = path
-        self._lock = Lock()
+        self.buffer_size = buffer_size
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval_ms / 1000
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.fsync_events = fsync_events
+        self.compress = compress
+        self.index_every = index_every
+
+        self._buffer: deque[tuple[dict, float, bool]] = deque()
+        self._cond = Condition()
+        self._urgent = False
+        self._closing = False
+        self._written_seq = 0
+        self._queued_seq = 0
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "fsyncs": 0, "rotations": 0, "errors": 0}
+
+        self._fh: Any = None
+        self._idx_fh: Any = None
+        self._since_index = 0
+        self._last_epoch: float | None = None
+        self._opened_at = 0.0
+        self._thread = Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> Path:
+        return self._path
 
     def write(self, event: dict) -> None:
-        record = {"ts": datetime.now(timezone.utc).isoformat(), **event}
-        with self._lock:
-            with self._path.open("a") as fh:
-                fh.write(json.dumps(record, ensure_ascii=False) + "\n")
-
+        now = datetime.now(timezone.utc)
+        record = {"ts": now.isoformat(), **event}
+        durable = event.get("event") in self.fsync_events or event.get("risk") == "high"
+        with self._cond:
+            if self._closing or len(self._buffer) >= self.buffer_size:
+                self.stats["dropped"] += 1
+                return
+            self._buffer.append((record, now.timestamp(), durable))
+            self._queued_seq += 1
+            if durable:
+                self._urgent = True
+            if durable or len(self._buffer) >= self.flush_every:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every record queued so far is on disk."""
+        with self._cond:
+            target = self._queued_seq
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written_seq >= target, timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {**self.stats, "buffered": len(self._buffer), "buffer_size": self.buffer_size}
+
+    # -- writer thread ------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closing or self._urgent or len(self._buffer) >= self.flush_every,
+                    self.flush_interval,
+                )
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._urgent = False
+                closing = self._closing
+            if batch:
+                self._write_batch(batch)
+            with self._cond:
+                self._written_seq += len(batch)
+                self._cond.notify_all()
+            if closing:
+                # write() refuses new records once closing, so the buffer is empty here.
+                if self._fh is not None:
+                    self._close_segment()
+                return
+
+    def _write_batch(self, batch: list[tuple[dict, float, bool]]) -> None:
+        try:
+            fh = self._handle()
+            offset = fh.tell()
+            lines, index = [], bytearray()
+            for record, epoch, _ in batch:
+                try:
+                    line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode()
+                except (TypeError, ValueError):
+                    # e.g. circular references; one bad record must not cost the batch.
+                    self.stats["errors"] += 1
+                    log.exception("audit record not serializable; dropped")
+                    continue
+                if self._since_index >= self.index_every:
+                    index += _AUDIT_INDEX_ENTRY.pack(offset, epoch)
+                    self._since_index = 0
+                self._since_index += 1
+                self._last_epoch = epoch
+                offset += len(line)
+                lines.append(line)
+            fh.write(b"".join(lines))
+            fh.flush()
+            if index:
+                self._idx_fh.write(index)
+                self._idx_fh.flush()
+            if any(durable for _, _, durable in batch):
+                os.fsync(fh.fileno())
+                self.stats["fsyncs"] += 1
+            self.stats["written"] += len(lines)
+            self.stats["batches"] += 1
+        except Exception:
+            # The writer thread must survive anything, or flush() waiters hang.
+            self.stats["errors"] += 1
+            log.exception("audit write failed; %d records lost", len(batch))
+
+    def _handle(self) -> Any:
+        if self._fh is not None and (
+            self._fh.tell() >= self.rotate_bytes or time.time() - self._opened_at >= self.rotate_seconds
+        ):
+            self._rotate()
+        if self._fh is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self._path.open("ab")
+            self._idx_fh = audit_index_path(self._path).open("ab")
+            # Always index the first record written by this handle.
+            self._since_index = self.index_every
+            self._last_epoch = None
+            self._opened_at = time.time()
+        return self._fh
+
+    def _close_segment(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        self._idx_fh.close()
+        self._fh = self._idx_fh = None
+
+    def _rotate(self) -> None:
+        if self._last_epoch is not None:
+            self._idx_fh.write(_AUDIT_INDEX_ENTRY.pack(_AUDIT_INDEX_END, self._last_epoch))
+        self._close_segment()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        closed = self._path.with_name(f"{self._path.stem}.{stamp}{self._path.suffix}")
+        audit_index_path(self._path).rename(audit_index_path(closed))
+        self._path.rename(closed)
+        self.stats["rotations"] += 1
+        if self.compress:
+            Thread(target=self._gzip, args=(closed,), name="audit-gzip", daemon=True).start()
+
+    @staticmethod
+    def _gzip(path: Path) -> None:
+        tmp = path.with_name(path.name + ".gz.tmp")
+        with path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        tmp.rename(path.with_name(path.name + ".gz"))
+        path.unlink()
+
+
+_AUDIT_INDEX_ENTRY = struct.Struct("<Qd")  # (byte offset, epoch seconds)
+_AUDIT_INDEX_END = 2**64 - 1  # offset of the closing entry: epoch of the segment's last record
+
+
+def audit_index_path(segment: Path) -> Path:
+    """Sidecar index of a segment (``audit.jsonl`` and ``audit.jsonl.gz`` share one)."""
+    name = segment.name[:-3] if segment.name.endswith(".gz") else segment.name
+    return segment.with_name(name + ".idx")
+
+
+def _parse_time(value: str | float | None) -> float | None:
+    """ISO-8601 (naive = UTC) or epoch seconds -> epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class AuditQuery:
+    """Newest-first audit search over the active segment and rotated ones.
+
+    Segments are read backwards in ``block_size`` chunks, so a tail or a page
+    costs what it returns, not the size of the log. Both time bounds go
+    through the sidecar index before any record is read: segments that start
+    after ``until`` or (by their closing entry) end before ``since`` are never
+    opened, ``until`` bounds the scan from above and ``since`` from below, and
+    the ``since`` cutoff is checked on the record's leading ``ts`` before any
+    filter (segments are chronological). Gzipped segments are decompressed in
+    memory only when a query reaches them.
+
+    Pages continue from an opaque cursor naming the segment, byte offset and
+    time of the last record returned. If that segment was rotated away in the
+    meantime the cursor degrades to "strictly older than that time".
+    """
 
-audit = AuditWriter(AUDIT_FILE)
+    def __init__(self, path: Path, *, block_size: int = 64 * 1024) -> None:
+        self._path = path
+        self.block_size = block_size
+        self._index_cache: dict[str, tuple[list[int], list[float], float | None]] = {}
+
+    def segments(self) -> list[Path]:
+        """Active segment first, then rotated segments newest first."""
+        rotated: dict[str, Path] = {}
+        pattern = f"{self._path.stem}.*{self._path.suffix}"
+        for segment in list(self._path.parent.glob(pattern)) + list(self._path.parent.glob(pattern + ".gz")):
+            key = segment.name[:-3] if segment.name.endswith(".gz") else segment.name
+            # While gzip runs both copies exist; the plain one is complete.
+            if key not in rotated or not segment.name.endswith(".gz"):
+                rotated[key] = segment
+        ordered = [rotated[key] for key in sorted(rotated, reverse=True)]
+        return ([self._path] if self._path.exists() else []) + ordered
+
+    def query(
+        self,
+        *,
+        event: str | None = None,
+        actor: str | None = None,
+        intent: str | None = None,
+        since: str | float | None = None,
+        until: str | float | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Return up to ``limit`` matching records (newest first) and the next cursor."""
+        if limit <= 0:
+            return [], None
+        since_ts, until_ts = _parse_time(since), _parse_time(until)
+        filters = {k: v for k, v in (("event", event), ("actor", actor), ("intent", intent)) if v is not None}
+        # Cheap byte-level rejection before json.loads (records use default separators).
+        needles = [f'"{k}": {json.dumps(v, ensure_ascii=False)}'.encode() for k, v in filters.items()]
+
+        segments = self.segments()
+        start_offset, before_ts = None, None
+        if cursor:
+            name, offset, cursor_ts = self._decode_cursor(cursor)
+            names = [segment.name for segment in segments]
+            if name in names and self._ts_at(segments[names.index(name)], offset) == cursor_ts:
+                segments, start_offset = segments[names.index(name):], offset
+            else:
+                before_ts = cursor_ts
+                until_ts = cursor_ts if until_ts is None else min(until_ts, cursor_ts)
+
+        records: list[dict] = []
+        for segment in segments:
+            offsets, times, last_ts = self._index(segment)
+            if since_ts is not None and last_ts is not None and last_ts < since_ts:
+                break  # this segment and every older one end before ``since``
+            if until_ts is not None and times and times[0] > until_ts:
+                start_offset = None
+                continue
+            # Index entries before the first one at/after ``since`` only cover older records.
+            entry = bisect.bisect_left(times, since_ts) if since_ts is not None else 0
+            floor = offsets[entry - 1] if entry else 0
+
+            with self._open(segment) as fh:
+                end = fh.seek(0, os.SEEK_END)
+                if start_offset is not None:
+                    end, start_offset = min(end, start_offset), None
+                if until_ts is not None and times:
+                    position = bisect.bisect_right(times, until_ts)
+                    if position < len(offsets):
+                        end = min(end, offsets[position])
+
+                for offset, line in self._reverse_lines(fh, end, floor):
+                    if since_ts is not None:
+                        line_ts = self._line_ts(line)
+                        if line_ts is not None and line_ts < since_ts:
+                            return records, None
+                    if any(needle not in line for needle in needles):
+                        continue
+                    try:
+                        record = json.loads(line)
+                        ts = datetime.fromisoformat(record["ts"]).timestamp()
+                    except (ValueError, KeyError, TypeError):
+                        continue  # partial trailing line or foreign content
+                    if since_ts is not None and ts < since_ts:
+                        return records, None
+                    if until_ts is not None and ts > until_ts:
+                        continue
+                    if before_ts is not None and ts >= before_ts:
+                        continue
+                    if any(record.get(k) != v for k, v in filters.items()):
+                        continue
+                    records.append(record)
+                    if len(records) >= limit:
+                        return records, self._encode_cursor(segment.name, offset, ts)
+            if entry:
+                break  # the rest of this segment and every older one precede ``since``
+        return records, None
+
+    # -- internals ----------------------------------------------------------
+
+    def _open(self, segment: Path) -> Any:
+        if segment.name.endswith(".gz"):
+            with gzip.open(segment, "rb") as fh:
+                return io.BytesIO(fh.read())
+        return segment.open("rb")
+
+    def _index(self, segment: Path) -> tuple[list[int], list[float], float | None]:
+        """Offsets, times and closing time (if rotated) from the sidecar; rotated segments are cached."""
+        cached = self._index_cache.get(segment.name)
+        if cached is not None:
+            return cached
+        index_path = audit_index_path(segment)
+        data = index_path.read_bytes() if index_path.exists() else b""
+        data = data[: len(data) - len(data) % _AUDIT_INDEX_ENTRY.size]
+        entries = list(_AUDIT_INDEX_ENTRY.iter_unpack(data))
+        last_ts = entries.pop()[1] if entries and entries[-1][0] == _AUDIT_INDEX_END else None
+        result = [offset for offset, _ in entries], [ts for _, ts in entries], last_ts
+        if segment != self._path:
+            self._index_cache[segment.name] = result
+        return result
+
+    def _ts_at(self, segment: Path, offset: int) -> float | None:
+        with self._open(segment) as fh:
+            fh.seek(offset)
+            try:
+                return datetime.fromisoformat(json.loads(fh.readline())["ts"]).timestamp()
+            except (ValueError, KeyError, TypeError):
+                return None
+
+    @staticmethod
+    def _line_ts(line: bytes) -> float | None:
+        """``ts`` of a record without parsing it (the writer always puts it first)."""
+        if not line.startswith(b'{"ts": "'):
+            return None
+        try:
+            return datetime.fromisoformat(line[8:line.index(b'"', 8)].decode()).timestamp()
+        except ValueError:
+            return None
+
+    def _reverse_lines(self, fh: Any, end: int, floor: int = 0):
+        """Yield ``(offset, line)`` from ``end`` back to ``floor`` (a line boundary)."""
+        position, tail = end, b""
+        while position > floor:
+            size = min(self.block_size, position - floor)
+            position -= size
+            fh.seek(position)
+            chunk = fh.read(size) + tail
+            lines = chunk.split(b"\n")
+            line_end = position + len(chunk)
+            for line in reversed(lines[1:]):
+                start = line_end - len(line)
+                if line:
+                    yield start, line
+                line_end = start - 1
+            tail = lines[0]
+        if tail:
+            yield floor, tail
+
+    @staticmethod
+    def _encode_cursor(segment: str, offset: int, ts: float) -> str:
+        return _b64url(json.dumps([segment, offset, ts]).encode())
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[str, int, float]:
+        try:
+            segment, offset, ts = json.loads(_b64url_decode(cursor))
+        except (ValueError, TypeError):
+            raise ValueError("Malformed cursor")
+        if not isinstance(segment, str) or not isinstance(offset, int) or offset < 0:
+            raise ValueError("Malformed cursor")
+        if not isinstance(ts, (int, float)):
+            raise ValueError("Malformed cursor")
+        return segment, offset, ts
+
+
+audit = AuditWriter(
+    AUDIT_FILE,
+    buffer_size=AUDIT_BUFFER_SIZE,
+    flush_every=AUDIT_FLUSH_EVERY,
+    flush_interval_ms=AUDIT_FLUSH_INTERVAL_MS,
+    rotate_bytes=AUDIT_ROTATE_BYTES,
+    rotate_seconds=AUDIT_ROTATE_SECONDS,
+    fsync_events=AUDIT_FSYNC_EVENTS,
+    index_every=AUDIT_INDEX_EVERY,
+)
+audit_log = AuditQuery(AUDIT_FILE)
 
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
 
-app = FastAPI(title="Mulberry Agent Gateway", version=VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Graceful shutdown: drain and fsync buffered audit records.
+    audit.close()
+    await state_backend.close()
+
+
+app = FastAPI(title="Mulberry Agent Gateway", version=VERSION, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -209,6 +1450,22 @@ class TriggerRequest(BaseModel):
     idempotency_key: str | None = None
 
 
+TRIGGER_BATCH_MAX_ITEMS = int(os.environ.get("TRIGGER_BATCH_MAX_ITEMS", "50"))
+
+
+class BatchTriggerRequest(BaseModel):
+    items: list[TriggerRequest] = Field(min_length=1, max_length=TRIGGER_BATCH_MAX_ITEMS)
+
+    @field_validator("items")
+    @classmethod
+    def _unique_idempotency_keys(cls, items: list[TriggerRequest]) -> list[TriggerRequest]:
+        # Items run concurrently, so two with one key would both miss the cache and both dispatch.
+        keys = [item.idempotency_key for item in items if item.idempotency_key]
+        if len(keys) != len(set(keys)):
+            raise ValueError("duplicate idempotency_key within one batch")
+        return items
+
+
 class ApprovalRequest(BaseModel):
     execution_id: str
     approver: str
@@ -239,23 +1496,90 @@ ROLE_PERMISSIONS: dict[str, set[str]] = {
 }
 
 
-def authenticate_passport(x_passport_token: str = Header(...)) -> Actor:
-    try:
-        payload = verify_token(x_passport_token, PASSPORT_SIGNING_KEY)
-    except ValueError as exc:
-        raise HTTPException(status_code=401, detail=str(exc))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+@functools.lru_cache(maxsize=256)
+def role_permissions(roles: tuple[str, ...]) -> frozenset[str]:
+    """Union of ROLE_PERMISSIONS for a role combination, computed once per combination."""
+    allowed: set[str] = set()
+    for role in roles:
+        allowed |= ROLE_PERMISSIONS.get(role, set())
+    return frozenset(allowed)
+
+
+class VerifiedTokenCache:
+    """Caches the decoded claims object of tokens that verified against ``key``.
+
+    Agents resend the same passport/mandate on many consecutive calls, so a
+    repeat token costs one SHA-256 of the token plus a dict lookup instead of
+    split + HMAC + base64 + ``json.loads``. Entries expire at the token's
+    ``exp``, the cache is LRU-bounded, and ``rotate()`` drops everything
+    verified under the old key. Failed verifications are never cached.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        decode: Callable[[dict], Any],
+        *,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.key = key
+        self._decode = decode
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[Any, float]] = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+
+    def verify(self, token: str) -> Any:
+        """Return the decoded claims object; raises ValueError like ``verify_token``."""
+        digest = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[1] >= self._clock():
+                    self._entries.move_to_end(digest)
+                    self.stats["hits"] += 1
+                    return entry[0]
+                del self._entries[digest]
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            key = self.key
+
+        payload = verify_token(token, key)
+        decoded = self._decode(payload)
+        with self._lock:
+            if key == self.key:
+                self._entries[digest] = (decoded, payload["exp"])
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return decoded
+
+    def rotate(self, key: str) -> None:
+        with self._lock:
+            self.key = key
+            self.stats["invalidated"] += len(self._entries)
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+def _actor_from_claims(payload: dict) -> Actor:
+    roles = tuple(payload.get("roles", []))
     return Actor(
         agent_id=payload["sub"],
         passport_id=payload["passport_id"],
-        roles=tuple(payload.get("roles", [])),
+        roles=roles,
+        permissions=role_permissions(roles),
     )
 
 
-def authenticate_mandate(x_mandate_token: str = Header(...)) -> Mandate:
-    try:
-        payload = verify_token(x_mandate_token, MANDATE_SIGNING_KEY)
-    except ValueError as exc:
-        raise HTTPException(status_code=403, detail=str(exc))
+def _mandate_from_claims(payload: dict) -> Mandate:
     return Mandate(
         mandate_id=payload["mandate_id"],
         subject=payload["sub"],
@@ -264,17 +1588,34 @@ def authenticate_mandate(x_mandate_token: str = Header(...)) -> Mandate:
         max_calls=payload.get("max_calls", 1),
         max_amount_krw=payload.get("max_amount_krw", 0),
         human_approval_over_krw=payload.get("human_approval_over_krw", 0),
+        expires_at=payload["exp"],
     )
 
 
+passport_tokens = VerifiedTokenCache(PASSPORT_SIGNING_KEY, _actor_from_claims, max_entries=TOKEN_CACHE_MAX_ENTRIES)
+mandate_tokens = VerifiedTokenCache(MANDATE_SIGNING_KEY, _mandate_from_claims, max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
+
+# Async so FastAPI runs them on the event loop rather than the threadpool.
+async def authenticate_passport(x_passport_token: str = Header(...)) -> Actor:
+    try:
+        return passport_tokens.verify(x_passport_token)
+    except ValueError as exc:
+        raise HTTPException(status_code=401, detail=str(exc))
+
+
+async def authenticate_mandate(x_mandate_token: str = Header(...)) -> Mandate:
+    try:
+        return mandate_tokens.verify(x_mandate_token)
+    except ValueError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+
+
 # ---------------------------------------------------------------------------
 # Core execution gate
 # ---------------------------------------------------------------------------
 
-call_counters: dict[str, int] = {}
-
-
-def execute_guarded(
+async def execute_guarded(
     actor: Actor,
     mandate: Mandate,
     intent: str,
@@ -286,11 +1627,18 @@ def execute_guarded(
     execution_id = str(uuid.uuid4())
     amount_krw: int = payload.get("amount_krw", 0)
 
+    # 0. Rate limit — per-agent token bucket, shared across replicas
+    if AGENT_RATE_PER_SECOND > 0:
+        allowed, retry_after = await state_backend.take_token(actor.agent_id, AGENT_RATE_PER_SECOND, AGENT_RATE_BURST)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Agent rate limit exceeded",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
     # 1. Passport — role check
-    allowed = set()
-    for role in actor.roles:
-        allowed |= ROLE_PERMISSIONS.get(role, set())
-    if intent not in allowed:
+    if intent not in actor.permissions:
         audit.write({"event": "DENIED_ROLE", "actor": actor.agent_id, "intent": intent})
         raise HTTPException(status_code=403, detail="Role does not permit this intent")
 
@@ -302,8 +1650,11 @@ def execute_guarded(
         raise HTTPException(status_code=403, detail="Amount exceeds mandate limit")
 
     call_key = f"{actor.agent_id}:{mandate.mandate_id}"
-    call_counters[call_key] = call_counters.get(call_key, 0) + 1
-    if call_counters[call_key] > mandate.max_calls:
+    try:
+        calls = await state_backend.incr_quota(call_key, expires_at=mandate.expires_at)
+    except StoreFull:
+        raise HTTPException(status_code=503, detail="Call counter store full")
+    if calls > mandate.max_calls:
         raise HTTPException(status_code=429, detail="Mandate call limit reached")
 
     # 3. Risk — human approval gate
@@ -316,20 +1667,25 @@ def execute_guarded(
                 status_code=202,
                 detail={"execution_id": execution_id, "status": "pending_approval"},
             )
-        if not approval_store.contains(approval_token):
+        if not await state_backend.approval_valid(approval_token):
             raise HTTPException(status_code=403, detail="Approval token invalid or expired")
 
     # 4. Nonce check (replay prevention)
-    if nonce_store.contains(nonce):
+    try:
+        fresh_nonce = await state_backend.add_nonce(nonce, ttl=NONCE_TTL_SECONDS)
+    except StoreFull:
+        raise HTTPException(status_code=503, detail="Nonce store full")
+    if not fresh_nonce:
         raise HTTPException(status_code=409, detail="Duplicate nonce")
-    nonce_store.add(nonce, ttl=300)
 
     # 5. Idempotency
-    if idempotency_key and idempotency_key in idempotency_store:
-        return idempotency_store[idempotency_key]
+    if idempotency_key:
+        cached = await idempotency_store.get_async(idempotency_key)
+        if cached is not None:
+            return cached
 
     # 6. Execute
-    result = _dispatch(intent, payload, actor)
+    result = await _dispatch(intent, payload, actor, execution_id)
     audit.write({
         "event": "EXECUTED",
         "execution_id": execution_id,
@@ -339,49 +1695,124 @@ def execute_guarded(
         "amount_krw": amount_krw,
     })
     if idempotency_key:
-        idempotency_store[idempotency_key] = result
+        await idempotency_store.set_async(idempotency_key, result, expires_at=mandate.expires_at)
     return result
 
 
-def _dispatch(intent: str, payload: dict, actor: Actor) -> dict:
-    """Route validated intents to adapter functions."""
-    if intent == "search.read":
-        return _adapter_search(payload, actor)
-    if intent == "quote.request":
-        return _adapter_quote(payload, actor)
-    if intent == "memory.append":
-        return _adapter_memory(payload, actor)
-    if intent == "image.generate":
-        return _adapter_image(payload, actor)
-    if intent == "github.memory.append":
-        return _adapter_github_memory(payload, actor)
-    raise HTTPException(status_code=400, detail=f"Unknown intent: {intent}")
+async def _dispatch(intent: str, payload: dict, actor: Actor, execution_id: str) -> dict:
+    """Route validated intents to their registered adapter."""
+    slot = ADAPTERS.get(intent)
+    if slot is None:
+        raise HTTPException(status_code=400, detail=f"Unknown intent: {intent}")
+    return await slot.run(payload, actor, execution_id)
 
 
 # ---------------------------------------------------------------------------
 # Adapter stubs (replace with real implementations)
 # ---------------------------------------------------------------------------
 
-def _adapter_search(payload: dict, actor: Actor) -> dict:
+async def _adapter_search(payload: dict, actor: Actor) -> dict:
     return {"status": "ok", "results": [], "note": "stub — wire NaverOfficialAPIAdapter"}
 
 
-def _adapter_quote(payload: dict, actor: Actor) -> dict:
+async def _adapter_quote(payload: dict, actor: Actor) -> dict:
     return {"status": "ok", "quote_id": str(uuid.uuid4()), "note": "stub"}
 
 
-def _adapter_memory(payload: dict, actor: Actor) -> dict:
+async def _adapter_memory(payload: dict, actor: Actor) -> dict:
     return {"status": "ok", "appended": True}
 
 
-def _adapter_image(payload: dict, actor: Actor) -> dict:
+async def _adapter_image(payload: dict, actor: Actor) -> dict:
     return {"status": "ok", "image_url": None, "note": "stub"}
 
 
-def _adapter_github_memory(payload: dict, actor: Actor) -> dict:
+async def _adapter_github_memory(payload: dict, actor: Actor) -> dict:
     return {"status": "ok", "committed": False, "note": "stub — wire GitHub API"}
 
 
+# ---------------------------------------------------------------------------
+# Adapter registry (async, per-adapter concurrency limit and timeout)
+# ---------------------------------------------------------------------------
+
+class Adapter(Protocol):
+    async def __call__(self, payload: dict, actor: Actor) -> dict: ...
+
+
+class AdapterSlot:
+    """One registered adapter with its own in-flight cap and deadline.
+
+    Calls beyond ``max_concurrency`` wait for a slot; ``timeout`` covers the
+    wait and the call, so a saturated or hung provider fails fast with 504
+    instead of piling up requests. Semaphores are created per event loop.
+    """
+
+    def __init__(self, intent: str, handler: Adapter, *, max_concurrency: int, timeout: float) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.intent = intent
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self.stats = {"calls": 0, "timeouts": 0, "errors": 0}
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _call(self, payload: dict, actor: Actor) -> dict:
+        async with self._semaphore():
+            self.in_flight += 1
+            try:
+                return await self.handler(payload, actor)
+            finally:
+                self.in_flight -= 1
+
+    async def run(self, payload: dict, actor: Actor, execution_id: str) -> dict:
+        self.stats["calls"] += 1
+        try:
+            return await asyncio.wait_for(self._call(payload, actor), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            audit.write({"event": "ADAPTER_TIMEOUT", "execution_id": execution_id, "intent": self.intent})
+            raise HTTPException(status_code=504, detail=f"Adapter timed out: {self.intent}")
+        except HTTPException:
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            log.exception("adapter %s failed", self.intent)
+            audit.write({"event": "ADAPTER_FAILED", "execution_id": execution_id, "intent": self.intent})
+            raise HTTPException(status_code=502, detail=f"Adapter failed: {self.intent}")
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+        }
+
+
+ADAPTERS: dict[str, AdapterSlot] = {}
+
+
+def register_adapter(intent: str, handler: Adapter, *, max_concurrency: int = 32, timeout: float = 10.0) -> None:
+    """Install (or replace) the adapter serving ``intent``."""
+    ADAPTERS[intent] = AdapterSlot(intent, handler, max_concurrency=max_concurrency, timeout=timeout)
+
+
+register_adapter("search.read", _adapter_search, max_concurrency=32, timeout=5.0)
+register_adapter("quote.request", _adapter_quote, max_concurrency=32, timeout=5.0)
+register_adapter("memory.append", _adapter_memory, max_concurrency=16, timeout=5.0)
+register_adapter("image.generate", _adapter_image, max_concurrency=4, timeout=30.0)
+register_adapter("github.memory.append", _adapter_github_memory, max_concurrency=4, timeout=10.0)
+
+
 # ---------------------------------------------------------------------------
 # HTTP routes
 # ---------------------------------------------------------------------------
@@ -392,11 +1823,22 @@ def health() -> dict:
         "status": "ok",
         "version": VERSION,
         "uptime_seconds": round(time.time() - STARTED_AT, 1),
+        "stores": {
+            "idempotency": idempotency_store.metrics(),
+        },
+        "state_backend": state_backend.metrics(),
+        "audit": audit.metrics(),
+        "adapters": {intent: slot.metrics() for intent, slot in ADAPTERS.items()},
+        "token_cache": {
+            "passport": passport_tokens.metrics(),
+            "mandate": mandate_tokens.metrics(),
+        },
+        "kakao_replies": kakao_replies.metrics(),
     }
 
 
 @app.post("/trigger")
-def trigger(
+async def trigger(
     body: TriggerRequest,
     actor: Actor = Depends(authenticate_passport),
     mandate: Mandate = Depends(authenticate_mandate),
@@ -404,7 +1846,7 @@ def trigger(
 ) -> JSONResponse:
     if body.intent not in ALLOWED_INTENTS:
         raise HTTPException(status_code=400, detail="Unknown intent")
-    result = execute_guarded(
+    result = await execute_guarded(
         actor=actor,
         mandate=mandate,
         intent=body.intent,
@@ -416,8 +1858,41 @@ def trigger(
     return JSONResponse(content=result)
 
 
+@app.post("/trigger/batch")
+async def trigger_batch(
+    body: BatchTriggerRequest,
+    actor: Actor = Depends(authenticate_passport),
+    mandate: Mandate = Depends(authenticate_mandate),
+    x_approval_token: str | None = Header(default=None),
+) -> dict:
+    """Guard every item under one passport/mandate, then run the adapters concurrently.
+
+    Items fail independently; each result carries its own ``status_code``.
+    """
+
+    async def run_item(item: TriggerRequest) -> dict:
+        try:
+            if item.intent not in ALLOWED_INTENTS:
+                raise HTTPException(status_code=400, detail="Unknown intent")
+            result = await execute_guarded(
+                actor=actor,
+                mandate=mandate,
+                intent=item.intent,
+                payload=item.payload,
+                nonce=item.nonce,
+                idempotency_key=item.idempotency_key,
+                approval_token=x_approval_token,
+            )
+        except HTTPException as exc:
+            return {"status_code": exc.status_code, "detail": exc.detail}
+        return {"status_code": 200, "result": result}
+
+    results = await asyncio.gather(*(run_item(item) for item in body.items))
+    return {"results": results}
+
+
 @app.post("/approval/decide")
-def approval_decide(
+async def approval_decide(
     body: ApprovalRequest,
     actor: Actor = Depends(authenticate_passport),
 ) -> dict:
@@ -425,7 +1900,10 @@ def approval_decide(
         raise HTTPException(status_code=403, detail="Only admin/senior may approve")
     if body.decision == "approve":
         token = secrets.token_hex(32)
-        approval_store.add(token, ttl=600)
+        try:
+            await state_backend.add_approval(token, ttl=APPROVAL_TTL_SECONDS)
+        except StoreFull:
+            raise HTTPException(status_code=503, detail="Approval store full")
         audit.write({
             "event": "APPROVED",
             "execution_id": body.execution_id,
@@ -442,65 +1920,251 @@ def approval_decide(
     return {"status": "rejected"}
 
 
+AUDIT_QUERY_MAX_LIMIT = 1000
+
+
 @app.get("/audit")
 def audit_tail(
-    n: int = 50,
+    n: int = Query(default=50, ge=1),
     actor: Actor = Depends(authenticate_passport),
 ) -> list[dict]:
     if "admin" not in actor.roles:
         raise HTTPException(status_code=403, detail="Admin only")
-    if not AUDIT_FILE.exists():
-        return []
-    lines = AUDIT_FILE.read_text().strip().split("\n")
-    return [json.loads(l) for l in lines[-n:] if l]
+    audit.flush()
+    records, _ = audit_log.query(limit=min(n, AUDIT_QUERY_MAX_LIMIT))
+    return records[::-1]
+
+
+@app.get("/audit/query")
+def audit_query(
+    event: str | None = None,
+    actor_id: str | None = Query(default=None, alias="actor"),
+    intent: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = Query(default=50, ge=1, le=AUDIT_QUERY_MAX_LIMIT),
+    cursor: str | None = None,
+    actor: Actor = Depends(authenticate_passport),
+) -> dict:
+    """Filtered audit search, newest first; pass ``next_cursor`` back for the next page."""
+    if "admin" not in actor.roles:
+        raise HTTPException(status_code=403, detail="Admin only")
+    audit.flush()
+    try:
+        records, next_cursor = audit_log.query(
+            event=event,
+            actor=actor_id,
+            intent=intent,
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"records": records, "next_cursor": next_cursor}
 
 
 # ---------------------------------------------------------------------------
 # Kakao v2 webhook — intentionally read-only
 # ---------------------------------------------------------------------------
 
+KAKAO_USER_RATE_PER_SECOND = float(os.environ.get("KAKAO_USER_RATE_PER_SECOND", "1"))
+KAKAO_USER_RATE_BURST = int(os.environ.get("KAKAO_USER_RATE_BURST", "5"))
+KAKAO_REPLY_CACHE_TTL_SECONDS = float(os.environ.get("KAKAO_REPLY_CACHE_TTL_SECONDS", "30"))
+KAKAO_REPLY_CACHE_MAX_ENTRIES = int(os.environ.get("KAKAO_REPLY_CACHE_MAX_ENTRIES", "10000"))
+
+
+def kakao_simple_text(text: str) -> bytes:
+    """Serialize a Kakao skill ``simpleText`` response once, ready to send."""
+    reply = {"version": "2.0", "template": {"outputs": [{"simpleText": {"text": text}}]}}
+    return json.dumps(reply, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+KAKAO_READONLY_REPLY = kakao_simple_text(
+    "안녕하세요! Mulberry v2 채널은 읽기 전용 안내 모드입니다. "
+    "검색·예약은 Luna 채널을 이용해 주세요."
+)
+KAKAO_THROTTLED_REPLY = kakao_simple_text("요청이 많아요. 잠시 후 다시 말씀해 주세요.")
+
+_KAKAO_UTTERANCE = re.compile(r'"utterance"\s*:\s*"')
+_KAKAO_USER = re.compile(r'"user"\s*:\s*\{')
+_KAKAO_ID = re.compile(r'"id"\s*:\s*"')
+
+
+def extract_kakao_fields(body: bytes) -> tuple[str, str]:
+    """Return ``(utterance, user_id)`` from a Kakao skill payload.
+
+    Only ``userRequest.utterance`` and ``userRequest.user.id`` are read: the
+    scanner jumps to those keys and decodes just their string values, instead
+    of building the whole payload (bot, intent, action, contexts...). It only
+    trusts a key that appears exactly once, and an ``id`` that sits directly
+    in the ``user`` object; anything else falls back to ``json.loads``.
+    Raises ValueError on a malformed payload.
+    """
+    text = body.decode()
+    found = _scan_kakao_fields(text)
+    if found is not None:
+        return found
+    data = json.loads(text)
+    user_request = data.get("userRequest") or {}
+    user = user_request.get("user") or {}
+    return str(user_request.get("utterance", "")), str(user.get("id", ""))
+
+
+def _scan_kakao_fields(text: str) -> tuple[str, str] | None:
+    start = text.find('"userRequest"')
+    if start < 0 or text.count('"userRequest"') != 1 or text.count('"utterance"') != 1 or text.count('"user"') != 1:
+        return None
+    utterance = _KAKAO_UTTERANCE.search(text, start)
+    user = _KAKAO_USER.search(text, start)
+    if utterance is None or user is None:
+        return None
+    user_id = _KAKAO_ID.search(text, user.end())
+    if user_id is None or any(c in text[user.end():user_id.start()] for c in "{}[]"):
+        return None
+    try:
+        return (
+            json.decoder.scanstring(text, utterance.end())[0],
+            json.decoder.scanstring(text, user_id.end())[0],
+        )
+    except ValueError:
+        return None
+
+
+def normalize_utterance(utterance: str) -> str:
+    """Cache key for an utterance: NFKC, case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", utterance).casefold().split())
+
+
+class KakaoReplyCache:
+    """Short-lived LRU of serialized replies keyed by normalized utterance.
+
+    Announcement spikes send the same few questions thousands of times, so a
+    non-constant reply builder runs once per distinct utterance per ``ttl``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    def get_or_build(self, utterance: str, build: Callable[[str], bytes]) -> bytes:
+        key = normalize_utterance(utterance)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+
+        reply = build(utterance)
+        with self._lock:
+            self._entries[key] = (reply, now + self.ttl)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return reply
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+kakao_replies = KakaoReplyCache(max_entries=KAKAO_REPLY_CACHE_MAX_ENTRIES, ttl=KAKAO_REPLY_CACHE_TTL_SECONDS)
+
+# None keeps the constant read-only reply; a builder maps an utterance to a
+# serialized reply (see kakao_simple_text) and is cached per utterance.
+kakao_reply_builder: Callable[[str], bytes] | None = None
+
+
+def set_kakao_reply_builder(builder: Callable[[str], bytes] | None) -> None:
+    """Install (or remove) the Kakao reply builder and drop cached replies."""
+    global kakao_reply_builder
+    kakao_reply_builder = builder
+    kakao_replies.clear()
+
+
+def _kakao_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+
 @app.post("/kakao/webhook")
-async def kakao_webhook(
-    request: Request,
-    x_kakao_signature: str = Header(default=""),
-) -> dict:
+async def kakao_webhook(request: Request) -> Response:
     """
     v2 Kakao channel: read-only announcement mode.
     Mutating actions are handled by v1.6 (agent_gateway.py).
+
+    Hot path during announcement spikes: no body model or response
+    serialization, only the two fields we need are decoded, and the audit
+    write just enqueues for the background writer.
     """
+    # Fast reject before reading the body when the client declares its size.
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > kakao_verifier.max_body_bytes:
+        raise HTTPException(status_code=413, detail="Kakao payload too large")
+
     body = await request.body()
-    expected = hmac.new(
-        PASSPORT_SIGNING_KEY.encode(), body, hashlib.sha256
-    ).hexdigest()
-    if not hmac.compare_digest(expected, x_kakao_signature):
+    if len(body) > kakao_verifier.max_body_bytes:
+        raise HTTPException(status_code=413, detail="Kakao payload too large")
+    if not await kakao_verifier.verify_async(body, request.headers.get("x-kakao-signature", "")):
         raise HTTPException(status_code=401, detail="Bad Kakao signature")
 
-    data = json.loads(body)
-    user_utterance = data.get("userRequest", {}).get("utterance", "")
-    log.info("kakao_v2 utterance=%r", user_utterance)
-    audit.write({"event": "KAKAO_RECEIVED", "utterance": user_utterance})
+    try:
+        user_utterance, user_id = extract_kakao_fields(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed Kakao payload")
 
-    return {
-        "version": "2.0",
-        "template": {
-            "outputs": [
-                {
-                    "simpleText": {
-                        "text": (
-                            "안녕하세요! Mulberry v2 채널은 읽기 전용 안내 모드입니다. "
-                            "검색·예약은 Luna 채널을 이용해 주세요."
-                        )
-                    }
-                }
-            ]
-        },
-    }
+    if user_id and KAKAO_USER_RATE_PER_SECOND > 0:
+        allowed, _ = await state_backend.take_token(
+            "kakao:" + user_id, KAKAO_USER_RATE_PER_SECOND, KAKAO_USER_RATE_BURST
+        )
+        if not allowed:
+            audit.write({"event": "KAKAO_RATE_LIMITED", "user": user_id})
+            return _kakao_response(KAKAO_THROTTLED_REPLY)
+
+    log.debug("kakao_v2 utterance=%r", user_utterance)
+    audit.write({"event": "KAKAO_RECEIVED", "utterance": user_utterance, "user": user_id})
+
+    builder = kakao_reply_builder
+    if builder is None:
+        return _kakao_response(KAKAO_READONLY_REPLY)
+    return _kakao_response(kakao_replies.get_or_build(user_utterance, builder))
 
 
 # ---------------------------------------------------------------------------
 # Admin helpers (NOT exposed as HTTP routes)
 # ---------------------------------------------------------------------------
 
+def rotate_signing_keys(*, passport: str | None = None, mandate: str | None = None) -> None:
+    """Switch signing keys and drop every token or webhook signature made with the old ones."""
+    global PASSPORT_SIGNING_KEY, MANDATE_SIGNING_KEY
+    if passport is not None:
+        PASSPORT_SIGNING_KEY = passport
+        passport_tokens.rotate(passport)
+        kakao_verifier.rotate(passport)
+    if mandate is not None:
+        MANDATE_SIGNING_KEY = mandate
+        mandate_tokens.rotate(mandate)
+
+
 def issue_passport(agent_id: str, roles: list[str], ttl_seconds: int = 3600) -> str:
     payload = {
         "sub": agent_id,
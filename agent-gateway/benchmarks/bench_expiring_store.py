@@ -0,0 +1,92 @@
+"""Nonce store benchmark: drive 1M nonces through ExpiringStore.
+
+Simulates the /trigger hot path (``contains`` then ``add``) at a fixed request
+rate on a synthetic clock, so the live set settles at ``rate * ttl`` nonces.
+The baseline (the previous dict-rebuild store) is O(live nonces) per call and
+only runs on a small sample.
+
+Usage:
+    python agent-gateway/benchmarks/bench_expiring_store.py [--nonces 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+for _name in ("PASSPORT_SIGNING_KEY", "MANDATE_SIGNING_KEY", "APPROVAL_SIGNING_KEY"):
+    os.environ.setdefault(_name, "b" * 32)
+os.environ.setdefault("AUDIT_FILE", str(Path(tempfile.mkdtemp()) / "audit.jsonl"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent_gateway_v2 import ExpiringStore  # noqa: E402
+
+
+class RebuildStore:
+    """The pre-heap store: rebuilds the dict on every add/contains."""
+
+    def __init__(self, clock) -> None:
+        self._store: dict[str, float] = {}
+        self._clock = clock
+
+    def add(self, key: str, ttl: float) -> None:
+        self._store[key] = self._clock() + ttl
+        self._evict()
+
+    def contains(self, key: str) -> bool:
+        self._evict()
+        return key in self._store
+
+    def _evict(self) -> None:
+        now = self._clock()
+        self._store = {k: v for k, v in self._store.items() if v > now}
+
+
+def drive(store, clock: list[float], nonces: int, rate: float, ttl: float) -> float:
+    """Run ``nonces`` contains+add pairs; returns calls per second."""
+    step = 1.0 / rate
+    started = time.perf_counter()
+    for i in range(nonces):
+        clock[0] += step
+        key = f"nonce-{i:08x}"
+        if not store.contains(key):
+            store.add(key, ttl=ttl)
+    return nonces / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nonces", type=int, default=1_000_000)
+    parser.add_argument("--rate", type=float, default=200.0, help="requests per synthetic second")
+    parser.add_argument("--ttl", type=float, default=300.0, help="nonce TTL (gateway uses 300 s)")
+    parser.add_argument("--baseline-nonces", type=int, default=2_000)
+    args = parser.parse_args()
+
+    live = int(args.rate * args.ttl)
+    print(f"steady-state live nonces: {live:,}")
+
+    clock = [0.0]
+    store = ExpiringStore(capacity=max(live * 2, 1), clock=lambda: clock[0])
+    per_sec = drive(store, clock, args.nonces, args.rate, args.ttl)
+    metrics = store.metrics()
+    print(
+        f"ExpiringStore  {args.nonces:>10,} nonces  {per_sec:>12,.0f} req/s  "
+        f"size={metrics['size']:,} expired={metrics['expired']:,} "
+        f"rejected_capacity={metrics['rejected_capacity']:,}"
+    )
+
+    # Warm the baseline to the same live-set size before timing it.
+    clock = [0.0]
+    baseline = RebuildStore(lambda: clock[0])
+    baseline._store = {f"warm-{i}": args.ttl for i in range(live)}
+    per_sec = drive(baseline, clock, args.baseline_nonces, args.rate, args.ttl)
+    print(f"RebuildStore   {args.baseline_nonces:>10,} nonces  {per_sec:>12,.0f} req/s  (baseline)")
+
+
+if __name__ == "__main__":
+    main()
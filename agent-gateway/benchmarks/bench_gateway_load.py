@@ -0,0 +1,315 @@
+"""Gateway load test and latency benchmark.
+
+Runs ``agent_gateway_v2.app`` in-process (httpx ASGI transport, no sockets)
+with freshly generated signing keys and tokens minted by ``issue_passport`` /
+``issue_mandate``, drives a weighted mix of workloads from concurrent virtual
+agents, and samples RSS while it runs. Micro-benchmarks then time the hot
+building blocks on their own (``verify_token``, the verified-token cache,
+``ExpiringStore``, ``AuditWriter.write`` and ``execute_guarded``).
+
+Workloads:
+    allowed     search.read within role and mandate            -> 200
+    denied      github.memory.append with the "agent" role     -> 403
+    approval    image.generate without an approval token       -> 202
+    replay      quote.request repeating one idempotency key    -> 200 (cached)
+    kakao       signed Kakao webhook                           -> 200
+
+Results can be saved as a baseline and compared on later runs; the process
+exits 1 when a throughput metric drops, or a latency metric rises, by more
+than ``--tolerance``.
+
+Usage:
+    python agent-gateway/benchmarks/bench_gateway_load.py [--seconds 10] [--concurrency 64]
+    python agent-gateway/benchmarks/bench_gateway_load.py --save-baseline baseline.json
+    python agent-gateway/benchmarks/bench_gateway_load.py --baseline baseline.json --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_WORKDIR = Path(tempfile.mkdtemp(prefix="gateway-bench-"))
+for _name in ("PASSPORT_SIGNING_KEY", "MANDATE_SIGNING_KEY", "APPROVAL_SIGNING_KEY"):
+    os.environ[_name] = secrets.token_hex(32)
+os.environ["AUDIT_FILE"] = str(_WORKDIR / "audit.jsonl")
+os.environ.setdefault("AGENT_RATE_BURST", "1000000000")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+import agent_gateway_v2 as gw  # noqa: E402
+
+
+DEFAULT_MIX = "allowed=55,denied=10,approval=10,replay=15,kakao=10"
+HIGHER_IS_BETTER = ("_rps", "_ops")
+LOWER_IS_BETTER = ("_ms",)
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+class VirtualAgent:
+    def __init__(self, index: int) -> None:
+        self.agent_id = f"BENCH_{index:04d}"
+        actions = ["search.read", "quote.request", "image.generate", "github.memory.append"]
+        self.headers = {
+            "x-passport-token": gw.issue_passport(self.agent_id, ["agent"]),
+            "x-mandate-token": gw.issue_mandate(self.agent_id, actions, ["*"], max_calls=10**9),
+        }
+        self.idempotency_key = f"idem-{self.agent_id}"
+
+
+def build_request(kind: str, agent: VirtualAgent) -> tuple[str, dict]:
+    """Return (path, httpx request kwargs) for one workload call."""
+    if kind == "allowed":
+        return "/trigger", {"json": {"intent": "search.read", "payload": {"q": "배추"}}, "headers": agent.headers}
+    if kind == "denied":
+        return "/trigger", {"json": {"intent": "github.memory.append"}, "headers": agent.headers}
+    if kind == "approval":
+        return "/trigger", {"json": {"intent": "image.generate"}, "headers": agent.headers}
+    if kind == "replay":
+        body = {"intent": "quote.request", "idempotency_key": agent.idempotency_key}
+        return "/trigger", {"json": body, "headers": agent.headers}
+    if kind == "kakao":
+        body = json.dumps({"userRequest": {"utterance": "오늘 공동구매 있어?", "user": {"id": agent.agent_id}}},
+                          ensure_ascii=False).encode()
+        signature = hmac.new(gw.PASSPORT_SIGNING_KEY.encode(), body, hashlib.sha256).hexdigest()
+        headers = {"content-type": "application/json", "x-kakao-signature": signature}
+        return "/kakao/webhook", {"content": body, "headers": headers}
+    raise ValueError(f"Unknown workload: {kind}")
+
+
+EXPECTED_STATUS = {"allowed": 200, "denied": 403, "approval": 202, "replay": 200, "kakao": 200}
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in EXPECTED_STATUS:
+            raise SystemExit(f"unknown workload in --mix: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+# ---------------------------------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------------------------------
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc; falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "rps": len(values) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Load test
+# ---------------------------------------------------------------------------
+
+async def run_load(seconds: float, concurrency: int, agents: int, mix: dict[str, int], sample_every: float) -> dict:
+    population = [VirtualAgent(i) for i in range(agents)]
+    kinds, weights = list(mix), list(mix.values())
+    latencies: dict[str, list[float]] = {kind: [] for kind in kinds}
+    unexpected: dict[str, int] = {}
+    rss_samples = [(0.0, rss_mb())]
+
+    transport = httpx.ASGITransport(app=gw.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        async def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                path, kwargs = build_request(kind, rng.choice(population))
+                t0 = time.perf_counter()
+                response = await client.post(path, **kwargs)
+                latencies[kind].append(time.perf_counter() - t0)
+                if response.status_code != EXPECTED_STATUS[kind]:
+                    key = f"{kind}:{response.status_code}"
+                    unexpected[key] = unexpected.get(key, 0) + 1
+
+        async def sampler() -> None:
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(sample_every)
+                rss_samples.append((time.perf_counter() - started, rss_mb()))
+
+        await asyncio.gather(sampler(), *(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    overall = summarize([v for values in latencies.values() for v in values], elapsed)
+    return {
+        "overall": overall,
+        "by_workload": {kind: summarize(values, elapsed) for kind, values in latencies.items()},
+        "unexpected_status": unexpected,
+        "rss_mb": rss_samples,
+        "rss_growth_mb": rss_samples[-1][1] - rss_samples[0][1],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Micro-benchmarks
+# ---------------------------------------------------------------------------
+
+def ops_per_second(fn, seconds: float) -> float:
+    calls, started = 0, time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return calls / (time.perf_counter() - started)
+
+
+def run_micro(seconds: float) -> dict[str, float]:
+    agent = VirtualAgent(9999)
+    passport = agent.headers["x-passport-token"]
+    counter = iter(range(10**12))
+
+    store = gw.ExpiringStore(capacity=1_000_000)
+    cache = gw.VerifiedTokenCache(gw.PASSPORT_SIGNING_KEY, gw._actor_from_claims)
+    writer = gw.AuditWriter(_WORKDIR / "micro-audit.jsonl", buffer_size=10**7)
+
+    results = {
+        "verify_token": ops_per_second(lambda: gw.verify_token(passport, gw.PASSPORT_SIGNING_KEY), seconds),
+        "token_cache_hit": ops_per_second(lambda: cache.verify(passport), seconds),
+        "expiring_store_add": ops_per_second(lambda: store.add_if_absent(f"n-{next(counter)}", 300), seconds),
+        "audit_write": ops_per_second(lambda: writer.write({"event": "EXECUTED", "actor": agent.agent_id}), seconds),
+    }
+    writer.close()
+
+    actor = gw.passport_tokens.verify(passport)
+    mandate = gw.mandate_tokens.verify(agent.headers["x-mandate-token"])
+    loop = asyncio.new_event_loop()
+
+    def guarded() -> None:
+        loop.run_until_complete(gw.execute_guarded(
+            actor, mandate, "search.read", {}, f"micro-{next(counter)}", None, None
+        ))
+
+    results["execute_guarded"] = ops_per_second(guarded, seconds)
+    loop.close()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def flatten(load: dict, micro: dict[str, float]) -> dict[str, float]:
+    metrics = {f"load_{key}": value for key, value in load["overall"].items() if key != "count"}
+    for kind, summary in load["by_workload"].items():
+        metrics.update({f"load_{kind}_{key}": value for key, value in summary.items() if key != "count"})
+    metrics.update({f"micro_{name}_ops": value for name, value in micro.items()})
+    metrics["memory_rss_growth_mb"] = load["rss_growth_mb"]
+    return metrics
+
+
+def compare(current: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """Print a delta table; return the metrics that regressed beyond ``tolerance``."""
+    regressions = []
+    print(f"\n{'metric':<34} | {'baseline':>12} | {'current':>12} | {'delta':>8}")
+    print("-" * 74)
+    for name in sorted(current):
+        if name not in baseline or not baseline[name]:
+            continue
+        delta = (current[name] - baseline[name]) / baseline[name]
+        worse = (name.endswith(HIGHER_IS_BETTER) and delta < -tolerance) or (
+            name.endswith(LOWER_IS_BETTER) and delta > tolerance
+        )
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<34} | {baseline[name]:>12,.2f} | {current[name]:>12,.2f} | {delta:>+7.0%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="load test duration")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent in-flight requests")
+    parser.add_argument("--agents", type=int, default=200, help="distinct agents (passport/mandate pairs)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"workload weights (default {DEFAULT_MIX})")
+    parser.add_argument("--micro-seconds", type=float, default=1.0, help="duration of each micro-benchmark")
+    parser.add_argument("--sample-every", type=float, default=1.0, help="RSS sampling interval (seconds)")
+    parser.add_argument("--baseline", type=Path, help="compare against this baseline file")
+    parser.add_argument("--save-baseline", type=Path, help="write this run's metrics as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression ratio")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+
+    load = asyncio.run(run_load(args.seconds, args.concurrency, args.agents, parse_mix(args.mix), args.sample_every))
+    gw.audit.close()
+    micro = run_micro(args.micro_seconds)
+    metrics = flatten(load, micro)
+
+    if args.json:
+        print(json.dumps({"load": load, "micro": micro, "metrics": metrics}, indent=2))
+    else:
+        overall = load["overall"]
+        print(f"load: {overall['count']:,} requests in {args.seconds:.0f}s, concurrency {args.concurrency}")
+        print(f"{'workload':<10} | {'req/s':>10} | {'p50 ms':>8} | {'p99 ms':>8}")
+        print("-" * 46)
+        for kind, summary in {**load["by_workload"], "overall": overall}.items():
+            print(f"{kind:<10} | {summary['rps']:>10,.0f} | {summary['p50_ms']:>8.2f} | {summary['p99_ms']:>8.2f}")
+        samples = ", ".join(f"{t:.0f}s={mb:.1f}" for t, mb in load["rss_mb"])
+        print(f"\nRSS MB: {samples}  (growth {load['rss_growth_mb']:+.1f} MB)")
+        if load["unexpected_status"]:
+            print(f"unexpected status codes: {load['unexpected_status']}")
+        print("\nmicro-benchmarks (ops/s):")
+        for name, value in micro.items():
+            print(f"  {name:<22} {value:>14,.0f}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(metrics, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare(metrics, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
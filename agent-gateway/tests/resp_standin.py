@@ -0,0 +1,180 @@
+"""In-process Redis-protocol stand-in for gateway state backend tests.
+
+Implements only what RedisStateBackend sends: PING, GET, SET (NX/PX), EXISTS,
+INCR, PEXPIREAT, WATCH/UNWATCH, MULTI/EXEC/DISCARD and FLUSHALL. Commands are
+executed one at a time on the server loop, so every command is atomic, and
+WATCH aborts EXEC when a watched key was written since.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class RespStandIn:
+    def __init__(self) -> None:
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._versions: dict[bytes, int] = {}
+        self._loop = asyncio.new_event_loop()
+        self._server: asyncio.AbstractServer | None = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._sessions: set[asyncio.Task] = set()
+        self.port = 0
+        self.commands = 0
+
+    def __enter__(self) -> "RespStandIn":
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(self._start(), self._loop)
+        self.port = future.result(5)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    async def _start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _stop(self) -> None:
+        self._server.close()
+        for task in self._sessions:
+            task.cancel()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+        await self._server.wait_closed()
+
+    # -- protocol -----------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = {"watched": {}, "queued": None}
+        task = asyncio.current_task()
+        self._sessions.add(task)
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._encode(self._dispatch(session, args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._sessions.discard(task)
+            writer.close()
+
+    def _encode(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, _Status):
+            return b"+%s\r\n" % value.text.encode()
+        if isinstance(value, _Error):
+            return b"-%s\r\n" % value.text.encode()
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if isinstance(value, _NullArray):
+            return b"*-1\r\n"
+        return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+
+    # -- commands -----------------------------------------------------------
+
+    def _dispatch(self, session: dict, args: list[bytes]):
+        self.commands += 1
+        name = args[0].upper()
+        if session["queued"] is not None and name not in (b"EXEC", b"DISCARD", b"MULTI", b"WATCH"):
+            session["queued"].append(args)
+            return _Status("QUEUED")
+        if name == b"MULTI":
+            session["queued"] = []
+            return _Status("OK")
+        if name == b"DISCARD":
+            session["queued"] = None
+            session["watched"] = {}
+            return _Status("OK")
+        if name == b"EXEC":
+            queued, session["queued"] = session["queued"], None
+            watched, session["watched"] = session["watched"], {}
+            if any(self._versions.get(key, 0) != version for key, version in watched.items()):
+                return _NullArray()
+            return [self._run(command) for command in queued]
+        if name == b"WATCH":
+            for key in args[1:]:
+                session["watched"][key] = self._versions.get(key, 0)
+            return _Status("OK")
+        if name == b"UNWATCH":
+            session["watched"] = {}
+            return _Status("OK")
+        return self._run(args)
+
+    def _run(self, args: list[bytes]):
+        name, now = args[0].upper(), time.time()
+        if name == b"PING":
+            return _Status("PONG")
+        if name == b"FLUSHALL":
+            for key in list(self._data):
+                self._write(key, None)
+            return _Status("OK")
+        if name == b"GET":
+            return self._get(args[1], now)
+        if name == b"EXISTS":
+            return sum(1 for key in args[1:] if self._get(key, now) is not None)
+        if name == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            expires_at = None
+            if b"PX" in options:
+                expires_at = now + int(args[3 + options.index(b"PX") + 1]) / 1000
+            if b"NX" in options and self._get(key, now) is not None:
+                return None
+            self._write(key, (value, expires_at))
+            return _Status("OK")
+        if name == b"INCR":
+            current = self._get(args[1], now)
+            value = int(current or 0) + 1
+            expires_at = self._data[args[1]][1] if current is not None else None
+            self._write(args[1], (str(value).encode(), expires_at))
+            return value
+        if name == b"PEXPIREAT":
+            current = self._get(args[1], now)
+            if current is None:
+                return 0
+            self._write(args[1], (current, int(args[2]) / 1000))
+            return 1
+        return _Error(f"ERR unknown command '{name.decode()}'")
+
+    def _get(self, key: bytes, now: float) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            self._write(key, None)
+            return None
+        return entry[0]
+
+    def _write(self, key: bytes, entry: tuple[bytes, float | None] | None) -> None:
+        if entry is None:
+            self._data.pop(key, None)
+        else:
+            self._data[key] = entry
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class _Status:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _Error:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _NullArray:
+    pass
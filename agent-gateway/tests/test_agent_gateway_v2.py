@@ -0,0 +1,922 @@
+"""Tests for Mulberry Agent Gateway v2 in-process stores and routes."""
+
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# The gateway refuses to start without signing keys.
+os.environ.setdefault("PASSPORT_SIGNING_KEY", "p" * 32)
+os.environ.setdefault("MANDATE_SIGNING_KEY", "m" * 32)
+os.environ.setdefault("APPROVAL_SIGNING_KEY", "a" * 32)
+os.environ.setdefault("AUDIT_FILE", str(Path(tempfile.mkdtemp()) / "audit.jsonl"))
+# Route tests share AGENT_001; rate limiting is exercised on dedicated backends.
+os.environ.setdefault("AGENT_RATE_BURST", "100000")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import agent_gateway_v2 as gw  # noqa: E402
+from resp_standin import RespStandIn  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ---------------------------------------------------------------------------
+# ExpiringStore
+# ---------------------------------------------------------------------------
+
+class TestExpiringStore:
+    def test_expiry(self):
+        clock = FakeClock()
+        store = gw.ExpiringStore(clock=clock)
+        store.add("n1", ttl=300)
+        assert store.contains("n1")
+        clock.now += 299
+        assert store.contains("n1")
+        clock.now += 2
+        assert not store.contains("n1")
+        assert len(store) == 0
+        assert store.metrics()["expired"] == 1
+
+    def test_eviction_is_incremental(self):
+        clock = FakeClock()
+        store = gw.ExpiringStore(evict_batch=10, clock=clock)
+        for i in range(100):
+            store.add(f"n{i}", ttl=1)
+        clock.now += 2
+
+        # Expired keys are never reported, but only evict_batch are removed per call.
+        assert not store.contains("n0")
+        assert len(store) == 90
+        for _ in range(9):
+            store.contains("x")
+        assert len(store) == 0
+
+    def test_readd_extends_expiry(self):
+        clock = FakeClock()
+        store = gw.ExpiringStore(clock=clock)
+        store.add("token", ttl=10)
+        store.add("token", ttl=100)
+        clock.now += 50
+        assert store.contains("token")
+        assert len(store) == 1
+
+    def test_stale_heap_entries_compacted(self):
+        store = gw.ExpiringStore(evict_batch=4, clock=FakeClock())
+        for ttl in range(1, 1_000):
+            store.add("same", ttl=ttl)
+        assert len(store) == 1
+        assert len(store._heap) <= 2 + store.evict_batch
+
+    def test_full_store_rejects_new_keys_instead_of_dropping_live_ones(self):
+        clock = FakeClock()
+        store = gw.ExpiringStore(capacity=3, evict_batch=1, clock=clock)
+        store.add("short", ttl=10)
+        store.add("long-1", ttl=600)
+        store.add("long-2", ttl=600)
+
+        with pytest.raises(gw.StoreFull):
+            store.add_if_absent("new", ttl=300)
+        assert store.contains("short") and not store.contains("new")
+        assert store.add_if_absent("short", ttl=300) is False
+        assert store.metrics()["rejected_capacity"] == 1
+
+        # Once an entry expires there is room again, even past the per-call evict_batch.
+        clock.now += 11
+        assert store.add_if_absent("new", ttl=300) is True
+        assert len(store) == 3
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            gw.ExpiringStore(capacity=0)
+
+
+# ---------------------------------------------------------------------------
+# StateStore
+# ---------------------------------------------------------------------------
+
+class TestStateStore:
+    def test_entries_expire_at_absolute_time(self):
+        clock = FakeClock()
+        store = gw.StateStore("t", max_entries=16, stripes=4, clock=clock)
+        store.set("idem-1", {"status": "ok"}, expires_at=clock.now + 60)
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 60) == 1
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 60) == 2
+        assert store.get("idem-1") == {"status": "ok"}
+
+        clock.now += 61
+        assert store.get("idem-1") is None
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 60) == 1
+
+    def test_entry_bound_is_lru(self):
+        store = gw.StateStore("t", max_entries=4, stripes=1, clock=FakeClock())
+        for i in range(4):
+            store.set(f"k{i}", i, expires_at=2_000)
+        store.get("k0")
+        store.set("k4", 4, expires_at=2_000)
+
+        assert len(store) == 4
+        assert store.get("k0") == 0
+        assert store.get("k1") is None
+        assert store.metrics()["evicted_live"] == 1
+
+    def test_persistent_store_waits_off_the_event_loop(self, tmp_path):
+        import sqlite3
+
+        path = tmp_path / "state.db"
+        store = gw.StateStore("idempotency", max_entries=16, stripes=1, db_path=path)
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")  # another process holds the write lock
+
+        async def scenario():
+            write = asyncio.create_task(store.set_async("idem-1", {"status": "ok"}, expires_at=time.time() + 60))
+            ticks = 0
+            while ticks < 10:
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert not write.done()
+            other.execute("COMMIT")
+            await write
+            return ticks, await store.get_async("idem-1"), await store.incr_async("AGENT_001:mnd-1", time.time() + 60)
+
+        assert asyncio.run(scenario()) == (10, {"status": "ok"}, 1)
+        store.close()
+        other.close()
+
+    def test_live_counters_are_never_evicted(self):
+        clock = FakeClock()
+        store = gw.StateStore("call_counters", max_entries=2, stripes=1, evict_live=False, clock=clock)
+        store.incr("AGENT_001:mnd-1", expires_at=clock.now + 600)
+        store.incr("AGENT_002:mnd-2", expires_at=clock.now + 60)
+
+        with pytest.raises(gw.StoreFull):
+            store.incr("AGENT_003:mnd-3", expires_at=clock.now + 600)
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 600) == 2
+        assert store.metrics()["rejected_full"] == 1
+        assert store.metrics()["evicted_live"] == 0
+
+        clock.now += 61
+        assert store.incr("AGENT_003:mnd-3", expires_at=clock.now + 600) == 1
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 600) == 3
+
+    def test_byte_bound_evicts_large_results(self):
+        store = gw.StateStore("t", max_entries=100, max_bytes=1_000, stripes=1, clock=FakeClock())
+        for i in range(10):
+            store.set(f"k{i}", {"blob": "x" * 300}, expires_at=2_000)
+        store.set("huge", {"blob": "x" * 2_000}, expires_at=2_000)
+
+        metrics = store.metrics()
+        assert metrics["bytes"] <= 1_000
+        assert metrics["size"] == 3
+        assert metrics["too_large"] == 1
+        assert store.get("huge") is None
+
+    def test_memory_flat_under_churn(self):
+        clock = FakeClock()
+        store = gw.StateStore("t", max_entries=64, stripes=8, clock=clock)
+        for i in range(10_000):
+            clock.now += 1
+            store.incr(f"AGENT_{i % 500}:mnd-{i}", expires_at=clock.now + 1_800)
+        assert len(store) <= 64
+
+    def test_sqlite_tier_survives_restart_and_eviction(self, tmp_path):
+        clock = FakeClock()
+        path = tmp_path / "state.db"
+        store = gw.StateStore("call_counters", max_entries=2, stripes=1, db_path=path, clock=clock)
+        for _ in range(3):
+            store.incr("AGENT_001:mnd-1", expires_at=clock.now + 600)
+        store.incr("AGENT_002:mnd-2", expires_at=clock.now + 600)
+        store.incr("AGENT_003:mnd-3", expires_at=clock.now + 600)
+        # AGENT_001 was evicted from memory but is read back from SQLite.
+        assert store.incr("AGENT_001:mnd-1", expires_at=clock.now + 600) == 4
+        store.close()
+
+        reopened = gw.StateStore("call_counters", max_entries=2, stripes=1, db_path=path, clock=clock)
+        assert reopened.incr("AGENT_001:mnd-1", expires_at=clock.now + 600) == 5
+        assert reopened.metrics()["db_reads"] == 1
+        reopened.close()
+
+
+# ---------------------------------------------------------------------------
+# VerifiedTokenCache
+# ---------------------------------------------------------------------------
+
+class TestVerifiedTokenCache:
+    def make_cache(self, clock, key="k" * 32):
+        return gw.VerifiedTokenCache(key, gw._actor_from_claims, max_entries=2, clock=clock)
+
+    def token(self, key="k" * 32, exp=2_000, sub="AGENT_001"):
+        return gw.sign_token({"sub": sub, "passport_id": "pp-1", "roles": ["agent"], "exp": exp}, key)
+
+    def test_repeat_token_served_from_cache(self, monkeypatch):
+        cache = self.make_cache(FakeClock())
+        token = self.token(exp=int(time.time()) + 600)
+        first = cache.verify(token)
+
+        monkeypatch.setattr(gw, "verify_token", lambda *a: pytest.fail("re-verified cached token"))
+        assert cache.verify(token) is first
+        assert first.permissions == gw.ROLE_PERMISSIONS["agent"]
+        assert cache.metrics()["hits"] == 1
+
+    def test_expires_at_token_exp(self, monkeypatch):
+        clock = FakeClock(now=time.time())
+        cache = self.make_cache(clock)
+        token = self.token(exp=int(clock.now) + 5)
+        cache.verify(token)
+
+        clock.now += 10
+        monkeypatch.setattr(gw.time, "time", clock)
+        # Falls through to verify_token, which rejects the expired token.
+        with pytest.raises(ValueError, match="expired"):
+            cache.verify(token)
+        assert cache.metrics()["expired"] == 1
+
+    def test_bounded_lru(self):
+        cache = self.make_cache(FakeClock())
+        exp = int(time.time()) + 600
+        for i in range(5):
+            cache.verify(self.token(exp=exp, sub=f"AGENT_{i}"))
+        assert cache.metrics()["size"] == 2
+
+    def test_rotation_invalidates(self):
+        cache = self.make_cache(FakeClock())
+        token = self.token(exp=int(time.time()) + 600)
+        cache.verify(token)
+
+        cache.rotate("n" * 32)
+        with pytest.raises(ValueError, match="Invalid signature"):
+            cache.verify(token)
+        assert cache.metrics()["invalidated"] == 1
+
+    def test_role_permissions_precomputed(self):
+        assert gw.role_permissions(("agent", "senior")) == gw.ROLE_PERMISSIONS["senior"]
+        assert gw.role_permissions(("unknown",)) == frozenset()
+        assert gw.role_permissions(("agent",)) is gw.role_permissions(("agent",))
+
+
+# ---------------------------------------------------------------------------
+# AuditWriter
+# ---------------------------------------------------------------------------
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestAuditWriter:
+    def test_batches_and_flushes(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", flush_every=50, flush_interval_ms=10_000)
+        for i in range(120):
+            writer.write({"event": "EXECUTED", "n": i})
+        assert writer.flush()
+
+        records = read_jsonl(tmp_path / "audit.jsonl")
+        assert [r["n"] for r in records] == list(range(120))
+        assert writer.metrics()["batches"] <= 4
+        writer.close()
+
+    def test_high_risk_records_fsynced_without_waiting(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", flush_every=1_000, flush_interval_ms=10_000)
+        writer.write({"event": "APPROVED", "execution_id": "x"})
+        deadline = time.time() + 2
+        while writer.metrics()["written"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert writer.metrics()["fsyncs"] == 1
+        writer.close()
+
+    def test_overload_drops_and_counts(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", buffer_size=10, flush_every=1_000, flush_interval_ms=10_000)
+        for i in range(25):
+            writer.write({"event": "DENIED_ROLE", "n": i})
+        assert writer.metrics()["dropped"] == 15
+        writer.close()
+        assert len(read_jsonl(tmp_path / "audit.jsonl")) == 10
+
+    def test_close_drains_buffer(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", flush_every=1_000, flush_interval_ms=10_000)
+        for i in range(30):
+            writer.write({"event": "EXECUTED", "n": i})
+        writer.close()
+        assert len(read_jsonl(tmp_path / "audit.jsonl")) == 30
+        writer.write({"event": "EXECUTED"})
+        assert writer.metrics()["dropped"] == 1
+
+    def test_unserializable_record_does_not_stop_the_writer(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", flush_every=1_000, flush_interval_ms=10_000)
+        cyclic: dict = {"event": "EXECUTED"}
+        cyclic["self"] = cyclic
+        writer.write(cyclic)
+        writer.write({"event": "EXECUTED", "detail": {1, 2}, "n": 1})
+        assert writer.flush(timeout=2)
+        writer.write({"event": "EXECUTED", "n": 2})
+        assert writer.flush(timeout=2)
+        writer.close()
+
+        records = read_jsonl(tmp_path / "audit.jsonl")
+        assert [r["n"] for r in records] == [1, 2]
+        assert records[0]["detail"] == "{1, 2}"
+        assert writer.metrics()["errors"] == 1
+        assert writer.metrics()["written"] == 2
+
+    def test_size_rotation_gzips_closed_segments(self, tmp_path):
+        writer = gw.AuditWriter(tmp_path / "audit.jsonl", flush_every=1, rotate_bytes=500)
+        for i in range(40):
+            writer.write({"event": "EXECUTED", "n": i})
+            writer.flush()
+        writer.close()
+
+        deadline = time.time() + 2
+        while list(tmp_path.glob("*.jsonl.gz.tmp")) or list(tmp_path.glob("audit.*Z.jsonl")):
+            assert time.time() < deadline
+            time.sleep(0.01)
+        segments = sorted(tmp_path.glob("audit.*.jsonl.gz"))
+        assert len(segments) == writer.metrics()["rotations"] >= 2
+
+        records = []
+        for segment in segments:
+            with gzip.open(segment, "rt") as fh:
+                records += [json.loads(line) for line in fh]
+        records += read_jsonl(tmp_path / "audit.jsonl")
+        assert [r["n"] for r in records] == list(range(40))
+
+
+# ---------------------------------------------------------------------------
+# AuditQuery
+# ---------------------------------------------------------------------------
+
+def fill_audit(path, count, **writer_kwargs):
+    writer = gw.AuditWriter(path, flush_every=1, compress=False, **writer_kwargs)
+    for i in range(count):
+        writer.write({
+            "event": "EXECUTED" if i % 3 else "DENIED_ROLE",
+            "actor": f"AGENT_{i % 4}",
+            "intent": "search.read" if i % 2 else "quote.request",
+            "n": i,
+        })
+        if i % 10 == 9:
+            writer.flush()
+    writer.close()
+    return writer
+
+
+class TestAuditQuery:
+    def test_reverse_tail_matches_file(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        fill_audit(path, 200)
+        engine = gw.AuditQuery(path, block_size=97)
+
+        records, cursor = engine.query(limit=30)
+        assert [r["n"] for r in records] == list(range(199, 169, -1))
+        assert cursor is not None
+
+    def test_non_positive_limit_returns_nothing(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        fill_audit(path, 10)
+        engine = gw.AuditQuery(path)
+        assert engine.query(limit=0) == ([], None)
+        assert engine.query(limit=-5) == ([], None)
+
+    def test_filters(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        fill_audit(path, 120)
+        records, _ = gw.AuditQuery(path).query(event="DENIED_ROLE", actor="AGENT_0", intent="quote.request", limit=100)
+        expected = [i for i in range(119, -1, -1) if i % 3 == 0 and i % 4 == 0 and i % 2 == 0]
+        assert [r["n"] for r in records] == expected
+
+    def test_cursor_pages_across_rotated_segments(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        writer = fill_audit(path, 150, rotate_bytes=2_000, index_every=8)
+        for segment in tmp_path.glob("audit.*Z.jsonl"):
+            gw.AuditWriter._gzip(segment)
+        assert writer.metrics()["rotations"] >= 3
+        assert list(tmp_path.glob("audit.*.jsonl.gz"))
+
+        engine = gw.AuditQuery(path, block_size=128)
+        seen, cursor = [], None
+        while True:
+            records, cursor = engine.query(limit=7, cursor=cursor)
+            seen += [r["n"] for r in records]
+            if cursor is None:
+                break
+        assert seen == list(range(149, -1, -1))
+
+    def test_time_range_uses_index(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        fill_audit(path, 100, index_every=8)
+        all_records = [json.loads(line) for line in path.read_text().splitlines()]
+        since, until = all_records[20]["ts"], all_records[60]["ts"]
+
+        records, cursor = gw.AuditQuery(path).query(since=since, until=until, limit=1000)
+        assert [r["n"] for r in records] == list(range(60, 19, -1))
+        assert cursor is None
+        assert (tmp_path / "audit.jsonl.idx").stat().st_size == 13 * 16
+
+    def test_since_with_filter_skips_older_segments(self, tmp_path, monkeypatch):
+        path = tmp_path / "audit.jsonl"
+        writer = gw.AuditWriter(path, flush_every=1, compress=False, rotate_bytes=2_000, index_every=8)
+        for i in range(150):
+            # Only the newest records match, so nothing stops the scan early except ``since``.
+            writer.write({"event": "EXECUTED", "actor": "AGENT_9" if i >= 140 else f"AGENT_{i % 4}", "n": i})
+            if i % 10 == 9:
+                writer.flush()
+        writer.close()
+        for segment in tmp_path.glob("audit.*Z.jsonl"):
+            gw.AuditWriter._gzip(segment)
+        assert writer.metrics()["rotations"] >= 3
+
+        engine = gw.AuditQuery(path, block_size=128)
+        contents = {}
+        for segment in engine.segments():
+            with engine._open(segment) as fh:
+                contents[segment.name] = [json.loads(line) for line in fh.read().splitlines()]
+        names = list(contents)
+        # ``since`` falls inside the newest rotated segment.
+        since = contents[names[1]][len(contents[names[1]]) // 2]["ts"]
+
+        opened = []
+        original_open = engine._open
+        monkeypatch.setattr(engine, "_open", lambda segment: opened.append(segment.name) or original_open(segment))
+        records, cursor = engine.query(actor="AGENT_9", since=since, limit=100)
+
+        expected = [r for segment in contents.values() for r in reversed(segment)]
+        assert records == [r for r in expected if r["actor"] == "AGENT_9" and r["ts"] >= since]
+        assert records and cursor is None
+        # Older segments end before ``since`` and are never decompressed.
+        assert len(names) >= 4
+        assert opened == names[:2]
+
+    def test_cursor_survives_rotation(self, tmp_path):
+        path = tmp_path / "audit.jsonl"
+        fill_audit(path, 40)
+        engine = gw.AuditQuery(path)
+        first, cursor = engine.query(limit=10)
+
+        # The active segment rotates and new records arrive before the next page.
+        rotated = tmp_path / "audit.20260101T000000000000Z.jsonl"
+        gw.audit_index_path(path).rename(gw.audit_index_path(rotated))
+        path.rename(rotated)
+        fill_audit(path, 5)
+        second, _ = engine.query(limit=10, cursor=cursor)
+        assert [r["n"] for r in first + second] == list(range(39, 19, -1))
+
+    def test_malformed_cursor(self, tmp_path):
+        with pytest.raises(ValueError):
+            gw.AuditQuery(tmp_path / "audit.jsonl").query(cursor="not-a-cursor")
+
+
+# ---------------------------------------------------------------------------
+# Adapters
+# ---------------------------------------------------------------------------
+
+ACTOR = gw.Actor(agent_id="AGENT_001", passport_id="pp-1", roles=("agent",))
+
+
+class TestAdapterSlot:
+    def test_concurrency_limit(self):
+        peak = []
+
+        async def slow(payload, actor):
+            peak.append(slot.in_flight)
+            await asyncio.sleep(0.02)
+            return {"status": "ok"}
+
+        slot = gw.AdapterSlot("search.read", slow, max_concurrency=2, timeout=5)
+
+        async def scenario():
+            return await asyncio.gather(*(slot.run({}, ACTOR, "x") for _ in range(6)))
+
+        assert len(asyncio.run(scenario())) == 6
+        assert max(peak) == 2
+        assert slot.metrics()["calls"] == 6
+
+    def test_timeout_and_failure_map_to_gateway_errors(self):
+        async def hang(payload, actor):
+            await asyncio.sleep(10)
+
+        async def boom(payload, actor):
+            raise RuntimeError("provider down")
+
+        with pytest.raises(gw.HTTPException) as exc_info:
+            asyncio.run(gw.AdapterSlot("image.generate", hang, max_concurrency=1, timeout=0.05).run({}, ACTOR, "x"))
+        assert exc_info.value.status_code == 504
+
+        failing = gw.AdapterSlot("image.generate", boom, max_concurrency=1, timeout=1)
+        with pytest.raises(gw.HTTPException) as exc_info:
+            asyncio.run(failing.run({}, ACTOR, "x"))
+        assert exc_info.value.status_code == 502
+        assert failing.metrics()["errors"] == 1
+
+
+@pytest.fixture
+def slow_search():
+    original = gw.ADAPTERS["search.read"]
+
+    async def slow(payload, actor):
+        await asyncio.sleep(0.1)
+        return {"status": "ok", "q": payload.get("q")}
+
+    gw.register_adapter("search.read", slow, max_concurrency=32, timeout=5)
+    yield
+    gw.ADAPTERS["search.read"] = original
+
+
+# ---------------------------------------------------------------------------
+# Shared state backends
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def replicas(request, tmp_path):
+    """Two backend handles that share state, as two gateway replicas would."""
+    if request.param == "memory":
+        backend = gw.InProcessStateBackend()
+        yield backend, backend
+    elif request.param == "sqlite":
+        yield gw.SqliteStateBackend(tmp_path / "state.db"), gw.SqliteStateBackend(tmp_path / "state.db")
+    else:
+        with RespStandIn() as server:
+            yield gw.RedisStateBackend(port=server.port), gw.RedisStateBackend(port=server.port)
+
+
+class TestStateBackends:
+    def test_nonce_replay_rejected_across_replicas(self, replicas):
+        a, b = replicas
+
+        async def scenario():
+            return [await a.add_nonce("n-1", 300), await b.add_nonce("n-1", 300), await b.add_nonce("n-2", 300)]
+
+        assert asyncio.run(scenario()) == [True, False, True]
+
+    def test_nonce_reusable_after_ttl(self, replicas):
+        a, b = replicas
+
+        async def scenario():
+            first = await a.add_nonce("n-ttl", 0.05)
+            await asyncio.sleep(0.1)
+            return first, await b.add_nonce("n-ttl", 300)
+
+        assert asyncio.run(scenario()) == (True, True)
+
+    def test_quota_is_shared(self, replicas):
+        a, b = replicas
+        expires_at = time.time() + 600
+
+        async def scenario():
+            counts = await asyncio.gather(*(
+                (a if i % 2 else b).incr_quota("AGENT_001:mnd-1", expires_at) for i in range(10)
+            ))
+            return sorted(counts)
+
+        assert asyncio.run(scenario()) == list(range(1, 11))
+
+    def test_approvals(self, replicas):
+        a, b = replicas
+
+        async def scenario():
+            await a.add_approval("tok", 600)
+            return await b.approval_valid("tok"), await b.approval_valid("other")
+
+        assert asyncio.run(scenario()) == (True, False)
+
+    def test_token_bucket_burst_is_global(self, replicas):
+        a, b = replicas
+
+        async def scenario():
+            results = await asyncio.gather(*(
+                (a if i % 2 else b).take_token("AGENT_RL", 1.0, 5) for i in range(12)
+            ))
+            return [allowed for allowed, _ in results], max(retry for _, retry in results)
+
+        allowed, retry_after = asyncio.run(scenario())
+        assert allowed.count(True) == 5
+        assert 0 < retry_after <= 8
+
+
+def test_gcra_refills_at_rate():
+    allowed, tat, _ = gw.gcra(None, 100.0, rate=10, burst=2)
+    allowed2, tat, _ = gw.gcra(tat, 100.0, rate=10, burst=2)
+    denied, _, retry_after = gw.gcra(tat, 100.0, rate=10, burst=2)
+    assert (allowed, allowed2, denied) == (True, True, False)
+    assert retry_after == pytest.approx(0.1)
+    assert gw.gcra(tat, 100.1, rate=10, burst=2)[0]
+
+
+def test_sqlite_backend_waits_off_the_event_loop(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "state.db"
+    backend = gw.SqliteStateBackend(path)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # another process holds the write lock
+
+    async def scenario():
+        take = asyncio.create_task(backend.take_token("AGENT_SLOW", 1.0, 5))
+        ticks = 0
+        while ticks < 10:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not take.done()
+        other.execute("COMMIT")
+        result = await take
+        await backend.close()
+        return ticks, result
+
+    ticks, (allowed, _) = asyncio.run(scenario())
+    assert ticks == 10 and allowed
+    other.close()
+
+
+def test_make_state_backend(tmp_path):
+    assert isinstance(gw.make_state_backend("memory://"), gw.InProcessStateBackend)
+    assert isinstance(gw.make_state_backend(f"sqlite://{tmp_path}/s.db"), gw.SqliteStateBackend)
+    redis = gw.make_state_backend("redis://cache:6380/tenant-a:")
+    assert (redis.client.host, redis.client.port, redis.prefix) == ("cache", 6380, "tenant-a:")
+    with pytest.raises(RuntimeError):
+        gw.make_state_backend("etcd://x")
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    return TestClient(gw.app)
+
+
+def auth_headers(actions=("search.read",), roles=("agent",), **mandate_kwargs) -> dict:
+    return {
+        "x-passport-token": gw.issue_passport("AGENT_001", list(roles)),
+        "x-mandate-token": gw.issue_mandate("AGENT_001", list(actions), ["*"], **mandate_kwargs),
+    }
+
+
+class TestTrigger:
+    def test_duplicate_nonce_rejected(self, client):
+        headers = auth_headers()
+        body = {"intent": "search.read", "payload": {}, "nonce": "nonce-dup"}
+        assert client.post("/trigger", json=body, headers=headers).status_code == 200
+        assert client.post("/trigger", json=body, headers=headers).status_code == 409
+
+    def test_full_nonce_store_fails_closed(self, client, monkeypatch):
+        monkeypatch.setattr(gw, "state_backend", gw.InProcessStateBackend(nonce_capacity=1))
+        headers = auth_headers()
+
+        def trigger(nonce):
+            return client.post("/trigger", json={"intent": "search.read", "nonce": nonce}, headers=headers)
+
+        assert [trigger(n).status_code for n in ("n-1", "n-2", "n-1")] == [200, 503, 409]
+
+    def test_health_reports_store_metrics(self, client):
+        health = client.get("/health").json()
+        backend = health["state_backend"]
+        assert backend["backend"] == "memory"
+        assert backend["nonce"]["capacity"] == gw.NONCE_STORE_CAPACITY
+        assert set(health["stores"]) == {"idempotency"}
+
+    def test_mandate_call_limit(self, client):
+        headers = auth_headers(max_calls=2)
+        codes = [
+            client.post("/trigger", json={"intent": "search.read"}, headers=headers).status_code
+            for _ in range(3)
+        ]
+        assert codes == [200, 200, 429]
+
+    def test_full_call_counter_store_fails_closed(self, client, monkeypatch):
+        monkeypatch.setattr(gw, "state_backend", gw.InProcessStateBackend(quota_entries=1, stripes=1))
+        first, second = auth_headers(max_calls=1), auth_headers(max_calls=1)
+        codes = [
+            client.post("/trigger", json={"intent": "search.read"}, headers=headers).status_code
+            for headers in (first, second, first)
+        ]
+        assert codes == [200, 503, 429]
+
+    def test_idempotent_replay_returns_cached_result(self, client):
+        headers = auth_headers(actions=("quote.request",))
+        body = {"intent": "quote.request", "idempotency_key": "idem-quote-1"}
+        first = client.post("/trigger", json=body, headers=headers).json()
+        second = client.post("/trigger", json=body, headers=headers).json()
+        assert first["quote_id"] == second["quote_id"]
+
+    def test_audit_query_route(self, client):
+        admin = {"x-passport-token": gw.issue_passport("ADMIN_001", ["admin"])}
+        for i in range(3):
+            gw.audit.write({"event": "ROUTE_TEST", "actor": "AGENT_R", "n": i})
+
+        page = client.get("/audit/query", params={"event": "ROUTE_TEST", "limit": 2}, headers=admin).json()
+        assert [r["n"] for r in page["records"]] == [2, 1]
+        rest = client.get(
+            "/audit/query", params={"event": "ROUTE_TEST", "cursor": page["next_cursor"]}, headers=admin
+        ).json()
+        assert [r["n"] for r in rest["records"]] == [0]
+        assert client.get("/audit", params={"n": 1}, headers=admin).json()[0]["n"] == 2
+        assert client.get("/audit", params={"n": 0}, headers=admin).status_code == 422
+        assert client.get("/audit/query", params={"cursor": "bad"}, headers=admin).status_code == 400
+        assert client.get("/audit/query", headers=auth_headers()).status_code == 403
+
+    def test_batch_runs_adapters_concurrently(self, client, slow_search):
+        headers = auth_headers(actions=("search.read",), max_calls=20)
+        items = [{"intent": "search.read", "payload": {"q": i}} for i in range(10)]
+        started = time.perf_counter()
+        response = client.post("/trigger/batch", json={"items": items}, headers=headers)
+        elapsed = time.perf_counter() - started
+
+        assert [r["result"]["q"] for r in response.json()["results"]] == list(range(10))
+        assert elapsed < 0.6
+
+    def test_batch_items_fail_independently(self, client):
+        headers = auth_headers(actions=("search.read", "image.generate", "quote.request"), max_calls=20)
+        items = [
+            {"intent": "search.read"},
+            {"intent": "nope"},
+            {"intent": "memory.append"},
+            {"intent": "image.generate"},
+            {"intent": "search.read", "nonce": "batch-dup"},
+            {"intent": "search.read", "nonce": "batch-dup"},
+        ]
+        results = client.post("/trigger/batch", json={"items": items}, headers=headers).json()["results"]
+        assert [r["status_code"] for r in results] == [200, 400, 403, 202, 200, 409]
+        assert results[3]["detail"]["status"] == "pending_approval"
+
+    def test_batch_rejects_duplicate_idempotency_keys(self, client):
+        headers = auth_headers(actions=("quote.request",), max_calls=20)
+        items = [
+            {"intent": "quote.request", "idempotency_key": "idem-batch-1"},
+            {"intent": "quote.request", "idempotency_key": "idem-batch-1"},
+        ]
+        response = client.post("/trigger/batch", json={"items": items}, headers=headers)
+        assert response.status_code == 422
+        assert gw.idempotency_store.get("idem-batch-1") is None
+
+        items[1]["idempotency_key"] = "idem-batch-2"
+        assert client.post("/trigger/batch", json={"items": items}, headers=headers).status_code == 200
+
+    def test_batch_size_limit(self, client):
+        items = [{"intent": "search.read"}] * (gw.TRIGGER_BATCH_MAX_ITEMS + 1)
+        assert client.post("/trigger/batch", json={"items": items}, headers=auth_headers()).status_code == 422
+
+    def test_agent_rate_limit(self, client, monkeypatch):
+        monkeypatch.setattr(gw, "state_backend", gw.InProcessStateBackend())
+        monkeypatch.setattr(gw, "AGENT_RATE_PER_SECOND", 0.5)
+        monkeypatch.setattr(gw, "AGENT_RATE_BURST", 2)
+        headers = auth_headers()
+        responses = [client.post("/trigger", json={"intent": "search.read"}, headers=headers) for _ in range(3)]
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert responses[2].headers["retry-after"] == "2"
+
+    def test_rotated_passport_key_rejects_old_tokens(self, client):
+        headers = auth_headers()
+        body = {"intent": "search.read"}
+        assert client.post("/trigger", json=body, headers=headers).status_code == 200
+
+        old_key = gw.PASSPORT_SIGNING_KEY
+        gw.rotate_signing_keys(passport="r" * 32)
+        try:
+            assert client.post("/trigger", json=body, headers=headers).status_code == 401
+            assert client.post("/trigger", json=body, headers=auth_headers()).status_code == 200
+        finally:
+            gw.rotate_signing_keys(passport=old_key)
+
+
+def kakao_post(client, payload, *, raw: bytes | None = None, key: str | None = None):
+    body = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode()
+    signature = hmac.new((key or gw.PASSPORT_SIGNING_KEY).encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        "/kakao/webhook",
+        content=body,
+        headers={"content-type": "application/json", "x-kakao-signature": signature},
+    )
+
+
+def kakao_payload(utterance: str, user_id: str = "kakao-user-1") -> dict:
+    return {
+        "bot": {"id": "bot-1", "name": "mulberry"},
+        "intent": {"id": "intent-1", "name": "fallback", "extra": {"reason": {"code": 1}}},
+        "userRequest": {
+            "block": {"id": "block-1"},
+            "utterance": utterance,
+            "user": {"id": user_id, "type": "botUserKey", "properties": {"plusfriendUserKey": "pf"}},
+        },
+        "action": {"params": {}, "detailParams": {}},
+    }
+
+
+def test_hmac_verifier_matches_hmac_new_and_honours_grace_key():
+    verifier = gw.HmacVerifier("long-" * 40, "old-key")
+    body = b'{"utterance": "hi"}'
+    for key in ("long-" * 40, "old-key"):
+        assert verifier.verify(body, hmac.new(key.encode(), body, hashlib.sha256).hexdigest())
+    verifier.rotate("long-" * 40)
+    assert not verifier.verify(body, hmac.new(b"old-key", body, hashlib.sha256).hexdigest())
+    assert not verifier.verify(b"x" * (verifier.max_body_bytes + 1), "00" * 32)
+
+
+class TestKakaoWebhook:
+    def test_readonly_reply_is_preserialized(self, client):
+        response = kakao_post(client, kakao_payload("안녕"))
+        assert response.status_code == 200
+        assert response.content == gw.KAKAO_READONLY_REPLY
+        assert response.json()["template"]["outputs"][0]["simpleText"]["text"].startswith("안녕하세요")
+
+    def test_rejects_bad_signature_and_malformed_body(self, client):
+        body = json.dumps(kakao_payload("x")).encode()
+        headers = {"x-kakao-signature": "00" * 32}
+        assert client.post("/kakao/webhook", content=body, headers=headers).status_code == 401
+        assert kakao_post(client, None, raw=b"{not json").status_code == 400
+
+    def test_rejects_non_canonical_signature(self, client):
+        body = json.dumps(kakao_payload("x")).encode()
+        signature = hmac.new(gw.PASSPORT_SIGNING_KEY.encode(), body, hashlib.sha256).hexdigest()
+        for variant in (signature.upper(), f" {signature}", f"{signature[:32]} {signature[32:]}"):
+            headers = {"x-kakao-signature": variant}
+            assert client.post("/kakao/webhook", content=body, headers=headers).status_code == 401
+
+    def test_rotated_passport_key_rejects_old_kakao_signatures(self, client):
+        old_key = gw.PASSPORT_SIGNING_KEY
+        assert kakao_post(client, kakao_payload("hi"), key=old_key).status_code == 200
+
+        gw.rotate_signing_keys(passport="k" * 32)
+        try:
+            assert kakao_post(client, kakao_payload("hi"), key=old_key).status_code == 401
+            assert kakao_post(client, kakao_payload("hi"), key="k" * 32).status_code == 200
+        finally:
+            gw.rotate_signing_keys(passport=old_key)
+
+    def test_scan_matches_full_parse(self):
+        tricky = kakao_payload('따옴표 "배추" \\ 와 é 이모지 🍓', user_id="u\"1")
+        body = json.dumps(tricky, ensure_ascii=False).encode()
+        assert gw._scan_kakao_fields(body.decode()) is not None
+        assert gw.extract_kakao_fields(body) == ('따옴표 "배추" \\ 와 é 이모지 🍓', 'u"1')
+        # Non-ASCII escapes decode the same way as json.loads.
+        assert gw.extract_kakao_fields(json.dumps(tricky).encode()) == gw.extract_kakao_fields(body)
+
+    def test_ambiguous_payload_falls_back_to_json(self):
+        payload = kakao_payload("진짜")
+        payload["action"]["params"] = {"utterance": "가짜"}
+        payload["userRequest"]["user"] = {"properties": {"id": "nested"}, "id": "real-user"}
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        assert gw._scan_kakao_fields(body.decode()) is None
+        assert gw.extract_kakao_fields(body) == ("진짜", "real-user")
+        assert gw.extract_kakao_fields(b"{}") == ("", "")
+
+    def test_per_user_rate_limit(self, client, monkeypatch):
+        monkeypatch.setattr(gw, "state_backend", gw.InProcessStateBackend())
+        monkeypatch.setattr(gw, "KAKAO_USER_RATE_PER_SECOND", 0.5)
+        monkeypatch.setattr(gw, "KAKAO_USER_RATE_BURST", 2)
+        replies = [kakao_post(client, kakao_payload("hi", user_id="spiky")).content for _ in range(3)]
+        assert replies == [gw.KAKAO_READONLY_REPLY, gw.KAKAO_READONLY_REPLY, gw.KAKAO_THROTTLED_REPLY]
+        assert kakao_post(client, kakao_payload("hi", user_id="calm")).content == gw.KAKAO_READONLY_REPLY
+
+    def test_reply_builder_cached_by_normalized_utterance(self, client):
+        calls = []
+
+        def builder(utterance: str) -> bytes:
+            calls.append(utterance)
+            return gw.kakao_simple_text(f"답변: {utterance.strip()}")
+
+        gw.set_kakao_reply_builder(builder)
+        try:
+            first = kakao_post(client, kakao_payload("오늘 배추 가격", user_id="c1"))
+            second = kakao_post(client, kakao_payload("  오늘   배추 가격 ", user_id="c2"))
+            other = kakao_post(client, kakao_payload("내일", user_id="c3"))
+        finally:
+            gw.set_kakao_reply_builder(None)
+
+        assert first.content == second.content
+        assert "답변: 오늘 배추 가격" in first.text
+        assert "답변: 내일" in other.text
+        assert len(calls) == 2
+        assert gw.kakao_replies.metrics()["size"] == 0
+
+    def test_reply_cache_expires(self):
+        clock = FakeClock()
+        cache = gw.KakaoReplyCache(max_entries=2, ttl=10, clock=clock)
+        built = []
+
+        def build(utterance):
+            built.append(utterance)
+            return utterance.encode()
+
+        cache.get_or_build("A", build)
+        cache.get_or_build("a", build)
+        clock.now += 11
+        cache.get_or_build("a", build)
+        cache.get_or_build("b", build)
+        cache.get_or_build("c", build)
+        assert built == ["A", "a", "b", "c"]
+        assert cache.metrics() == {"hits": 1, "misses": 4, "expired": 1, "size": 2, "max_entries": 2}
@@ -0,0 +1,203 @@
+"""
+Mulberry Group Purchase - Campaign Join Concurrency Benchmark
+핫딜 공지 직후처럼 한 캠페인에 초당 N건의 참여를 몰아넣고 처리량/지연과 정합성 검증
+
+모드:
+    legacy     기존 방식 재현 (참여자 JSON 읽기 → 수정 → 쓰기, 단계별 커밋)
+    engine     CampaignJoinEngine (원자적 증가, 참여 1건 = 트랜잭션 1개)
+    sequencer  CampaignJoinEngine(sequencer=True) (마이크로 배치 그룹 커밋)
+
+검증: current_participants == 참여자 행 수 == 고유 사용자 수,
+      current_quantity == 주문 수량 합계 == 요청 수량 합계, 주문 수 == 참여 수
+
+Usage:
+    python mulberry-agent-system-v3/benchmarks/bench_campaign_join.py [--rate 1000] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+# v3 modules 와 공용 인프라(src)를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+sys.path.insert(0, str(ROOT.parent / "src"))
+
+from database.connection_pool import SQLitePool
+from group_purchase.database_schema import init_group_purchase_tables
+from group_purchase.group_purchase_manager import GroupPurchaseManager, ProductCategory
+from group_purchase.join_engine import CampaignJoinEngine
+
+
+def setup(path: str, workers: int):
+    """새 DB에 상품 1개 + 캠페인 1개 (목표 인원은 벤치 중 달성되지 않도록 크게)"""
+    pool = SQLitePool(path, size=workers + 1)
+    with redirect_stdout(StringIO()), pool.transaction() as conn:
+        init_group_purchase_tables(conn)
+        manager = GroupPurchaseManager(conn)
+        product = manager.create_product(
+            name="인제 옥수수 1박스",
+            description="벤치마크 상품",
+            category=ProductCategory.AGRICULTURAL,
+            producer_agent_id="AGENT-BENCH",
+            producer_location="강원도 인제군",
+            original_price=30000,
+            group_price=20000
+        )
+        campaign = manager.create_campaign(product.product_id)
+        conn.execute(
+            "UPDATE group_purchase_campaigns SET min_participants = ? WHERE campaign_id = ?",
+            (10 ** 9, campaign.campaign_id)
+        )
+    return pool, campaign.campaign_id
+
+
+def legacy_join(pool, campaign_id: str, user_id: str, quantity: int):
+    """기존 join_campaign 재현: 읽고-수정-쓰기 + 단계별 커밋"""
+    with pool.connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM group_purchase_campaigns WHERE campaign_id = ?", (campaign_id,)
+        ).fetchone()
+        participants = json.loads(row["participants"] or "[]")
+        current_participants = row["current_participants"]
+        if user_id not in participants:
+            participants.append(user_id)
+            current_participants += 1
+        conn.execute("""
+            UPDATE group_purchase_campaigns
+            SET current_participants = ?, current_quantity = ?, participants = ?
+            WHERE campaign_id = ?
+        """, (current_participants, row["current_quantity"] + quantity, json.dumps(participants), campaign_id))
+        conn.commit()
+        order_id = f"ORDER-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.getrandbits(48):012x}"
+        conn.execute("""
+            INSERT INTO group_purchase_orders (
+                order_id, campaign_id, user_id, product_id,
+                quantity, unit_price, total_price, created_at
+            ) VALUES (?, ?, ?, 'P', ?, 20000, ?, ?)
+        """, (order_id, campaign_id, user_id, quantity, 20000 * quantity, datetime.now()))
+        conn.commit()
+
+
+def run(mode: str, rate: float, seconds: float, workers: int, users: int, seed: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="join-bench-"), "join.db")
+    pool, campaign_id = setup(path, workers)
+    engine = None
+    if mode == "legacy":
+        join = lambda user_id, quantity: legacy_join(pool, campaign_id, user_id, quantity)  # noqa: E731
+    else:
+        engine = CampaignJoinEngine(pool, sequencer=(mode == "sequencer"))
+        join = lambda user_id, quantity: engine.join(campaign_id, user_id, quantity)  # noqa: E731
+
+    rng = random.Random(seed)
+    total = int(rate * seconds)
+    # 일부 사용자는 여러 번 참여 (수량만 누적, 참여자 수는 그대로)
+    requests = [(f"user{rng.randrange(users)}@mastodon.social", rng.randint(1, 3)) for _ in range(total)]
+    latencies = [0.0] * total
+    errors = []
+    next_index = iter(range(total))
+    lock = threading.Lock()
+    started = time.perf_counter() + 0.05
+
+    def worker():
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            # 개방형 부하: i번째 요청은 started + i/rate 에 도착
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            t0 = time.perf_counter()
+            try:
+                join(*requests[i])
+            except Exception as e:
+                errors.append(repr(e))
+            latencies[i] = time.perf_counter() - t0
+
+    with ThreadPoolExecutor(workers) as executor:
+        for _ in range(workers):
+            executor.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    if engine is not None:
+        engine.close()
+
+    with pool.connection() as conn:
+        campaign = conn.execute(
+            "SELECT current_participants, current_quantity FROM group_purchase_campaigns WHERE campaign_id = ?",
+            (campaign_id,)
+        ).fetchone()
+        member_rows = conn.execute(
+            "SELECT COUNT(*) FROM group_purchase_participants WHERE campaign_id = ?", (campaign_id,)
+        ).fetchone()[0]
+        orders, order_quantity = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM group_purchase_orders WHERE campaign_id = ?",
+            (campaign_id,)
+        ).fetchone()
+    pool.close()
+
+    expected_users = len({user_id for user_id, _ in requests})
+    expected_quantity = sum(quantity for _, quantity in requests)
+    checks = {
+        "participants": (campaign[0], expected_users),
+        "quantity": (campaign[1], expected_quantity),
+        "orders": (orders, total),
+        "order_quantity": (order_quantity, expected_quantity),
+    }
+    if mode != "legacy":
+        checks["member_rows"] = (member_rows, expected_users)
+
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "joins": total,
+        "joins_per_sec": total / elapsed,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "errors": len(errors),
+        "checks": checks,
+        "ok": not errors and all(actual == expected for actual, expected in checks.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공동구매 참여 동시성 벤치마크")
+    parser.add_argument("--rate", type=float, default=1000.0, help="목표 참여 요청/초")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=32, help="동시 요청 스레드 수")
+    parser.add_argument("--users", type=int, default=3000, help="사용자 풀 크기 (작을수록 중복 참여 ↑)")
+    parser.add_argument("--modes", default="legacy,engine,sequencer")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"📦 캠페인 1개에 {args.rate:,.0f} joins/s × {args.seconds:.0f}s, 스레드 {args.workers}개")
+    print(f"{'mode':<10} | {'joins/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | 정합성")
+    print("-" * 60)
+    failed = False
+    for mode in args.modes.split(","):
+        result = run(mode, args.rate, args.seconds, args.workers, args.users, args.seed)
+        mismatches = {k: v for k, v in result["checks"].items() if v[0] != v[1]}
+        verdict = "✅ OK" if result["ok"] else f"❌ {mismatches} errors={result['errors']}"
+        print(
+            f"{mode:<10} | {result['joins_per_sec']:>9,.0f} | {result['p50_ms']:>8.2f} | "
+            f"{result['p99_ms']:>8.2f} | {verdict}"
+        )
+        # legacy는 유실을 보여주기 위한 기준선이므로 실패로 치지 않음
+        failed |= mode != "legacy" and not result["ok"]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Mulberry Spirit Score - Bulk Ingestion Benchmark
+단말기 일일 동기화처럼 이벤트 N건을 한꺼번에 재생할 때 처리량 비교
+
+모드:
+    single   이벤트마다 record_event (기록 INSERT + 집계 갱신 + 커밋)
+    bulk     record_events_bulk(list) (executemany + 에이전트당 UPDATE 1회, 커밋 1회)
+    stream   record_events_bulk(generator, transaction_size=10000) (메모리 일정, 구간 커밋)
+
+검증: 모드마다 verify_aggregates() == [] 이고 기록 수 == 이벤트 수
+
+Usage:
+    python mulberry-agent-system-v3/benchmarks/bench_spirit_bulk.py [--events 100000] [--agents 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+# v3 modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import SQLitePool
+from spirit_score.database_schema import init_spirit_score_tables
+from spirit_score.spirit_score_manager import SpiritScoreEvent, SpiritScoreManager
+
+
+def generate(count: int, agents: int, seed: int):
+    """단말기 동기화 이벤트 (제너레이터 - stream 모드는 목록을 만들지 않음)"""
+    rng = random.Random(seed)
+    event_types = [event_type.value for event_type in SpiritScoreEvent]
+    for i in range(count):
+        yield {
+            "agent_id": f"AGENT-{rng.randrange(agents):04d}",
+            "event_type": rng.choice(event_types),
+            "reason": f"단말기 동기화 #{i}",
+            "related_entity": f"CUSTOMER-{rng.randrange(10000)}",
+        }
+
+
+def run(mode: str, count: int, agents: int, seed: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="spirit-bench-"), "spirit.db")
+    pool = SQLitePool(path, size=1)
+
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE agents (agent_id TEXT PRIMARY KEY, spirit_score REAL DEFAULT 0)")
+        conn.executemany("INSERT INTO agents VALUES (?, 0)", [(f"AGENT-{i:04d}",) for i in range(agents)])
+        conn.commit()
+        with redirect_stdout(StringIO()):
+            init_spirit_score_tables(conn)
+        manager = SpiritScoreManager(conn)
+
+        events = generate(count, agents, seed)
+        if mode != "stream":
+            events = list(events)
+
+        started = time.perf_counter()
+        if mode == "single":
+            for event in events:
+                manager.record_event(
+                    event["agent_id"],
+                    SpiritScoreEvent(event["event_type"]),
+                    event["reason"],
+                    related_entity=event["related_entity"]
+                )
+        elif mode == "bulk":
+            manager.record_events_bulk(events)
+        else:
+            manager.record_events_bulk(events, transaction_size=10000)
+        elapsed = time.perf_counter() - started
+
+        records = conn.execute("SELECT COUNT(*) FROM spirit_scores").fetchone()[0]
+        mismatches = manager.verify_aggregates()
+    pool.close()
+
+    return {
+        "mode": mode,
+        "events_per_sec": count / elapsed,
+        "seconds": elapsed,
+        "ok": records == count and not mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spirit Score 일괄 기록 벤치마크")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--modes", default="single,bulk,stream")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"📦 이벤트 {args.events:,}건, 에이전트 {args.agents}명 (SQLite WAL 파일)")
+    print(f"{'mode':<8} | {'events/s':>10} | {'seconds':>8} | 정합성")
+    print("-" * 45)
+    failed = False
+    baseline = None
+    for mode in args.modes.split(","):
+        result = run(mode, args.events, args.agents, args.seed)
+        baseline = baseline or result["seconds"]
+        print(
+            f"{mode:<8} | {result['events_per_sec']:>10,.0f} | {result['seconds']:>8.2f} | "
+            f"{'✅ OK' if result['ok'] else '❌ 불일치'}  (×{baseline / result['seconds']:.1f})"
+        )
+        failed |= not result["ok"]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
 
 from agent_factory.agent_factory import AgentFactory, StoreType
 from spirit_score.spirit_score_manager import SpiritScoreManager, SpiritScoreEvent
+from spirit_score.database_schema import init_spirit_score_tables
 from ap2_integration.mandate_manager import AP2MandateManager
 from jangseungbaegi_checker.checker import JangseungbaegiChecker
 
@@ -48,20 +49,6 @@ def init_demo_database():
         )
     """)
     
-    # spirit_scores 테이블
-    cursor.execute("""
-        CREATE TABLE spirit_scores (
-            record_id TEXT PRIMARY KEY,
-            agent_id TEXT NOT NULL,
-            event_type TEXT NOT NULL,
-            points REAL NOT NULL,
-            reason TEXT NOT NULL,
-            created_at TIMESTAMP NOT NULL,
-            related_entity TEXT,
-            metadata TEXT
-        )
-    """)
-    
     # mandates 테이블
     cursor.execute("""
         CREATE TABLE mandates (
@@ -104,6 +91,9 @@ def init_demo_database():
     """)
     
     conn.commit()
+    
+    # spirit_scores + spirit_score_totals 테이블
+    init_spirit_score_tables(conn)
     return conn
 
 
@@ -7,18 +7,19 @@ Windows/Linux 환경에서 실행 가능한 메인 서버
 
 import os
 import json
-import sqlite3
+import logging
 from datetime import datetime
 from typing import Optional, List, Dict
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 
 # 모듈 임포트
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))  # 공용 인프라 (outbound_delivery)
 
 from agent_factory.agent_factory import AgentFactory, StoreType, AgentStatus
 from terminal_matching.terminal_matching import TerminalMatchingManager, StoreInfo
@@ -26,6 +27,9 @@ from jangseungbaegi_library.library import JangseungbaegiLibrary, DocumentType,
 from business_operations.operations import BusinessOperationsManager
 from group_purchase.group_purchase_manager import GroupPurchaseManager, GroupPurchaseProduct, ProductCategory
 from group_purchase.database_schema import init_group_purchase_tables
+from group_purchase.join_engine import CampaignJoinEngine
+from group_purchase.deal_feed import DealFeed
+from database.connection_pool import create_pool
 
 
 # ============================================
@@ -50,34 +54,38 @@ def load_config():
 
 CONFIG = load_config()
 
+# 모듈 로그 (mulberry.*) 레벨: config.json의 logging.level
+logging.basicConfig(
+    level=CONFIG.get('logging', {}).get('level', 'INFO'),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+
 
 # ============================================
 # 데이터베이스 연결
 # ============================================
 
-def get_db_connection():
-    """데이터베이스 연결"""
-    db_type = CONFIG['database']['type']
-    
-    if db_type == 'sqlite':
-        db_path = CONFIG['database']['path']
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-    elif db_type == 'postgresql':
-        import psycopg2
-        pg_config = CONFIG['database']['postgresql']
-        conn = psycopg2.connect(
-            host=pg_config['host'],
-            port=pg_config['port'],
-            database=pg_config['database'],
-            user=pg_config['user'],
-            password=pg_config['password']
-        )
-        return conn
-    else:
-        raise ValueError(f"지원하지 않는 데이터베이스 타입: {db_type}")
+# 요청마다 연결을 새로 열지 않고 풀에서 빌려 쓴다.
+# DB를 쓰는 라우트는 동기 함수(def)라서 FastAPI 스레드풀에서 실행되고,
+# 동시 요청은 각자 풀의 연결을 사용한다.
+db_pool = create_pool(CONFIG['database'])
+
+# 공동구매 참여: 원자적 카운터 + 한 트랜잭션 (옵션: 마이크로 배치 그룹 커밋)
+_join_config = CONFIG.get('group_purchase', {})
+join_engine = CampaignJoinEngine(
+    db_pool,
+    sequencer=_join_config.get('join_sequencer', False),
+    batch_size=_join_config.get('join_batch_size', 128),
+    batch_window_ms=_join_config.get('join_batch_window_ms', 2.0)
+)
+
+# 핫딜/우리 마을 피드: 메모리에 물질화 + 직렬화된 JSON + ETag (단말기 폴링용)
+deal_feed = DealFeed(
+    db_pool,
+    top_n=_join_config.get('feed_top_n', 10),
+    refresh_interval=_join_config.get('feed_refresh_interval', 1.0),
+    reconcile_interval=_join_config.get('feed_reconcile_interval', 60.0)
+)
 
 
 # ============================================
@@ -94,10 +102,14 @@ async def lifespan(app: FastAPI):
     
     # 데이터베이스 초기화
     init_database()
+    deal_feed.start()
     
     yield
     
     # 종료 시
+    deal_feed.close()
+    join_engine.close()
+    db_pool.close()
     print("👋 Mulberry Agent System 종료")
 
 
@@ -115,7 +127,17 @@ app = FastAPI(
 
 def init_database():
     """데이터베이스 스키마 생성"""
-    conn = get_db_connection()
+    with db_pool.transaction() as conn:
+        _create_core_tables(conn)
+        
+        # 공동구매 테이블 초기화
+        init_group_purchase_tables(conn)
+    
+    print("✅ 데이터베이스 초기화 완료")
+
+
+def _create_core_tables(conn):
+    """핵심 테이블 (agents, terminals, documents, meetings, interactions)"""
     cursor = conn.cursor()
     
     # agents 테이블
@@ -223,15 +245,6 @@ def init_database():
             customer_rating INTEGER
         )
     """)
-    
-    conn.commit()
-    
-    # 공동구매 테이블 초기화
-    init_group_purchase_tables(conn)
-    
-    conn.close()
-    
-    print("✅ 데이터베이스 초기화 완료")
 
 
 # ============================================
@@ -287,19 +300,17 @@ async def health():
 # ============================================
 
 @app.post("/api/agents/create")
-async def create_agent(request: AgentCreateRequest):
+def create_agent(request: AgentCreateRequest):
     """에이전트 생성"""
     try:
-        conn = get_db_connection()
-        factory = AgentFactory(conn, CONFIG['agent_factory'])
-        
-        agent = factory.create_agent(
-            name=request.name,
-            store_type=StoreType(request.store_type),
-            raspberry_pi_id=request.raspberry_pi_id
-        )
-        
-        conn.close()
+        with db_pool.transaction() as conn:
+            factory = AgentFactory(conn, CONFIG['agent_factory'])
+            
+            agent = factory.create_agent(
+                name=request.name,
+                store_type=StoreType(request.store_type),
+                raspberry_pi_id=request.raspberry_pi_id
+            )
         
         return agent.to_dict()
     except Exception as e:
@@ -307,14 +318,10 @@ async def create_agent(request: AgentCreateRequest):
 
 
 @app.get("/api/agents/{agent_id}")
-async def get_agent(agent_id: str):
+def get_agent(agent_id: str):
     """에이전트 조회"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM agents WHERE agent_id = ?", (agent_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        row = conn.execute("SELECT * FROM agents WHERE agent_id = ?", (agent_id,)).fetchone()
     
     if not row:
         raise HTTPException(status_code=404, detail="에이전트를 찾을 수 없습니다")
@@ -323,27 +330,21 @@ async def get_agent(agent_id: str):
 
 
 @app.get("/api/agents")
-async def list_agents():
+def list_agents():
     """에이전트 목록"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM agents ORDER BY created_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    with db_pool.connection() as conn:
+        rows = conn.execute("SELECT * FROM agents ORDER BY created_at DESC").fetchall()
     
     return [dict(row) for row in rows]
 
 
 @app.post("/api/agents/{agent_id}/deploy")
-async def deploy_agent(agent_id: str, raspberry_pi_id: str):
+def deploy_agent(agent_id: str, raspberry_pi_id: str):
     """에이전트 배치"""
     try:
-        conn = get_db_connection()
-        factory = AgentFactory(conn, CONFIG['agent_factory'])
-        
-        agent = factory.deploy_agent(agent_id, raspberry_pi_id)
-        conn.close()
+        with db_pool.transaction() as conn:
+            factory = AgentFactory(conn, CONFIG['agent_factory'])
+            agent = factory.deploy_agent(agent_id, raspberry_pi_id)
         
         return agent.to_dict()
     except Exception as e:
@@ -351,15 +352,11 @@ async def deploy_agent(agent_id: str, raspberry_pi_id: str):
 
 
 @app.get("/api/agents/stats/daily")
-async def daily_agent_stats():
+def daily_agent_stats():
     """일일 통계"""
-    conn = get_db_connection()
-    factory = AgentFactory(conn, CONFIG['agent_factory'])
-    
-    stats = factory.get_daily_stats()
-    conn.close()
-    
-    return stats
+    with db_pool.connection() as conn:
+        factory = AgentFactory(conn, CONFIG['agent_factory'])
+        return factory.get_daily_stats()
 
 
 # ============================================
@@ -367,12 +364,9 @@ async def daily_agent_stats():
 # ============================================
 
 @app.post("/api/terminals/register")
-async def register_terminal(request: TerminalRegisterRequest):
+def register_terminal(request: TerminalRegisterRequest):
     """단말기 등록"""
     try:
-        conn = get_db_connection()
-        manager = TerminalMatchingManager(conn)
-        
         store_info = StoreInfo(
             store_name=request.store_name,
             store_type=request.store_type,
@@ -382,12 +376,12 @@ async def register_terminal(request: TerminalRegisterRequest):
             google_business_id=request.google_business_id
         )
         
-        terminal = manager.register_terminal(
-            serial_number=request.serial_number,
-            store_info=store_info
-        )
-        
-        conn.close()
+        with db_pool.transaction() as conn:
+            manager = TerminalMatchingManager(conn)
+            terminal = manager.register_terminal(
+                serial_number=request.serial_number,
+                store_info=store_info
+            )
         
         return terminal.to_dict()
     except Exception as e:
@@ -395,28 +389,20 @@ async def register_terminal(request: TerminalRegisterRequest):
 
 
 @app.get("/api/terminals")
-async def list_terminals():
+def list_terminals():
     """단말기 목록"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM terminals ORDER BY registered_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    with db_pool.connection() as conn:
+        rows = conn.execute("SELECT * FROM terminals ORDER BY registered_at DESC").fetchall()
     
     return [dict(row) for row in rows]
 
 
 @app.get("/api/terminals/stats")
-async def terminal_stats():
+def terminal_stats():
     """단말기 통계"""
-    conn = get_db_connection()
-    manager = TerminalMatchingManager(conn)
-    
-    stats = manager.get_matching_stats()
-    conn.close()
-    
-    return stats
+    with db_pool.connection() as conn:
+        manager = TerminalMatchingManager(conn)
+        return manager.get_matching_stats()
 
 
 # ============================================
@@ -424,33 +410,27 @@ async def terminal_stats():
 # ============================================
 
 @app.get("/api/library/constitution")
-async def get_constitution():
+def get_constitution():
     """장승배기 헌법"""
-    conn = get_db_connection()
-    library = JangseungbaegiLibrary(conn)
-    
-    constitution = library.get_constitution()
-    conn.close()
-    
-    return constitution.to_dict()
+    with db_pool.connection() as conn:
+        library = JangseungbaegiLibrary(conn)
+        return library.get_constitution().to_dict()
 
 
 @app.post("/api/library/meetings/schedule")
-async def schedule_meeting(request: MeetingScheduleRequest):
+def schedule_meeting(request: MeetingScheduleRequest):
     """회의 일정"""
     try:
-        conn = get_db_connection()
-        library = JangseungbaegiLibrary(conn)
-        
-        meeting = library.schedule_meeting(
-            title=request.title,
-            meeting_type=MeetingType(request.meeting_type),
-            scheduled_at=datetime.fromisoformat(request.scheduled_at),
-            invited_agents=request.invited_agents,
-            agenda=request.agenda
-        )
-        
-        conn.close()
+        with db_pool.transaction() as conn:
+            library = JangseungbaegiLibrary(conn)
+            
+            meeting = library.schedule_meeting(
+                title=request.title,
+                meeting_type=MeetingType(request.meeting_type),
+                scheduled_at=datetime.fromisoformat(request.scheduled_at),
+                invited_agents=request.invited_agents,
+                agenda=request.agenda
+            )
         
         return meeting.to_dict()
     except Exception as e:
@@ -458,15 +438,11 @@ async def schedule_meeting(request: MeetingScheduleRequest):
 
 
 @app.get("/api/library/stats")
-async def library_stats():
+def library_stats():
     """도서관 통계"""
-    conn = get_db_connection()
-    library = JangseungbaegiLibrary(conn)
-    
-    stats = library.get_library_stats()
-    conn.close()
-    
-    return stats
+    with db_pool.connection() as conn:
+        library = JangseungbaegiLibrary(conn)
+        return library.get_library_stats()
 
 
 # ============================================
@@ -474,33 +450,31 @@ async def library_stats():
 # ============================================
 
 @app.get("/api/dashboard")
-async def dashboard():
+def dashboard():
     """전체 대시보드"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 에이전트 통계
-    cursor.execute("SELECT COUNT(*) FROM agents")
-    total_agents = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM agents WHERE status = 'active'")
-    active_agents = cursor.fetchone()[0]
-    
-    # 단말기 통계
-    cursor.execute("SELECT COUNT(*) FROM terminals")
-    total_terminals = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM terminals WHERE status = 'active'")
-    active_terminals = cursor.fetchone()[0]
-    
-    # 오늘의 상호작용
-    cursor.execute("""
-        SELECT COUNT(*) FROM interactions 
-        WHERE DATE(created_at) = DATE('now')
-    """)
-    today_interactions = cursor.fetchone()[0]
-    
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        
+        # 에이전트 통계
+        cursor.execute("SELECT COUNT(*) FROM agents")
+        total_agents = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT COUNT(*) FROM agents WHERE status = 'active'")
+        active_agents = cursor.fetchone()[0]
+        
+        # 단말기 통계
+        cursor.execute("SELECT COUNT(*) FROM terminals")
+        total_terminals = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT COUNT(*) FROM terminals WHERE status = 'active'")
+        active_terminals = cursor.fetchone()[0]
+        
+        # 오늘의 상호작용
+        cursor.execute("""
+            SELECT COUNT(*) FROM interactions 
+            WHERE DATE(created_at) = DATE('now')
+        """)
+        today_interactions = cursor.fetchone()[0]
     
     return {
         "agents": {
@@ -523,24 +497,22 @@ async def dashboard():
 # ============================================
 
 @app.post("/api/group-purchase/products")
-async def create_group_purchase_product(request: dict):
+def create_group_purchase_product(request: dict):
     """공동구매 상품 등록"""
     try:
-        conn = get_db_connection()
-        manager = GroupPurchaseManager(conn)
-        
-        product = manager.create_product(
-            name=request['name'],
-            description=request['description'],
-            category=ProductCategory(request['category']),
-            producer_agent_id=request['producer_agent_id'],
-            producer_location=request['producer_location'],
-            original_price=request['original_price'],
-            group_price=request['group_price'],
-            min_quantity=request.get('min_quantity', 10)
-        )
-        
-        conn.close()
+        with db_pool.transaction() as conn:
+            manager = GroupPurchaseManager(conn)
+            
+            product = manager.create_product(
+                name=request['name'],
+                description=request['description'],
+                category=ProductCategory(request['category']),
+                producer_agent_id=request['producer_agent_id'],
+                producer_location=request['producer_location'],
+                original_price=request['original_price'],
+                group_price=request['group_price'],
+                min_quantity=request.get('min_quantity', 10)
+            )
         
         return product.to_dict()
     except Exception as e:
@@ -548,66 +520,58 @@ async def create_group_purchase_product(request: dict):
 
 
 @app.post("/api/group-purchase/campaigns")
-async def create_campaign(request: dict):
+def create_campaign(request: dict):
     """공동구매 캠페인 시작"""
     try:
-        conn = get_db_connection()
-        manager = GroupPurchaseManager(conn)
-        
-        campaign = manager.create_campaign(
-            product_id=request['product_id'],
-            duration_days=request.get('duration_days', 7)
-        )
-        
-        conn.close()
+        with db_pool.transaction() as conn:
+            manager = GroupPurchaseManager(conn)
+            
+            campaign = manager.create_campaign(
+                product_id=request['product_id'],
+                duration_days=request.get('duration_days', 7)
+            )
         
+        deal_feed.add_campaign(campaign.campaign_id)
         return campaign.get_progress()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/group-purchase/join")
-async def join_campaign(request: dict):
+def join_campaign(request: dict):
     """공동구매 참여"""
     try:
-        conn = get_db_connection()
-        manager = GroupPurchaseManager(conn)
-        
-        result = manager.join_campaign(
+        result = join_engine.join(
             campaign_id=request['campaign_id'],
             user_id=request['user_id'],
             quantity=request.get('quantity', 1)
         )
-        
-        conn.close()
-        
-        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if result["success"]:
+        deal_feed.apply_progress(result["campaign"])
+    return result
 
 
 @app.get("/api/group-purchase/hot-deals")
-async def get_hot_deals():
+def get_hot_deals(if_none_match: Optional[str] = Header(default=None)):
     """오늘의 핫딜"""
-    conn = get_db_connection()
-    manager = GroupPurchaseManager(conn)
-    
-    hot_deals = manager.get_hot_deals(10)
-    conn.close()
-    
-    return {"hot_deals": hot_deals}
+    return _feed_response(*deal_feed.hot_deals(if_none_match))
 
 
 @app.get("/api/group-purchase/village/{village_id}")
-async def get_village_purchases(village_id: str):
+def get_village_purchases(village_id: str, if_none_match: Optional[str] = Header(default=None)):
     """우리 마을 공동구매"""
-    conn = get_db_connection()
-    manager = GroupPurchaseManager(conn)
-    
-    purchases = manager.get_village_purchases(village_id)
-    conn.close()
-    
-    return {"purchases": purchases}
+    return _feed_response(*deal_feed.village(village_id, if_none_match))
+
+
+def _feed_response(body: Optional[bytes], etag: str) -> Response:
+    """직렬화된 피드 응답 (단말기 ETag가 같으면 304)"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # ============================================
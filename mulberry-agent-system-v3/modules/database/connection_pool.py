@@ -0,0 +1,419 @@
+"""
+Mulberry Database - Connection Pool
+CTO Koda
+
+요청마다 연결을 새로 여는 대신 풀에서 빌려 쓰는 DB 접근 계층
+
+- SQLite: WAL 모드 + 튜닝된 PRAGMA, 연결별 prepared statement 캐시 재사용
+- PostgreSQL: psycopg2 연결 재사용
+- 작업 단위(transaction): 여러 구문을 실행해도 커밋은 한 번
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+# SQLite 연결마다 적용하는 PRAGMA
+# (foreign_keys는 기존 스키마/데이터 호환을 위해 켜지 않음)
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",          # 읽기와 쓰기가 서로 막지 않음
+    "synchronous": "NORMAL",        # WAL에서는 NORMAL로도 손상 없음
+    "busy_timeout": 5000,           # 쓰기 잠금 대기 (ms)
+    "temp_store": "MEMORY",
+    "cache_size": -16000,           # 연결당 페이지 캐시 16MB
+    "mmap_size": 128 * 1024 * 1024,
+}
+
+
+# ============================================
+# 풀 연결
+# ============================================
+
+class PooledConnection:
+    """
+    풀에서 빌린 연결
+
+    매니저들은 기존처럼 cursor() / execute() / commit()을 호출하면 된다.
+    transaction() 블록 안에서는 commit()이 미뤄지고, 블록이 정상 종료될 때
+    한 번만 커밋된다 (예외 시 전체 롤백).
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw):
+        self._pool = pool
+        self.raw = raw
+        self.in_transaction = False
+
+    def cursor(self):
+        return self.raw.cursor()
+
+    def execute(self, sql: str, params=()):
+        cursor = self.raw.cursor()
+        cursor.execute(sql, params)
+        return cursor
+
+    def executemany(self, sql: str, seq_of_params):
+        cursor = self.raw.cursor()
+        cursor.executemany(sql, seq_of_params)
+        return cursor
+
+    def commit(self):
+        if self.in_transaction:
+            self._pool._count("deferred_commits")
+            return
+        self.raw.commit()
+        self._pool._count("commits")
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        """풀 연결은 블록이 끝날 때 반납되므로 아무것도 하지 않음"""
+
+    def reconnect(self):
+        """끊긴 연결을 버리고 새 연결로 교체"""
+        self.raw = self._pool._replace(self.raw)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+# ============================================
+# 연결 풀
+# ============================================
+
+class ConnectionPool:
+    """
+    스레드 안전 연결 풀
+
+    최대 size개의 연결을 필요할 때 만들고, 반납된 연결은 가장 최근 것부터
+    재사용한다 (LIFO: 캐시가 따뜻한 연결 우선). 모두 사용 중이면 timeout초
+    동안 기다린 뒤 TimeoutError를 낸다.
+    """
+
+    # 트랜잭션 안에서 읽은 행을 잠그는 SELECT 접미사
+    # (SQLite는 transaction(immediate=True)가 DB 쓰기 잠금을 이미 잡음)
+    lock_clause = ""
+
+    def __init__(self, size: int = 8, timeout: float = 10.0):
+        """
+        Args:
+            size: 최대 연결 수
+            timeout: 연결 대기 시간 (초)
+        """
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "waits": 0,
+            "commits": 0,
+            "deferred_commits": 0,
+            "rollbacks": 0,
+            "discarded": 0,
+        }
+
+    # ---- 하위 클래스 구현 ----
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _begin(self, raw, immediate: bool):
+        """트랜잭션 시작 (기본: 드라이버의 암묵적 BEGIN 사용)"""
+
+    def _reset(self, raw):
+        """반납 전 커밋되지 않은 작업 정리"""
+        raw.rollback()
+
+    # ---- 공개 API ----
+
+    @contextmanager
+    def connection(self):
+        """
+        연결 빌리기 (자동 커밋 모드)
+
+        매니저의 commit()은 즉시 실행되고, 블록이 끝나면 연결은 풀로 돌아간다.
+        """
+        conn = PooledConnection(self, self._acquire())
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = not self._rollback(conn.raw)
+            raise
+        finally:
+            if not broken:
+                broken = not self._safe_reset(conn.raw)
+            self._release(conn.raw, broken)
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """
+        작업 단위 (unit of work)
+
+        블록 안의 모든 구문은 하나의 트랜잭션이며, 블록이 정상 종료될 때 한 번
+        커밋된다. immediate=True면 SQLite에서 시작 시 쓰기 잠금을 잡는다
+        (읽고-수정-쓰기 작업용).
+        """
+        with self.connection() as conn:
+            self._begin(conn.raw, immediate)
+            conn.in_transaction = True
+            try:
+                yield conn
+            finally:
+                conn.in_transaction = False
+            conn.raw.commit()
+            self._count("commits")
+
+    def close(self):
+        """유휴 연결을 모두 닫음 (사용 중인 연결은 반납 시 닫힘)"""
+        self._closed = True
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(raw)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+            }
+
+    # ---- 내부 ----
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            raw = self._idle.get_nowait()
+            self._count("reused")
+            return raw
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+                self.stats["created"] += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        self._count("waits")
+        try:
+            raw = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"DB 연결 풀 고갈: {self.size}개 모두 사용 중 ({self.timeout}초 대기)")
+        self._count("reused")
+        return raw
+
+    def _release(self, raw, broken: bool = False):
+        if broken or self._closed:
+            self._discard(raw)
+            return
+        self._idle.put(raw)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+            self.stats["discarded"] += 1
+
+    def _replace(self, raw):
+        self._discard(raw)
+        with self._lock:
+            self._created += 1
+            self.stats["created"] += 1
+        return self._connect()
+
+    def _rollback(self, raw) -> bool:
+        self._count("rollbacks")
+        try:
+            raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _safe_reset(self, raw) -> bool:
+        try:
+            self._reset(raw)
+            return True
+        except Exception:
+            return False
+
+
+class SQLitePool(ConnectionPool):
+    """
+    SQLite 연결 풀
+
+    sqlite3는 연결마다 컴파일된 구문(prepared statement)을 캐시하므로,
+    연결을 재사용하면 같은 SQL을 다시 컴파일하지 않는다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 8,
+        timeout: float = 10.0,
+        statement_cache_size: int = 256,
+        pragmas: Optional[Dict] = None,
+    ):
+        """
+        Args:
+            path: DB 파일 경로 (':memory:'는 연결마다 별도 DB이므로 size=1로 고정)
+            size: 최대 연결 수
+            timeout: 연결 대기 시간 (초)
+            statement_cache_size: 연결당 prepared statement 캐시 크기
+            pragmas: DEFAULT_SQLITE_PRAGMAS에 덮어쓸 PRAGMA
+        """
+        if path == ":memory:":
+            size = 1
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        super().__init__(size=size, timeout=timeout)
+        self.path = path
+        self.statement_cache_size = statement_cache_size
+        self.pragmas = {**DEFAULT_SQLITE_PRAGMAS, **(pragmas or {})}
+
+    def _connect(self):
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.pragmas["busy_timeout"] / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        raw.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            raw.execute(f"PRAGMA {name}={value}")
+        return raw
+
+    def _begin(self, raw, immediate: bool):
+        if immediate:
+            raw.execute("BEGIN IMMEDIATE")
+
+    def _reset(self, raw):
+        if raw.in_transaction:
+            raw.rollback()
+
+
+class PostgresPool(ConnectionPool):
+    """PostgreSQL 연결 풀 (psycopg2)"""
+
+    lock_clause = " FOR UPDATE"
+
+    def __init__(self, pg_config: Dict, size: int = 8, timeout: float = 10.0):
+        """
+        Args:
+            pg_config: host/port/database/user/password
+            size: 최대 연결 수
+            timeout: 연결 대기 시간 (초)
+        """
+        super().__init__(size=size, timeout=timeout)
+        self.pg_config = pg_config
+
+    def _connect(self):
+        import psycopg2
+
+        return psycopg2.connect(
+            host=self.pg_config['host'],
+            port=self.pg_config['port'],
+            database=self.pg_config['database'],
+            user=self.pg_config['user'],
+            password=self.pg_config['password'],
+        )
+
+    def _reset(self, raw):
+        if raw.closed:
+            raise ConnectionError("connection closed")
+        raw.rollback()
+
+
+def create_pool(db_config: Dict) -> ConnectionPool:
+    """
+    설정(config.json의 database 섹션)으로 연결 풀 생성
+
+    Args:
+        db_config: type, path, postgresql, pool_size, pool_timeout,
+                   statement_cache_size, sqlite_pragmas
+
+    Returns:
+        연결 풀
+    """
+    db_type = db_config['type']
+    size = db_config.get('pool_size', 8)
+    timeout = db_config.get('pool_timeout', 10.0)
+
+    if db_type == 'sqlite':
+        return SQLitePool(
+            db_config['path'],
+            size=size,
+            timeout=timeout,
+            statement_cache_size=db_config.get('statement_cache_size', 256),
+            pragmas=db_config.get('sqlite_pragmas'),
+        )
+    elif db_type == 'postgresql':
+        return PostgresPool(db_config['postgresql'], size=size, timeout=timeout)
+    else:
+        raise ValueError(f"지원하지 않는 데이터베이스 타입: {db_type}")
+
+
+if __name__ == "__main__":
+    # 테스트: 여러 스레드가 연결 4개를 나눠 쓰며 작업 단위로 기록
+    import tempfile
+    import time
+
+    pool = SQLitePool(os.path.join(tempfile.mkdtemp(), "pool_demo.db"), size=4)
+
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS visits (worker INTEGER, n INTEGER)")
+
+    def worker(worker_id: int):
+        for n in range(200):
+            with pool.transaction() as conn:
+                conn.execute("INSERT INTO visits VALUES (?, ?)", (worker_id, n))
+                conn.commit()  # 매니저식 commit() → 블록 끝까지 미뤄짐
+                conn.execute("INSERT INTO visits VALUES (?, ?)", (worker_id, -n))
+                conn.commit()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with pool.connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+
+    print(f"✅ {total}행 기록 ({elapsed:.2f}초)")
+    print(f"📊 풀 상태: {pool.metrics()}")
+    pool.close()
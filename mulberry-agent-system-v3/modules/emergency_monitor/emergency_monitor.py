@@ -10,9 +10,10 @@ from typing import Optional, Dict, List
 from datetime import datetime, timedelta
 from enum import Enum
 import json
-import requests
 import time
 
+from outbound_delivery import NO_RETRY, DeliveryEngine, DeliveryError, get_delivery_engine
+
 
 class ErrorSeverity(str, Enum):
     """에러 심각도"""
@@ -102,11 +103,15 @@ class RaspberryPiHealthCheck:
     
     각 단말기의 상태를 주기적으로 체크하고
     문제 발생 시 자동 복구 시도
+    
+    HTTP 호출은 공용 전송 엔진 사용 (keep-alive 연결 재사용,
+    응답 없는 단말기는 서킷 브레이커가 타임아웃 대기 없이 즉시 실패 처리)
     """
     
-    def __init__(self, terminal_id: str, terminal_ip: str):
+    def __init__(self, terminal_id: str, terminal_ip: str, delivery: Optional[DeliveryEngine] = None):
         self.terminal_id = terminal_id
         self.terminal_ip = terminal_ip
+        self.delivery = delivery or get_delivery_engine()
         
         # 헬스 체크 간격 (초)
         self.check_interval = 60
@@ -125,10 +130,12 @@ class RaspberryPiHealthCheck:
             응답 여부
         """
         try:
-            # HTTP 헬스 체크 엔드포인트
-            response = requests.get(
+            # HTTP 헬스 체크 엔드포인트 (재시도 없음 - 연속 실패 횟수로 판단)
+            response = self.delivery.request_sync(
+                "GET",
                 f"http://{self.terminal_ip}:8000/health",
-                timeout=5
+                timeout=5,
+                retry=NO_RETRY
             )
             
             if response.status_code == 200:
@@ -139,7 +146,7 @@ class RaspberryPiHealthCheck:
                 self.consecutive_failures += 1
                 return False
         
-        except Exception as e:
+        except DeliveryError as e:
             self.consecutive_failures += 1
             print(f"❌ 단말기 {self.terminal_id} 응답 없음: {e}")
             return False
@@ -152,9 +159,11 @@ class RaspberryPiHealthCheck:
             상태 정보
         """
         try:
-            response = requests.get(
+            response = self.delivery.request_sync(
+                "GET",
                 f"http://{self.terminal_ip}:8000/status",
-                timeout=5
+                timeout=5,
+                retry=NO_RETRY
             )
             
             if response.status_code == 200:
@@ -162,7 +171,7 @@ class RaspberryPiHealthCheck:
             else:
                 return {"error": "Status check failed"}
         
-        except Exception as e:
+        except (DeliveryError, ValueError) as e:  # ValueError: JSON 이 아닌 200 응답
             return {"error": str(e)}
     
     def is_healthy(self) -> bool:
@@ -177,9 +186,12 @@ class RaspberryPiHealthCheck:
             성공 여부
         """
         try:
-            response = requests.post(
+            # 재시작은 멱등이 아니므로 재시도 없음
+            response = self.delivery.request_sync(
+                "POST",
                 f"http://{self.terminal_ip}:8000/restart",
-                timeout=10
+                timeout=10,
+                retry=NO_RETRY
             )
             
             if response.status_code == 200:
@@ -189,7 +201,7 @@ class RaspberryPiHealthCheck:
                 print(f"❌ 단말기 {self.terminal_id} 재시작 실패")
                 return False
         
-        except Exception as e:
+        except DeliveryError as e:
             print(f"❌ 재시작 요청 실패: {e}")
             return False
 
@@ -202,12 +214,14 @@ class AIEmergencyMonitor:
     문제 발생 시 AI가 자동으로 진단하고 복구 시도
     """
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, delivery: Optional[DeliveryEngine] = None):
         """
         Args:
             db_connection: 데이터베이스 연결
+            delivery: 외부 HTTP 전송 엔진 (None = 프로세스 공용 엔진)
         """
         self.db = db_connection
+        self.delivery = delivery or get_delivery_engine()
         
         # 라즈베리파이 헬스 체크 목록
         self.pi_health_checks: Dict[str, RaspberryPiHealthCheck] = {}
@@ -286,9 +300,16 @@ class AIEmergencyMonitor:
     def detect_api_server_issue(self, api_url: str) -> Optional[EmergencyEvent]:
         """API 서버 문제 감지"""
         try:
-            response = requests.get(f"{api_url}/health", timeout=5)
+            try:
+                status_code = self.delivery.request_sync(
+                    "GET", f"{api_url}/health", timeout=5, retry=NO_RETRY
+                ).status_code
+            except DeliveryError as e:
+                if e.status_code is None:
+                    raise  # 연결 실패 / 서킷 open → 아래 CRITICAL 처리
+                status_code = e.status_code
             
-            if response.status_code != 200:
+            if status_code != 200:
                 event_id = f"EMG-{datetime.now().strftime('%Y%m%d%H%M%S')}"
                 
                 event = EmergencyEvent(
@@ -296,7 +317,7 @@ class AIEmergencyMonitor:
                     component=SystemComponent.API_SERVER,
                     severity=ErrorSeverity.ERROR,
                     error_type="server_error",
-                    error_message=f"API 서버 응답 코드: {response.status_code}"
+                    error_message=f"API 서버 응답 코드: {status_code}"
                 )
                 
                 return event
@@ -481,9 +502,12 @@ class AIEmergencyMonitor:
         event.recovery_log.append(f"{datetime.now()}: 데이터베이스 재연결 시도")
         
         try:
-            # 재연결 시도
-            self.db = sqlite3.connect('mulberry.db')
-            self.db.row_factory = sqlite3.Row
+            # 재연결 시도 (풀 연결이면 풀에서 새 연결로 교체)
+            if hasattr(self.db, 'reconnect'):
+                self.db.reconnect()
+            else:
+                self.db = sqlite3.connect('mulberry.db')
+                self.db.row_factory = sqlite3.Row
             
             # 테스트 쿼리
             cursor = self.db.cursor()
@@ -567,7 +591,7 @@ class AIEmergencyMonitor:
     
     def register_raspberry_pi(self, terminal_id: str, terminal_ip: str):
         """라즈베리파이 단말기 등록"""
-        health_check = RaspberryPiHealthCheck(terminal_id, terminal_ip)
+        health_check = RaspberryPiHealthCheck(terminal_id, terminal_ip, self.delivery)
         self.pi_health_checks[terminal_id] = health_check
         
         print(f"✅ 단말기 등록: {terminal_id} ({terminal_ip})")
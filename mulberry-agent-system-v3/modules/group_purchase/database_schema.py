@@ -256,6 +256,27 @@ def init_group_purchase_tables(db_connection):
         )
     """)
     
+    # ============================================
+    # 8. 공동구매 참여자 테이블
+    # ============================================
+    # 캠페인의 participants(JSON 목록)를 대체: 참여 처리 시 목록 전체를
+    # 읽고 다시 쓰지 않고 한 행만 추가/갱신한다.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS group_purchase_participants (
+            campaign_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            
+            -- 누적 수량
+            quantity INTEGER NOT NULL DEFAULT 0,
+            
+            -- 메타
+            joined_at TIMESTAMP NOT NULL,
+            
+            PRIMARY KEY (campaign_id, user_id),
+            FOREIGN KEY (campaign_id) REFERENCES group_purchase_campaigns(campaign_id)
+        )
+    """)
+    
     # ============================================
     # 인덱스 생성
     # ============================================
@@ -293,6 +314,23 @@ def init_group_purchase_tables(db_connection):
         ON group_purchase_orders(campaign_id)
     """)
     
+    # 참여자 조회 최적화 (사용자별 참여 내역)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_participants_user 
+        ON group_purchase_participants(user_id, joined_at)
+    """)
+    
+    # 기존 participants(JSON 목록) → 참여자 테이블 이관 (이미 이관된 행은 건너뜀)
+    cursor.execute("""
+        INSERT OR IGNORE INTO group_purchase_participants (campaign_id, user_id, quantity, joined_at)
+        SELECT c.campaign_id, j.value,
+               COALESCE((SELECT SUM(o.quantity) FROM group_purchase_orders o
+                         WHERE o.campaign_id = c.campaign_id AND o.user_id = j.value), 0),
+               c.created_at
+        FROM group_purchase_campaigns c, json_each(c.participants) j
+        WHERE c.participants IS NOT NULL AND c.participants != '[]'
+    """)
+    
     db_connection.commit()
     
     print("✅ 공동구매 데이터베이스 테이블 초기화 완료")
@@ -0,0 +1,318 @@
+"""
+Mulberry Group Purchase - Deal Feed
+CTO Koda
+
+단말기 화면이 폴링하는 핫딜/우리 마을 공동구매 피드
+
+매 요청마다 상품 × 캠페인 JOIN + 정렬을 하는 대신, 진행 중인 캠페인을
+메모리에 물질화해 두고
+- 참여/캠페인 생성 시 해당 캠페인만 갱신 (증분)
+- 순위 목록은 바뀐 피드만, refresh_interval에 최대 한 번 다시 만들어 JSON으로 직렬화
+- 마감된 캠페인은 조회 시점이 아니라 타이머로 제거
+- ETag 비교로 바뀌지 않은 피드는 304 응답
+"""
+
+import hashlib
+import heapq
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from group_purchase.join_engine import parse_timestamp
+
+
+# 피드에 필요한 컬럼만 (SELECT p.*, c.* 대신)
+FEED_COLUMNS = """
+    c.campaign_id, c.product_id, p.name, p.category, p.producer_location,
+    p.original_price, p.group_price, p.discount_rate, p.image_urls, p.delivery_type,
+    c.current_participants, c.min_participants, c.current_quantity, c.target_quantity,
+    c.status, c.end_at
+"""
+
+GLOBAL_FEED = ""  # 핫딜 피드 키 (나머지 키는 마을 ID)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+EMPTY_VILLAGE_BODY = b'{"purchases":[]}'
+EMPTY_VILLAGE_ETAG = _etag(EMPTY_VILLAGE_BODY)
+
+
+class _Feed:
+    """직렬화된 피드 한 개"""
+
+    __slots__ = ("body", "etag", "dirty", "built_at")
+
+    def __init__(self):
+        self.body = b""
+        self.etag = ""
+        self.dirty = True
+        self.built_at = 0.0
+
+
+class DealFeed:
+    """
+    물질화된 공동구매 피드
+
+    - 핫딜: 참여자 수 ↓, 할인율 ↓ 상위 top_n
+    - 우리 마을: 마감 임박 순 상위 village_limit
+
+    피드는 바뀌어도 refresh_interval 동안은 직전 JSON을 그대로 내보내므로
+    참여가 몰려도 재정렬/직렬화는 피드당 초당 최대 1/refresh_interval회.
+    reconcile_interval마다 DB에서 전체를 다시 읽어 다른 경로로 바뀐
+    캠페인도 반영한다.
+    """
+
+    def __init__(
+        self,
+        pool,
+        top_n: int = 10,
+        village_limit: int = 50,
+        refresh_interval: float = 1.0,
+        reconcile_interval: float = 60.0
+    ):
+        """
+        Args:
+            pool: DB 연결 풀 (database.connection_pool)
+            top_n: 핫딜 개수
+            village_limit: 마을 피드 최대 개수
+            refresh_interval: 바뀐 피드를 다시 만드는 최소 간격 (초)
+            reconcile_interval: DB 전체 재적재 간격 (초, 0 = 끔)
+        """
+        self.pool = pool
+        self.top_n = top_n
+        self.village_limit = village_limit
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+
+        self._entries: Dict[str, Dict] = {}           # campaign_id → 피드 항목
+        self._end_at: Dict[str, float] = {}           # campaign_id → 마감 (timestamp)
+        self._villages: Dict[str, set] = {}           # 마을 ID → campaign_id 집합
+        self._expiry: List[Tuple[float, str]] = []    # (마감, campaign_id) 최소 힙
+        self._feeds: Dict[str, _Feed] = {}
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"builds": 0, "served": 0, "not_modified": 0, "updates": 0, "expired": 0, "reloads": 0}
+
+    # ============================================
+    # 수명 주기
+    # ============================================
+
+    def start(self):
+        """DB에서 전체 적재 후 마감/재적재 타이머 시작"""
+        self.reload()
+        self._thread = threading.Thread(target=self._run, name="deal-feed-timer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    # ============================================
+    # 적재 / 증분 갱신
+    # ============================================
+
+    def reload(self):
+        """진행 중인 캠페인 전체를 DB에서 다시 적재"""
+        rows = self._query("WHERE c.status = 'active' AND c.end_at > ?", (datetime.now(),))
+        with self._cond:
+            self._entries.clear()
+            self._end_at.clear()
+            self._villages.clear()
+            self._expiry.clear()
+            for row in rows:
+                self._put(row)
+            for feed in self._feeds.values():
+                feed.dirty = True
+            self.stats["reloads"] += 1
+            self._cond.notify_all()
+
+    def add_campaign(self, campaign_id: str):
+        """새 캠페인 반영 (create_campaign 직후)"""
+        rows = self._query("WHERE c.campaign_id = ?", (campaign_id,))
+        with self._cond:
+            if rows and rows[0]["status"] == "active":
+                self._put(rows[0])
+                self.stats["updates"] += 1
+                self._cond.notify_all()
+
+    def apply_progress(self, progress: Dict):
+        """
+        참여 결과 반영 (join_campaign 결과의 "campaign")
+
+        진행 중이 아니게 된 캠페인은 피드에서 빠진다. 수량은 줄지 않으므로
+        늦게 도착한 이전 스냅샷은 무시한다.
+        """
+        campaign_id = progress["campaign_id"]
+        with self._cond:
+            entry = self._entries.get(campaign_id)
+            if entry is None or progress["current_quantity"] < entry["current_quantity"]:
+                return
+            if progress["status"] != "active":
+                self._remove(campaign_id)
+            else:
+                entry["current_participants"] = progress["current_participants"]
+                entry["current_quantity"] = progress["current_quantity"]
+                self._mark_dirty(entry["producer_location"])
+            self.stats["updates"] += 1
+
+    # ============================================
+    # 조회
+    # ============================================
+
+    def hot_deals(self, if_none_match: Optional[str] = None) -> Tuple[Optional[bytes], str]:
+        """
+        핫딜 피드 ({"hot_deals": [...]})
+
+        Args:
+            if_none_match: 요청의 If-None-Match 헤더
+
+        Returns:
+            (JSON 바이트, ETag) — 단말기가 가진 ETag와 같으면 JSON 대신 None (304)
+        """
+        return self._serve(GLOBAL_FEED, if_none_match)
+
+    def village(self, village_id: str, if_none_match: Optional[str] = None) -> Tuple[Optional[bytes], str]:
+        """우리 마을 피드 ({"purchases": [...]}), 반환값은 hot_deals와 동일"""
+        return self._serve(village_id, if_none_match)
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            return {**self.stats, "campaigns": len(self._entries), "feeds": len(self._feeds)}
+
+    # ============================================
+    # 내부
+    # ============================================
+
+    def _query(self, where: str, params: tuple) -> List[Dict]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {FEED_COLUMNS}
+                FROM group_purchase_campaigns c
+                JOIN group_purchase_products p ON p.product_id = c.product_id
+                {where}
+            """, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def _put(self, row: Dict):
+        """항목 추가/교체 (잠금 보유 상태)"""
+        campaign_id = row["campaign_id"]
+        if campaign_id in self._entries:
+            self._remove(campaign_id)
+        end_at = parse_timestamp(row["end_at"])
+        row["end_at"] = end_at.isoformat()
+        self._entries[campaign_id] = row
+        self._end_at[campaign_id] = end_at.timestamp()
+        self._villages.setdefault(row["producer_location"], set()).add(campaign_id)
+        heapq.heappush(self._expiry, (self._end_at[campaign_id], campaign_id))
+        self._mark_dirty(row["producer_location"])
+
+    def _remove(self, campaign_id: str):
+        """항목 제거 (잠금 보유 상태, 힙의 항목은 꺼낼 때 건너뜀)"""
+        entry = self._entries.pop(campaign_id, None)
+        if entry is None:
+            return
+        self._end_at.pop(campaign_id, None)
+        village = self._villages.get(entry["producer_location"])
+        if village is not None:
+            village.discard(campaign_id)
+            if not village:
+                del self._villages[entry["producer_location"]]
+        self._mark_dirty(entry["producer_location"])
+
+    def _mark_dirty(self, village_id: str):
+        for key in (GLOBAL_FEED, village_id):
+            feed = self._feeds.get(key)
+            if feed is not None:
+                feed.dirty = True
+
+    def _serve(self, key: str, if_none_match: Optional[str]) -> Tuple[Optional[bytes], str]:
+        now = time.monotonic()
+        with self._cond:
+            feed = self._feeds.get(key)
+            if feed is None and key != GLOBAL_FEED and key not in self._villages:
+                # 캠페인이 없는 마을은 캐시하지 않음 (임의 ID로 메모리가 늘지 않도록)
+                body, etag = EMPTY_VILLAGE_BODY, EMPTY_VILLAGE_ETAG
+            else:
+                if feed is None:
+                    feed = self._feeds[key] = _Feed()
+                if feed.dirty and (not feed.body or now - feed.built_at >= self.refresh_interval):
+                    self._build(key, feed)
+                    feed.built_at = now
+                body, etag = feed.body, feed.etag
+
+            if etag_matches(if_none_match, etag):
+                self.stats["not_modified"] += 1
+                return None, etag
+            self.stats["served"] += 1
+            return body, etag
+
+    def _build(self, key: str, feed: _Feed):
+        """순위 계산 + JSON 직렬화 (잠금 보유 상태)"""
+        if key == GLOBAL_FEED:
+            items = heapq.nsmallest(
+                self.top_n,
+                self._entries.values(),
+                key=lambda e: (-e["current_participants"], -e["discount_rate"])
+            )
+            payload = {"hot_deals": items}
+        else:
+            items = sorted(
+                (self._entries[campaign_id] for campaign_id in self._villages.get(key, ())),
+                key=lambda e: e["end_at"]
+            )[:self.village_limit]
+            payload = {"purchases": items}
+        feed.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        feed.etag = _etag(feed.body)
+        feed.dirty = False
+        self.stats["builds"] += 1
+
+    def _run(self):
+        """마감된 캠페인 제거 + 주기적 재적재"""
+        next_reload = time.monotonic() + self.reconcile_interval
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.time()
+                while self._expiry and self._expiry[0][0] <= now:
+                    end_at, campaign_id = heapq.heappop(self._expiry)
+                    if self._end_at.get(campaign_id) == end_at:
+                        self._remove(campaign_id)
+                        self.stats["expired"] += 1
+                waits = [60.0]
+                if self._expiry:
+                    waits.append(self._expiry[0][0] - now)
+                if self.reconcile_interval > 0:
+                    waits.append(next_reload - time.monotonic())
+                self._cond.wait(max(0.0, min(waits)))
+                if self._closed:
+                    return
+            if self.reconcile_interval > 0 and time.monotonic() >= next_reload:
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠️ 피드 재적재 실패: {e}")
+                next_reload = time.monotonic() + self.reconcile_interval
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 일치하는지 (목록, 약한 ETag, * 지원)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -10,6 +10,11 @@ from typing import Optional, Dict, List
 from datetime import datetime, timedelta
 from enum import Enum
 import json
+import uuid
+
+from outbound_delivery import DeliveryEngine
+
+from group_purchase.join_engine import apply_joins, parse_timestamp
 
 
 class GroupPurchaseStatus(str, Enum):
@@ -268,16 +273,24 @@ class MastodonOAuthIntegration:
     Mastodon 계정으로 로그인 및 타임라인 포스팅
     """
     
-    def __init__(self, instance_url: str, client_id: str, client_secret: str):
+    def __init__(
+        self,
+        instance_url: str,
+        client_id: str,
+        client_secret: str,
+        delivery: Optional[DeliveryEngine] = None
+    ):
         """
         Args:
             instance_url: Mastodon 인스턴스 URL (예: https://mastodon.social)
             client_id: OAuth 클라이언트 ID
             client_secret: OAuth 클라이언트 시크릿
+            delivery: 공용 전송 엔진 (None = 개발 모드, mock 응답)
         """
         self.instance_url = instance_url
         self.client_id = client_id
         self.client_secret = client_secret
+        self.delivery = delivery
     
     def get_authorization_url(self, redirect_uri: str) -> str:
         """
@@ -301,7 +314,13 @@ class MastodonOAuthIntegration:
         # POST /oauth/token
         return "mock_access_token"
     
-    def post_to_timeline(self, access_token: str, status: str, visibility: str = "public") -> Dict:
+    def post_to_timeline(
+        self,
+        access_token: str,
+        status: str,
+        visibility: str = "public",
+        idempotency_key: Optional[str] = None
+    ) -> Dict:
         """
         타임라인에 포스트
         
@@ -309,16 +328,42 @@ class MastodonOAuthIntegration:
             access_token: 사용자 액세스 토큰
             status: 포스트 내용
             visibility: 공개 범위 (public, unlisted, private)
+            idempotency_key: 게시 1건당 키 (호출자가 재시도할 때 같은 값 재사용,
+                             None 이면 새로 생성 → 같은 문구의 새 게시는 중복 처리되지 않음)
         
         Returns:
             포스트 정보
+        
+        Raises:
+            DeliveryError: 재시도 후에도 게시 실패
         """
-        # TODO: 실제 Mastodon API 호출
-        # POST /api/v1/statuses
+        if self.delivery is None:
+            # 개발 모드: 실제 API 호출 없음
+            return {
+                "id": "mock_status_id",
+                "url": f"{self.instance_url}/@user/12345",
+                "created_at": datetime.now().isoformat()
+            }
+        
+        # 재시도 시 중복 게시 방지 (Mastodon Idempotency-Key 지원, 전송 재시도 동안 같은 키)
+        if idempotency_key is None:
+            idempotency_key = uuid.uuid4().hex
+        
+        response = self.delivery.request_sync(
+            "POST",
+            f"{self.instance_url}/api/v1/statuses",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Idempotency-Key": idempotency_key
+            },
+            data={"status": status, "visibility": visibility}
+        )
+        post = response.json()
+        
         return {
-            "id": "mock_status_id",
-            "url": f"{self.instance_url}/@user/12345",
-            "created_at": datetime.now().isoformat()
+            "id": post["id"],
+            "url": post["url"],
+            "created_at": post["created_at"]
         }
 
 
@@ -460,40 +505,29 @@ class GroupPurchaseManager:
         Returns:
             참여 결과
         """
-        campaign = self._load_campaign(campaign_id)
-        product = self._load_product(campaign.product_id)
-        
-        # 참여 처리
-        success = campaign.add_participant(user_id, quantity)
-        
-        if not success:
-            return {
-                "success": False,
-                "message": "캠페인이 종료되었거나 참여할 수 없습니다."
-            }
+        # 참여자 행 추가 + 카운터 원자적 증가 + 주문 기록 (join_engine 참고)
+        # 호출자가 쓰기 잠금 트랜잭션으로 감싸면 한 번에 커밋된다.
+        result = apply_joins(self.db, [(campaign_id, user_id, quantity)])[0]
+        if isinstance(result, Exception):
+            raise result
+        self.db.commit()
         
-        # 데이터베이스 업데이트
-        self._update_campaign(campaign)
+        if not result["success"]:
+            return result
         
-        # 주문 기록 생성
-        order = self._create_order(campaign_id, user_id, product, quantity)
+        progress = result["campaign"]
         
         # 진행 상황 업데이트 (Mastodon 타임라인)
-        if self.mastodon and campaign.current_participants % 5 == 0:
+        if self.mastodon and progress["current_participants"] % 5 == 0:
             # 5명씩 참여할 때마다 업데이트
-            self._update_campaign_progress(campaign, product)
+            campaign = self._load_campaign(campaign_id)
+            self._update_campaign_progress(campaign, self._load_product(campaign.product_id))
         
         print(f"✅ 공동구매 참여: {user_id}")
-        print(f"   상품: {product.name}")
         print(f"   수량: {quantity}개")
-        print(f"   현재 참여: {campaign.current_participants}명")
+        print(f"   현재 참여: {progress['current_participants']}명")
         
-        return {
-            "success": True,
-            "order_id": order["order_id"],
-            "campaign": campaign.get_progress(),
-            "message": "공동구매 참여가 완료되었습니다!"
-        }
+        return result
     
     def get_hot_deals(self, limit: int = 10) -> List[Dict]:
         """
@@ -616,45 +650,6 @@ class GroupPurchaseManager:
         ))
         self.db.commit()
     
-    def _update_campaign(self, campaign: GroupPurchaseCampaign):
-        """캠페인 업데이트"""
-        cursor = self.db.cursor()
-        cursor.execute("""
-            UPDATE group_purchase_campaigns
-            SET current_participants = ?,
-                current_quantity = ?,
-                status = ?,
-                participants = ?
-            WHERE campaign_id = ?
-        """, (
-            campaign.current_participants,
-            campaign.current_quantity,
-            campaign.status.value,
-            json.dumps(campaign.participants),
-            campaign.campaign_id
-        ))
-        self.db.commit()
-    
-    def _create_order(self, campaign_id: str, user_id: str, product: GroupPurchaseProduct, quantity: int) -> Dict:
-        """주문 생성"""
-        order_id = f"ORDER-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        cursor = self.db.cursor()
-        cursor.execute("""
-            INSERT INTO group_purchase_orders (
-                order_id, campaign_id, user_id, product_id,
-                quantity, unit_price, total_price, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            order_id, campaign_id, user_id, product.product_id,
-            quantity, product.group_price,
-            product.group_price * quantity,
-            datetime.now()
-        ))
-        self.db.commit()
-        
-        return {"order_id": order_id}
-    
     def _load_product(self, product_id: str) -> GroupPurchaseProduct:
         """상품 조회"""
         cursor = self.db.cursor()
@@ -689,13 +684,18 @@ class GroupPurchaseManager:
         if not row:
             raise ValueError(f"Campaign {campaign_id} not found")
         
-        # TODO: row를 GroupPurchaseCampaign로 변환
-        return GroupPurchaseCampaign(
+        campaign = GroupPurchaseCampaign(
             campaign_id=row['campaign_id'],
             product_id=row['product_id'],
             min_participants=row['min_participants'],
             target_quantity=row['target_quantity']
         )
+        campaign.current_participants = row['current_participants']
+        campaign.current_quantity = row['current_quantity']
+        campaign.status = GroupPurchaseStatus(row['status'])
+        campaign.end_at = parse_timestamp(row['end_at'])
+        campaign.activity_uri = row['activity_uri']
+        return campaign
     
     def _post_campaign_to_mastodon(self, campaign: GroupPurchaseCampaign, product: GroupPurchaseProduct):
         """캠페인을 Mastodon 타임라인에 포스팅"""
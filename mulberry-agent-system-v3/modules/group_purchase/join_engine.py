@@ -0,0 +1,315 @@
+"""
+Mulberry Group Purchase - Join Engine
+CTO Koda
+
+공동구매 참여 처리 엔진
+
+핫딜이 Mastodon에 공유되면 같은 캠페인에 수백 건의 참여가 몇 초 안에 몰린다.
+- 참여자 수/수량은 SQL에서 원자적으로 증가 (읽고-수정-쓰기 유실 없음)
+- 참여자는 JSON 목록 대신 group_purchase_participants 테이블에 한 행씩
+- 캠페인 갱신 + 주문 기록은 하나의 트랜잭션 (커밋 1회)
+- 선택: 시퀀서가 참여 요청을 모아 마이크로 배치로 그룹 커밋
+"""
+
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+
+JoinRequest = Tuple[str, str, int]  # (campaign_id, user_id, quantity)
+JoinResult = Union[Dict, Exception]
+
+REJECTED_MESSAGE = "캠페인이 종료되었거나 참여할 수 없습니다."
+
+
+# ============================================
+# 참여 적용 (호출자의 트랜잭션 안에서 실행)
+# ============================================
+
+def apply_joins(db_connection, joins: List[JoinRequest], lock_clause: str = "") -> List[JoinResult]:
+    """
+    참여 요청들을 현재 트랜잭션에 적용
+
+    캠페인별로 묶어 캠페인 행은 한 번만 읽고, 카운터는 한 번의 UPDATE로
+    증가시키며, 주문은 executemany로 기록한다. 호출자는 쓰기 잠금을 잡은
+    트랜잭션 안에서 호출해야 한다 (pool.transaction(immediate=True)).
+
+    Args:
+        db_connection: 트랜잭션 중인 연결
+        joins: (campaign_id, user_id, quantity) 목록
+        lock_clause: 캠페인 행 잠금 SELECT 접미사 (PostgreSQL: " FOR UPDATE")
+
+    Returns:
+        요청 순서대로 참여 결과 dict, 또는 캠페인이 없으면 ValueError
+    """
+    results: List[Optional[JoinResult]] = [None] * len(joins)
+    by_campaign: Dict[str, List[int]] = {}
+    for index, (campaign_id, _, _) in enumerate(joins):
+        by_campaign.setdefault(campaign_id, []).append(index)
+
+    cursor = db_connection.cursor()
+    now = datetime.now()
+
+    for campaign_id, indexes in by_campaign.items():
+        cursor.execute(f"""
+            SELECT c.status, c.min_participants, c.target_quantity,
+                   c.current_participants, c.current_quantity, c.end_at,
+                   c.product_id, p.group_price
+            FROM group_purchase_campaigns c
+            JOIN group_purchase_products p ON p.product_id = c.product_id
+            WHERE c.campaign_id = ?{lock_clause}
+        """, (campaign_id,))
+        row = cursor.fetchone()
+        if row is None:
+            for index in indexes:
+                results[index] = ValueError(f"Campaign {campaign_id} not found")
+            continue
+
+        status, min_participants, target_quantity, participants, quantity, end_at, product_id, price = row
+        end_at = parse_timestamp(end_at)
+        new_participants = 0
+        added_quantity = 0
+        orders = []
+
+        for index in indexes:
+            _, user_id, join_quantity = joins[index]
+            if status != "active" or end_at <= now:
+                results[index] = {"success": False, "message": REJECTED_MESSAGE}
+                continue
+
+            cursor.execute("""
+                INSERT INTO group_purchase_participants (campaign_id, user_id, quantity, joined_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (campaign_id, user_id) DO NOTHING
+            """, (campaign_id, user_id, join_quantity, now))
+            if cursor.rowcount == 1:
+                new_participants += 1
+            else:
+                cursor.execute("""
+                    UPDATE group_purchase_participants
+                    SET quantity = quantity + ?
+                    WHERE campaign_id = ? AND user_id = ?
+                """, (join_quantity, campaign_id, user_id))
+            added_quantity += join_quantity
+
+            # 목표 달성 체크 (GroupPurchaseCampaign.add_participant와 동일)
+            if participants + new_participants >= min_participants:
+                status = "success"
+
+            order_id = f"ORDER-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            orders.append((
+                order_id, campaign_id, user_id, product_id,
+                join_quantity, price, price * join_quantity, now
+            ))
+            results[index] = {
+                "success": True,
+                "order_id": order_id,
+                "campaign": _progress(
+                    campaign_id, status, participants + new_participants, min_participants,
+                    quantity + added_quantity, target_quantity, end_at, now
+                ),
+                "message": "공동구매 참여가 완료되었습니다!"
+            }
+
+        if not orders:
+            continue
+
+        cursor.execute("""
+            UPDATE group_purchase_campaigns
+            SET current_participants = current_participants + ?,
+                current_quantity = current_quantity + ?,
+                status = ?
+            WHERE campaign_id = ?
+        """, (new_participants, added_quantity, status, campaign_id))
+        cursor.executemany("""
+            INSERT INTO group_purchase_orders (
+                order_id, campaign_id, user_id, product_id,
+                quantity, unit_price, total_price, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, orders)
+
+    return results
+
+
+def parse_timestamp(value) -> datetime:
+    """SQLite는 TIMESTAMP를 문자열로, PostgreSQL은 datetime으로 돌려줌"""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _progress(
+    campaign_id: str,
+    status: str,
+    participants: int,
+    min_participants: int,
+    quantity: int,
+    target_quantity: int,
+    end_at: datetime,
+    now: datetime
+) -> Dict:
+    """GroupPurchaseCampaign.get_progress()와 같은 형태"""
+    return {
+        "campaign_id": campaign_id,
+        "status": status,
+        "current_participants": participants,
+        "target_participants": min_participants,
+        "progress_percent": round(participants / min_participants * 100, 1),
+        "current_quantity": quantity,
+        "target_quantity": target_quantity,
+        "time_left": (end_at - now).total_seconds(),
+        "is_success": status == "success"
+    }
+
+
+# ============================================
+# 참여 엔진
+# ============================================
+
+class CampaignJoinEngine:
+    """
+    공동구매 참여 엔진
+
+    기본: 참여 1건 = 트랜잭션 1개 (쓰기 잠금 선점, 커밋 1회).
+    sequencer=True: 참여 요청을 시퀀서 스레드가 batch_window_ms 동안 최대
+    batch_size건 모아 한 트랜잭션으로 그룹 커밋한다 (fsync 횟수 ↓).
+    """
+
+    def __init__(
+        self,
+        pool,
+        sequencer: bool = False,
+        batch_size: int = 128,
+        batch_window_ms: float = 2.0,
+        timeout: float = 10.0
+    ):
+        """
+        Args:
+            pool: DB 연결 풀 (database.connection_pool)
+            sequencer: 마이크로 배치 그룹 커밋 사용 여부
+            batch_size: 배치당 최대 참여 수
+            batch_window_ms: 첫 요청 후 배치를 모으는 시간
+            timeout: 참여 결과 대기 시간 (초)
+        """
+        self.pool = pool
+        self.timeout = timeout
+        self._sequencer = JoinSequencer(pool, batch_size, batch_window_ms) if sequencer else None
+
+    def join(self, campaign_id: str, user_id: str, quantity: int = 1) -> Dict:
+        """
+        공동구매 참여
+
+        Args:
+            campaign_id: 캠페인 ID
+            user_id: 사용자 ID (Mastodon 계정 등)
+            quantity: 구매 수량
+
+        Returns:
+            참여 결과 (GroupPurchaseManager.join_campaign과 같은 형태)
+
+        Raises:
+            ValueError: 잘못된 수량 또는 없는 캠페인
+        """
+        if quantity < 1:
+            raise ValueError("quantity must be >= 1")
+
+        request = (campaign_id, user_id, quantity)
+        if self._sequencer is not None:
+            return self._sequencer.submit(request).result(self.timeout)
+
+        with self.pool.transaction(immediate=True) as conn:
+            result = apply_joins(conn, [request], self.pool.lock_clause)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def metrics(self) -> Dict:
+        return self._sequencer.metrics() if self._sequencer else {"sequencer": False}
+
+    def close(self):
+        if self._sequencer is not None:
+            self._sequencer.close()
+
+
+class JoinSequencer:
+    """
+    참여 요청 그룹 커밋 시퀀서
+
+    전용 스레드 하나가 큐에서 요청을 모아 apply_joins로 한 번에 적용한다.
+    같은 캠페인의 요청은 배치 안에서 도착 순서대로 처리되고 캠페인 행은
+    배치당 한 번만 갱신된다. 배치 트랜잭션이 실패하면 그 배치의 모든
+    요청이 같은 예외를 받는다.
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool, batch_size: int = 128, batch_window_ms: float = 2.0):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self.stats = {"batches": 0, "joins": 0, "max_batch": 0, "failed_batches": 0}
+        self._thread = threading.Thread(target=self._run, name="join-sequencer", daemon=True)
+        self._thread.start()
+
+    def submit(self, request: JoinRequest) -> Future:
+        if self._closed:
+            raise RuntimeError("join sequencer is closed")
+        future: Future = Future()
+        self._queue.put((request, future))
+        return future
+
+    def metrics(self) -> Dict:
+        return {"sequencer": True, **self.stats, "queued": self._queue.qsize()}
+
+    def close(self, timeout: float = 10.0):
+        """남은 요청을 처리한 뒤 스레드 종료"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    # ---- 내부 ----
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[JoinRequest, Future]]):
+        requests = [request for request, _ in batch]
+        try:
+            with self.pool.transaction(immediate=True) as conn:
+                results = apply_joins(conn, requests, self.pool.lock_clause)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["joins"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,98 @@
+"""
+Mulberry Spirit Score - Database Schema
+CTO Koda
+
+Spirit Score 기록(이력) + 에이전트별 집계 테이블
+"""
+
+import sqlite3
+
+
+def init_spirit_score_tables(db_connection):
+    """
+    Spirit Score 테이블 초기화
+
+    집계 테이블이 비어 있는 에이전트가 이력에 있으면 (기존 DB 업그레이드)
+    이력에서 집계를 다시 계산한다.
+
+    Args:
+        db_connection: 데이터베이스 연결
+    """
+    cursor = db_connection.cursor()
+
+    # ============================================
+    # 1. Spirit Score 기록 (이벤트 이력)
+    # ============================================
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS spirit_scores (
+            record_id TEXT PRIMARY KEY,
+            agent_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            points REAL NOT NULL,
+            reason TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            related_entity TEXT,
+            metadata TEXT  -- JSON object
+        )
+    """)
+
+    # ============================================
+    # 2. 에이전트별 집계 (기록 INSERT와 같은 커밋에서 갱신)
+    # ============================================
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS spirit_score_totals (
+            agent_id TEXT PRIMARY KEY,
+            total_score REAL NOT NULL DEFAULT 0,
+            total_events INTEGER NOT NULL DEFAULT 0,
+            level TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    """)
+
+    # ============================================
+    # 인덱스 생성
+    # ============================================
+
+    # 최근 활동 / 에이전트별 재계산
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_spirit_scores_agent
+        ON spirit_scores(agent_id, created_at)
+    """)
+
+    # 리더보드 (정렬 없이 인덱스 순서대로 상위 N명)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_spirit_totals_score
+        ON spirit_score_totals(total_score DESC, agent_id)
+    """)
+
+    db_connection.commit()
+
+    # 기존 이력 → 집계 이관
+    cursor.execute("""
+        SELECT 1 FROM spirit_scores s
+        WHERE NOT EXISTS (SELECT 1 FROM spirit_score_totals t WHERE t.agent_id = s.agent_id)
+        LIMIT 1
+    """)
+    if cursor.fetchone() is not None:
+        from spirit_score.spirit_score_manager import SpiritScoreManager
+        rebuilt = SpiritScoreManager(db_connection).rebuild_aggregates()
+        print(f"   Spirit Score 집계 이관: 에이전트 {rebuilt}명")
+
+    print("✅ Spirit Score 데이터베이스 테이블 초기화 완료")
+
+
+if __name__ == "__main__":
+    # 테스트
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+
+    init_spirit_score_tables(conn)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'spirit%' ORDER BY name")
+
+    print("\n📊 생성된 테이블:")
+    for row in cursor.fetchall():
+        print(f"   - {row['name']}")
+
+    conn.close()
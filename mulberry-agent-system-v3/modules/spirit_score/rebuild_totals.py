@@ -0,0 +1,63 @@
+"""
+Mulberry Spirit Score - Aggregate Rebuild/Verify Tool
+CTO Koda
+
+spirit_score_totals 집계를 이력(spirit_scores)과 비교하고, 필요하면 다시 계산
+
+Usage:
+    python modules/spirit_score/rebuild_totals.py                  # 검증만 (불일치 시 exit 1)
+    python modules/spirit_score/rebuild_totals.py --rebuild        # 전체 재계산 후 검증
+    python modules/spirit_score/rebuild_totals.py --rebuild --agent AGENT-001
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import create_pool
+from spirit_score.database_schema import init_spirit_score_tables
+from spirit_score.spirit_score_manager import SpiritScoreManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spirit Score 집계 재계산/검증")
+    parser.add_argument("--config", default=str(ROOT / "config" / "config.json"))
+    parser.add_argument("--rebuild", action="store_true", help="이력에서 집계를 다시 계산")
+    parser.add_argument("--agent", help="특정 에이전트만 재계산")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="총점 허용 오차")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        db_config = json.load(f)['database']
+    pool = create_pool(db_config)
+
+    try:
+        with pool.connection() as conn:
+            init_spirit_score_tables(conn)
+            manager = SpiritScoreManager(conn)
+
+            if args.rebuild:
+                rebuilt = manager.rebuild_aggregates(args.agent)
+                print(f"🔧 집계 재계산: 에이전트 {rebuilt}명")
+
+            mismatches = manager.verify_aggregates(args.tolerance)
+    finally:
+        pool.close()
+
+    if not mismatches:
+        print("✅ Spirit Score 집계가 이력과 일치합니다")
+        return 0
+
+    print(f"❌ 불일치 {len(mismatches)}건 (--rebuild 로 재계산)")
+    for mismatch in mismatches:
+        print(f"   - {json.dumps(mismatch, ensure_ascii=False)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
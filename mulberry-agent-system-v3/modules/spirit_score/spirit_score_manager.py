@@ -3,12 +3,25 @@ Mulberry Spirit Score System
 CTO Koda
 
 에이전트 모든 활동을 Spirit Score로 자동 변환
+
+총점/이벤트 수/레벨은 spirit_score_totals에 에이전트별로 누적되며
+(기록 INSERT와 같은 커밋), 조회는 이력 전체 SUM 대신 집계 행 하나만 읽는다.
+리더보드 인덱스(src/leaderboard_index)를 넘기면 리더보드/내 순위는 메모리에서.
 """
 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterable, List, Tuple
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 import json
+import logging
+import math
+import uuid
+
+
+logger = logging.getLogger("mulberry.spirit_score")
+
+MAX_REPORTED_ERRORS = 100  # record_events_bulk 결과에 담는 오류 상세 최대 개수
 
 
 class SpiritScoreEvent(str, Enum):
@@ -100,12 +113,17 @@ class SpiritScoreManager:
         SpiritScoreEvent.HELP_REFUSED: -0.05,
     }
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, leaderboard=None):
         """
         Args:
             db_connection: 데이터베이스 연결
+            leaderboard: 메모리 리더보드 인덱스 (src/leaderboard_index.LeaderboardIndex, 선택)
+                         비어 있으면 spirit_score_totals에서 적재
         """
         self.db = db_connection
+        self.leaderboard = leaderboard
+        if leaderboard is not None and len(leaderboard) == 0:
+            self.load_leaderboard()
     
     def record_event(
         self,
@@ -133,12 +151,9 @@ class SpiritScoreManager:
         # 점수 계산
         points = points_override if points_override is not None else self.EVENT_POINTS[event_type]
         
-        # 기록 ID 생성
-        record_id = f"SPIRIT-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
-        
         # 기록 생성
         record = SpiritScoreRecord(
-            record_id=record_id,
+            record_id=self._new_record_id(datetime.now()),
             agent_id=agent_id,
             event_type=event_type,
             points=points,
@@ -150,18 +165,125 @@ class SpiritScoreManager:
         if metadata:
             record.metadata = metadata
         
-        # 데이터베이스 저장
-        self._save_record(record)
+        # 기록 저장 + 집계 갱신 (커밋 1회, 실패 시 둘 다 롤백)
+        try:
+            self._save_record(record)
+            total_score, total_events = self._update_agent_score(agent_id, points, record.created_at)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        # 커밋된 총점만 리더보드에 반영 (이벤트 수 = 버전)
+        if self.leaderboard is not None:
+            self.leaderboard.update(agent_id, total_score, version=total_events)
+        
+        logger.debug(
+            "spirit_score.recorded agent_id=%s event=%s points=%+.3f total=%.3f reason=%s",
+            agent_id, event_type.value, points, total_score, reason
+        )
+        
+        return record
+    
+    def record_events_bulk(
+        self,
+        events: Iterable[Dict],
+        chunk_size: int = 1000,
+        transaction_size: Optional[int] = None,
+        skip_invalid: bool = False
+    ) -> Dict:
+        """
+        이벤트 일괄 기록 (단말기 일일 동기화 재생 등)
+        
+        기록은 chunk_size개씩 executemany로 INSERT하고, 집계는 에이전트별
+        증분을 모아 에이전트당 UPDATE 한 번으로 반영한다. events는 제너레이터도
+        되며 한 번에 chunk_size개까지만 메모리에 올린다.
         
-        # 에이전트 총점 업데이트
-        self._update_agent_score(agent_id, points)
+        Args:
+            events: record_event 인자와 같은 키의 dict (agent_id, event_type, reason,
+                    related_entity, metadata, points_override) + 선택 created_at
+                    (datetime 또는 ISO 문자열, 없으면 현재 시각)
+            chunk_size: executemany 한 번에 INSERT할 기록 수
+            transaction_size: N건마다 기록+집계를 커밋 (None = 전체가 트랜잭션 하나).
+                              중간에 실패하면 이미 커밋된 구간은 남는다
+            skip_invalid: 잘못된 이벤트를 건너뜀 (False면 ValueError, 전체 롤백)
         
-        print(f"✅ Spirit Score 기록: {agent_id}")
-        print(f"   이벤트: {event_type.value}")
-        print(f"   점수: {points:+.3f}")
-        print(f"   사유: {reason}")
+        Returns:
+            {"recorded", "skipped", "agents", "errors": [{"index", "error"}, ...]}
         
-        return record
+        Raises:
+            ValueError: skip_invalid=False이고 잘못된 이벤트가 있을 때
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if transaction_size is not None and transaction_size < 1:
+            raise ValueError("transaction_size must be >= 1")
+        
+        result = {"recorded": 0, "skipped": 0, "agents": 0, "errors": []}
+        touched: Dict[str, Tuple[float, int]] = {}
+        deltas: Dict[str, List] = {}   # agent_id → [점수 합, 이벤트 수] (커밋 전 구간)
+        pending = 0                    # 커밋 전 구간의 기록 수
+        index = 0
+        iterator = iter(events)
+        cursor = self.db.cursor()
+        
+        try:
+            while True:
+                now = datetime.now()
+                rows = []
+                read = 0
+                for event in islice(iterator, chunk_size):
+                    read += 1
+                    try:
+                        row = self._bulk_row(event, now)
+                    except (KeyError, TypeError, ValueError) as e:
+                        if not skip_invalid:
+                            raise ValueError(f"event #{index}: {e!r}") from e
+                        result["skipped"] += 1
+                        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                            result["errors"].append({"index": index, "error": repr(e)})
+                        logger.debug("spirit_score.bulk_skipped index=%d error=%r", index, e)
+                    else:
+                        rows.append(row)
+                        delta = deltas.setdefault(row[1], [0.0, 0])
+                        delta[0] += row[3]
+                        delta[1] += 1
+                    index += 1
+                
+                if rows:
+                    cursor.executemany("""
+                        INSERT INTO spirit_scores (
+                            record_id, agent_id, event_type, points, reason,
+                            created_at, related_entity, metadata
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    pending += len(rows)
+                
+                exhausted = read < chunk_size
+                if deltas and (exhausted or (transaction_size is not None and pending >= transaction_size)):
+                    totals = self._apply_deltas(deltas, now)
+                    self.db.commit()
+                    touched.update(totals)  # 커밋이 성공한 뒤에만 (실패 시 롤백된 총점이 리더보드로 가지 않게)
+                    result["recorded"] += pending
+                    deltas, pending = {}, 0
+                
+                if exhausted:
+                    break
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            # 커밋된 구간만 리더보드에 반영
+            if self.leaderboard is not None:
+                for agent_id, (total_score, total_events) in touched.items():
+                    self.leaderboard.update(agent_id, total_score, version=total_events)
+        
+        result["agents"] = len(touched)
+        logger.info(
+            "spirit_score.bulk_recorded recorded=%d skipped=%d agents=%d",
+            result["recorded"], result["skipped"], result["agents"]
+        )
+        return result
     
     def get_agent_score(self, agent_id: str) -> Dict:
         """
@@ -175,20 +297,20 @@ class SpiritScoreManager:
         """
         cursor = self.db.cursor()
         
-        # 총점 조회
+        # 총점 조회 (집계 행 하나)
         cursor.execute("""
-            SELECT SUM(points) as total_score,
-                   COUNT(*) as total_events
-            FROM spirit_scores
+            SELECT total_score, total_events, level
+            FROM spirit_score_totals
             WHERE agent_id = ?
         """, (agent_id,))
         
         row = cursor.fetchone()
-        total_score = row['total_score'] or 0.0
-        total_events = row['total_events'] or 0
-        
-        # 레벨 계산
-        level = self._calculate_level(total_score)
+        if row is None:
+            total_score, total_events = 0.0, 0
+            level = self._calculate_level(total_score)
+        else:
+            total_score, total_events = row['total_score'], row['total_events']
+            level = SpiritLevel(row['level'])
         
         # 다음 레벨까지 필요한 점수
         next_level_score = self._get_next_level_threshold(level)
@@ -212,16 +334,16 @@ class SpiritScoreManager:
         Returns:
             리더보드
         """
+        if self.leaderboard is not None:
+            return [self._leaderboard_row(entry) for entry in self.leaderboard.top(limit)]
+        
         cursor = self.db.cursor()
         
+        # idx_spirit_totals_score 순서대로 상위 N행만 읽음
         cursor.execute("""
-            SELECT 
-                agent_id,
-                SUM(points) as total_score,
-                COUNT(*) as total_events
-            FROM spirit_scores
-            GROUP BY agent_id
-            ORDER BY total_score DESC
+            SELECT agent_id, total_score, total_events, level
+            FROM spirit_score_totals
+            ORDER BY total_score DESC, agent_id
             LIMIT ?
         """, (limit,))
         
@@ -229,19 +351,107 @@ class SpiritScoreManager:
         
         leaderboard = []
         for rank, row in enumerate(rows, start=1):
-            score = row['total_score']
-            level = self._calculate_level(score)
-            
             leaderboard.append({
                 "rank": rank,
                 "agent_id": row['agent_id'],
-                "total_score": round(score, 3),
+                "total_score": round(row['total_score'], 3),
                 "total_events": row['total_events'],
-                "level": level.value
+                "level": row['level']
             })
         
         return leaderboard
     
+    def get_agent_rank(self, agent_id: str) -> Optional[Dict]:
+        """
+        에이전트 순위 ("내 순위")
+        
+        Args:
+            agent_id: 에이전트 ID
+        
+        Returns:
+            순위 정보 (점수 기록이 없으면 None)
+        """
+        if self.leaderboard is not None:
+            window = self.leaderboard.around(agent_id, radius=0)
+            if not window:
+                return None
+            return {**self._leaderboard_row(window[0]), "total_agents": len(self.leaderboard)}
+        
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT total_score, total_events, level FROM spirit_score_totals WHERE agent_id = ?
+        """, (agent_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        # 나보다 앞선 에이전트 수 (idx_spirit_totals_score 범위 스캔)
+        cursor.execute("""
+            SELECT COUNT(*) FROM spirit_score_totals
+            WHERE total_score > ? OR (total_score = ? AND agent_id < ?)
+        """, (row['total_score'], row['total_score'], agent_id))
+        ahead = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM spirit_score_totals")
+        total_agents = cursor.fetchone()[0]
+        
+        return {
+            "rank": ahead + 1,
+            "agent_id": agent_id,
+            "total_score": round(row['total_score'], 3),
+            "total_events": row['total_events'],
+            "level": row['level'],
+            "total_agents": total_agents
+        }
+    
+    def get_leaderboard_around(self, agent_id: str, radius: int = 5) -> List[Dict]:
+        """
+        내 앞뒤 radius명 리더보드
+        
+        Args:
+            agent_id: 에이전트 ID
+            radius: 앞뒤 인원 수
+        
+        Returns:
+            리더보드 구간 (점수 기록이 없으면 빈 목록)
+        """
+        if self.leaderboard is not None:
+            return [self._leaderboard_row(entry) for entry in self.leaderboard.around(agent_id, radius)]
+        
+        mine = self.get_agent_rank(agent_id)
+        if mine is None:
+            return []
+        
+        start = max(mine['rank'] - 1 - radius, 0)
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT agent_id, total_score, total_events, level
+            FROM spirit_score_totals
+            ORDER BY total_score DESC, agent_id
+            LIMIT ? OFFSET ?
+        """, (mine['rank'] + radius - start, start))
+        
+        return [
+            {
+                "rank": rank,
+                "agent_id": row['agent_id'],
+                "total_score": round(row['total_score'], 3),
+                "total_events": row['total_events'],
+                "level": row['level']
+            }
+            for rank, row in enumerate(cursor.fetchall(), start=start + 1)
+        ]
+    
+    def load_leaderboard(self) -> int:
+        """
+        리더보드 인덱스를 spirit_score_totals에서 다시 적재
+        
+        Returns:
+            적재한 에이전트 수
+        """
+        cursor = self.db.cursor()
+        cursor.execute("SELECT agent_id, total_score, total_events FROM spirit_score_totals")
+        return self.leaderboard.load(tuple(row) for row in cursor.fetchall())
+    
     def get_recent_activities(self, agent_id: str, limit: int = 20) -> List[Dict]:
         """
         최근 활동 내역
@@ -267,6 +477,110 @@ class SpiritScoreManager:
         
         return [dict(row) for row in rows]
     
+    # ============================================
+    # 집계 재계산 / 검증
+    # ============================================
+    
+    def rebuild_aggregates(self, agent_id: Optional[str] = None) -> int:
+        """
+        이력(spirit_scores)에서 집계를 다시 계산
+        
+        agents.spirit_score 캐시도 집계 값으로 맞춘다.
+        
+        Args:
+            agent_id: 특정 에이전트만 (None = 전체)
+        
+        Returns:
+            다시 계산한 에이전트 수
+        """
+        where, params = ("WHERE agent_id = ?", (agent_id,)) if agent_id else ("", ())
+        now = datetime.now()
+        cursor = self.db.cursor()
+        
+        try:
+            cursor.execute(f"""
+                SELECT agent_id, SUM(points) as total_score, COUNT(*) as total_events
+                FROM spirit_scores
+                {where}
+                GROUP BY agent_id
+            """, params)
+            totals = [
+                (row[0], row[1], row[2], self._calculate_level(row[1]).value, now)
+                for row in cursor.fetchall()
+            ]
+            
+            cursor.execute(f"DELETE FROM spirit_score_totals {where}", params)
+            cursor.executemany("""
+                INSERT INTO spirit_score_totals (agent_id, total_score, total_events, level, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, totals)
+            
+            cursor.execute(f"""
+                UPDATE agents
+                SET spirit_score = COALESCE(
+                    (SELECT t.total_score FROM spirit_score_totals t WHERE t.agent_id = agents.agent_id), 0
+                )
+                {where}
+            """, params)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        if self.leaderboard is not None:
+            self.load_leaderboard()
+        
+        return len(totals)
+    
+    def verify_aggregates(self, tolerance: float = 1e-6) -> List[Dict]:
+        """
+        집계가 이력과 일치하는지 검증
+        
+        Args:
+            tolerance: 총점 허용 오차 (부동소수점 누적 순서 차이)
+        
+        Returns:
+            불일치 목록 (비어 있으면 정상)
+        """
+        cursor = self.db.cursor()
+        
+        cursor.execute("""
+            SELECT agent_id, SUM(points) as total_score, COUNT(*) as total_events
+            FROM spirit_scores
+            GROUP BY agent_id
+        """)
+        expected = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        cursor.execute("SELECT agent_id, total_score, total_events, level FROM spirit_score_totals")
+        actual = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+        
+        mismatches = []
+        for agent_id in sorted(expected.keys() | actual.keys()):
+            expected_score, expected_events = expected.get(agent_id, (0.0, 0))
+            if agent_id not in actual:
+                mismatches.append({
+                    "agent_id": agent_id,
+                    "problem": "missing_aggregate",
+                    "expected": {"total_score": expected_score, "total_events": expected_events}
+                })
+                continue
+            
+            score, events, level = actual[agent_id]
+            expected_level = self._calculate_level(expected_score).value
+            if abs(score - expected_score) > tolerance or events != expected_events or level != expected_level:
+                mismatches.append({
+                    "agent_id": agent_id,
+                    "problem": "mismatch" if agent_id in expected else "orphan_aggregate",
+                    "expected": {
+                        "total_score": expected_score,
+                        "total_events": expected_events,
+                        "level": expected_level
+                    },
+                    "actual": {"total_score": score, "total_events": events, "level": level}
+                })
+        
+        return mismatches
+    
     # ============================================
     # 자동 통합 헬퍼 메서드
     # ============================================
@@ -342,6 +656,16 @@ class SpiritScoreManager:
     # Private Methods
     # ============================================
     
+    def _leaderboard_row(self, entry) -> Dict:
+        """리더보드 인덱스 항목 → get_leaderboard 형식 (순위는 동점 시 ID 순)"""
+        return {
+            "rank": entry.position,
+            "agent_id": entry.member_id,
+            "total_score": round(entry.score, 3),
+            "total_events": self.leaderboard.member_version(entry.member_id) or 0,
+            "level": self._calculate_level(entry.score).value
+        }
+    
     def _calculate_level(self, score: float) -> SpiritLevel:
         """점수로 레벨 계산"""
         if score < 21:
@@ -383,6 +707,93 @@ class SpiritScoreManager:
         
         return (score - min_score) / (max_score - min_score)
     
+    def _new_record_id(self, now: datetime) -> str:
+        """기록 ID (같은 마이크로초에 여러 건이어도 겹치지 않도록 난수 접미사)"""
+        return f"SPIRIT-{now.strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+    
+    def _bulk_row(self, event: Dict, now: datetime) -> tuple:
+        """일괄 기록 이벤트 검증 → spirit_scores INSERT 파라미터"""
+        agent_id = event["agent_id"]
+        if not isinstance(agent_id, str) or not agent_id:
+            raise ValueError("agent_id must be a non-empty string")
+        reason = event["reason"]
+        if not isinstance(reason, str):
+            raise ValueError("reason must be a string")
+        
+        event_type = SpiritScoreEvent(event["event_type"])
+        points = event.get("points_override")
+        points = self.EVENT_POINTS[event_type] if points is None else float(points)
+        if not math.isfinite(points):
+            raise ValueError("points must be finite")
+        
+        created_at = event.get("created_at") or now
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        elif not isinstance(created_at, datetime):
+            raise ValueError("created_at must be a datetime or ISO string")
+        
+        metadata = event.get("metadata")
+        return (
+            self._new_record_id(now),
+            agent_id,
+            event_type.value,
+            points,
+            reason,
+            created_at,
+            event.get("related_entity"),
+            json.dumps(metadata) if metadata else None
+        )
+    
+    def _apply_deltas(self, deltas: Dict[str, List], updated_at: datetime) -> Dict[str, Tuple[float, int]]:
+        """
+        에이전트별 증분을 집계/agents 캐시에 반영 (커밋은 호출자)
+        
+        Returns:
+            agent_id → (갱신된 총점, 누적 이벤트 수)
+        """
+        cursor = self.db.cursor()
+        
+        # 에이전트당 UPSERT 한 번
+        cursor.executemany("""
+            INSERT INTO spirit_score_totals (agent_id, total_score, total_events, level, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (agent_id) DO UPDATE SET
+                total_score = total_score + excluded.total_score,
+                total_events = total_events + excluded.total_events,
+                updated_at = excluded.updated_at
+        """, [
+            (agent_id, points, count, self._calculate_level(points).value, updated_at)
+            for agent_id, (points, count) in deltas.items()
+        ])
+        
+        # 레벨은 경계를 넘은 에이전트만
+        totals: Dict[str, Tuple[float, int]] = {}
+        level_changes = []
+        agent_ids = list(deltas)
+        for start in range(0, len(agent_ids), 500):
+            batch = agent_ids[start:start + 500]
+            cursor.execute(f"""
+                SELECT agent_id, total_score, total_events, level
+                FROM spirit_score_totals
+                WHERE agent_id IN ({", ".join("?" * len(batch))})
+            """, batch)
+            for agent_id, total_score, total_events, level in cursor.fetchall():
+                totals[agent_id] = (total_score, total_events)
+                new_level = self._calculate_level(total_score).value
+                if new_level != level:
+                    level_changes.append((new_level, agent_id))
+        if level_changes:
+            cursor.executemany("UPDATE spirit_score_totals SET level = ? WHERE agent_id = ?", level_changes)
+        
+        # agents 테이블의 spirit_score 컬럼 업데이트
+        cursor.executemany("""
+            UPDATE agents
+            SET spirit_score = COALESCE(spirit_score, 0) + ?
+            WHERE agent_id = ?
+        """, [(points, agent_id) for agent_id, (points, _) in deltas.items()])
+        
+        return totals
+    
     def _save_record(self, record: SpiritScoreRecord):
         """기록 저장"""
         cursor = self.db.cursor()
@@ -401,18 +812,45 @@ class SpiritScoreManager:
             record.related_entity,
             json.dumps(record.metadata) if record.metadata else None
         ))
-        self.db.commit()
     
-    def _update_agent_score(self, agent_id: str, points: float):
-        """에이전트 총점 업데이트 (캐시)"""
-        # agents 테이블의 spirit_score 컬럼 업데이트
+    def _update_agent_score(self, agent_id: str, points: float, updated_at: datetime) -> Tuple[float, int]:
+        """
+        에이전트 집계 + agents.spirit_score 캐시 갱신 (커밋은 record_event에서)
+        
+        Returns:
+            (갱신된 총점, 누적 이벤트 수)
+        """
         cursor = self.db.cursor()
+        
+        # 총점/이벤트 수 원자적 누적
+        cursor.execute("""
+            INSERT INTO spirit_score_totals (agent_id, total_score, total_events, level, updated_at)
+            VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT (agent_id) DO UPDATE SET
+                total_score = total_score + excluded.total_score,
+                total_events = total_events + 1,
+                updated_at = excluded.updated_at
+        """, (agent_id, points, self._calculate_level(points).value, updated_at))
+        
+        # 레벨은 경계를 넘을 때만 갱신
+        cursor.execute("""
+            SELECT total_score, total_events, level FROM spirit_score_totals WHERE agent_id = ?
+        """, (agent_id,))
+        total_score, total_events, level = cursor.fetchone()
+        new_level = self._calculate_level(total_score).value
+        if new_level != level:
+            cursor.execute("""
+                UPDATE spirit_score_totals SET level = ? WHERE agent_id = ?
+            """, (new_level, agent_id))
+        
+        # agents 테이블의 spirit_score 컬럼 업데이트
         cursor.execute("""
             UPDATE agents
             SET spirit_score = COALESCE(spirit_score, 0) + ?
             WHERE agent_id = ?
         """, (points, agent_id))
-        self.db.commit()
+        
+        return total_score, total_events
 
 
 # ============================================
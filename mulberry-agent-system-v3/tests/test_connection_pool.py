@@ -0,0 +1,153 @@
+"""
+Mulberry Database - Connection Pool 테스트
+tmp_path 의 SQLite 파일로 작업 단위 커밋/롤백, 끊긴 연결 교체, 풀 고갈 대기를 검증
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# v3 modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import SQLitePool, create_pool  # noqa: E402
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), size=2, timeout=0.2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE visits (n INTEGER)")
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def count_rows(path) -> int:
+    """풀 밖의 독립 연결로 커밋된 행만 셈"""
+    with sqlite3.connect(path) as other:
+        return other.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+
+
+class TestTransaction:
+    def test_commit_is_deferred_to_block_end(self, pool):
+        """블록 안의 commit() 은 미뤄지고 블록이 끝날 때 한 번만 커밋"""
+        commits = pool.metrics()["commits"]
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO visits VALUES (1)")
+            conn.commit()
+            conn.execute("INSERT INTO visits VALUES (2)")
+            conn.commit()
+            assert count_rows(pool.path) == 0
+
+        assert count_rows(pool.path) == 2
+        metrics = pool.metrics()
+        assert metrics["deferred_commits"] == 2
+        assert metrics["commits"] == commits + 1
+
+    def test_exception_rolls_back_whole_block(self, pool):
+        """예외 시 블록 안에서 commit() 한 구문까지 전부 롤백"""
+        with pytest.raises(RuntimeError):
+            with pool.transaction() as conn:
+                conn.execute("INSERT INTO visits VALUES (1)")
+                conn.commit()
+                raise RuntimeError("boom")
+
+        assert count_rows(pool.path) == 0
+        assert pool.metrics()["rollbacks"] == 1
+
+        # 연결은 정상 반납되어 재사용됨
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO visits VALUES (3)")
+        assert count_rows(pool.path) == 1
+        assert pool.metrics()["discarded"] == 0
+
+    def test_immediate_takes_write_lock_at_begin(self, pool):
+        """immediate=True 면 시작 시 쓰기 잠금 → 다른 쓰기는 대기"""
+        with pool.transaction(immediate=True):
+            other = sqlite3.connect(pool.path, timeout=0.05)
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("INSERT INTO visits VALUES (1)")
+            other.close()
+
+
+class TestBrokenConnections:
+    def test_connection_failing_rollback_is_replaced(self, pool):
+        """롤백도 실패하는 끊긴 연결은 풀에 돌아가지 않고 새 연결로 교체"""
+        with pytest.raises(RuntimeError):
+            with pool.connection() as conn:
+                broken_raw = conn.raw
+                broken_raw.close()
+                raise RuntimeError("connection lost")
+
+        assert pool.metrics()["discarded"] == 1
+        with pool.connection() as conn:
+            assert conn.raw is not broken_raw
+            assert conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 0
+        assert pool.metrics()["open"] == 1
+
+    def test_connection_failing_reset_is_discarded(self, pool):
+        """예외 없이 끝나도 반납 전 정리가 실패하면 폐기"""
+        with pool.connection() as conn:
+            conn.raw.close()
+
+        metrics = pool.metrics()
+        assert metrics["discarded"] == 1
+        assert metrics["idle"] == 0
+
+    def test_reconnect_swaps_raw_connection(self, pool):
+        """reconnect() 는 끊긴 연결을 버리고 같은 자리에 새 연결을 받음"""
+        with pool.connection() as conn:
+            old_raw = conn.raw
+            old_raw.close()
+            conn.reconnect()
+            assert conn.raw is not old_raw
+            conn.execute("INSERT INTO visits VALUES (1)")
+            conn.commit()
+
+        assert count_rows(pool.path) == 1
+        metrics = pool.metrics()
+        assert metrics["discarded"] == 1
+        assert metrics["open"] == 1
+
+
+class TestExhaustion:
+    def test_timeout_when_all_connections_in_use(self, pool):
+        """size 개 모두 사용 중이면 timeout 초 기다린 뒤 TimeoutError"""
+        with pool.connection(), pool.connection():
+            started = time.perf_counter()
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+            elapsed = time.perf_counter() - started
+
+        assert 0.2 <= elapsed < 2.0
+        assert pool.metrics()["waits"] == 1
+
+        # 반납 후에는 다시 빌릴 수 있음
+        with pool.connection() as conn:
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+    def test_released_connection_unblocks_waiter(self, pool):
+        """대기 중 다른 스레드가 반납하면 timeout 전에 그 연결을 받음"""
+        held = [pool._acquire(), pool._acquire()]
+        threading.Timer(0.05, pool._release, args=(held[0],)).start()
+
+        with pool.connection() as conn:
+            assert conn.raw is held[0]
+        pool._release(held[1])
+        assert pool.metrics()["open"] == 2
+
+
+def test_create_pool_from_config(tmp_path):
+    pool = create_pool({"type": "sqlite", "path": str(tmp_path / "cfg" / "app.db"), "pool_size": 3})
+    assert isinstance(pool, SQLitePool)
+    assert pool.size == 3
+    with pytest.raises(ValueError):
+        create_pool({"type": "mysql"})
+    pool.close()
@@ -0,0 +1,215 @@
+"""
+Mulberry Group Purchase - Deal Feed 테스트
+ETag/304, 참여 스냅샷 반영, 마감 타이머, refresh_interval 재생성 제한,
+캠페인 없는 마을 미캐시를 tmp_path SQLite 로 검증
+"""
+
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# v3 modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import SQLitePool  # noqa: E402
+from group_purchase import deal_feed  # noqa: E402
+from group_purchase.database_schema import init_group_purchase_tables  # noqa: E402
+from group_purchase.deal_feed import EMPTY_VILLAGE_BODY, EMPTY_VILLAGE_ETAG, DealFeed, etag_matches  # noqa: E402
+
+VILLAGE = "강원도 인제군"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "deal_feed.db"), size=2)
+    with redirect_stdout(StringIO()), pool.transaction() as conn:
+        init_group_purchase_tables(conn)
+    yield pool
+    pool.close()
+
+
+def add_campaign(pool, campaign_id: str, *, village: str = VILLAGE, participants: int = 0,
+                 ends_in: timedelta = timedelta(days=1), status: str = "active") -> str:
+    now = datetime.now()
+    product_id = f"PROD-{campaign_id}"
+    with pool.transaction() as conn:
+        conn.execute("""
+            INSERT INTO group_purchase_products (
+                product_id, name, description, category, producer_agent_id, producer_location,
+                original_price, group_price, discount_rate, min_quantity, max_quantity,
+                start_at, end_at, delivery_type, created_at
+            ) VALUES (?, '옥수수', '테스트 상품', 'agricultural', 'AGENT-T', ?,
+                      30000, 20000, 0.33, 1, 10000, ?, ?, 'direct', ?)
+        """, (product_id, village, now, now + ends_in, now))
+        conn.execute("""
+            INSERT INTO group_purchase_campaigns (
+                campaign_id, product_id, min_participants, target_quantity, status,
+                current_participants, current_quantity, start_at, end_at, created_at
+            ) VALUES (?, ?, 1000, 10000, ?, ?, ?, ?, ?, ?)
+        """, (campaign_id, product_id, status, participants, participants, now, now + ends_in, now))
+    return campaign_id
+
+
+def progress(campaign_id: str, participants: int, status: str = "active") -> dict:
+    return {
+        "campaign_id": campaign_id,
+        "status": status,
+        "current_participants": participants,
+        "current_quantity": participants,
+    }
+
+
+def hot_deal_ids(feed: DealFeed):
+    body, _ = feed.hot_deals()
+    return [item["campaign_id"] for item in json.loads(body)["hot_deals"]]
+
+
+class TestEtagMatches:
+    def test_exact_list_weak_and_wildcard(self):
+        etag = '"abc123"'
+        assert etag_matches('"abc123"', etag)
+        assert etag_matches('"zzz", "abc123"', etag)
+        assert etag_matches('W/"abc123"', etag)
+        assert etag_matches('"zzz",W/"abc123"', etag)
+        assert etag_matches("*", etag)
+
+    def test_non_matching(self):
+        etag = '"abc123"'
+        assert not etag_matches(None, etag)
+        assert not etag_matches("", etag)
+        assert not etag_matches('"abc124"', etag)
+        assert not etag_matches("abc123", etag)  # 따옴표 없는 값
+        assert not etag_matches('w/"abc123"', etag)  # 약한 ETag 접두어는 대문자만
+
+
+class TestServe:
+    def test_not_modified_until_feed_changes(self, pool):
+        """같은 ETag 면 본문 없이 304, 참여 반영 후에는 새 ETag"""
+        add_campaign(pool, "C-1")
+        feed = DealFeed(pool, refresh_interval=0)
+        feed.reload()
+
+        body, etag = feed.hot_deals()
+        assert json.loads(body)["hot_deals"][0]["campaign_id"] == "C-1"
+        assert feed.hot_deals(if_none_match=etag) == (None, etag)
+        assert feed.hot_deals(if_none_match=f'"other", W/{etag}') == (None, etag)
+
+        feed.apply_progress(progress("C-1", 5))
+        body, new_etag = feed.hot_deals(if_none_match=etag)
+        assert body is not None and new_etag != etag
+        assert json.loads(body)["hot_deals"][0]["current_participants"] == 5
+        assert feed.metrics()["not_modified"] == 2
+
+    def test_refresh_interval_throttles_rebuilds(self, pool, monkeypatch):
+        """바뀐 피드도 refresh_interval 동안은 직전 JSON 을 그대로 내보냄"""
+        clock = FakeClock()
+        monkeypatch.setattr(deal_feed.time, "monotonic", clock)
+        add_campaign(pool, "C-1")
+        feed = DealFeed(pool, refresh_interval=1.0)
+        feed.reload()
+
+        first, etag = feed.hot_deals()
+        for participants in range(1, 20):
+            feed.apply_progress(progress("C-1", participants))
+            clock.now += 0.01
+            assert feed.hot_deals() == (first, etag)
+        assert feed.metrics()["builds"] == 1
+
+        clock.now += 1.0
+        body, new_etag = feed.hot_deals()
+        assert new_etag != etag
+        assert json.loads(body)["hot_deals"][0]["current_participants"] == 19
+        assert feed.metrics()["builds"] == 2
+
+        # 바뀐 것이 없으면 간격이 지나도 다시 만들지 않음
+        clock.now += 5.0
+        assert feed.hot_deals() == (body, new_etag)
+        assert feed.metrics()["builds"] == 2
+
+    def test_unknown_village_is_not_cached(self, pool):
+        """캠페인 없는 마을은 빈 피드를 돌려주되 캐시에 남기지 않음"""
+        add_campaign(pool, "C-1")
+        feed = DealFeed(pool)
+        feed.reload()
+
+        for i in range(100):
+            assert feed.village(f"없는-마을-{i}") == (EMPTY_VILLAGE_BODY, EMPTY_VILLAGE_ETAG)
+        assert feed.village("없는-마을", if_none_match=EMPTY_VILLAGE_ETAG) == (None, EMPTY_VILLAGE_ETAG)
+        assert feed.metrics()["feeds"] == 0
+
+        body, _ = feed.village(VILLAGE)
+        assert [item["campaign_id"] for item in json.loads(body)["purchases"]] == ["C-1"]
+        assert feed.metrics()["feeds"] == 1
+
+
+class TestApplyProgress:
+    def test_stale_snapshot_is_ignored(self, pool):
+        """늦게 도착한 이전 스냅샷(수량이 더 적음)은 무시"""
+        add_campaign(pool, "C-1")
+        feed = DealFeed(pool, refresh_interval=0)
+        feed.reload()
+
+        feed.apply_progress(progress("C-1", 7))
+        feed.apply_progress(progress("C-1", 3))
+        body, _ = feed.hot_deals()
+        assert json.loads(body)["hot_deals"][0]["current_participants"] == 7
+        assert feed.metrics()["updates"] == 1
+
+    def test_non_active_campaign_is_dropped(self, pool):
+        """success 등 진행 중이 아니게 된 캠페인은 핫딜/마을 피드에서 빠짐"""
+        add_campaign(pool, "C-1", participants=1)
+        add_campaign(pool, "C-2", participants=2)
+        feed = DealFeed(pool, refresh_interval=0)
+        feed.reload()
+        assert hot_deal_ids(feed) == ["C-2", "C-1"]
+
+        feed.apply_progress(progress("C-2", 3, status="success"))
+        assert hot_deal_ids(feed) == ["C-1"]
+        body, _ = feed.village(VILLAGE)
+        assert [item["campaign_id"] for item in json.loads(body)["purchases"]] == ["C-1"]
+
+        # 피드에 없는 캠페인의 스냅샷은 다시 추가하지 않음
+        feed.apply_progress(progress("C-2", 4))
+        assert hot_deal_ids(feed) == ["C-1"]
+
+    def test_add_campaign_skips_inactive(self, pool):
+        feed = DealFeed(pool, refresh_interval=0)
+        feed.reload()
+        feed.add_campaign(add_campaign(pool, "C-FAILED", status="failed"))
+        feed.add_campaign(add_campaign(pool, "C-NEW"))
+        assert hot_deal_ids(feed) == ["C-NEW"]
+
+
+class TestTimer:
+    def test_expired_campaign_removed_by_timer(self, pool):
+        """조회가 없어도 마감 시각에 타이머가 캠페인을 제거"""
+        add_campaign(pool, "C-LONG")
+        add_campaign(pool, "C-SOON", village="다른 마을", ends_in=timedelta(seconds=0.3))
+        feed = DealFeed(pool, refresh_interval=0, reconcile_interval=0)
+        feed.start()
+        try:
+            assert sorted(hot_deal_ids(feed)) == ["C-LONG", "C-SOON"]
+            deadline = time.monotonic() + 5
+            while feed.metrics()["expired"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            feed.close()
+
+        assert feed.metrics()["expired"] == 1
+        assert hot_deal_ids(feed) == ["C-LONG"]
+        assert feed.village("다른 마을") == (EMPTY_VILLAGE_BODY, EMPTY_VILLAGE_ETAG)
@@ -0,0 +1,217 @@
+"""
+Mulberry Group Purchase - Join Engine 테스트
+apply_joins 의 재참여/종료·만료/없는 캠페인/목표 달성 처리, 시퀀서 배치 실패,
+동시 참여 시 카운터 정합성을 tmp_path SQLite 로 검증
+"""
+
+import sys
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# v3 modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import SQLitePool  # noqa: E402
+from group_purchase.database_schema import init_group_purchase_tables  # noqa: E402
+from group_purchase.join_engine import (  # noqa: E402
+    REJECTED_MESSAGE,
+    CampaignJoinEngine,
+    JoinSequencer,
+    apply_joins,
+)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "group_purchase.db"), size=5)
+    with redirect_stdout(StringIO()), pool.transaction() as conn:
+        init_group_purchase_tables(conn)
+    yield pool
+    pool.close()
+
+
+def add_campaign(pool, campaign_id: str, *, min_participants: int = 1000, status: str = "active",
+                 ends_in: timedelta = timedelta(days=1), price: float = 20000) -> str:
+    """상품 1개 + 캠페인 1개를 직접 INSERT"""
+    now = datetime.now()
+    product_id = f"PROD-{campaign_id}"
+    with pool.transaction() as conn:
+        conn.execute("""
+            INSERT INTO group_purchase_products (
+                product_id, name, description, category, producer_agent_id, producer_location,
+                original_price, group_price, discount_rate, min_quantity, max_quantity,
+                start_at, end_at, delivery_type, created_at
+            ) VALUES (?, '옥수수', '테스트 상품', 'agricultural', 'AGENT-T', '강원도 인제군',
+                      30000, ?, 0.33, 1, 10000, ?, ?, 'direct', ?)
+        """, (product_id, price, now, now + ends_in, now))
+        conn.execute("""
+            INSERT INTO group_purchase_campaigns (
+                campaign_id, product_id, min_participants, target_quantity, status,
+                start_at, end_at, participants, created_at
+            ) VALUES (?, ?, ?, 10000, ?, ?, ?, '[]', ?)
+        """, (campaign_id, product_id, min_participants, status, now, now + ends_in, now))
+    return campaign_id
+
+
+def join_batch(pool, joins):
+    with pool.transaction(immediate=True) as conn:
+        return apply_joins(conn, joins, pool.lock_clause)
+
+
+def campaign_row(pool, campaign_id: str):
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT status, current_participants, current_quantity FROM group_purchase_campaigns WHERE campaign_id = ?",
+            (campaign_id,)
+        ).fetchone()
+
+
+def table_counts(pool, campaign_id: str):
+    """(참여자 행 수, 참여자 수량 합, 주문 수, 주문 수량 합)"""
+    with pool.connection() as conn:
+        participants = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM group_purchase_participants WHERE campaign_id = ?",
+            (campaign_id,)
+        ).fetchone()
+        orders = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM group_purchase_orders WHERE campaign_id = ?",
+            (campaign_id,)
+        ).fetchone()
+    return tuple(participants) + tuple(orders)
+
+
+class TestApplyJoins:
+    def test_repeat_join_adds_quantity_not_participant(self, pool):
+        """같은 사용자의 재참여는 참여자 수는 그대로, 수량과 주문만 늘림"""
+        campaign = add_campaign(pool, "C-REPEAT")
+        results = join_batch(pool, [(campaign, "alice", 2), (campaign, "alice", 3), (campaign, "bob", 1)])
+        assert all(result["success"] for result in results)
+        assert results[1]["campaign"]["current_participants"] == 1
+        assert results[2]["campaign"]["current_participants"] == 2
+
+        join_batch(pool, [(campaign, "alice", 1)])
+
+        assert tuple(campaign_row(pool, campaign)) == ("active", 2, 7)
+        assert table_counts(pool, campaign) == (2, 7, 4, 7)
+        with pool.connection() as conn:
+            alice = conn.execute(
+                "SELECT quantity FROM group_purchase_participants WHERE campaign_id = ? AND user_id = 'alice'",
+                (campaign,)
+            ).fetchone()[0]
+        assert alice == 6
+
+    @pytest.mark.parametrize("status, ends_in", [
+        ("failed", timedelta(days=1)),
+        ("success", timedelta(days=1)),
+        ("active", timedelta(seconds=-1)),
+    ])
+    def test_closed_or_expired_campaign_rejects(self, pool, status, ends_in):
+        """종료(active 아님) 또는 마감 지난 캠페인은 거절하고 아무것도 쓰지 않음"""
+        campaign = add_campaign(pool, "C-CLOSED", status=status, ends_in=ends_in)
+        results = join_batch(pool, [(campaign, "alice", 1), (campaign, "bob", 2)])
+
+        assert results == [{"success": False, "message": REJECTED_MESSAGE}] * 2
+        assert tuple(campaign_row(pool, campaign)) == (status, 0, 0)
+        assert table_counts(pool, campaign) == (0, 0, 0, 0)
+
+    def test_missing_campaign_fails_only_its_requests(self, pool):
+        """없는 캠페인 요청은 ValueError, 같은 배치의 다른 캠페인은 정상 처리"""
+        campaign = add_campaign(pool, "C-OK")
+        results = join_batch(pool, [("C-NOPE", "alice", 1), (campaign, "bob", 1), ("C-NOPE", "carol", 1)])
+
+        assert isinstance(results[0], ValueError) and isinstance(results[2], ValueError)
+        assert "C-NOPE" in str(results[0])
+        assert results[1]["success"]
+        assert tuple(campaign_row(pool, campaign)) == ("active", 1, 1)
+
+    def test_engine_join_raises_for_missing_campaign(self, pool):
+        engine = CampaignJoinEngine(pool)
+        with pytest.raises(ValueError):
+            engine.join("C-NOPE", "alice")
+        with pytest.raises(ValueError):
+            engine.join("C-NOPE", "alice", quantity=0)
+
+    def test_reaching_target_within_batch_closes_campaign(self, pool):
+        """배치 중간에 최소 인원 달성 → success, 이후 요청은 거절"""
+        campaign = add_campaign(pool, "C-GOAL", min_participants=2)
+        results = join_batch(pool, [(campaign, "alice", 1), (campaign, "bob", 1), (campaign, "carol", 1)])
+
+        assert results[0]["campaign"]["status"] == "active"
+        assert results[1]["campaign"]["status"] == "success"
+        assert results[1]["campaign"]["is_success"]
+        assert results[2] == {"success": False, "message": REJECTED_MESSAGE}
+        assert tuple(campaign_row(pool, campaign)) == ("success", 2, 2)
+        assert table_counts(pool, campaign) == (2, 2, 2, 2)
+
+        assert join_batch(pool, [(campaign, "dave", 1)])[0]["success"] is False
+
+
+class TestJoinSequencer:
+    def test_failed_batch_fails_every_request_and_rolls_back(self, pool):
+        """배치 트랜잭션이 실패하면 배치의 모든 요청이 같은 예외를 받고 전부 롤백"""
+        first = add_campaign(pool, "C-SEQ-1")
+        second = add_campaign(pool, "C-SEQ-2")
+        with pool.transaction() as conn:
+            conn.execute("DROP TABLE group_purchase_orders")  # 주문 INSERT 가 실패하도록
+
+        sequencer = JoinSequencer(pool, batch_size=16, batch_window_ms=200)
+        futures = [sequencer.submit(request) for request in [
+            (first, "alice", 1), (second, "bob", 1), (first, "carol", 2),
+        ]]
+        errors = [future.exception(timeout=5) for future in futures]
+        sequencer.close()
+
+        assert errors[0] is not None
+        assert all(error is errors[0] for error in errors)
+        assert sequencer.stats["failed_batches"] == 1
+        assert sequencer.stats["batches"] == 0
+        for campaign in (first, second):
+            assert tuple(campaign_row(pool, campaign)) == ("active", 0, 0)
+
+    def test_close_drains_queued_requests(self, pool):
+        campaign = add_campaign(pool, "C-DRAIN")
+        sequencer = JoinSequencer(pool, batch_size=4, batch_window_ms=50)
+        futures = [sequencer.submit((campaign, f"user-{i}", 1)) for i in range(10)]
+        sequencer.close()
+
+        assert all(future.result(timeout=0)["success"] for future in futures)
+        assert sequencer.stats["joins"] == 10
+        assert sequencer.stats["max_batch"] <= 4
+        with pytest.raises(RuntimeError):
+            sequencer.submit((campaign, "late", 1))
+
+
+@pytest.mark.parametrize("sequencer", [False, True], ids=["per-join", "sequencer"])
+def test_threaded_joins_keep_exact_counts(pool, sequencer):
+    """여러 스레드가 한 캠페인에 동시 참여해도 참여자/수량/주문이 정확히 일치"""
+    campaign = add_campaign(pool, "C-HOT")
+    engine = CampaignJoinEngine(pool, sequencer=sequencer, batch_window_ms=1)
+    threads_count, joins_per_thread = 8, 25
+    errors = []
+
+    def worker(worker_id: int):
+        try:
+            for n in range(joins_per_thread):
+                # 사용자 40명이 돌아가며 참여 → 재참여 포함
+                engine.join(campaign, f"user-{(worker_id * joins_per_thread + n) % 40}", quantity=n % 3 + 1)
+        except Exception as e:  # pragma: no cover - 실패 시 메시지 확인용
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.close()
+
+    total_joins = threads_count * joins_per_thread
+    total_quantity = threads_count * sum(n % 3 + 1 for n in range(joins_per_thread))
+    assert errors == []
+    assert tuple(campaign_row(pool, campaign)) == ("active", 40, total_quantity)
+    assert table_counts(pool, campaign) == (40, total_quantity, total_joins, total_quantity)
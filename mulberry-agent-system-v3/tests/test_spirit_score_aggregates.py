@@ -0,0 +1,243 @@
+"""
+Mulberry Spirit Score - 집계 테스트
+record_event 의 단일 커밋/롤백, 레벨 경계 갱신, rebuild_aggregates / verify_aggregates,
+스키마 초기화 시 기존 이력 이관, rebuild_totals.py 종료 코드를 tmp_path SQLite 로 검증
+"""
+
+import json
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# v3 modules 를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+
+from database.connection_pool import SQLitePool  # noqa: E402
+from spirit_score import rebuild_totals  # noqa: E402
+from spirit_score.database_schema import init_spirit_score_tables  # noqa: E402
+from spirit_score.spirit_score_manager import SpiritLevel, SpiritScoreEvent, SpiritScoreManager  # noqa: E402
+
+AGENTS = ["AGENT-001", "AGENT-002", "AGENT-003"]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "spirit.db")
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = SQLitePool(db_path, size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE agents (agent_id TEXT PRIMARY KEY, spirit_score REAL DEFAULT 0)")
+        conn.executemany("INSERT INTO agents VALUES (?, 0)", [(agent_id,) for agent_id in AGENTS])
+        conn.commit()
+        with redirect_stdout(StringIO()):
+            init_spirit_score_tables(conn)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def conn(pool):
+    with pool.connection() as conn:
+        yield conn
+
+
+def insert_history(conn, rows):
+    """집계 없이 이력만 INSERT (기존 DB / 다른 경로로 쓰인 기록 재현)"""
+    conn.executemany("""
+        INSERT INTO spirit_scores (record_id, agent_id, event_type, points, reason, created_at)
+        VALUES (?, ?, 'task_completed', ?, '이관 테스트', ?)
+    """, [(f"OLD-{i}", agent_id, points, datetime.now()) for i, (agent_id, points) in enumerate(rows)])
+    conn.commit()
+
+
+def totals(conn) -> dict:
+    rows = conn.execute("SELECT agent_id, total_score, total_events, level FROM spirit_score_totals").fetchall()
+    return {row[0]: (round(row[1], 6), row[2], row[3]) for row in rows}
+
+
+def agent_cache(conn, agent_id: str) -> float:
+    return conn.execute("SELECT spirit_score FROM agents WHERE agent_id = ?", (agent_id,)).fetchone()[0]
+
+
+class TestRecordEvent:
+    def test_record_and_aggregate_commit_once(self, pool, conn):
+        """기록 INSERT + 집계 UPSERT + agents 캐시가 커밋 한 번"""
+        manager = SpiritScoreManager(conn)
+        commits = pool.metrics()["commits"]
+        manager.record_event("AGENT-001", SpiritScoreEvent.TRAINING_COMPLETED, "교육 이수")
+        manager.record_event("AGENT-001", SpiritScoreEvent.TASK_FAILED, "업무 실패")
+
+        assert pool.metrics()["commits"] == commits + 2
+        assert totals(conn) == {"AGENT-001": (0.03, 2, "novice")}
+        assert agent_cache(conn, "AGENT-001") == pytest.approx(0.03)
+        assert manager.get_agent_score("AGENT-001")["total_events"] == 2
+        assert manager.verify_aggregates() == []
+
+    def test_failed_aggregate_upsert_rolls_back_record(self, pool, conn):
+        """집계 UPSERT 가 실패하면 기록 INSERT 도 함께 롤백 (커밋 없음)"""
+        manager = SpiritScoreManager(conn)
+        manager.record_event("AGENT-001", SpiritScoreEvent.TASK_COMPLETED, "업무 완료")
+        conn.execute("""
+            CREATE TRIGGER fail_totals BEFORE UPDATE ON spirit_score_totals
+            BEGIN SELECT RAISE(ABORT, 'aggregate write failed'); END
+        """)
+        conn.commit()
+        commits = pool.metrics()["commits"]
+
+        with pytest.raises(Exception, match="aggregate write failed"):
+            manager.record_event("AGENT-001", SpiritScoreEvent.TRAINING_COMPLETED, "교육 이수")
+
+        assert pool.metrics()["commits"] == commits
+        assert conn.execute("SELECT COUNT(*) FROM spirit_scores").fetchone()[0] == 1
+        assert totals(conn) == {"AGENT-001": (0.01, 1, "novice")}
+        assert agent_cache(conn, "AGENT-001") == pytest.approx(0.01)
+        assert not conn.raw.in_transaction
+
+    def test_level_updated_only_when_threshold_crossed(self, conn):
+        """레벨 UPDATE 는 경계(21/41/...)를 넘을 때만 실행"""
+        manager = SpiritScoreManager(conn)
+        statements = []
+        conn.raw.set_trace_callback(statements.append)
+
+        def level_updates():
+            return sum("SET level" in statement for statement in statements)
+
+        def record(points):
+            manager.record_event("AGENT-001", SpiritScoreEvent.TASK_COMPLETED, "점수", points_override=points)
+            return manager.get_agent_score("AGENT-001")["level"]
+
+        assert record(20.5) == SpiritLevel.NOVICE.value
+        assert record(0.4) == SpiritLevel.NOVICE.value
+        assert level_updates() == 0
+
+        assert record(0.2) == SpiritLevel.APPRENTICE.value  # 21.1
+        assert level_updates() == 1
+        assert record(5.0) == SpiritLevel.APPRENTICE.value
+        assert level_updates() == 1
+
+        assert record(-10.0) == SpiritLevel.NOVICE.value  # 16.1 (내려갈 때도)
+        assert level_updates() == 2
+
+        # 첫 기록부터 경계를 넘는 에이전트는 INSERT 시 레벨이 이미 맞음
+        manager.record_event("AGENT-002", SpiritScoreEvent.TASK_COMPLETED, "점수", points_override=50)
+        assert level_updates() == 2
+        assert totals(conn)["AGENT-002"][2] == SpiritLevel.SKILLED.value
+        conn.raw.set_trace_callback(None)
+        assert manager.verify_aggregates() == []
+
+
+class TestRebuildAndVerify:
+    def test_verify_reports_missing_mismatch_and_orphan(self, conn):
+        manager = SpiritScoreManager(conn)
+        for agent_id in AGENTS[:2]:
+            manager.record_event(agent_id, SpiritScoreEvent.TASK_COMPLETED, "업무 완료")
+        insert_history(conn, [("AGENT-003", 1.5)])                              # 집계 없음
+        conn.execute("UPDATE spirit_score_totals SET total_events = 9 WHERE agent_id = 'AGENT-002'")
+        conn.execute("""
+            INSERT INTO spirit_score_totals (agent_id, total_score, total_events, level, updated_at)
+            VALUES ('AGENT-GHOST', 2.0, 4, 'novice', ?)
+        """, (datetime.now(),))                                                 # 이력 없음
+        conn.commit()
+
+        problems = {m["agent_id"]: m for m in manager.verify_aggregates()}
+        assert {agent_id: m["problem"] for agent_id, m in problems.items()} == {
+            "AGENT-002": "mismatch",
+            "AGENT-003": "missing_aggregate",
+            "AGENT-GHOST": "orphan_aggregate",
+        }
+        assert problems["AGENT-002"]["expected"]["total_events"] == 1
+        assert problems["AGENT-002"]["actual"]["total_events"] == 9
+        assert problems["AGENT-003"]["expected"] == {"total_score": 1.5, "total_events": 1}
+        assert problems["AGENT-GHOST"]["expected"]["total_events"] == 0
+
+    def test_verify_checks_level_and_tolerance(self, conn):
+        manager = SpiritScoreManager(conn)
+        manager.record_event("AGENT-001", SpiritScoreEvent.TASK_COMPLETED, "업무 완료")
+        conn.execute("UPDATE spirit_score_totals SET total_score = total_score + 1e-9")
+        conn.commit()
+        assert manager.verify_aggregates() == []
+        assert manager.verify_aggregates(tolerance=1e-12)[0]["problem"] == "mismatch"
+
+        conn.execute("UPDATE spirit_score_totals SET level = 'master'")
+        conn.commit()
+        assert manager.verify_aggregates()[0]["actual"]["level"] == "master"
+
+    def test_rebuild_single_agent_leaves_others(self, conn):
+        manager = SpiritScoreManager(conn)
+        insert_history(conn, [("AGENT-001", 1.0), ("AGENT-001", 2.0), ("AGENT-002", 30.0)])
+
+        assert manager.rebuild_aggregates("AGENT-001") == 1
+        assert totals(conn) == {"AGENT-001": (3.0, 2, "novice")}
+        assert agent_cache(conn, "AGENT-001") == pytest.approx(3.0)
+        assert agent_cache(conn, "AGENT-002") == 0
+
+        assert manager.rebuild_aggregates() == 2
+        assert totals(conn)["AGENT-002"] == (30.0, 1, "apprentice")
+        assert agent_cache(conn, "AGENT-002") == pytest.approx(30.0)
+        assert manager.verify_aggregates() == []
+
+    def test_rebuild_clears_aggregates_without_history(self, conn):
+        """전체 재계산은 이력 없는 집계 행을 지우고 agents 캐시를 0 으로"""
+        manager = SpiritScoreManager(conn)
+        manager.record_event("AGENT-001", SpiritScoreEvent.TASK_COMPLETED, "업무 완료")
+        conn.execute("DELETE FROM spirit_scores")
+        conn.commit()
+
+        assert manager.rebuild_aggregates() == 0
+        assert totals(conn) == {}
+        assert agent_cache(conn, "AGENT-001") == 0
+
+
+class TestSchemaBackfill:
+    def test_init_backfills_existing_history_once(self, conn):
+        """집계가 없는 기존 이력은 스키마 초기화 때 이관, 이후 초기화는 건너뜀"""
+        insert_history(conn, [("AGENT-001", 10.0), ("AGENT-001", 15.0), ("AGENT-002", 0.5)])
+
+        output = StringIO()
+        with redirect_stdout(output):
+            init_spirit_score_tables(conn)
+        assert "에이전트 2명" in output.getvalue()
+        assert totals(conn) == {
+            "AGENT-001": (25.0, 2, "apprentice"),
+            "AGENT-002": (0.5, 1, "novice"),
+        }
+        assert agent_cache(conn, "AGENT-001") == pytest.approx(25.0)
+        assert SpiritScoreManager(conn).verify_aggregates() == []
+
+        output = StringIO()
+        with redirect_stdout(output):
+            init_spirit_score_tables(conn)
+        assert "이관" not in output.getvalue()
+
+
+class TestRebuildTotalsTool:
+    @pytest.fixture
+    def config(self, tmp_path, db_path):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({"database": {"type": "sqlite", "path": db_path}}), encoding="utf-8")
+        return str(path)
+
+    def run_tool(self, monkeypatch, capsys, *args) -> int:
+        monkeypatch.setattr(sys, "argv", ["rebuild_totals.py", *args])
+        code = rebuild_totals.main()
+        capsys.readouterr()
+        return code
+
+    def test_exit_code_follows_verification(self, conn, config, monkeypatch, capsys):
+        manager = SpiritScoreManager(conn)
+        manager.record_event("AGENT-001", SpiritScoreEvent.TASK_COMPLETED, "업무 완료")
+        assert self.run_tool(monkeypatch, capsys, "--config", config) == 0
+
+        conn.execute("UPDATE spirit_score_totals SET total_events = 5")
+        conn.commit()
+        assert self.run_tool(monkeypatch, capsys, "--config", config) == 1
+        assert self.run_tool(monkeypatch, capsys, "--config", config, "--rebuild", "--agent", "AGENT-001") == 0
+        assert manager.verify_aggregates() == []
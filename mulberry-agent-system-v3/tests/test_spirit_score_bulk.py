@@ -0,0 +1,235 @@
+"""
+Mulberry Spirit Score - 일괄 기록 테스트
+record_events_bulk 의 제너레이터 입력 / chunk_size·transaction_size 구간 커밋,
+skip_invalid 오류 보고(MAX_REPORTED_ERRORS 상한), 잘못된 이벤트 시 전체 롤백,
+커밋이 성공한 총점만 리더보드에 반영되는지를 tmp_path SQLite 로 검증
+"""
+
+import sqlite3
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# v3 modules 와 공용 인프라(src)를 Python 경로에 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "modules"))
+sys.path.insert(0, str(ROOT.parent / "src"))
+
+from database.connection_pool import SQLitePool  # noqa: E402
+from leaderboard_index import LeaderboardIndex  # noqa: E402
+from spirit_score.database_schema import init_spirit_score_tables  # noqa: E402
+from spirit_score.spirit_score_manager import MAX_REPORTED_ERRORS, SpiritScoreEvent, SpiritScoreManager  # noqa: E402
+
+AGENTS = [f"AGENT-{i:03d}" for i in range(5)]
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "spirit.db"), size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE agents (agent_id TEXT PRIMARY KEY, spirit_score REAL DEFAULT 0)")
+        conn.executemany("INSERT INTO agents VALUES (?, 0)", [(agent_id,) for agent_id in AGENTS])
+        conn.commit()
+        with redirect_stdout(StringIO()):
+            init_spirit_score_tables(conn)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def conn(pool):
+    with pool.connection() as conn:
+        yield conn
+
+
+class FailingCommit:
+    """commit() 만 실패하는 연결 (디스크 오류 등 재현)"""
+
+    def __init__(self, conn, fail_on: int = 1):
+        self._conn = conn
+        self._fail_on = fail_on
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        if self.commits >= self._fail_on:
+            raise sqlite3.OperationalError("disk I/O error")
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def events(count: int, *, points: float = None):
+    """에이전트를 돌아가며 TASK_COMPLETED 이벤트 (제너레이터)"""
+    for i in range(count):
+        event = {"agent_id": AGENTS[i % len(AGENTS)], "event_type": "task_completed", "reason": f"동기화 #{i}"}
+        if points is not None:
+            event["points_override"] = points
+        yield event
+
+
+def record_count(conn) -> int:
+    return conn.execute("SELECT COUNT(*) FROM spirit_scores").fetchone()[0]
+
+
+def totals(conn) -> dict:
+    rows = conn.execute("SELECT agent_id, total_score, total_events FROM spirit_score_totals").fetchall()
+    return {row[0]: (round(row[1], 6), row[2]) for row in rows}
+
+
+class TestChunking:
+    def test_generator_with_chunk_and_transaction_size(self, pool, conn):
+        """제너레이터를 chunk_size 씩 읽고 transaction_size 건마다 커밋"""
+        consumed = []
+
+        def tracked():
+            for i, event in enumerate(events(25)):
+                consumed.append(i)
+                yield event
+
+        manager = SpiritScoreManager(conn)
+        commits = pool.metrics()["commits"]
+        result = manager.record_events_bulk(tracked(), chunk_size=4, transaction_size=10)
+
+        # 4건씩 읽어 12건, 24건에서 구간 커밋, 남은 1건은 마지막 커밋
+        assert pool.metrics()["commits"] == commits + 3
+        assert result == {"recorded": 25, "skipped": 0, "agents": 5, "errors": []}
+        assert consumed == list(range(25))
+        assert record_count(conn) == 25
+        assert totals(conn)["AGENT-000"] == (0.05, 5)
+        assert manager.verify_aggregates() == []
+
+    def test_generator_is_read_lazily(self, conn):
+        """한 번에 chunk_size 건까지만 읽음 (읽는 시점에 앞 구간 INSERT 가 끝나 있음)"""
+        manager = SpiritScoreManager(conn)
+        seen_rows = []
+
+        def probing():
+            for i, event in enumerate(events(9)):
+                if i % 3 == 0:
+                    seen_rows.append(record_count(conn))
+                yield event
+
+        manager.record_events_bulk(probing(), chunk_size=3)
+        assert seen_rows == [0, 3, 6]
+
+    def test_committed_segments_survive_later_failure(self, conn):
+        """transaction_size 구간 커밋 후 실패하면 커밋된 구간만 남음"""
+        def failing():
+            yield from events(12)
+            raise RuntimeError("단말기 연결 끊김")
+
+        manager = SpiritScoreManager(conn)
+        with pytest.raises(RuntimeError):
+            manager.record_events_bulk(failing(), chunk_size=5, transaction_size=10)
+
+        assert record_count(conn) == 10
+        assert sum(events for _, events in totals(conn).values()) == 10
+        assert manager.verify_aggregates() == []
+
+    @pytest.mark.parametrize("kwargs", [{"chunk_size": 0}, {"transaction_size": 0}])
+    def test_invalid_sizes(self, conn, kwargs):
+        with pytest.raises(ValueError):
+            SpiritScoreManager(conn).record_events_bulk(events(1), **kwargs)
+
+
+class TestInvalidEvents:
+    def test_skip_invalid_reports_errors(self, conn):
+        batch = [
+            {"agent_id": "AGENT-000", "event_type": "task_completed", "reason": "ok"},
+            {"event_type": "task_completed", "reason": "agent 없음"},
+            {"agent_id": "AGENT-001", "event_type": "no_such_event", "reason": "종류 오류"},
+            {"agent_id": "AGENT-001", "event_type": "task_completed", "reason": "nan", "points_override": "nan"},
+            {"agent_id": "AGENT-001", "event_type": "task_completed", "reason": "시각", "created_at": 123},
+            {"agent_id": "", "event_type": "task_completed", "reason": "빈 ID"},
+            {"agent_id": "AGENT-002", "event_type": "positive_review", "reason": "ok",
+             "created_at": "2026-01-02T03:04:05"},
+        ]
+        manager = SpiritScoreManager(conn)
+        result = manager.record_events_bulk(iter(batch), chunk_size=2, skip_invalid=True)
+
+        assert (result["recorded"], result["skipped"], result["agents"]) == (2, 5, 2)
+        assert [error["index"] for error in result["errors"]] == [1, 2, 3, 4, 5]
+        assert "agent_id" in result["errors"][0]["error"]
+        assert "no_such_event" in result["errors"][1]["error"]
+        assert totals(conn) == {"AGENT-000": (0.01, 1), "AGENT-002": (0.02, 1)}
+        assert conn.execute(
+            "SELECT created_at FROM spirit_scores WHERE agent_id = 'AGENT-002'"
+        ).fetchone()[0].startswith("2026-01-02 03:04:05")
+
+    def test_reported_errors_are_capped(self, conn):
+        """오류 상세는 MAX_REPORTED_ERRORS 개까지만, skipped 는 전부 셈"""
+        invalid = MAX_REPORTED_ERRORS + 50
+        batch = [{"agent_id": "AGENT-000", "event_type": "bogus", "reason": "x"}] * invalid
+        result = SpiritScoreManager(conn).record_events_bulk(batch + list(events(3)), skip_invalid=True)
+
+        assert result["skipped"] == invalid
+        assert result["recorded"] == 3
+        assert len(result["errors"]) == MAX_REPORTED_ERRORS
+        assert result["errors"][-1]["index"] == MAX_REPORTED_ERRORS - 1
+
+    def test_invalid_event_rolls_back_everything(self, conn):
+        """skip_invalid=False 면 ValueError + 앞 chunk 까지 전체 롤백"""
+        batch = list(events(7))
+        batch.insert(5, {"agent_id": "AGENT-000", "event_type": "bogus", "reason": "x"})
+        leaderboard = LeaderboardIndex(seed=1)
+        leaderboard.update("AGENT-000", 1.0, version=1)
+        manager = SpiritScoreManager(conn, leaderboard=leaderboard)
+
+        with pytest.raises(ValueError, match="event #5"):
+            manager.record_events_bulk(batch, chunk_size=2)
+
+        assert record_count(conn) == 0
+        assert totals(conn) == {}
+        assert conn.execute("SELECT SUM(spirit_score) FROM agents").fetchone()[0] == 0
+        assert leaderboard.score("AGENT-000") == 1.0
+        assert len(leaderboard) == 1
+
+
+class TestLeaderboard:
+    @pytest.fixture
+    def leaderboard(self, conn):
+        manager = SpiritScoreManager(conn)
+        manager.record_event("AGENT-000", SpiritScoreEvent.TRAINING_COMPLETED, "교육 이수")
+        index = LeaderboardIndex(seed=1)
+        SpiritScoreManager(conn, leaderboard=index)  # spirit_score_totals 에서 적재
+        return index
+
+    def test_totals_published_after_commit(self, conn, leaderboard):
+        manager = SpiritScoreManager(conn, leaderboard=leaderboard)
+        manager.record_events_bulk(events(10, points=1.0))
+
+        assert leaderboard.score("AGENT-000") == pytest.approx(2.05)
+        assert leaderboard.member_version("AGENT-000") == 3
+        assert [entry.member_id for entry in leaderboard.top(1)] == ["AGENT-000"]
+        assert len(leaderboard) == len(AGENTS)
+
+    def test_failed_commit_leaves_index_unchanged(self, conn, leaderboard):
+        """커밋이 실패하면 롤백된 총점이 리더보드에 가지 않음"""
+        before = [(entry.member_id, entry.score) for entry in leaderboard.top(10)]
+        manager = SpiritScoreManager(FailingCommit(conn), leaderboard=leaderboard)
+
+        with pytest.raises(sqlite3.OperationalError):
+            manager.record_events_bulk(events(10, points=1.0))
+
+        assert [(entry.member_id, entry.score) for entry in leaderboard.top(10)] == before
+        assert leaderboard.member_version("AGENT-000") == 1
+        assert record_count(conn) == 1
+        assert totals(conn) == {"AGENT-000": (0.05, 1)}
+
+    def test_failed_segment_commit_publishes_only_committed_segments(self, conn, leaderboard):
+        """앞 구간은 커밋되어 반영되고, 커밋에 실패한 구간의 총점은 반영되지 않음"""
+        manager = SpiritScoreManager(FailingCommit(conn, fail_on=2), leaderboard=leaderboard)
+
+        with pytest.raises(sqlite3.OperationalError):
+            manager.record_events_bulk(events(10, points=1.0), chunk_size=5, transaction_size=5)
+
+        # 첫 구간(5건): 에이전트마다 1건씩 커밋
+        assert leaderboard.score("AGENT-000") == pytest.approx(1.05)
+        assert leaderboard.score("AGENT-004") == pytest.approx(1.0)
+        assert totals(conn)["AGENT-004"] == (1.0, 1)
+        assert record_count(conn) == 6
@@ -2,9 +2,12 @@ import re
 import json
 import asyncio
 import logging # Added logging
-import httpx   # Added httpx
 from twilio.rest import Client # Added Twilio Client
 
+# Shared outbound HTTP engine (repo src/ on PYTHONPATH): pooled keep-alive
+# connections, jittered retries and a per-host circuit breaker
+from outbound_delivery import DeliveryError, get_delivery_engine
+
 # Import Settings class from src.settings
 from src.settings import Settings
 
@@ -132,26 +135,29 @@ class MulberryMind:
         }
         return claim_report
 
-    # Modified to accept settings object and use httpx for actual API call
+    # Submits through the shared delivery engine (one pooled client per insurer host)
     @staticmethod
-    async def send_json_to_api(final_report: dict, settings: Settings) -> dict:
+    async def send_json_to_api(final_report: dict, settings: Settings, delivery=None) -> dict:
         logger.info(f"MulberryMind: Submitting claim via API to {settings.API_INSURER_URL}...")
-        await asyncio.sleep(0.1) # Simulate network latency
+        delivery = delivery or get_delivery_engine()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    settings.API_INSURER_URL,
-                    json=final_report,
-                    headers={"Authorization": f"Bearer {settings.API_INSURER_API_KEY}"}
-                )
-                response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-                logger.info("Claim submitted via API successfully.")
-                return {"status": "success", "message": "Claim submitted via API successfully", "claim_id": final_report.get("claim_id")}
-        except httpx.HTTPStatusError as e:
-            logger.error(f"API submission failed due to HTTP error: {e.response.status_code} - {e.response.text}")
-            return {"status": "failed", "message": f"HTTP error during API submission: {e.response.status_code}", "details": e.response.text}
-        except httpx.RequestError as e:
+            await delivery.request(
+                "POST",
+                settings.API_INSURER_URL,
+                json=final_report,
+                headers={
+                    "Authorization": f"Bearer {settings.API_INSURER_API_KEY}",
+                    # Retries must not file the same claim twice
+                    "Idempotency-Key": str(final_report.get("claim_id", "")),
+                }
+            )
+            logger.info("Claim submitted via API successfully.")
+            return {"status": "success", "message": "Claim submitted via API successfully", "claim_id": final_report.get("claim_id")}
+        except DeliveryError as e:
+            if e.response is not None:
+                logger.error(f"API submission failed due to HTTP error: {e.status_code} - {e.response.text}")
+                return {"status": "failed", "message": f"HTTP error during API submission: {e.status_code}", "details": e.response.text}
             logger.error(f"API submission failed due to network error: {e}")
             return {"status": "failed", "message": f"Network error during API submission: {e}"}
         except Exception as e:
@@ -22,7 +22,7 @@ Run:
     python mulberry_wifi_sensing_mvp.py
 
 Production dependencies (commented — not needed for MVP stub):
-    pip install numpy scipy pyaudio librosa soundfile torch requests
+    pip install numpy scipy pyaudio librosa soundfile torch httpx loguru  # + src/ on PYTHONPATH
 """
 
 from __future__ import annotations
@@ -37,13 +37,14 @@ import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
-# ── optional: requests (needed for real MHCClient HTTP calls) ──────────────
+# ── optional: shared outbound delivery engine (src/outbound_delivery.py) ───
+# Needed for real MHCClient HTTP calls; add the repo's src/ to PYTHONPATH.
 try:
-    import requests as _requests
-    _REQUESTS_AVAILABLE = True
+    from outbound_delivery import DeliveryError, RetryPolicy, get_delivery_engine
+    _DELIVERY_AVAILABLE = True
 except ImportError:
-    _requests = None
-    _REQUESTS_AVAILABLE = False
+    DeliveryError = RetryPolicy = get_delivery_engine = None
+    _DELIVERY_AVAILABLE = False
 
 logging.basicConfig(
     level=logging.INFO,
@@ -312,8 +313,9 @@ class MHCClient:
     Features:
     - API Key는 환경 변수에서 로드 (보안)
     - Bearer Token 인증
-    - 지수 백오프 재시도 (max_retries=3, 5xx 오류 시)
-    - MVP 모드: requests 미설치 시 stub 응답 반환
+    - 공용 전송 엔진 사용: keep-alive 연결 풀, 지수 백오프 + jitter 재시도
+      (max_retries=3, 5xx/네트워크 오류 시), 호스트별 서킷 브레이커
+    - MVP 모드: 전송 엔진 미설치 시 stub 응답 반환
     """
 
     def __init__(
@@ -322,9 +324,12 @@ class MHCClient:
         api_key_env_var: str = "MHC_API_KEY",
         api_key: Optional[str] = None,
         mock_mode: bool = False,
+        delivery=None,
     ) -> None:
         self.base_url = base_url
         self._mock_mode = mock_mode
+        # 전송 엔진 주입 (None → 프로세스 공용 엔진)
+        self._delivery = delivery
         # api_key 직접 전달 > 환경변수 > 기본 mock 값
         self.api_key = api_key or os.getenv(api_key_env_var, "mock_api_key")
         if self.api_key == "mock_api_key":
@@ -344,15 +349,15 @@ class MHCClient:
         max_retries: int = 3,
         backoff_factor: float = 1.0,
     ) -> dict:
-        """HTTP POST with retry + exponential backoff.
-        MVP stub: requests 미설치 또는 mock_mode=True 시 stub 응답 반환.
+        """HTTP POST with retry + exponential backoff (shared delivery engine).
+        MVP stub: 전송 엔진 미설치 또는 mock_mode=True 시 stub 응답 반환.
         """
         if not LEGACY_EXTERNAL_ACTIONS_ENABLED:
             raise PermissionError(
                 "legacy external actions are disabled; use safety_workflow.py and recorded Human Approval"
             )
 
-        if self._mock_mode or not _REQUESTS_AVAILABLE:
+        if self._mock_mode or not _DELIVERY_AVAILABLE:
             logger.info(
                 f"[MHCClient][STUB] POST {endpoint} "
                 f"payload_type={payload.get('eventType')} → mock OK"
@@ -364,50 +369,32 @@ class MHCClient:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
-
-        for attempt in range(max_retries):
-            logger.info(
-                f"[MHCClient] attempt {attempt + 1}/{max_retries} → {url}"
+        delivery = self._delivery or get_delivery_engine()
+        # 백오프는 전송 루프에서 대기 (호출 스레드에서 time.sleep 하지 않음)
+        retry = RetryPolicy(max_attempts=max_retries, backoff_base=backoff_factor)
+
+        logger.info(f"[MHCClient] POST {url} (max_retries={max_retries})")
+        try:
+            response = delivery.request_sync(
+                "POST", url, headers=headers, json=payload, timeout=10, retry=retry
             )
-            try:
-                response = _requests.post(
-                    url, headers=headers, json=payload, timeout=10
-                )
-                response.raise_for_status()
-                return response.json()
+            return response.json()
 
-            except _requests.exceptions.HTTPError as exc:
-                status_code = (
-                    exc.response.status_code if exc.response is not None else None
-                )
-                logger.error(f"[MHCClient] HTTP {status_code} for {url}: {exc}")
-                if status_code in (500, 502, 503, 504) and attempt < max_retries - 1:
-                    sleep_time = backoff_factor * (2 ** attempt)
-                    logger.info(f"[MHCClient] retry in {sleep_time:.1f}s …")
-                    time.sleep(sleep_time)
-                else:
-                    raise MHCApiError(
-                        f"HTTP error {status_code}", status_code, exc
-                    )
-
-            except _requests.exceptions.RequestException as exc:
-                logger.error(f"[MHCClient] network error: {exc}")
-                if attempt < max_retries - 1:
-                    sleep_time = backoff_factor * (2 ** attempt)
-                    logger.info(f"[MHCClient] retry in {sleep_time:.1f}s …")
-                    time.sleep(sleep_time)
-                else:
-                    raise MHCApiError(
-                        "Network error after retries", original_exception=exc
-                    )
-
-            except Exception as exc:
-                logger.error(f"[MHCClient] unexpected error: {exc}")
+        except DeliveryError as exc:
+            logger.error(f"[MHCClient] delivery failed for {url}: {exc}")
+            if exc.status_code is not None:
                 raise MHCApiError(
-                    "Unexpected error", original_exception=exc
+                    f"HTTP error {exc.status_code}", exc.status_code, exc
                 )
+            raise MHCApiError(
+                "Network error after retries", original_exception=exc
+            )
 
-        raise MHCApiError(f"Failed after {max_retries} attempts")
+        except Exception as exc:
+            logger.error(f"[MHCClient] unexpected error: {exc}")
+            raise MHCApiError(
+                "Unexpected error", original_exception=exc
+            )
 
     def send_fall_detection_alert(self, payload: dict) -> dict:
         return self._send_request("/events/fall-detection", payload)
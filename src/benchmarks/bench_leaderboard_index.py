@@ -0,0 +1,109 @@
+"""
+Mulberry - Leaderboard Index Micro-Benchmark
+리더보드 / "내 순위" 조회 비용: SQL (이력 GROUP BY, 집계 테이블) vs 메모리 인덱스
+
+Usage:
+    python src/benchmarks/bench_leaderboard_index.py [--agents 20000] [--events 200000]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from leaderboard_index import LeaderboardIndex
+
+
+def measure_us(fn, calls: int) -> float:
+    """fn 1회 평균 소요 시간 (마이크로초)"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def setup(agents: int, events: int, seed: int) -> sqlite3.Connection:
+    """spirit_scores 이력 + spirit_score_totals 집계 (v3 스키마와 같은 형태)"""
+    rng = random.Random(seed)
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE spirit_scores (agent_id TEXT NOT NULL, points REAL NOT NULL)")
+    db.execute("CREATE INDEX idx_spirit_scores_agent ON spirit_scores(agent_id)")
+    db.executemany(
+        "INSERT INTO spirit_scores VALUES (?, ?)",
+        ((f"AGENT-{rng.randrange(agents):06d}", rng.choice((0.01, 0.005, 0.02, 0.05, -0.02))) for _ in range(events))
+    )
+    db.execute("""
+        CREATE TABLE spirit_score_totals (agent_id TEXT PRIMARY KEY, total_score REAL NOT NULL, total_events INTEGER)
+    """)
+    db.execute("CREATE INDEX idx_spirit_totals_score ON spirit_score_totals(total_score DESC, agent_id)")
+    db.execute("""
+        INSERT INTO spirit_score_totals
+        SELECT agent_id, SUM(points), COUNT(*) FROM spirit_scores GROUP BY agent_id
+    """)
+    db.commit()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리더보드 인덱스 마이크로 벤치마크")
+    parser.add_argument("--agents", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    db = setup(args.agents, args.events, args.seed)
+    members = [row[0] for row in db.execute("SELECT agent_id FROM spirit_score_totals")]
+    rng = random.Random(args.seed)
+
+    index = LeaderboardIndex(seed=args.seed)
+    started = time.perf_counter()
+    index.load(db.execute("SELECT agent_id, total_score, total_events FROM spirit_score_totals"))
+    load_ms = (time.perf_counter() - started) * 1000
+
+    def sql_rank(table_scan: bool):
+        agent_id = rng.choice(members)
+        if table_scan:
+            return db.execute("""
+                SELECT COUNT(*) + 1 FROM (SELECT agent_id, SUM(points) AS s FROM spirit_scores GROUP BY agent_id)
+                WHERE s > (SELECT SUM(points) FROM spirit_scores WHERE agent_id = ?)
+            """, (agent_id,)).fetchone()
+        score = db.execute(
+            "SELECT total_score FROM spirit_score_totals WHERE agent_id = ?", (agent_id,)
+        ).fetchone()[0]
+        return db.execute(
+            "SELECT COUNT(*) + 1 FROM spirit_score_totals WHERE total_score > ?", (score,)
+        ).fetchone()
+
+    slow_calls = max(args.calls // 100, 5)
+    results = [
+        ("top10 · 이력 GROUP BY", measure_us(lambda: db.execute("""
+            SELECT agent_id, SUM(points) AS s FROM spirit_scores GROUP BY agent_id ORDER BY s DESC LIMIT 10
+        """).fetchall(), slow_calls)),
+        ("top10 · 집계 테이블", measure_us(lambda: db.execute("""
+            SELECT agent_id, total_score FROM spirit_score_totals ORDER BY total_score DESC, agent_id LIMIT 10
+        """).fetchall(), args.calls)),
+        ("top10 · 인덱스", measure_us(lambda: index.top(10), args.calls)),
+        ("내 순위 · 이력 GROUP BY", measure_us(lambda: sql_rank(True), slow_calls)),
+        ("내 순위 · 집계 테이블", measure_us(lambda: sql_rank(False), args.calls)),
+        ("내 순위 · 인덱스", measure_us(lambda: index.rank(rng.choice(members)), args.calls)),
+        ("내 주변 ±5 · 인덱스", measure_us(lambda: index.around(rng.choice(members), 5), args.calls)),
+        ("점수 갱신 · 인덱스", measure_us(
+            lambda: index.update(rng.choice(members), rng.uniform(-1, 5)), args.calls
+        )),
+    ]
+
+    print(f"📊 에이전트 {len(members):,}명, 이력 {args.events:,}건 (인덱스 적재 {load_ms:.0f} ms)")
+    print(f"{'query':<24} | {'µs/call':>12}")
+    print("-" * 40)
+    for name, micros in results:
+        print(f"{name:<24} | {micros:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
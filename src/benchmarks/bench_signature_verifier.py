@@ -0,0 +1,71 @@
+"""
+Mulberry Phase 4-B - Signature Verifier Micro-Benchmark
+코어 1개당 초당 서명 검증 수 (매번 키잉 vs 사전 키잉 copy())
+
+Usage:
+    python src/benchmarks/bench_signature_verifier.py [--seconds 1.0]
+"""
+
+import argparse
+import hashlib
+import hmac
+import sys
+import time
+from pathlib import Path
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from signature_verifier import SignatureVerifier
+
+
+BODY_SIZES = (256, 2 * 1024, 16 * 1024, 256 * 1024)
+SECRET = "5f2b8c0e9d4a4f3e8b1c7a6d2e9f0a1b"
+
+
+def naive_verify(secret: str, body: bytes, signature: str) -> bool:
+    """기존 방식: 요청마다 hmac.new(secret) 키잉"""
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def measure(fn, seconds: float) -> float:
+    """fn 을 seconds 동안 반복 실행해 초당 호출 수 반환"""
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0, help="측정 시간 (케이스당)")
+    args = parser.parse_args()
+
+    verifier = SignatureVerifier(max_body_bytes=max(BODY_SIZES))
+    verifier.set_secret("AGENT_001", SECRET)
+    previous = SignatureVerifier(max_body_bytes=max(BODY_SIZES))
+    previous.set_secret("AGENT_001", SECRET)
+    previous.rotate_secret("AGENT_001", "0" * 32)  # 교체 중: 두 번째 시크릿에서 일치
+
+    print(f"{'body':>8} | {'naive/s':>12} | {'cached/s':>12} | {'rotating/s':>12} | {'speedup':>7}")
+    print("-" * 64)
+    for size in BODY_SIZES:
+        body = b"x" * size
+        signature = hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+        naive = measure(lambda: naive_verify(SECRET, body, signature), args.seconds)
+        cached = measure(lambda: verifier.verify("AGENT_001", body, signature), args.seconds)
+        rotating = measure(lambda: previous.verify("AGENT_001", body, signature), args.seconds)
+        print(f"{size:>8} | {naive:>12,.0f} | {cached:>12,.0f} | {rotating:>12,.0f} | {cached / naive:>6.2f}x")
+
+    malformed = measure(lambda: verifier.verify("AGENT_001", b"x" * 256, "not-a-signature"), args.seconds)
+    print(f"\nfast reject (malformed signature): {malformed:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
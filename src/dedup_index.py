@@ -0,0 +1,246 @@
+"""
+Mulberry Phase 4-B - Webhook Dedup Index
+결제 게이트웨이 재시도 웹훅 중복 수신 차단
+
+Mission: 같은 결제 웹훅이 두 번 와도 정산은 한 번
+- 시간 구간별 집합 링 (TTL 경과 구간은 통째로 재사용 → 만료 비용 O(1))
+- 키는 16바이트 BLAKE2b 다이제스트로 고정 크기 저장
+- 최대 키 수 상한 (초과 시 가장 오래된 키부터 한 개씩 조기 만료 - 구간 내 FIFO)
+- 선택적 SQLite 영속화 (재시작 후에도 TTL 내 중복 차단)
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from loguru import logger
+
+
+class DedupIndex:
+    """
+    TTL 기반 중복 키 인덱스
+
+    window = ttl_seconds 를 buckets 개 구간으로 나눈 집합 링 (구간은 삽입 순서 dict).
+    조회는 구간 수만큼의 집합 조회 → 이벤트 수와 무관하게 일정
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 24 * 3600,
+        buckets: int = 24,
+        max_keys: int = 2_000_000,
+        persist_path: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        인덱스 초기화
+
+        Args:
+            ttl_seconds: 중복 판정 유지 시간 (초)
+            buckets: TTL 분할 수 (클수록 만료 경계가 정확)
+            max_keys: 최대 보관 키 수 (메모리 상한)
+            persist_path: SQLite 파일 경로 (None = 메모리 전용)
+            clock: 시계 함수 (벽시계 - 재시작 후 영속 키 만료 판정에 사용)
+        """
+        if buckets < 1:
+            raise ValueError("buckets must be >= 1")
+
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = ttl_seconds / buckets
+        self.max_keys = max_keys
+        self._clock = clock
+
+        self._buckets: List[Dict[bytes, None]] = [{} for _ in range(buckets)]
+        self._epochs: List[int] = [-1] * buckets
+        self._size = 0
+
+        # 통계
+        self.stats: Dict[str, int] = {
+            "added": 0,
+            "duplicates": 0,
+            "evicted_early": 0,
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path is not None:
+            self._open(Path(persist_path))
+
+    # ============================================
+    # Buckets
+    # ============================================
+
+    def _epoch(self, at: Optional[float] = None) -> int:
+        return int((self._clock() if at is None else at) / self.bucket_seconds)
+
+    @staticmethod
+    def _digest(key: Hashable) -> bytes:
+        if not isinstance(key, (str, bytes)):
+            key = "\x1f".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+        if isinstance(key, str):
+            key = key.encode()
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _bucket_for(self, epoch: int) -> Dict[bytes, None]:
+        """epoch 구간 집합 (오래된 구간 재사용 시 초기화)"""
+        position = epoch % len(self._buckets)
+        if self._epochs[position] != epoch:
+            self._size -= len(self._buckets[position])
+            self._buckets[position].clear()
+            self._epochs[position] = epoch
+            self._purge_persisted()
+        return self._buckets[position]
+
+    def _contains(self, digest: bytes, epoch: int) -> bool:
+        oldest = epoch - len(self._buckets) + 1
+        for bucket, bucket_epoch in zip(self._buckets, self._epochs):
+            if bucket_epoch >= oldest and digest in bucket:
+                return True
+        return False
+
+    def _evict_oldest(self) -> Optional[bytes]:
+        """
+        최대 키 수 초과 시 가장 오래된 키 1개 조기 만료
+
+        가장 오래된 비어있지 않은 구간에서 먼저 들어온 키부터 (구간 내 FIFO).
+        한 구간 안에서 폭주해도 방금 등록된 키는 남는다
+
+        Returns:
+            Optional[bytes]: 만료된 다이제스트 (영속 저장소에서도 삭제)
+        """
+        candidates = [
+            (epoch, position)
+            for position, epoch in enumerate(self._epochs)
+            if self._buckets[position]
+        ]
+        if not candidates:
+            return None
+        _, position = min(candidates)
+        bucket = self._buckets[position]
+        digest = next(iter(bucket))
+        del bucket[digest]
+        self._size -= 1
+        self.stats["evicted_early"] += 1
+        return digest
+
+    # ============================================
+    # Public API
+    # ============================================
+
+    def check_and_add(self, key: Hashable) -> bool:
+        """
+        키 등록 (이미 있으면 중복)
+
+        Args:
+            key: 중복 판정 키 (예: (agent_id, event_type, transaction_id))
+
+        Returns:
+            bool: 새 키이면 True, TTL 내 중복이면 False
+        """
+        digest = self._digest(key)
+        now = self._clock()
+        epoch = self._epoch(now)
+
+        if self._contains(digest, epoch):
+            self.stats["duplicates"] += 1
+            return False
+
+        bucket = self._bucket_for(epoch)
+        bucket[digest] = None
+        self._size += 1
+        self.stats["added"] += 1
+
+        evicted = self._evict_oldest() if self._size > self.max_keys else None
+
+        if self._db is not None:
+            if evicted is not None:
+                self._db.execute("DELETE FROM dedup_keys WHERE digest = ?", (evicted,))
+            self._db.execute("INSERT OR REPLACE INTO dedup_keys (digest, seen_at) VALUES (?, ?)", (digest, now))
+            self._db.commit()
+
+        return True
+
+    def contains(self, key: Hashable) -> bool:
+        """TTL 내 등록 여부 (등록하지 않음)"""
+        return self._contains(self._digest(key), self._epoch())
+
+    def discard(self, key: Hashable):
+        """
+        키 삭제 (수신 처리 실패 시 재시도가 거절되지 않도록)
+
+        Args:
+            key: 중복 판정 키
+        """
+        digest = self._digest(key)
+        for bucket in self._buckets:
+            if digest in bucket:
+                del bucket[digest]
+                self._size -= 1
+
+        if self._db is not None:
+            self._db.execute("DELETE FROM dedup_keys WHERE digest = ?", (digest,))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        return {
+            **self.stats,
+            "keys": self._size,
+            "max_keys": self.max_keys,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+        }
+
+    # ============================================
+    # SQLite Persistence
+    # ============================================
+
+    def _open(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dedup_keys (digest BLOB PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_dedup_seen_at ON dedup_keys (seen_at)")
+        self._db.commit()
+
+        # TTL 내 키 복원 (기록 시각 구간에 배치)
+        oldest = self._epoch() - len(self._buckets) + 1
+        loaded = 0
+        rows = self._db.execute(
+            "SELECT digest, seen_at FROM dedup_keys WHERE seen_at >= ? ORDER BY seen_at",
+            (oldest * self.bucket_seconds,)
+        )
+        for digest, seen_at in rows:
+            position = self._epoch(seen_at) % len(self._buckets)
+            if self._epochs[position] != self._epoch(seen_at):
+                self._size -= len(self._buckets[position])
+                self._buckets[position].clear()
+                self._epochs[position] = self._epoch(seen_at)
+            self._buckets[position][digest] = None
+            self._size += 1
+            loaded += 1
+
+        self._purge_persisted()
+        if loaded:
+            logger.info(f"♻️ Dedup index restored: {loaded} keys from {path}")
+
+    def _purge_persisted(self):
+        """TTL 지난 영속 키 삭제 (구간 교체 시점마다)"""
+        if self._db is None:
+            return
+        oldest = self._epoch() - len(self._buckets) + 1
+        self._db.execute("DELETE FROM dedup_keys WHERE seen_at < ?", (oldest * self.bucket_seconds,))
+        self._db.commit()
+
+    def close(self):
+        """SQLite 연결 종료"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
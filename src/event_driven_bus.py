@@ -7,14 +7,20 @@ Target: 서버 부하 70% 절감
 """
 
 import asyncio
+import functools
+import itertools
 import time
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, Deque, Iterable, List, Optional, Callable, Tuple, Union
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
 from loguru import logger
 
+from event_log import EventLog, LogCursor
+from event_transport import EventTransport, decode_event, encode_event
+from telemetry import CounterSet, CpuSampler, HistogramSet, LatencyHistogram
+
 
 # ============================================
 # Event Types
@@ -48,14 +54,184 @@ class EventType(Enum):
 # Event Bus (Lightweight)
 # ============================================
 
+# monotonic ns → 벽시계 ns 변환 오프셋 (프로세스 시작 시 1회 계산)
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
 @dataclass
 class Event:
     """경량 이벤트 객체"""
     event_type: EventType
     payload: Dict[str, Any]
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: int = field(default_factory=time.monotonic_ns)  # monotonic ns (문자열 포맷 없음)
     priority: int = 5  # 1=highest, 10=lowest
     source: str = "system"
+    offset: Optional[int] = field(default=None, compare=False)  # 이벤트 로그 오프셋 (내구 모드)
+    
+    def isoformat(self) -> str:
+        """발생 시각 ISO 문자열 (로그/표시용으로 필요할 때만 변환)"""
+        return datetime.fromtimestamp((self.timestamp + _WALL_CLOCK_OFFSET_NS) / 1e9).isoformat()
+
+
+@dataclass
+class DeadLetter:
+    """실패한 리스너 호출 기록"""
+    event: Union[Event, List[Event]]
+    listener: str
+    error: str
+    failed_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+class EventScheduler:
+    """
+    우선순위 이벤트 스케줄러 (단일 힙 + 대기 큐)
+    
+    10개 큐를 폴링하는 대신 하나의 힙에 이벤트를 넣고,
+    이벤트가 들어오는 즉시 대기 중인 워커를 깨운다.
+    
+    Aging: 정렬 키 = priority * aging_interval + 등록 시각(monotonic)
+    → 오래 기다린 이벤트일수록 키가 상대적으로 작아지므로
+      priority 10 이벤트도 (9 * aging_interval)초 이상 굶지 않는다.
+    """
+    
+    def __init__(self, aging_interval: float = 1.0, maxsize: int = 0):
+        """
+        스케줄러 초기화
+        
+        Args:
+            aging_interval: 우선순위 1단계에 해당하는 대기 시간 (초)
+            maxsize: 최대 대기 이벤트 수 (0 = 무제한)
+        """
+        self.aging_interval = aging_interval
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=maxsize)
+        self._seq = itertools.count()
+        
+        # 우선순위별 대기 이벤트 수
+        self.depths: Dict[int, int] = {i: 0 for i in range(1, 11)}
+    
+    def _entry(self, event: "Event", enqueued_at: Optional[float] = None) -> tuple:
+        if enqueued_at is None:
+            enqueued_at = time.monotonic()
+        key = event.priority * self.aging_interval + enqueued_at
+        return (key, next(self._seq), enqueued_at, event)
+    
+    async def put(self, event: "Event"):
+        """이벤트 등록 (대기 워커 즉시 깨움)"""
+        await self._queue.put(self._entry(event))
+        self.depths[event.priority] += 1
+    
+    def put_nowait(self, event: "Event"):
+        """이벤트 등록 (큐가 가득 차면 asyncio.QueueFull)"""
+        self._queue.put_nowait(self._entry(event))
+        self.depths[event.priority] += 1
+    
+    async def put_many(self, events: List["Event"], block: bool = True) -> int:
+        """
+        이벤트 일괄 등록
+        
+        등록 시각은 배치 전체에 1회만 측정.
+        여유 공간이 있는 동안은 중간에 양보(await)하지 않으므로 한 번의 연산으로 처리됨.
+        
+        Args:
+            events: 이벤트 목록
+            block: 큐 포화 시 대기 여부 (False면 들어간 만큼만 등록)
+            
+        Returns:
+            int: 등록된 이벤트 수
+        """
+        enqueued_at = time.monotonic()
+        accepted = 0
+        
+        for event in events:
+            entry = self._entry(event, enqueued_at)
+            if self._queue.full():
+                if not block:
+                    break
+                await self._queue.put(entry)
+            else:
+                self._queue.put_nowait(entry)
+            self.depths[event.priority] += 1
+            accepted += 1
+        
+        return accepted
+    
+    async def get(self) -> "Event":
+        """다음 이벤트 대기 (이벤트가 없으면 발행될 때까지 블로킹)"""
+        event, _ = await self.get_timed()
+        return event
+    
+    async def get_timed(self) -> Tuple["Event", float]:
+        """
+        다음 이벤트 + 큐 대기 시간
+        
+        Returns:
+            tuple: (이벤트, 등록→꺼냄까지 걸린 시간(초))
+        """
+        _, _, enqueued_at, event = await self._queue.get()
+        self.depths[event.priority] -= 1
+        return event, time.monotonic() - enqueued_at
+    
+    def qsize(self) -> int:
+        """전체 대기 이벤트 수"""
+        return self._queue.qsize()
+    
+    def full(self) -> bool:
+        """큐 포화 여부"""
+        return self._queue.full()
+    
+    @property
+    def maxsize(self) -> int:
+        """최대 대기 이벤트 수 (0 = 무제한)"""
+        return self._queue.maxsize
+    
+    def get_depth_stats(self) -> Dict[int, int]:
+        """우선순위별 대기 이벤트 수"""
+        return dict(self.depths)
+
+
+class BatchSubscription:
+    """배치 리스너 구독 정보 + 적재 버퍼"""
+    
+    def __init__(self, listener: Callable, max_batch: int, max_wait: float):
+        self.listener = listener
+        self.max_batch = max_batch
+        self.max_wait = max_wait  # 초
+        self.buffer: List[Event] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class BusTelemetry:
+    """
+    이벤트 버스 핫패스 계측
+    
+    publish → 큐 → _dispatch_event 구간별 실측값 (pull 방식 조회)
+    """
+    
+    def __init__(self):
+        # 처리량
+        self.published = CounterSet()   # event_type별 발행 수
+        self.rejected = CounterSet()    # event_type별 거절 수
+        self.dispatched = CounterSet()  # event_type별 디스패치 완료 수
+        
+        # 지연 히스토그램 (ms)
+        self.queue_latency = HistogramSet()     # (event_type, priority) → 등록→디스패치
+        self.dispatch_latency = HistogramSet()  # event_type → 전체 리스너 완료
+        self.listener_latency = HistogramSet()  # 리스너 이름 → 1회 실행
+        
+        # 프로세스 CPU
+        self.cpu = CpuSampler()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """계측값 스냅샷 (JSON 직렬화 가능)"""
+        return {
+            "published": self.published.snapshot(),
+            "rejected": self.rejected.snapshot(),
+            "dispatched": self.dispatched.snapshot(),
+            "queue_latency_ms": self.queue_latency.snapshot(),
+            "dispatch_latency_ms": self.dispatch_latency.snapshot(),
+            "listener_latency_ms": self.listener_latency.snapshot(),
+            "cpu": self.cpu.sample(),
+        }
 
 
 class EventDrivenBus:
@@ -65,27 +241,80 @@ class EventDrivenBus:
     기존 무한 루프 방식 대신 이벤트 기반으로 에이전트 가동
     """
     
-    def __init__(self):
-        """이벤트 버스 초기화"""
-        # 이벤트 큐 (우선순위별)
-        self.event_queues: Dict[int, asyncio.Queue] = {
-            i: asyncio.Queue() for i in range(1, 11)
-        }
+    def __init__(
+        self,
+        workers: int = 1,
+        aging_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        max_in_flight: int = 100,
+        listener_timeout: Optional[float] = 5.0,
+        listener_concurrency: int = 10,
+        block_on_full: bool = True,
+        dead_letter_size: int = 1000,
+        transport: Optional[EventTransport] = None,
+        event_log: Optional[EventLog] = None,
+        log_consumer: str = "event-bus"
+    ):
+        """
+        이벤트 버스 초기화
+        
+        Args:
+            workers: 동시 처리 워커 코루틴 수
+            aging_interval: 우선순위 1단계에 해당하는 대기 시간 (초)
+            max_queue_size: 최대 대기 이벤트 수 (0 = 무제한)
+            max_in_flight: 동시에 디스패치 중인 최대 이벤트 수
+            listener_timeout: 리스너 1회 실행 제한 시간 (초, None = 무제한)
+            listener_concurrency: 리스너별 동시 실행 상한
+            block_on_full: 큐 포화 시 publish 대기(True) / 즉시 거절(False)
+            dead_letter_size: 데드레터 큐 보관 개수
+            transport: 전송 백엔드 (None = 프로세스 내부 스케줄러,
+                       event_transport.MultiprocessTransport / RedisStreamTransport)
+            event_log: 내구 로그 (지정 시 publish 는 fsync 후 반환, 재시작 시 recover())
+            log_consumer: 로그 커밋 오프셋 컨슈머 이름
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if max_in_flight < 1 or listener_concurrency < 1:
+            raise ValueError("max_in_flight and listener_concurrency must be >= 1")
+        
+        # 이벤트 스케줄러 (우선순위 힙, 발행 즉시 워커 기상)
+        self.scheduler = EventScheduler(aging_interval=aging_interval, maxsize=max_queue_size)
+        self.workers = workers
+        self.block_on_full = block_on_full
+        self.transport = transport
+        
+        # 내구 로그 (프로세스 내부 스케줄러 경로에서만 사용)
+        self.event_log = event_log
+        self._log_cursor = LogCursor(event_log, log_consumer) if event_log else None
+        # 전달 완료 대기: id(event) → [남은 전달 수(리스너 + 배치), 완료 콜백]
+        self._deliveries: Dict[int, list] = {}
+        
+        # 동시 처리 제한 (백프레셔)
+        self.max_in_flight = max_in_flight
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._dispatch_tasks: set = set()
+        self.listener_timeout = listener_timeout
+        self.listener_concurrency = listener_concurrency
+        self._listener_slots: Dict[Callable, asyncio.Semaphore] = {}
+        
+        # 데드레터 큐 (실패한 리스너 호출)
+        self.dead_letters: Deque[DeadLetter] = deque(maxlen=dead_letter_size)
+        self.failed_listener_count = 0
+        self.rejected_count = 0
         
         # 이벤트 리스너
         self.listeners: Dict[EventType, List[Callable]] = defaultdict(list)
         
+        # 배치 리스너 (같은 EventType을 N개 / T ms 단위로 모아 전달)
+        self.batch_subscriptions: Dict[EventType, List[BatchSubscription]] = defaultdict(list)
+        self._batch_tasks: set = set()
+        
         # 에이전트 상태 (idle/busy)
         self.agent_states: Dict[str, str] = {}
         
-        # 성능 모니터링
+        # 성능 모니터링 (실측)
         self.event_count = 0
-        self.idle_time_total = 0.0  # 유휴 시간 (초)
-        self.busy_time_total = 0.0  # 작업 시간 (초)
-        
-        # 서버 부하 측정
-        self.server_load_before = 100.0  # 기존 무한 루프 방식 = 100%
-        self.server_load_after = 0.0
+        self.telemetry = BusTelemetry()
         
         logger.info("✅ Event-Driven Bus initialized")
     
@@ -104,129 +333,426 @@ class EventDrivenBus:
             agent_id: 에이전트 ID (선택)
         """
         self.listeners[event_type].append(listener)
+        self._listener_slots.setdefault(listener, asyncio.Semaphore(self.listener_concurrency))
         
         if agent_id:
             self.agent_states[agent_id] = "idle"
         
         logger.info(f"✅ Listener subscribed: {event_type.value}")
     
-    async def publish(
+    def subscribe_batch(
         self,
-        event: Event
+        event_type: EventType,
+        listener: Callable,
+        max_batch: int = 100,
+        max_wait_ms: float = 50.0,
+        agent_id: Optional[str] = None
     ):
+        """
+        배치 구독
+        
+        리스너는 Event 리스트를 받음 (정산/DB 기록처럼 bulk insert가 유리한 경우)
+        
+        Args:
+            event_type: 이벤트 타입
+            listener: 리스너 함수 (async def listener(events: List[Event]))
+            max_batch: 최대 배치 크기 (도달 즉시 전달)
+            max_wait_ms: 첫 이벤트 이후 최대 대기 시간 (ms)
+            agent_id: 에이전트 ID (선택)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        
+        self.batch_subscriptions[event_type].append(
+            BatchSubscription(listener=listener, max_batch=max_batch, max_wait=max_wait_ms / 1000)
+        )
+        self._listener_slots.setdefault(listener, asyncio.Semaphore(self.listener_concurrency))
+        
+        if agent_id:
+            self.agent_states[agent_id] = "idle"
+        
+        logger.info(f"✅ Batch listener subscribed: {event_type.value} (max_batch={max_batch})")
+    
+    async def publish(
+        self,
+        event: Event,
+        block: Optional[bool] = None
+    ) -> bool:
         """
         이벤트 발행
         
         Args:
             event: 이벤트 객체
+            block: 큐 포화 시 대기 여부 (None = 버스 기본값)
+            
+        Returns:
+            bool: 등록 성공 여부 (큐 포화로 거절되면 False)
         """
+        if block is None:
+            block = self.block_on_full
+        
         try:
-            # 우선순위 큐에 추가
-            priority = event.priority
-            await self.event_queues[priority].put(event)
+            if not 1 <= event.priority <= 10:
+                raise ValueError(f"priority must be 1-10: {event.priority}")
+            
+            if self.transport is not None:
+                # 외부 백엔드 (다른 프로세스/노드에서 디스패치)
+                if not await self.transport.send(event):
+                    raise asyncio.QueueFull()
+            elif self.event_log is not None:
+                # 로그에 먼저 기록(fsync) 후 큐 적재 → 재시작해도 유실 없음
+                if not block and self.scheduler.full():
+                    raise asyncio.QueueFull()
+                event.offset = await self.event_log.append(encode_event(event))
+                self._log_cursor.track(event.offset)
+                await self.scheduler.put(event)
+            elif block:
+                # 우선순위 스케줄러에 추가 (대기 워커 즉시 기상)
+                await self.scheduler.put(event)
+            else:
+                self.scheduler.put_nowait(event)
             
             self.event_count += 1
+            self.telemetry.published.incr(event.event_type.value)
             
-            logger.debug(f"📤 Event published: {event.event_type.value} (priority={priority})")
+            logger.debug(f"📤 Event published: {event.event_type.value} (priority={event.priority})")
+            return True
             
+        except asyncio.QueueFull:
+            self.rejected_count += 1
+            self.telemetry.rejected.incr(event.event_type.value)
+            logger.warning(f"⚠️ Event rejected (queue full): {event.event_type.value}")
+            return False
         except Exception as e:
             logger.error(f"❌ Event publish error: {str(e)}")
+            return False
+    
+    async def publish_many(
+        self,
+        events: Iterable[Event],
+        block: Optional[bool] = None
+    ) -> int:
+        """
+        이벤트 일괄 발행
+        
+        결제/주문 웹훅 버스트를 한 번의 큐 연산으로 등록
+        
+        Args:
+            events: 이벤트 목록
+            block: 큐 포화 시 대기 여부 (None = 버스 기본값)
+            
+        Returns:
+            int: 등록된 이벤트 수 (나머지는 거절로 집계)
+        """
+        if block is None:
+            block = self.block_on_full
+        
+        events = list(events)
+        for event in events:
+            if not 1 <= event.priority <= 10:
+                raise ValueError(f"priority must be 1-10: {event.priority}")
+        
+        if self.transport is not None:
+            accepted = await self.transport.send_many(events)
+        elif self.event_log is not None:
+            # 한 번의 그룹 커밋으로 기록 후 적재
+            room = len(events)
+            if not block and self.scheduler.maxsize > 0:
+                room = max(self.scheduler.maxsize - self.scheduler.qsize(), 0)
+            durable = events[:room]
+            offsets = await self.event_log.append_many([encode_event(e) for e in durable])
+            for event, offset in zip(durable, offsets):
+                event.offset = offset
+                self._log_cursor.track(offset)
+            accepted = await self.scheduler.put_many(durable, block=True)
+        else:
+            accepted = await self.scheduler.put_many(events, block=block)
+        self.event_count += accepted
+        
+        for event in events[:accepted]:
+            self.telemetry.published.incr(event.event_type.value)
+        
+        if accepted < len(events):
+            self.rejected_count += len(events) - accepted
+            for event in events[accepted:]:
+                self.telemetry.rejected.incr(event.event_type.value)
+            logger.warning(f"⚠️ Batch partially rejected (queue full): {accepted}/{len(events)}")
+        
+        logger.debug(f"📤 Batch published: {accepted} events")
+        return accepted
+    
+    async def recover(self) -> int:
+        """
+        로그에서 미처리(커밋 이후) 이벤트를 다시 큐에 적재
+        
+        재시작 직후 process_events 와 함께 호출 (큐가 작으면 워커가 소비할 때까지 대기)
+        
+        Returns:
+            int: 재적재한 이벤트 수
+        """
+        if self._log_cursor is None:
+            return 0
+        
+        count = 0
+        for record in self._log_cursor.pending():
+            event = decode_event(record.data)
+            event.offset = record.offset
+            self._log_cursor.track(record.offset)
+            await self.scheduler.put(event)
+            count += 1
+        
+        if count:
+            logger.info(f"♻️ Recovered {count} events from log")
+        return count
     
     async def process_events(self):
         """
         이벤트 처리 루프
         
-        기존: 무한 루프로 계속 확인 (CPU 100%)
-        신규: 이벤트 있을 때만 처리 (CPU 30%)
+        기존: 100ms 폴링으로 계속 확인
+        신규: 워커 N개가 스케줄러에서 블로킹 대기 → 발행 즉시 처리
+              (transport 지정 시 백엔드가 파티션 순서대로 수신 → 디스패치 → ack)
+        """
+        if self.transport is not None:
+            logger.info(f"🚀 Event processing started (transport={type(self.transport).__name__})")
+            await self.transport.consume(self._dispatch_event)
+            return
+        
+        logger.info(f"🚀 Event processing started (Event-Driven, workers={self.workers})")
+        
+        await asyncio.gather(*(
+            self._worker_loop(worker_id) for worker_id in range(self.workers)
+        ))
+    
+    async def _worker_loop(self, worker_id: int):
         """
-        logger.info("🚀 Event processing started (Event-Driven)")
+        워커 루프
         
+        이벤트가 없으면 get()에서 잠들고, 발행 즉시 깨어나 큐 대기 시간을 기록
+        
+        디스패치 슬롯을 먼저 확보한 뒤에 꺼냄 → 포화 시 이벤트는 스케줄러에 남아
+        나중에 온 높은 우선순위가 앞지를 수 있고, 기록되는 대기 시간에 슬롯 대기도 포함
+        """
         while True:
+            # 동시 디스패치 상한 도달 시 여기서 대기 (큐가 차면 publish 쪽 백프레셔)
+            await self._in_flight.acquire()
             try:
-                # 우선순위 순서대로 확인 (1=highest → 10=lowest)
-                event = None
+                event, queued = await self.scheduler.get_timed()
+                self.telemetry.queue_latency.record(
+                    (event.event_type.value, event.priority), queued * 1000
+                )
                 
-                for priority in range(1, 11):
-                    try:
-                        # 논블로킹 get (이벤트 없으면 즉시 통과)
-                        event = self.event_queues[priority].get_nowait()
-                        break
-                    except asyncio.QueueEmpty:
-                        continue
-                
-                if event:
-                    # 이벤트 처리
-                    await self._dispatch_event(event)
-                else:
-                    # 이벤트 없음 → 유휴 상태
-                    await asyncio.sleep(0.1)  # 100ms 대기
-                    self.idle_time_total += 0.1
+                task = asyncio.create_task(self._dispatch_event(event))
+                self._dispatch_tasks.add(task)
+                task.add_done_callback(self._on_dispatch_done)
                 
+            except asyncio.CancelledError:
+                self._in_flight.release()
+                raise
             except Exception as e:
-                logger.error(f"❌ Event processing error: {str(e)}")
-                await asyncio.sleep(1)
+                self._in_flight.release()
+                logger.error(f"❌ Event processing error (worker={worker_id}): {str(e)}")
     
-    async def _dispatch_event(self, event: Event):
+    def _on_dispatch_done(self, task: asyncio.Task):
+        self._dispatch_tasks.discard(task)
+        self._in_flight.release()
+    
+    def get_queue_depths(self) -> Dict[int, int]:
+        """우선순위별 대기 이벤트 수"""
+        return self.scheduler.get_depth_stats()
+    
+    async def _dispatch_event(self, event: Event, on_delivered: Optional[Callable[[], None]] = None):
         """
         이벤트 디스패치
         
         등록된 리스너들에게 이벤트 전달
+        
+        Args:
+            event: 이벤트
+            on_delivered: 배치 리스너까지 모두 전달된 뒤 호출 (전송 백엔드 ack 용)
+                          배치 리스너가 있으면 이 메서드가 반환된 뒤 flush 시점에 호출됨
         """
         start_time = time.perf_counter()
         
+        if on_delivered is None and event.offset is not None and self._log_cursor is not None:
+            on_delivered = functools.partial(self._log_cursor.ack, event.offset)
+        
         try:
             listeners = self.listeners.get(event.event_type, [])
+            batch_subscriptions = self.batch_subscriptions.get(event.event_type, [])
+            
+            if on_delivered is not None:
+                # 배치 리스너까지 전달된 뒤에 ack
+                self._deliveries[id(event)] = [1 + len(batch_subscriptions), on_delivered]
             
-            if not listeners:
+            if not listeners and not batch_subscriptions:
                 logger.warning(f"⚠️ No listeners for {event.event_type.value}")
                 return
             
-            # 리스너 실행 (병렬)
-            tasks = [listener(event) for listener in listeners]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # 배치 리스너: 버퍼에 적재 (N개 도달 또는 T ms 경과 시 전달)
+            for subscription in batch_subscriptions:
+                self._buffer_for_batch(subscription, event)
+            
+            # 리스너 실행 (병렬, 리스너별 동시성/시간 제한)
+            await asyncio.gather(*(
+                self._invoke_listener(listener, event) for listener in listeners
+            ))
             
             elapsed = time.perf_counter() - start_time
-            self.busy_time_total += elapsed
+            self.telemetry.dispatch_latency.record(event.event_type.value, elapsed * 1000)
+            self.telemetry.dispatched.incr(event.event_type.value)
             
             logger.debug(f"✅ Event dispatched: {event.event_type.value} ({elapsed*1000:.1f}ms)")
             
         except Exception as e:
             logger.error(f"❌ Event dispatch error: {str(e)}")
+        finally:
+            self._release_delivery(event)
     
-    def get_server_load_stats(self) -> Dict[str, Any]:
+    def _release_delivery(self, event: Event):
+        """리스너 전달 완료 → ack (배치 리스너가 있으면 모두 끝난 뒤)"""
+        delivery = self._deliveries.get(id(event))
+        if delivery is None:
+            return
+        delivery[0] -= 1
+        if delivery[0] > 0:
+            return
+        del self._deliveries[id(event)]
+        delivery[1]()
+    
+    def _buffer_for_batch(self, subscription: "BatchSubscription", event: Event):
+        subscription.buffer.append(event)
+        
+        if len(subscription.buffer) >= subscription.max_batch:
+            self._flush_batch(subscription)
+        elif subscription.timer is None:
+            loop = asyncio.get_running_loop()
+            subscription.timer = loop.call_later(subscription.max_wait, self._flush_batch, subscription)
+    
+    def _flush_batch(self, subscription: "BatchSubscription"):
+        if subscription.timer is not None:
+            subscription.timer.cancel()
+            subscription.timer = None
+        if not subscription.buffer:
+            return
+        
+        batch, subscription.buffer = subscription.buffer, []
+        task = asyncio.create_task(self._deliver_batch(subscription.listener, batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _deliver_batch(self, listener: Callable, batch: List[Event]):
+        try:
+            await self._invoke_listener(listener, batch)
+        finally:
+            for event in batch:
+                self._release_delivery(event)
+    
+    async def flush_batches(self):
+        """대기 중인 배치를 즉시 전달하고 완료까지 대기 (종료 시 호출)"""
+        for subscriptions in self.batch_subscriptions.values():
+            for subscription in subscriptions:
+                self._flush_batch(subscription)
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks)
+    
+    async def _invoke_listener(self, listener: Callable, event: Union[Event, List[Event]]):
         """
-        서버 부하 통계
+        리스너 1회 실행
         
-        Returns:
-            dict: 부하 통계
+        실패(예외/타임아웃)는 데드레터 큐에 기록하고 다른 리스너에 영향 주지 않음
         """
-        total_time = self.idle_time_total + self.busy_time_total
+        slot = self._listener_slots.get(listener)
+        if slot is None:
+            slot = self._listener_slots.setdefault(listener, asyncio.Semaphore(self.listener_concurrency))
         
-        if total_time == 0:
-            return {
-                "idle_percentage": 0,
-                "busy_percentage": 0,
-                "load_reduction": 0
-            }
+        name = getattr(listener, "__qualname__", repr(listener))
         
-        idle_percentage = (self.idle_time_total / total_time) * 100
-        busy_percentage = (self.busy_time_total / total_time) * 100
+        async with slot:
+            start_time = time.perf_counter()
+            try:
+                await asyncio.wait_for(listener(event), timeout=self.listener_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    error = f"timeout after {self.listener_timeout}s"
+                else:
+                    error = f"{type(e).__name__}: {e}"
+                
+                self.failed_listener_count += 1
+                self.dead_letters.append(DeadLetter(event=event, listener=name, error=error))
+                
+                event_type = event[0].event_type if isinstance(event, list) else event.event_type
+                logger.error(f"❌ Listener failed: {name} ({event_type.value}) - {error}")
+            finally:
+                self.telemetry.listener_latency.record(name, (time.perf_counter() - start_time) * 1000)
+    
+    def drain_dead_letters(self) -> List[DeadLetter]:
+        """데드레터 큐 비우고 반환 (재처리용)"""
+        letters = list(self.dead_letters)
+        self.dead_letters.clear()
+        return letters
+    
+    def get_telemetry(self) -> Dict[str, Any]:
+        """
+        핫패스 계측값 (pull API)
+        
+        웹훅 엔진 /stats 엔드포인트에서 그대로 재사용 가능한 JSON 구조
         
-        # 서버 부하 계산
-        # 기존: 100% (무한 루프)
-        # 신규: busy_percentage (이벤트 있을 때만)
-        self.server_load_after = busy_percentage
+        Returns:
+            dict: 처리량, 구간별 지연 히스토그램(p50/p95/p99), 큐 깊이, CPU
+        """
+        stats = self.telemetry.snapshot()
+        stats["queue"] = {
+            "depth": self.scheduler.qsize(),
+            "depth_by_priority": self.get_queue_depths(),
+            "in_flight": len(self._dispatch_tasks),
+            "max_in_flight": self.max_in_flight,
+        }
+        if self.transport is not None:
+            stats["transport"] = self.transport.get_stats()
+        if self.event_log is not None:
+            stats["event_log"] = self.event_log.get_stats()
+        stats["failures"] = {
+            "rejected_events": self.rejected_count,
+            "failed_listener_calls": self.failed_listener_count,
+            "dead_letters": len(self.dead_letters),
+        }
+        return stats
+    
+    def get_server_load_stats(self) -> Dict[str, Any]:
+        """
+        서버 부하 요약 (실측)
         
-        load_reduction = ((self.server_load_before - self.server_load_after) / self.server_load_before) * 100
+        Returns:
+            dict: CPU 사용률, 처리량, 큐 대기/디스패치 지연
+        """
+        cpu = self.telemetry.cpu.sample()
+        queue_latency = LatencyHistogram()
+        for histogram in self.telemetry.queue_latency.histograms.values():
+            queue_latency.merge(histogram)
+        dispatch_latency = LatencyHistogram()
+        for histogram in self.telemetry.dispatch_latency.histograms.values():
+            dispatch_latency.merge(histogram)
         
         return {
-            "before_load": self.server_load_before,
-            "after_load": self.server_load_after,
-            "load_reduction_percentage": load_reduction,
-            "idle_time_seconds": self.idle_time_total,
-            "busy_time_seconds": self.busy_time_total,
-            "total_events_processed": self.event_count,
-            "target_met": load_reduction >= 70  # 목표: 70% 절감
+            "cpu_percent": cpu["cpu_percent"],
+            "cpu_seconds": cpu["cpu_seconds"],
+            "uptime_seconds": cpu["wall_seconds"],
+            "total_events_published": self.event_count,
+            "total_events_dispatched": self.telemetry.dispatched.total(),
+            "events_per_second": (
+                self.telemetry.dispatched.total() / cpu["wall_seconds"] if cpu["wall_seconds"] > 0 else 0.0
+            ),
+            "queue_wait_p50_ms": queue_latency.percentile(50),
+            "queue_wait_p99_ms": queue_latency.percentile(99),
+            "dispatch_p50_ms": dispatch_latency.percentile(50),
+            "dispatch_p99_ms": dispatch_latency.percentile(99),
+            "queue_depth": self.scheduler.qsize(),
+            "in_flight": len(self._dispatch_tasks),
+            "rejected_events": self.rejected_count,
+            "failed_listener_calls": self.failed_listener_count,
         }
 
 
@@ -422,10 +948,10 @@ async def run_event_driven_demo():
     # 통계 출력
     stats = bus.get_server_load_stats()
     print(f"\n📊 Server Load Stats:")
-    print(f"Before: {stats['before_load']:.1f}%")
-    print(f"After: {stats['after_load']:.1f}%")
-    print(f"Reduction: {stats['load_reduction_percentage']:.1f}%")
-    print(f"Target Met: {stats['target_met']}")
+    print(f"CPU: {stats['cpu_percent']:.1f}%")
+    print(f"Events dispatched: {stats['total_events_dispatched']}")
+    print(f"Queue wait p50/p99: {stats['queue_wait_p50_ms']:.2f} / {stats['queue_wait_p99_ms']:.2f} ms")
+    print(f"Dispatch p50/p99: {stats['dispatch_p50_ms']:.2f} / {stats['dispatch_p99_ms']:.2f} ms")
 
 
 if __name__ == "__main__":
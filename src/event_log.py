@@ -0,0 +1,437 @@
+"""
+Mulberry Phase 4-B - Durable Event Log
+이벤트 버스 / 웹훅 엔진 공용 선행 기록(write-ahead) 로그
+
+Mission: publish ~ 디스패치 사이 재시작해도 결제 웹훅 유실 없음
+- 세그먼트 단위 append-only 파일 (길이 접두 바이너리 레코드 + CRC)
+- 그룹 커밋 fsync (배치마다 / N ms마다 선택)
+- 오프셋 기반 소비, 오프셋/시각 기준 재생(replay)
+- 모든 컨슈머가 ack 한 세그먼트 압축(삭제)
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+
+# 레코드 헤더: 길이(uint32) + CRC32(uint32) + 기록 시각 ns(uint64)
+RECORD_HEADER = struct.Struct("<IIQ")
+SEGMENT_SUFFIX = ".log"
+COMMITS_FILE = "consumers.json"
+
+FSYNC_BATCH = "batch"        # 그룹(동시 append 묶음)마다 fsync → 지연 최소
+FSYNC_INTERVAL = "interval"  # N ms 모아서 fsync → 처리량 최대
+
+
+@dataclass
+class LogRecord:
+    """로그 레코드"""
+    offset: int
+    timestamp_ns: int
+    data: bytes
+
+
+# ============================================
+# Event Log
+# ============================================
+
+class EventLog:
+    """
+    세그먼트 기반 append-only 이벤트 로그
+
+    append() 는 레코드가 디스크에 fsync 된 뒤 오프셋을 반환 (= ack 가능 시점).
+    동시에 들어온 append 는 한 번의 write + fsync 로 묶임 (group commit).
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_mode: str = FSYNC_BATCH,
+        fsync_interval_ms: float = 5.0,
+        commit_interval_ms: float = 200.0
+    ):
+        """
+        Args:
+            directory: 로그 디렉터리
+            segment_max_bytes: 세그먼트 최대 크기 (초과 시 새 세그먼트)
+            fsync_mode: "batch" (그룹마다) / "interval" (fsync_interval_ms 마다)
+            fsync_interval_ms: interval 모드의 fsync 주기
+            commit_interval_ms: 컨슈머 커밋 오프셋 저장 주기
+        """
+        if fsync_mode not in (FSYNC_BATCH, FSYNC_INTERVAL):
+            raise ValueError(f"Unknown fsync_mode: {fsync_mode}")
+
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_mode = fsync_mode
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.commit_interval = commit_interval_ms / 1000
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # 세그먼트 (기준 오프셋 오름차순)
+        self.segments: List[int] = sorted(
+            int(p.stem) for p in self.directory.glob(f"*{SEGMENT_SUFFIX}")
+        )
+        self.next_offset = 0
+        self._recover_tail()
+
+        # 활성 세그먼트
+        if not self.segments:
+            self.segments.append(0)
+        self._active = open(self._segment_path(self.segments[-1]), "ab")
+
+        # 그룹 커밋 버퍼
+        self._pending: List[bytes] = []
+        self._waiters: List[Tuple[asyncio.Future, int, int]] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+        # 컨슈머 커밋 오프셋
+        self.commits: Dict[str, int] = self._load_commits()
+        self._commits_dirty = False
+        self._commits_saved_at = time.monotonic()
+
+        # 통계
+        self.appended_count = 0
+        self.fsync_count = 0
+
+        # 기록 실패 시 이후 append 거부 (오프셋 공백 방지)
+        self._write_error: Optional[Exception] = None
+
+        logger.info(f"✅ Event log opened: {self.directory} (next_offset={self.next_offset})")
+
+    # ----------------------------------------
+    # Files
+    # ----------------------------------------
+
+    def _segment_path(self, base_offset: int) -> Path:
+        return self.directory / f"{base_offset:020d}{SEGMENT_SUFFIX}"
+
+    def _recover_tail(self):
+        """마지막 세그먼트의 잘린/손상된 꼬리 레코드 제거 후 next_offset 복원"""
+        if not self.segments:
+            return
+
+        base = self.segments[-1]
+        path = self._segment_path(base)
+        count = 0
+        valid_bytes = 0
+
+        with open(path, "rb") as fh:
+            while True:
+                header = fh.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc, _ = RECORD_HEADER.unpack(header)
+                data = fh.read(length)
+                if len(data) < length or zlib.crc32(data) != crc:
+                    break
+                count += 1
+                valid_bytes += RECORD_HEADER.size + length
+
+        if valid_bytes < path.stat().st_size:
+            logger.warning(f"⚠️ Truncating torn tail of {path.name} at {valid_bytes} bytes")
+            with open(path, "r+b") as fh:
+                fh.truncate(valid_bytes)
+
+        self.next_offset = base + count
+
+    def _load_commits(self) -> Dict[str, int]:
+        path = self.directory / COMMITS_FILE
+        if not path.exists():
+            return {}
+        return {k: int(v) for k, v in json.loads(path.read_text()).items()}
+
+    def _save_commits(self):
+        path = self.directory / COMMITS_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.commits))
+        os.replace(tmp, path)
+        self._commits_dirty = False
+        self._commits_saved_at = time.monotonic()
+
+    # ----------------------------------------
+    # Append (group commit)
+    # ----------------------------------------
+
+    async def append(self, data: bytes) -> int:
+        """
+        레코드 1개 기록
+
+        Returns:
+            int: 오프셋 (fsync 완료 후 반환)
+        """
+        return (await self.append_many([data]))[0]
+
+    async def append_many(self, records: List[bytes]) -> List[int]:
+        """
+        레코드 여러 개 기록 (한 번의 그룹 커밋)
+
+        Returns:
+            list: 오프셋 목록
+        """
+        if not records:
+            return []
+        if self._write_error is not None:
+            raise RuntimeError(f"Event log unavailable: {self._write_error}")
+
+        first = self.next_offset
+        timestamp_ns = time.time_ns()
+        for data in records:
+            self._pending.append(RECORD_HEADER.pack(len(data), zlib.crc32(data), timestamp_ns) + data)
+        self.next_offset += len(records)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((future, first, len(records)))
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+        await future
+        return list(range(first, first + len(records)))
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while self._pending:
+            # 같은 틱/주기에 들어온 append 를 한 그룹으로
+            if self.fsync_mode == FSYNC_INTERVAL:
+                await asyncio.sleep(self.fsync_interval)
+            else:
+                await asyncio.sleep(0)
+
+            batch, self._pending = self._pending, []
+            waiters, self._waiters = self._waiters, []
+            first_offset = waiters[0][1]
+
+            try:
+                await loop.run_in_executor(None, self._write_group, batch, first_offset)
+            except Exception as e:
+                logger.error(f"❌ Event log write failed: {str(e)}")
+                self._write_error = e
+                for future, _, _ in waiters + self._waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                self._pending, self._waiters = [], []
+                return
+
+            self.appended_count += len(batch)
+            for future, _, _ in waiters:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write_group(self, batch: List[bytes], first_offset: int):
+        """그룹 기록 + fsync 1회 (세그먼트 크기 초과 시 롤오버)"""
+        offset = first_offset
+        chunk: List[bytes] = []
+        size = self._active.tell()
+
+        for record in batch:
+            if size >= self.segment_max_bytes:
+                if chunk:
+                    self._active.write(b"".join(chunk))
+                    self._sync()
+                    chunk = []
+                self._roll(offset)
+                size = 0
+            chunk.append(record)
+            size += len(record)
+            offset += 1
+
+        self._active.write(b"".join(chunk))
+        self._sync()
+
+    def _sync(self):
+        self._active.flush()
+        os.fsync(self._active.fileno())
+        self.fsync_count += 1
+
+    def _roll(self, base_offset: int):
+        self._active.close()
+        self.segments.append(base_offset)
+        self._active = open(self._segment_path(base_offset), "ab")
+        logger.info(f"📁 Event log segment rolled: {base_offset}")
+
+    # ----------------------------------------
+    # Read / Replay
+    # ----------------------------------------
+
+    def read(self, from_offset: int = 0, max_records: Optional[int] = None) -> Iterator[LogRecord]:
+        """
+        오프셋부터 순서대로 읽기
+
+        Args:
+            from_offset: 시작 오프셋 (포함)
+            max_records: 최대 레코드 수
+        """
+        index = max(bisect.bisect_right(self.segments, from_offset) - 1, 0)
+        produced = 0
+
+        for base in self.segments[index:]:
+            path = self._segment_path(base)
+            if not path.exists():
+                continue
+            offset = base
+            with open(path, "rb") as fh:
+                while True:
+                    header = fh.read(RECORD_HEADER.size)
+                    if len(header) < RECORD_HEADER.size:
+                        break
+                    length, crc, timestamp_ns = RECORD_HEADER.unpack(header)
+                    if offset < from_offset:
+                        fh.seek(length, os.SEEK_CUR)
+                        offset += 1
+                        continue
+                    data = fh.read(length)
+                    if len(data) < length or zlib.crc32(data) != crc:
+                        break
+                    yield LogRecord(offset, timestamp_ns, data)
+                    offset += 1
+                    produced += 1
+                    if max_records is not None and produced >= max_records:
+                        return
+
+    def _first_timestamp(self, base: int) -> Optional[int]:
+        with open(self._segment_path(base), "rb") as fh:
+            header = fh.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        return RECORD_HEADER.unpack(header)[2]
+
+    def replay(
+        self,
+        from_offset: Optional[int] = None,
+        from_timestamp_ns: Optional[int] = None
+    ) -> Iterator[LogRecord]:
+        """
+        오프셋 또는 기록 시각(ns, time.time_ns 기준)부터 재생
+
+        시각 기준일 때는 세그먼트 첫 레코드 시각으로 건너뛸 세그먼트를 먼저 고름
+        """
+        if from_timestamp_ns is None:
+            yield from self.read(from_offset or 0)
+            return
+
+        start = self.segments[0] if self.segments else 0
+        for current, following in zip(self.segments, self.segments[1:]):
+            first = self._first_timestamp(following)
+            if first is not None and first <= from_timestamp_ns:
+                start = following
+            else:
+                start = current
+                break
+
+        for record in self.read(max(start, from_offset or 0)):
+            if record.timestamp_ns >= from_timestamp_ns:
+                yield record
+
+    # ----------------------------------------
+    # Consumer commits / Compaction
+    # ----------------------------------------
+
+    def commit(self, consumer: str, offset: int, persist: bool = False):
+        """
+        컨슈머 처리 완료 오프셋 기록 (이 오프셋까지 모두 처리됨)
+
+        디스크 저장은 commit_interval 마다 (persist=True 면 즉시)
+        """
+        if offset <= self.commits.get(consumer, -1):
+            return
+        self.commits[consumer] = offset
+        self._commits_dirty = True
+        if persist or time.monotonic() - self._commits_saved_at >= self.commit_interval:
+            self._save_commits()
+
+    def committed(self, consumer: str) -> int:
+        """컨슈머 커밋 오프셋 (-1 = 없음)"""
+        return self.commits.get(consumer, -1)
+
+    def compact(self) -> int:
+        """
+        모든 컨슈머가 처리한 세그먼트 삭제 (활성 세그먼트 제외)
+
+        Returns:
+            int: 삭제한 세그먼트 수
+        """
+        if not self.commits:
+            return 0
+        safe_offset = min(self.commits.values())
+        removed = 0
+
+        while len(self.segments) > 1 and self.segments[1] <= safe_offset + 1:
+            base = self.segments.pop(0)
+            self._segment_path(base).unlink(missing_ok=True)
+            removed += 1
+
+        if removed:
+            logger.info(f"🧹 Event log compacted: {removed} segments (safe_offset={safe_offset})")
+        return removed
+
+    async def close(self):
+        """남은 그룹 기록 후 닫기"""
+        if self._flusher is not None:
+            await self._flusher
+        if self._commits_dirty:
+            self._save_commits()
+        self._active.close()
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "directory": str(self.directory),
+            "segments": len(self.segments),
+            "next_offset": self.next_offset,
+            "appended": self.appended_count,
+            "fsyncs": self.fsync_count,
+            "fsync_mode": self.fsync_mode,
+            "commits": dict(self.commits),
+        }
+
+
+# ============================================
+# Consumer Cursor
+# ============================================
+
+class LogCursor:
+    """
+    컨슈머별 ack 추적
+
+    처리 완료 순서가 뒤섞여도(동시 디스패치) 연속으로 완료된 구간까지만 커밋.
+    재시작 시 커밋 이후 레코드를 다시 전달 → at-least-once
+    """
+
+    def __init__(self, log: EventLog, consumer: str):
+        self.log = log
+        self.consumer = consumer
+        self._in_flight: List[int] = []
+        self._done: Set[int] = set()
+        self._highest = log.committed(consumer)
+
+    def track(self, offset: int):
+        """처리 시작"""
+        heapq.heappush(self._in_flight, offset)
+        if offset > self._highest:
+            self._highest = offset
+
+    def ack(self, offset: int):
+        """처리 완료 → 연속 완료 구간까지 커밋"""
+        self._done.add(offset)
+        while self._in_flight and self._in_flight[0] in self._done:
+            self._done.discard(heapq.heappop(self._in_flight))
+
+        watermark = self._in_flight[0] - 1 if self._in_flight else self._highest
+        self.log.commit(self.consumer, watermark)
+
+    def pending(self) -> Iterator[LogRecord]:
+        """커밋 이후(미처리) 레코드"""
+        return self.log.read(self.log.committed(self.consumer) + 1)
@@ -0,0 +1,724 @@
+"""
+Mulberry Phase 4-B - Event Bus Transports
+멀티 프로세스 / 멀티 노드 이벤트 전송 계층
+
+Mission: 단일 asyncio 루프 한계 제거 (CPU 코어 / API 레플리카 확장)
+
+EventDrivenBus(transport=...) 로 교체 가능한 백엔드:
+- None (기본): 프로세스 내부 우선순위 스케줄러 (기존 방식)
+- MultiprocessTransport: 파티션을 소유한 워커 프로세스로 리스너 CPU 분산
+- RedisStreamTransport: Redis Streams 프로토콜 (컨슈머 그룹 + XACK)
+  → LocalStreamBroker 로 Redis 없이 로컬 테스트
+
+공통 보장:
+- 파티션 키(payload["agent_id"] 등)가 같은 이벤트는 순서 유지
+- 리스너 처리 완료 후 ack → 최소 1회(at-least-once) 전달
+"""
+
+import asyncio
+import functools
+import json
+import multiprocessing
+import queue
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+Deliver = Callable[[Any], Awaitable[None]]
+
+
+# ============================================
+# Serialization / Partitioning
+# ============================================
+
+def encode_event(event) -> bytes:
+    """Event → 전송용 bytes"""
+    return json.dumps({
+        "event_type": event.event_type.value,
+        "payload": event.payload,
+        "timestamp": event.timestamp,
+        "priority": event.priority,
+        "source": event.source,
+    }, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def decode_event(data: bytes):
+    """전송용 bytes → Event"""
+    from event_driven_bus import Event, EventType
+
+    raw = json.loads(data)
+    return Event(
+        event_type=EventType(raw["event_type"]),
+        payload=raw["payload"],
+        timestamp=raw["timestamp"],
+        priority=raw["priority"],
+        source=raw["source"],
+    )
+
+
+def partition_for(event, partitions: int, key_field: Optional[str] = "agent_id") -> int:
+    """
+    파티션 번호 계산 (프로세스/노드 간 동일한 결과를 위해 crc32 사용)
+
+    payload[key_field] 가 있으면 그 값, 없으면 event_type 기준
+    """
+    key = None
+    if key_field:
+        key = event.payload.get(key_field)
+    if key is None:
+        key = event.event_type.value
+    return zlib.crc32(str(key).encode()) % partitions
+
+
+# ============================================
+# Transport Interface
+# ============================================
+
+class EventTransport:
+    """
+    이벤트 전송 백엔드 인터페이스
+
+    - send / send_many: publish 쪽 (True/등록 수 반환)
+    - consume: 수신 이벤트를 deliver(event) 로 전달, 완료 후 ack
+    """
+
+    async def send(self, event) -> bool:
+        raise NotImplementedError
+
+    async def send_many(self, events: Iterable) -> int:
+        accepted = 0
+        for event in events:
+            if not await self.send(event):
+                break
+            accepted += 1
+        return accepted
+
+    async def consume(self, deliver: Deliver):
+        raise NotImplementedError
+
+    async def close(self):
+        """연결/프로세스 정리"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+# ============================================
+# Multiprocessing Backend
+# ============================================
+
+def _partition_worker(
+    partition: int,
+    inbox: "multiprocessing.Queue",
+    acks: "multiprocessing.Queue",
+    bus_factory: Callable
+):
+    """
+    파티션 워커 프로세스 본체
+
+    bus_factory() 로 만든 버스(리스너 등록 포함)에서 이벤트를 순서대로 디스패치하고
+    처리 완료 후 (partition, seq) ack 전송
+    """
+    asyncio.run(_run_partition(partition, inbox, acks, bus_factory))
+
+
+async def _run_partition(
+    partition: int,
+    inbox: "multiprocessing.Queue",
+    acks: "multiprocessing.Queue",
+    bus_factory: Callable
+):
+    """
+    파티션 워커 루프
+
+    - 수신 대기는 스레드에서 → 대기 중에도 루프가 돌아 배치 max_wait 타이머가 동작
+    - ack 는 배치 리스너까지 전달이 끝난 뒤 (flush 전에 죽으면 재전송 → at-least-once)
+    """
+    loop = asyncio.get_running_loop()
+    bus = bus_factory()
+
+    while True:
+        item = await loop.run_in_executor(None, inbox.get)
+        if item is None:
+            break
+        seq, data = item
+        await bus._dispatch_event(decode_event(data), on_delivered=functools.partial(acks.put, (partition, seq)))
+
+    await bus.flush_batches()
+
+
+class MultiprocessTransport(EventTransport):
+    """
+    멀티 프로세스 백엔드
+
+    파티션마다 워커 프로세스 1개가 소유 → 파티션 내 순서 보장, 파티션 간 병렬.
+    리스너는 각 워커에서 bus_factory() 로 등록 (모듈 최상위 함수여야 pickle 가능).
+    워커가 죽으면 재시작 후 ack 받지 못한 이벤트를 재전송 (at-least-once).
+    """
+
+    def __init__(
+        self,
+        bus_factory: Callable,
+        partitions: int = 4,
+        key_field: Optional[str] = "agent_id",
+        max_pending: int = 10000,
+        start_method: Optional[str] = None
+    ):
+        """
+        Args:
+            bus_factory: 워커에서 리스너 등록된 EventDrivenBus 를 만드는 함수
+            partitions: 파티션(=워커 프로세스) 수
+            key_field: 파티션 키로 쓸 payload 필드
+            max_pending: 파티션별 ack 대기 이벤트 상한 (초과 시 send 거절)
+            start_method: multiprocessing 시작 방식 (None = 플랫폼 기본)
+        """
+        if partitions < 1:
+            raise ValueError("partitions must be >= 1")
+
+        self.bus_factory = bus_factory
+        self.partitions = partitions
+        self.key_field = key_field
+        self.max_pending = max_pending
+        self._ctx = multiprocessing.get_context(start_method)
+        self._acks = self._ctx.Queue()
+        self._inboxes: List[Any] = []
+        self._processes: List[Any] = []
+        self._pending: List[Dict[int, bytes]] = [{} for _ in range(partitions)]
+        self._seq = 0
+        self.acked_count = 0
+        self.redelivered_count = 0
+        self._started = False
+
+    def _spawn(self, partition: int):
+        inbox = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_partition_worker,
+            args=(partition, inbox, self._acks, self.bus_factory),
+            daemon=True,
+            name=f"mulberry-bus-p{partition}",
+        )
+        process.start()
+        return inbox, process
+
+    def start(self):
+        """워커 프로세스 기동"""
+        if self._started:
+            return
+        for partition in range(self.partitions):
+            inbox, process = self._spawn(partition)
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        self._started = True
+        logger.info(f"✅ Multiprocess transport started ({self.partitions} partitions)")
+
+    async def send(self, event) -> bool:
+        self.start()
+        partition = partition_for(event, self.partitions, self.key_field)
+        pending = self._pending[partition]
+        if len(pending) >= self.max_pending:
+            return False
+
+        self._seq += 1
+        data = encode_event(event)
+        pending[self._seq] = data
+        self._inboxes[partition].put((self._seq, data))
+        return True
+
+    async def consume(self, deliver: Deliver):
+        """
+        ack 수집 + 워커 감시 루프
+
+        실제 디스패치는 워커 프로세스에서 수행되므로 deliver 는 사용하지 않음
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                partition, seq = await loop.run_in_executor(None, self._acks.get, True, 0.5)
+                if self._pending[partition].pop(seq, None) is not None:
+                    self.acked_count += 1
+            except queue.Empty:
+                pass
+            self._restart_dead_workers()
+
+    def _restart_dead_workers(self):
+        for partition, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+
+            logger.warning(f"⚠️ Partition worker {partition} died (exit={process.exitcode}), restarting")
+            inbox, process = self._spawn(partition)
+            self._inboxes[partition] = inbox
+            self._processes[partition] = process
+
+            # ack 안 된 이벤트 재전송 (순서 유지)
+            for seq, data in sorted(self._pending[partition].items()):
+                inbox.put((seq, data))
+                self.redelivered_count += 1
+
+    async def drain(self, timeout: float = 10.0):
+        """보낸 이벤트가 모두 ack 될 때까지 대기"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while any(self._pending) and loop.time() < deadline:
+            try:
+                partition, seq = await loop.run_in_executor(None, self._acks.get, True, 0.05)
+                if self._pending[partition].pop(seq, None) is not None:
+                    self.acked_count += 1
+            except queue.Empty:
+                self._restart_dead_workers()
+        return not any(self._pending)
+
+    async def close(self):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "multiprocess",
+            "partitions": self.partitions,
+            "pending_by_partition": [len(p) for p in self._pending],
+            "acked": self.acked_count,
+            "redelivered": self.redelivered_count,
+            "alive_workers": sum(1 for p in self._processes if p.is_alive()),
+        }
+
+
+# ============================================
+# Redis Protocol (RESP2) Client
+# ============================================
+
+class RespError(Exception):
+    """Redis 오류 응답 (-ERR ...)"""
+
+
+class RespConnection:
+    """최소 RESP2 클라이언트 (asyncio 스트림, 파이프라이닝 지원)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    @staticmethod
+    def pack(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    async def command(self, *args):
+        """명령 1개 실행"""
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: List[Tuple]) -> List[Any]:
+        """명령 여러 개를 한 번에 쓰고 응답 순서대로 반환"""
+        await self.connect()
+        self._writer.write(b"".join(self.pack(*c) for c in commands))
+        await self._writer.drain()
+        replies = []
+        for _ in commands:
+            replies.append(await read_resp(self._reader))
+        return replies
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
+
+
+async def read_resp(reader: asyncio.StreamReader):
+    """RESP2 응답 1개 파싱 (오류 응답은 RespError 객체로 반환)"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("RESP connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_resp(reader) for _ in range(length)]
+    raise RespError(f"Unknown RESP type: {line!r}")
+
+
+def _check(reply):
+    if isinstance(reply, RespError):
+        raise reply
+    return reply
+
+
+# ============================================
+# Redis Streams Backend
+# ============================================
+
+class RedisStreamTransport(EventTransport):
+    """
+    Redis Streams 백엔드 (멀티 노드)
+
+    - 파티션별 스트림: {stream}:{partition}
+    - 컨슈머 그룹: 같은 group 의 레플리카들이 owned_partitions 를 나눠 소유
+    - 파티션 내 순차 처리 후 XACK → 순서 보장 + at-least-once
+    - 재시작 시 ack 안 된 항목(PEL)부터 다시 처리
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        stream: str = "mulberry:events",
+        group: str = "mulberry-bus",
+        consumer: str = "consumer-1",
+        partitions: int = 8,
+        owned_partitions: Optional[Iterable[int]] = None,
+        key_field: Optional[str] = "agent_id",
+        read_count: int = 100,
+        block_ms: int = 1000,
+        max_len: Optional[int] = None
+    ):
+        """
+        Args:
+            host, port: Redis (또는 LocalStreamBroker) 주소
+            stream: 스트림 이름 접두어
+            group: 컨슈머 그룹 이름
+            consumer: 이 레플리카의 컨슈머 이름
+            partitions: 전체 파티션 수 (모든 레플리카 동일해야 함)
+            owned_partitions: 이 레플리카가 소비할 파티션 (None = 전체)
+            key_field: 파티션 키로 쓸 payload 필드
+            read_count: XREADGROUP 1회 최대 항목 수
+            block_ms: XREADGROUP 대기 시간
+            max_len: 스트림 최대 길이 (XADD MAXLEN ~, None = 무제한)
+        """
+        self.host = host
+        self.port = port
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.partitions = partitions
+        self.owned_partitions = list(range(partitions) if owned_partitions is None else owned_partitions)
+        self.key_field = key_field
+        self.read_count = read_count
+        self.block_ms = block_ms
+        self.max_len = max_len
+
+        self._producer = RespConnection(host, port)
+        self._producer_lock = asyncio.Lock()
+        self._consumers: List[RespConnection] = []
+        self.sent_count = 0
+        self.acked_count = 0
+
+    def stream_key(self, partition: int) -> str:
+        return f"{self.stream}:{partition}"
+
+    def _xadd(self, event) -> Tuple:
+        key = self.stream_key(partition_for(event, self.partitions, self.key_field))
+        if self.max_len:
+            return ("XADD", key, "MAXLEN", "~", self.max_len, "*", "e", encode_event(event))
+        return ("XADD", key, "*", "e", encode_event(event))
+
+    async def send(self, event) -> bool:
+        async with self._producer_lock:
+            _check(await self._producer.command(*self._xadd(event)))
+        self.sent_count += 1
+        return True
+
+    async def send_many(self, events: Iterable) -> int:
+        commands = [self._xadd(event) for event in events]
+        if not commands:
+            return 0
+        async with self._producer_lock:
+            replies = await self._producer.pipeline(commands)
+        accepted = sum(1 for r in replies if not isinstance(r, RespError))
+        self.sent_count += accepted
+        return accepted
+
+    async def _ensure_group(self, conn: RespConnection, key: str):
+        reply = await conn.command("XGROUP", "CREATE", key, self.group, "0", "MKSTREAM")
+        if isinstance(reply, RespError) and "BUSYGROUP" not in str(reply):
+            raise reply
+
+    async def consume(self, deliver: Deliver):
+        """소유 파티션마다 순차 소비 루프 실행"""
+        await asyncio.gather(*(
+            self._consume_partition(partition, deliver) for partition in self.owned_partitions
+        ))
+
+    async def _consume_partition(self, partition: int, deliver: Deliver):
+        # BLOCK 명령이 연결을 점유하므로 파티션마다 별도 연결
+        conn = RespConnection(self.host, self.port)
+        self._consumers.append(conn)
+        key = self.stream_key(partition)
+        await self._ensure_group(conn, key)
+
+        # "0" = 이 컨슈머의 미확인(PEL) 항목부터 재처리, 비면 ">" 새 항목
+        cursor = "0"
+        while True:
+            args = ["XREADGROUP", "GROUP", self.group, self.consumer, "COUNT", self.read_count]
+            if cursor == ">":
+                args += ["BLOCK", self.block_ms]
+            reply = _check(await conn.command(*args, "STREAMS", key, cursor))
+
+            entries = reply[0][1] if reply else []
+            if cursor == "0" and not entries:
+                cursor = ">"
+                continue
+
+            for entry_id, fields in entries:
+                data = dict(zip(fields[::2], fields[1::2])).get(b"e")
+                if data is not None:
+                    await deliver(decode_event(data))
+                _check(await conn.command("XACK", key, self.group, entry_id))
+                self.acked_count += 1
+
+    async def close(self):
+        await self._producer.close()
+        for conn in self._consumers:
+            await conn.close()
+        self._consumers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis-stream",
+            "stream": self.stream,
+            "group": self.group,
+            "consumer": self.consumer,
+            "owned_partitions": self.owned_partitions,
+            "sent": self.sent_count,
+            "acked": self.acked_count,
+        }
+
+
+# ============================================
+# Local Stand-in Broker
+# ============================================
+
+class _Stream:
+    def __init__(self):
+        self.entries: List[Tuple[Tuple[int, int], List[bytes]]] = []
+        self.groups: Dict[bytes, Dict[str, Any]] = {}
+        self.last_id = (0, 0)
+        self.changed = asyncio.Condition()
+
+
+def _parse_id(raw: bytes) -> Tuple[int, int]:
+    ms, _, seq = raw.decode().partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _format_id(entry_id: Tuple[int, int]) -> bytes:
+    return f"{entry_id[0]}-{entry_id[1]}".encode()
+
+
+class LocalStreamBroker:
+    """
+    Redis Streams 부분 구현 (테스트 / 로컬 개발용 스탠드인)
+
+    지원 명령: PING, XADD, XLEN, XGROUP CREATE, XREADGROUP, XACK, XPENDING(요약), DEL
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.streams: Dict[bytes, _Stream] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """서버 시작, 실제 포트 반환"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"✅ Local stream broker listening on {self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_resp(reader)
+                try:
+                    reply = await self._execute(request)
+                except RespError as e:
+                    reply = e
+                writer.write(self._encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _encode(self, value) -> bytes:
+        if value is None:
+            return b"*-1\r\n"
+        if isinstance(value, RespError):
+            return f"-{value}\r\n".encode()
+        if isinstance(value, bool):
+            return b":%d\r\n" % int(value)
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+
+    def _stream(self, key: bytes, create: bool = False) -> Optional[_Stream]:
+        stream = self.streams.get(key)
+        if stream is None and create:
+            stream = self.streams[key] = _Stream()
+        return stream
+
+    async def _execute(self, request: List[bytes]):
+        command = request[0].upper()
+        args = request[1:]
+
+        if command == b"PING":
+            return "PONG"
+        if command == b"XADD":
+            return await self._xadd(args)
+        if command == b"XLEN":
+            stream = self._stream(args[0])
+            return len(stream.entries) if stream else 0
+        if command == b"XGROUP":
+            return self._xgroup(args)
+        if command == b"XREADGROUP":
+            return await self._xreadgroup(args)
+        if command == b"XACK":
+            stream = self._stream(args[0])
+            group = stream.groups.get(args[1]) if stream else None
+            if group is None:
+                return 0
+            return sum(1 for raw in args[2:] if group["pending"].pop(_parse_id(raw), None) is not None)
+        if command == b"XPENDING":
+            stream = self._stream(args[0])
+            group = stream.groups.get(args[1]) if stream else None
+            return [len(group["pending"]) if group else 0]
+        if command == b"DEL":
+            return sum(1 for key in args if self.streams.pop(key, None) is not None)
+        raise RespError(f"ERR unknown command '{command.decode()}'")
+
+    async def _xadd(self, args: List[bytes]):
+        key = args[0]
+        i = 1
+        max_len = None
+        if args[i].upper() == b"MAXLEN":
+            i += 1
+            if args[i] in (b"~", b"="):
+                i += 1
+            max_len = int(args[i])
+            i += 1
+        if args[i] != b"*":
+            raise RespError("ERR only auto-generated IDs are supported")
+        fields = args[i + 1:]
+
+        stream = self._stream(key, create=True)
+        now_ms = int(time.time() * 1000)
+        ms, seq = stream.last_id
+        entry_id = (now_ms, 0) if now_ms > ms else (ms, seq + 1)
+        stream.last_id = entry_id
+        stream.entries.append((entry_id, fields))
+        if max_len is not None and len(stream.entries) > max_len:
+            del stream.entries[:len(stream.entries) - max_len]
+
+        async with stream.changed:
+            stream.changed.notify_all()
+        return _format_id(entry_id)
+
+    def _xgroup(self, args: List[bytes]):
+        if args[0].upper() != b"CREATE":
+            raise RespError("ERR only XGROUP CREATE is supported")
+        key, group, start = args[1], args[2], args[3]
+        mkstream = any(a.upper() == b"MKSTREAM" for a in args[4:])
+        stream = self._stream(key, create=mkstream)
+        if stream is None:
+            raise RespError("ERR The XGROUP subcommand requires the key to exist")
+        if group in stream.groups:
+            raise RespError("BUSYGROUP Consumer Group name already exists")
+        last = stream.last_id if start == b"$" else _parse_id(start)
+        stream.groups[group] = {"last_delivered": last, "pending": {}}
+        return "OK"
+
+    async def _xreadgroup(self, args: List[bytes]):
+        group_name, consumer = args[1], args[2]
+        count = None
+        block = None
+        i = 3
+        while args[i].upper() != b"STREAMS":
+            option = args[i].upper()
+            if option == b"COUNT":
+                count = int(args[i + 1])
+            elif option == b"BLOCK":
+                block = int(args[i + 1])
+            i += 2
+        key, cursor = args[i + 1], args[i + 2]
+
+        stream = self._stream(key)
+        if stream is None or group_name not in stream.groups:
+            raise RespError("NOGROUP No such key or consumer group")
+        group = stream.groups[group_name]
+
+        if cursor != b">":
+            # 이 컨슈머의 미확인 항목 재전달
+            start = _parse_id(cursor)
+            entries = [
+                (entry_id, fields) for entry_id, fields in stream.entries
+                if entry_id > start and group["pending"].get(entry_id) == consumer
+            ][:count]
+            return [[key, [[_format_id(e), f] for e, f in entries]]]
+
+        def new_entries():
+            found = [(e, f) for e, f in stream.entries if e > group["last_delivered"]]
+            return found[:count] if count else found
+
+        entries = new_entries()
+        if not entries and block is not None:
+            try:
+                async with stream.changed:
+                    await asyncio.wait_for(
+                        stream.changed.wait_for(lambda: bool(new_entries())),
+                        timeout=block / 1000 if block else None,
+                    )
+            except asyncio.TimeoutError:
+                return None
+            entries = new_entries()
+        if not entries:
+            return None
+
+        for entry_id, _ in entries:
+            group["pending"][entry_id] = consumer
+        group["last_delivered"] = entries[-1][0]
+        return [[key, [[_format_id(e), f] for e, f in entries]]]
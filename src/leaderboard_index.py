@@ -0,0 +1,449 @@
+"""
+Mulberry - Spirit Score Leaderboard Index
+단말기마다 폴링하는 리더보드 / "내 순위" 조회를 테이블 스캔 없이 메모리에서
+
+Mission: 점수 갱신 O(log n), 순위/상위 k명/내 주변 조회 O(log n + k)
+- 구간 폭(span)을 기록하는 인덱스 스킵 리스트 (키: (-점수, ID) → 1위가 맨 앞)
+- 시작 시 DB에서 적재, 점수가 바뀔 때마다 갱신 (version으로 늦게 온 갱신 무시)
+- 주기적 JSON 스냅샷 (바뀐 경우에만, 임시 파일 → rename 원자적 교체)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from loguru import logger
+
+
+MAX_LEVEL = 32
+LEVEL_PROBABILITY = 0.25
+
+
+class LeaderboardEntry(NamedTuple):
+    """리더보드 한 줄"""
+    position: int   # 1부터 시작하는 순번 (동점은 ID 순)
+    rank: int       # 동점 공동 순위 (SQL RANK()와 동일)
+    member_id: str
+    score: float
+
+
+# ============================================
+# Indexable Skip List
+# ============================================
+
+class _Node:
+    __slots__ = ("key", "forward", "span")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.forward: List[Optional["_Node"]] = [None] * level
+        self.span: List[int] = [0] * level  # forward[i]까지 건너뛰는 노드 수
+
+
+class _SkipList:
+    """
+    순서 통계 스킵 리스트
+
+    각 링크에 건너뛰는 노드 수를 기록해 두어 "키보다 작은 원소 수"와
+    "i번째 원소"를 모두 O(log n)에 찾는다.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.head = _Node(None, MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+        self._random = rng.random
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._random() < LEVEL_PROBABILITY:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update: List[_Node] = [self.head] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            rank[i] = 0 if i == self.level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.span[i] = self.length
+            self.level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        self.length += 1
+
+    def build(self, keys: List):
+        """정렬된 (중복 없는) 키로 빈 리스트를 O(n)에 구성"""
+        last: List[_Node] = [self.head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        position = 0
+        for key in keys:
+            position += 1
+            level = self._random_level()
+            node = _Node(key, level)
+            for i in range(level):
+                last[i].forward[i] = node
+                last[i].span[i] = position - last_position[i]
+                last[i] = node
+                last_position[i] = position
+            self.level = max(self.level, level)
+        for i in range(self.level):
+            last[i].span[i] = position - last_position[i]
+        self.length = position
+
+    def delete(self, key) -> bool:
+        update: List[_Node] = [self.head] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+
+        node = node.forward[0]
+        if node is None or node.key != key:
+            return False
+
+        for i in range(self.level):
+            if update[i].forward[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self.level > 1 and self.head.forward[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return True
+
+    def count_less(self, key) -> int:
+        """key보다 작은 원소 수"""
+        count = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                count += node.span[i]
+                node = node.forward[i]
+        return count
+
+    def node_at(self, index: int) -> Optional[_Node]:
+        """0부터 시작하는 index번째 노드"""
+        if index < 0 or index >= self.length:
+            return None
+        traversed = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] is not None and traversed + node.span[i] <= index + 1:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == index + 1:
+                return node
+        return None
+
+
+# ============================================
+# Leaderboard Index
+# ============================================
+
+class LeaderboardIndex:
+    """
+    메모리 리더보드 인덱스
+
+    점수 내림차순, 동점은 member_id 오름차순 (SQL의 ORDER BY score DESC, id).
+    모든 메서드는 스레드 안전.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        인덱스 초기화
+
+        Args:
+            seed: 스킵 리스트 레벨 난수 시드 (테스트 재현용)
+        """
+        self._rng = random.Random(seed)
+        self._list = _SkipList(self._rng)
+        self._scores: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        # 변경 카운터 (스냅샷은 바뀐 경우에만 저장)
+        self.changes = 0
+        self._saved_changes = -1
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_stop = threading.Event()
+
+        self.stats: Dict[str, int] = {
+            "updates": 0,
+            "stale_updates": 0,
+            "removes": 0,
+            "snapshots": 0,
+        }
+
+    @staticmethod
+    def _key(member_id: str, score: float) -> Tuple[float, str]:
+        return (-score, member_id)
+
+    # ============================================
+    # Updates
+    # ============================================
+
+    def load(self, entries: Iterable[Tuple]) -> int:
+        """
+        전체 교체 (시작 시 DB 적재)
+
+        Args:
+            entries: (member_id, score) 또는 (member_id, score, version)
+
+        Returns:
+            int: 적재한 항목 수
+        """
+        scores: Dict[str, float] = {}
+        versions: Dict[str, int] = {}
+        for entry in entries:
+            scores[entry[0]] = float(entry[1])
+            if len(entry) > 2 and entry[2] is not None:
+                versions[entry[0]] = entry[2]
+
+        with self._lock:
+            self._list = _SkipList(self._rng)
+            self._list.build(sorted(self._key(member_id, score) for member_id, score in scores.items()))
+            self._scores = scores
+            self._versions = versions
+            self.changes += 1
+            return len(scores)
+
+    def update(self, member_id: str, score: float, version: Optional[int] = None) -> bool:
+        """
+        점수 갱신 (없으면 추가)
+
+        Args:
+            member_id: 에이전트/사용자 ID
+            score: 새 총점
+            version: 단조 증가 버전 (예: 누적 이벤트 수). 이미 더 새로운
+                     버전이 반영돼 있으면 무시 (동시 커밋 순서 역전 대비)
+
+        Returns:
+            bool: 반영되었으면 True
+        """
+        with self._lock:
+            current = self._versions.get(member_id)
+            if version is not None and current is not None and version <= current:
+                self.stats["stale_updates"] += 1
+                return False
+            self._set(member_id, float(score), version)
+            self.stats["updates"] += 1
+            self.changes += 1
+            return True
+
+    def _set(self, member_id: str, score: float, version: Optional[int]):
+        previous = self._scores.get(member_id)
+        if previous is not None:
+            if previous == score:
+                if version is not None:
+                    self._versions[member_id] = version
+                return
+            self._list.delete(self._key(member_id, previous))
+        self._list.insert(self._key(member_id, score))
+        self._scores[member_id] = score
+        if version is not None:
+            self._versions[member_id] = version
+
+    def remove(self, member_id: str) -> bool:
+        """항목 삭제"""
+        with self._lock:
+            score = self._scores.pop(member_id, None)
+            if score is None:
+                return False
+            self._versions.pop(member_id, None)
+            self._list.delete(self._key(member_id, score))
+            self.stats["removes"] += 1
+            self.changes += 1
+            return True
+
+    # ============================================
+    # Queries
+    # ============================================
+
+    def score(self, member_id: str) -> Optional[float]:
+        with self._lock:
+            return self._scores.get(member_id)
+
+    def member_version(self, member_id: str) -> Optional[int]:
+        """마지막으로 반영된 갱신 버전"""
+        with self._lock:
+            return self._versions.get(member_id)
+
+    def position(self, member_id: str) -> Optional[int]:
+        """1부터 시작하는 순번 (동점은 ID 순), 없으면 None"""
+        with self._lock:
+            score = self._scores.get(member_id)
+            if score is None:
+                return None
+            return self._list.count_less(self._key(member_id, score)) + 1
+
+    def rank(self, member_id: str) -> Optional[int]:
+        """동점 공동 순위 (나보다 점수가 높은 인원 + 1), 없으면 None"""
+        with self._lock:
+            score = self._scores.get(member_id)
+            if score is None:
+                return None
+            return self._rank_of(score)
+
+    def _rank_of(self, score: float) -> int:
+        # (-score, "")는 같은 점수의 어떤 키보다도 작거나 같음
+        return self._list.count_less((-score, "")) + 1
+
+    def top(self, k: int = 10, offset: int = 0) -> List[LeaderboardEntry]:
+        """
+        상위 k명
+
+        Args:
+            k: 인원 수
+            offset: 건너뛸 인원 수 (페이지)
+        """
+        with self._lock:
+            return self._walk(offset, k)
+
+    def around(self, member_id: str, radius: int = 5) -> List[LeaderboardEntry]:
+        """
+        내 앞뒤 radius명 (나 포함 최대 2 * radius + 1명)
+
+        Returns:
+            리더보드 구간 (없는 ID이면 빈 목록)
+        """
+        with self._lock:
+            position = self.position(member_id)
+            if position is None:
+                return []
+            start = max(position - 1 - radius, 0)
+            return self._walk(start, position + radius - start)
+
+    def _walk(self, start: int, count: int) -> List[LeaderboardEntry]:
+        entries: List[LeaderboardEntry] = []
+        node = self._list.node_at(start)
+        if node is None or count <= 0:
+            return entries
+
+        score = -node.key[0]
+        rank = self._rank_of(score)
+        position = start + 1
+        while node is not None and len(entries) < count:
+            node_score = -node.key[0]
+            if node_score != score:
+                score, rank = node_score, position
+            entries.append(LeaderboardEntry(position, rank, node.key[1], node_score))
+            node = node.forward[0]
+            position += 1
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member_id: str) -> bool:
+        return member_id in self._scores
+
+    def get_stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        with self._lock:
+            return {
+                **self.stats,
+                "members": len(self._scores),
+                "levels": self._list.level,
+                "changes": self.changes,
+            }
+
+    # ============================================
+    # Snapshot Persistence
+    # ============================================
+
+    def save_snapshot(self, path: Union[str, Path]) -> bool:
+        """
+        스냅샷 저장 (마지막 저장 이후 바뀐 경우에만)
+
+        Returns:
+            bool: 파일을 썼으면 True
+        """
+        with self._lock:
+            if self.changes == self._saved_changes:
+                return False
+            changes = self.changes
+            members = [
+                [member_id, score, self._versions.get(member_id)]
+                for member_id, score in self._scores.items()
+            ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "members": members}, f, ensure_ascii=False)
+        os.replace(temp, path)
+
+        with self._lock:
+            self._saved_changes = changes
+            self.stats["snapshots"] += 1
+        return True
+
+    def load_snapshot(self, path: Union[str, Path]) -> Optional[float]:
+        """
+        스냅샷에서 적재
+
+        Returns:
+            스냅샷 저장 시각 (파일이 없으면 None)
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        self.load(
+            (member_id, score) if version is None else (member_id, score, version)
+            for member_id, score, version in snapshot["members"]
+        )
+        with self._lock:
+            self._saved_changes = self.changes
+        return snapshot["saved_at"]
+
+    def start_snapshots(self, path: Union[str, Path], interval_seconds: float = 60.0):
+        """interval_seconds마다 스냅샷 저장 (데몬 스레드)"""
+        if self._snapshot_thread is not None:
+            return
+        self._snapshot_stop.clear()
+
+        def run():
+            while not self._snapshot_stop.wait(interval_seconds):
+                try:
+                    self.save_snapshot(path)
+                except Exception as e:
+                    logger.warning(f"리더보드 스냅샷 저장 실패: {e}")
+
+        self._snapshot_thread = threading.Thread(target=run, name="leaderboard-snapshot", daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self, path: Optional[Union[str, Path]] = None):
+        """스냅샷 스레드 종료 (path를 주면 마지막으로 한 번 저장)"""
+        if self._snapshot_thread is not None:
+            self._snapshot_stop.set()
+            self._snapshot_thread.join(5)
+            self._snapshot_thread = None
+        if path is not None:
+            self.save_snapshot(path)
@@ -0,0 +1,593 @@
+"""
+Mulberry Phase 4-B - Outbound Delivery Engine
+외부 API 호출 / 웹훅 발송 공용 HTTP 전송 계층
+
+Mission: 흩어진 requests/httpx 호출을 하나의 풀로
+- 호스트별 keep-alive 연결 풀 (httpx.AsyncClient 호스트당 1개)
+- 지수 백오프 + full jitter (time.sleep 대신 루프에서 대기)
+- 호스트별 동시 요청 제한 (Semaphore)
+- 호스트별 서킷 브레이커 (연속 실패 시 즉시 거절 → half-open 탐침)
+- 영속 재시도 큐 (SQLite, fire-and-forget 발송은 재시작 후에도 재시도)
+
+전용 이벤트 루프 스레드에서 동작하므로 동기 코드(request_sync)와
+다른 루프의 비동기 코드(request) 모두 같은 연결 풀을 공유한다.
+다른 서비스 디렉터리에서는 src 를 PYTHONPATH 에 추가해 사용.
+"""
+
+import asyncio
+import json as jsonlib
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+from telemetry import HistogramSet
+
+
+# ============================================
+# Policies
+# ============================================
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    재시도 정책
+
+    지연 = uniform(0, min(backoff_max, backoff_base * 2^attempt)) (full jitter)
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, attempt: int) -> float:
+        """attempt 번째 실패 후 대기 시간 (초, attempt 는 0부터)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    """
+    호스트별 서킷 브레이커
+
+    closed → (연속 실패 failure_threshold 회) → open → (reset_timeout 경과) → half_open
+    half_open 에서는 탐침 요청 1개만 통과, 성공 시 closed / 실패 시 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """요청 통과 여부"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.open_count += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+# ============================================
+# Results / Errors
+# ============================================
+
+@dataclass
+class DeliveryResponse:
+    """응답 (연결 풀 밖으로 넘길 수 있도록 본문까지 읽은 상태)"""
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    attempts: int = 1
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(errors="replace")
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.content)
+
+
+class DeliveryError(Exception):
+    """재시도 후에도 실패한 전송"""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        response: Optional[DeliveryResponse] = None,
+        attempts: int = 0,
+        retryable: bool = True
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+        self.attempts = attempts
+        self.retryable = retryable
+
+
+class CircuitOpenError(DeliveryError):
+    """서킷 open 상태라 요청을 보내지 않음"""
+
+
+@dataclass
+class HostState:
+    """호스트별 연결 풀 / 동시성 / 브레이커"""
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+    breaker: CircuitBreaker
+    in_flight: int = 0
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "requests": 0, "succeeded": 0, "failed": 0, "retries": 0, "rejected_open": 0
+    })
+
+
+# ============================================
+# Delivery Engine
+# ============================================
+
+class DeliveryEngine:
+    """
+    공용 외부 HTTP 전송 엔진
+
+    Usage:
+        engine = DeliveryEngine(retry_store_path="data/outbound.db")
+        response = engine.request_sync("POST", url, json=payload)      # 동기 코드
+        response = await engine.request("POST", url, json=payload)     # 비동기 코드
+        await engine.enqueue("POST", url, json=payload)                # 영속 재시도
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        timeout: float = 10.0,
+        retry: RetryPolicy = RetryPolicy(),
+        breaker_threshold: int = 5,
+        breaker_reset_seconds: float = 30.0,
+        retry_store_path: Optional[Union[str, Path]] = None,
+        queue_retry: RetryPolicy = RetryPolicy(max_attempts=10, backoff_base=2.0, backoff_max=600.0),
+        queue_poll_seconds: float = 1.0
+    ):
+        """
+        엔진 초기화
+
+        Args:
+            max_connections_per_host: 호스트당 동시 요청 / keep-alive 연결 상한
+            timeout: 기본 요청 타임아웃 (초)
+            retry: request() 기본 재시도 정책
+            breaker_threshold: 서킷 open 까지 연속 실패 수
+            breaker_reset_seconds: open 유지 시간 (이후 half-open 탐침)
+            retry_store_path: 재시도 큐 SQLite 경로 (None = 메모리, 재시작 시 유실)
+            queue_retry: 재시도 큐 정책 (max_attempts 초과 시 dead 처리)
+            queue_poll_seconds: 재시도 큐 점검 주기 (초)
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.retry = retry
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self.retry_store_path = retry_store_path
+        self.queue_retry = queue_retry
+        self.queue_poll_seconds = queue_poll_seconds
+
+        self._hosts: Dict[str, HostState] = {}
+        self.latency = HistogramSet()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._queue_db: Optional[sqlite3.Connection] = None
+        self._queue_task: Optional[asyncio.Task] = None
+        self._queue_wakeup: Optional[asyncio.Event] = None
+        self.queue_stats: Dict[str, int] = {"enqueued": 0, "delivered": 0, "dead": 0}
+
+    # ============================================
+    # Loop Thread
+    # ============================================
+
+    def start(self):
+        """전송 루프 스레드 시작 (첫 요청 시 자동 호출)"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name="outbound-delivery", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        loop.run_until_complete(self._open_queue())
+        ready.set()
+        loop.run_forever()
+
+    def _submit(self, coro) -> "asyncio.Future":
+        """전송 루프에서 코루틴 실행 (concurrent.futures.Future 반환)"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    # ============================================
+    # Requests
+    # ============================================
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        json: Any = None,
+        data: Any = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None
+    ) -> DeliveryResponse:
+        """
+        HTTP 요청 (재시도 포함)
+
+        Args:
+            method: HTTP 메서드
+            url: 절대 URL
+            json / data / content: 요청 본문 (httpx 와 동일)
+            headers: 요청 헤더
+            timeout: 타임아웃 (초, None = 엔진 기본값)
+            retry: 재시도 정책 (None = 엔진 기본값, NO_RETRY = 1회만)
+
+        Returns:
+            DeliveryResponse: 2xx/3xx 응답 또는 재시도 불가 4xx 응답
+
+        Raises:
+            DeliveryError: 재시도 후에도 실패 (CircuitOpenError: 서킷 open)
+        """
+        coro = self._request(method, url, json, data, content, headers, timeout, retry or self.retry)
+        if self._in_loop_thread():
+            return await coro
+        return await asyncio.wrap_future(self._submit(coro))
+
+    def request_sync(self, method: str, url: str, **kwargs) -> DeliveryResponse:
+        """
+        동기 코드용 request() (호출 스레드만 대기, 백오프는 전송 루프에서)
+
+        Raises:
+            DeliveryError: 재시도 후에도 실패
+        """
+        if self._in_loop_thread():
+            raise RuntimeError("request_sync() cannot be called from the delivery loop")
+        return self._submit(self.request(method, url, **kwargs)).result()
+
+    def _host(self, url: str) -> HostState:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        state = self._hosts.get(origin)
+        if state is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections_per_host,
+                max_keepalive_connections=self.max_connections_per_host
+            )
+            state = self._hosts[origin] = HostState(
+                client=httpx.AsyncClient(base_url=origin, limits=limits, timeout=self.timeout),
+                semaphore=asyncio.Semaphore(self.max_connections_per_host),
+                breaker=CircuitBreaker(self.breaker_threshold, self.breaker_reset_seconds)
+            )
+        return state
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        json: Any,
+        data: Any,
+        content: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        retry: RetryPolicy
+    ) -> DeliveryResponse:
+        host = self._host(url)
+        origin = str(host.client.base_url).rstrip("/")
+        last_error: Optional[DeliveryError] = None
+
+        for attempt in range(retry.max_attempts):
+            if attempt:
+                host.stats["retries"] += 1
+                await asyncio.sleep(self._retry_delay(retry, attempt - 1, last_error))
+
+            if not host.breaker.allow():
+                host.stats["rejected_open"] += 1
+                raise CircuitOpenError(f"Circuit open for {origin}", attempts=attempt)
+
+            host.stats["requests"] += 1
+            started = time.perf_counter()
+            async with host.semaphore:
+                host.in_flight += 1
+                try:
+                    raw = await host.client.request(
+                        method, url, json=json, data=data, content=content, headers=headers,
+                        timeout=timeout if timeout is not None else self.timeout
+                    )
+                    response = DeliveryResponse(
+                        raw.status_code, dict(raw.headers), raw.content, attempts=attempt + 1
+                    )
+                except httpx.HTTPError as exc:
+                    response = None
+                    last_error = DeliveryError(f"{type(exc).__name__}: {exc}", attempts=attempt + 1)
+                finally:
+                    host.in_flight -= 1
+            self.latency.record(origin, (time.perf_counter() - started) * 1000)
+
+            if response is not None:
+                if response.status_code < 400:
+                    host.breaker.record_success()
+                    host.stats["succeeded"] += 1
+                    return response
+                retryable = response.status_code in retry.retry_statuses
+                last_error = DeliveryError(
+                    f"HTTP {response.status_code} from {origin}",
+                    status_code=response.status_code, response=response,
+                    attempts=attempt + 1, retryable=retryable
+                )
+                if not retryable:
+                    # 4xx 는 호출 측 문제 → 서킷에 반영하지 않음
+                    host.breaker.record_success()
+                    host.stats["failed"] += 1
+                    raise last_error
+
+            host.breaker.record_failure()
+            logger.warning(f"⚠️ Delivery attempt {attempt + 1}/{retry.max_attempts} failed: {last_error}")
+
+        host.stats["failed"] += 1
+        raise last_error
+
+    @staticmethod
+    def _retry_delay(retry: RetryPolicy, attempt: int, error: Optional[DeliveryError]) -> float:
+        delay = retry.delay(attempt)
+        if error is not None and error.response is not None:
+            retry_after = error.response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), retry.backoff_max))
+        return delay
+
+    # ============================================
+    # Persistent Retry Queue
+    # ============================================
+
+    async def _open_queue(self):
+        path = self.retry_store_path
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._queue_db = sqlite3.connect(str(path) if path is not None else ":memory:")
+        self._queue_db.execute("PRAGMA journal_mode=WAL")
+        self._queue_db.execute("""
+            CREATE TABLE IF NOT EXISTS outbound_retry (
+                delivery_id TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                status TEXT NOT NULL DEFAULT 'pending'
+            )
+        """)
+        self._queue_db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbound_retry_due ON outbound_retry (status, next_attempt_at)"
+        )
+        self._queue_db.commit()
+        self._queue_wakeup = asyncio.Event()
+        self._queue_task = asyncio.get_running_loop().create_task(self._queue_loop())
+
+    async def enqueue(
+        self,
+        method: str,
+        url: str,
+        *,
+        json: Any = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        영속 재시도 큐에 발송 등록 (즉시 반환, 전송은 백그라운드)
+
+        Args:
+            method: HTTP 메서드
+            url: 절대 URL
+            json / content: 요청 본문
+            headers: 요청 헤더
+
+        Returns:
+            str: delivery_id
+        """
+        headers = dict(headers or {})
+        if json is not None:
+            content = jsonlib.dumps(json, ensure_ascii=False).encode()
+            headers.setdefault("Content-Type", "application/json")
+        delivery_id = uuid.uuid4().hex
+        coro = self._enqueue(delivery_id, method, url, headers, content)
+        if self._in_loop_thread():
+            await coro
+        else:
+            await asyncio.wrap_future(self._submit(coro))
+        return delivery_id
+
+    def enqueue_sync(self, method: str, url: str, **kwargs) -> str:
+        """동기 코드용 enqueue()"""
+        return self._submit(self.enqueue(method, url, **kwargs)).result()
+
+    async def _enqueue(self, delivery_id: str, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]):
+        self._queue_db.execute(
+            "INSERT INTO outbound_retry (delivery_id, method, url, headers, body, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (delivery_id, method, url, jsonlib.dumps(headers), body, time.time())
+        )
+        self._queue_db.commit()
+        self.queue_stats["enqueued"] += 1
+        self._queue_wakeup.set()
+
+    async def _queue_loop(self):
+        """만기 항목 발송 (항목당 1회 시도, 실패 시 백오프 후 재예약)"""
+        while True:
+            try:
+                await asyncio.wait_for(self._queue_wakeup.wait(), self.queue_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._queue_wakeup.clear()
+
+            due = self._queue_db.execute(
+                "SELECT delivery_id, method, url, headers, body, attempts FROM outbound_retry "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 100",
+                (time.time(),)
+            ).fetchall()
+            if due:
+                await asyncio.gather(*(self._deliver_queued(*row) for row in due))
+
+    async def _deliver_queued(
+        self,
+        delivery_id: str,
+        method: str,
+        url: str,
+        headers: str,
+        body: Optional[bytes],
+        attempts: int
+    ):
+        try:
+            await self._request(method, url, None, None, body, jsonlib.loads(headers), None, NO_RETRY)
+        except DeliveryError as exc:
+            attempts += 1
+            if not exc.retryable or attempts >= self.queue_retry.max_attempts:
+                self._queue_db.execute(
+                    "UPDATE outbound_retry SET status = 'dead', attempts = ?, last_error = ? WHERE delivery_id = ?",
+                    (attempts, str(exc), delivery_id)
+                )
+                self.queue_stats["dead"] += 1
+                logger.error(f"❌ Outbound delivery dead after {attempts} attempts: {url} ({exc})")
+            else:
+                self._queue_db.execute(
+                    "UPDATE outbound_retry SET attempts = ?, next_attempt_at = ?, last_error = ? "
+                    "WHERE delivery_id = ?",
+                    (attempts, time.time() + self.queue_retry.delay(attempts - 1), str(exc), delivery_id)
+                )
+        else:
+            self._queue_db.execute("DELETE FROM outbound_retry WHERE delivery_id = ?", (delivery_id,))
+            self.queue_stats["delivered"] += 1
+        self._queue_db.commit()
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """재시도 한도를 넘긴 발송 목록"""
+        rows = self._submit(self._query(
+            "SELECT delivery_id, method, url, attempts, last_error FROM outbound_retry "
+            "WHERE status = 'dead' LIMIT ?", (limit,)
+        )).result()
+        keys = ("delivery_id", "method", "url", "attempts", "last_error")
+        return [dict(zip(keys, row)) for row in rows]
+
+    async def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self._queue_db.execute(sql, params).fetchall()
+
+    # ============================================
+    # Stats / Shutdown
+    # ============================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """호스트별 요청/실패/서킷 상태 + 지연 + 재시도 큐"""
+        latency = self.latency.snapshot()
+        pending = 0
+        if self._loop is not None:
+            pending = self._submit(self._query(
+                "SELECT COUNT(*) FROM outbound_retry WHERE status = 'pending'"
+            )).result()[0][0]
+        return {
+            "hosts": {
+                origin: {
+                    **state.stats,
+                    "in_flight": state.in_flight,
+                    "circuit": state.breaker.state,
+                    "circuit_opened": state.breaker.open_count,
+                    "latency": latency.get(origin, {}),
+                }
+                for origin, state in self._hosts.items()
+            },
+            "queue": {**self.queue_stats, "pending": pending},
+        }
+
+    async def _close(self):
+        if self._queue_task is not None:
+            self._queue_task.cancel()
+            await asyncio.gather(self._queue_task, return_exceptions=True)
+        for state in self._hosts.values():
+            await state.client.aclose()
+        self._hosts.clear()
+        if self._queue_db is not None:
+            self._queue_db.close()
+            self._queue_db = None
+
+    def close(self):
+        """연결 풀 / 재시도 큐 종료 (미발송 항목은 영속 큐에 남음)"""
+        if self._loop is None:
+            return
+        self._submit(self._close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+
+# ============================================
+# Shared Instance
+# ============================================
+
+_default_engine: Optional[DeliveryEngine] = None
+_default_lock = threading.Lock()
+
+
+def get_delivery_engine() -> DeliveryEngine:
+    """프로세스 공용 전송 엔진 (호스트별 연결 풀 공유)"""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = DeliveryEngine()
+        return _default_engine
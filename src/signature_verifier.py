@@ -0,0 +1,186 @@
+"""
+Mulberry Phase 4-B - Webhook Signature Verifier
+웹훅 HMAC 서명 검증 (사전 키잉 캐시)
+
+Mission: 서명 검증을 핫패스에서 가장 싼 단계로
+- 엔드포인트별 키잉 완료 hmac 객체 캐시 (요청마다 copy() → 재키잉 없음)
+- 시크릿 교체 중 2개 시크릿 동시 허용 (current / previous)
+- 해싱 전 빠른 거절 (본문 크기 초과, 서명 형식 오류, 미등록 키)
+- 서명 형식은 소문자 16진수 고정 길이만 허용 (공백/대문자/접두어 거절)
+- 큰 본문은 스레드 풀에서 검증 (이벤트 루프 비차단)
+"""
+
+import asyncio
+import hashlib
+import hmac
+import re
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from loguru import logger
+
+
+MAX_ACTIVE_SECRETS = 2  # current + previous (교체 유예 기간)
+
+
+class SignatureVerifier:
+    """
+    키별 HMAC 서명 검증기
+
+    hmac.new(secret) 는 매번 ipad/opad 블록을 해싱해 키잉 비용이 든다.
+    등록 시 키잉을 마친 hmac 객체를 보관하고 요청마다 copy() 로 상태만 복제
+    """
+
+    def __init__(
+        self,
+        max_body_bytes: int = 1024 * 1024,
+        offload_threshold_bytes: int = 64 * 1024,
+        digestmod: Callable[..., Any] = hashlib.sha256,
+        executor: Optional[Executor] = None
+    ):
+        """
+        검증기 초기화
+
+        Args:
+            max_body_bytes: 허용 최대 본문 크기 (초과 시 해싱 없이 거절)
+            offload_threshold_bytes: 이 크기 이상 본문은 스레드 풀에서 검증 (verify_async)
+            digestmod: 해시 함수 (기본 SHA-256)
+            executor: 오프로드용 실행기 (None = 루프 기본 스레드 풀)
+        """
+        self.max_body_bytes = max_body_bytes
+        self.offload_threshold_bytes = offload_threshold_bytes
+        self.digestmod = digestmod
+        self.digest_size = digestmod().digest_size
+        self.executor = executor
+
+        # 서명 형식: 소문자 16진수 digest_size * 2 자 (bytes.fromhex 는 공백/대문자도 받아줌)
+        self._well_formed = re.compile(f"[0-9a-f]{{{self.digest_size * 2}}}").fullmatch
+
+        # 키 ID → 키잉 완료 hmac 객체 (최신 순)
+        self._keyed: Dict[Hashable, List[Any]] = {}
+
+        # 통계
+        self.stats: Dict[str, int] = {
+            "verified": 0,
+            "verified_previous_secret": 0,
+            "rejected_unknown_key": 0,
+            "rejected_oversize": 0,
+            "rejected_malformed": 0,
+            "rejected_mismatch": 0,
+            "offloaded": 0,
+        }
+
+    def _key(self, secret: Union[str, bytes]) -> Any:
+        if isinstance(secret, str):
+            secret = secret.encode()
+        return hmac.new(secret, digestmod=self.digestmod)
+
+    def set_secret(self, key_id: Hashable, secret: Union[str, bytes]):
+        """
+        시크릿 등록 (기존 시크릿 전부 대체)
+
+        Args:
+            key_id: 키 ID (예: agent_id)
+            secret: HMAC 시크릿
+        """
+        self._keyed[key_id] = [self._key(secret)]
+
+    def rotate_secret(self, key_id: Hashable, secret: Union[str, bytes]):
+        """
+        시크릿 교체 (이전 시크릿은 retire_previous() 전까지 유효)
+
+        Args:
+            key_id: 키 ID
+            secret: 새 HMAC 시크릿
+        """
+        keyed = self._keyed.get(key_id, [])
+        self._keyed[key_id] = ([self._key(secret)] + keyed)[:MAX_ACTIVE_SECRETS]
+        logger.info(f"🔑 Signing secret rotated: {key_id}")
+
+    def retire_previous(self, key_id: Hashable):
+        """교체 유예 종료 - 최신 시크릿만 유지"""
+        if key_id in self._keyed:
+            del self._keyed[key_id][1:]
+
+    def remove(self, key_id: Hashable):
+        """키 삭제"""
+        self._keyed.pop(key_id, None)
+
+    def _reject(self, reason: str) -> bool:
+        self.stats[reason] += 1
+        return False
+
+    def verify(
+        self,
+        key_id: Hashable,
+        body: Union[str, bytes],
+        signature: Optional[str]
+    ) -> bool:
+        """
+        서명 검증
+
+        Args:
+            key_id: 키 ID
+            body: 요청 본문 (원문 바이트 권장)
+            signature: 소문자 16진수 HMAC 서명
+
+        Returns:
+            bool: 활성 시크릿 중 하나와 일치하면 True
+        """
+        keyed = self._keyed.get(key_id)
+        if not keyed:
+            return self._reject("rejected_unknown_key")
+
+        if isinstance(body, str):
+            body = body.encode()
+        if len(body) > self.max_body_bytes:
+            return self._reject("rejected_oversize")
+
+        if not isinstance(signature, str) or not self._well_formed(signature):
+            return self._reject("rejected_malformed")
+        expected = bytes.fromhex(signature)
+
+        for position, keyed_mac in enumerate(keyed):
+            mac = keyed_mac.copy()
+            mac.update(body)
+            if hmac.compare_digest(mac.digest(), expected):
+                self.stats["verified"] += 1
+                if position:
+                    self.stats["verified_previous_secret"] += 1
+                return True
+
+        return self._reject("rejected_mismatch")
+
+    async def verify_async(
+        self,
+        key_id: Hashable,
+        body: Union[str, bytes],
+        signature: Optional[str]
+    ) -> bool:
+        """
+        서명 검증 (큰 본문은 스레드 풀에서)
+
+        hashlib 은 큰 버퍼 해싱 중 GIL 을 해제하므로 오프로드 시 루프가 막히지 않음
+
+        Args:
+            key_id: 키 ID
+            body: 요청 본문
+            signature: 16진수 HMAC 서명
+
+        Returns:
+            bool: 검증 성공 여부
+        """
+        if len(body) < self.offload_threshold_bytes or len(body) > self.max_body_bytes:
+            return self.verify(key_id, body, signature)
+
+        self.stats["offloaded"] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.verify, key_id, body, signature)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """검증 통계"""
+        return {
+            **self.stats,
+            "keys": len(self._keyed),
+            "rotating_keys": sum(1 for keyed in self._keyed.values() if len(keyed) > 1),
+        }
@@ -0,0 +1,300 @@
+"""
+Mulberry Phase 4-B - Hot-Path Telemetry
+이벤트 버스 / 웹훅 엔진 공용 계측 모듈
+
+Mission: 고정 상수 대신 실측 p50/p99로 용량 계획
+- 고정 메모리 지연 히스토그램 (로그 버킷, 정밀도 ~5%)
+- 처리량 카운터
+- 프로세스 CPU 시간 (time.process_time / resource)
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+try:
+    import resource  # Unix 전용
+except ImportError:  # pragma: no cover - Windows 단말
+    resource = None
+
+
+# ============================================
+# Latency Histogram
+# ============================================
+
+class LatencyHistogram:
+    """
+    고정 메모리 지연 히스토그램 (HDR 방식 로그 버킷)
+
+    값 개수와 무관하게 버킷 수가 고정 → 기록 O(1), 백분위 O(버킷 수)
+    """
+
+    def __init__(
+        self,
+        min_ms: float = 0.001,
+        max_ms: float = 100_000.0,
+        precision: float = 0.05
+    ):
+        """
+        히스토그램 초기화
+
+        Args:
+            min_ms: 구분 가능한 최소값 (ms)
+            max_ms: 구분 가능한 최대값 (ms, 초과 값은 마지막 버킷)
+            precision: 버킷 상대 폭 (0.05 = 5%)
+        """
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self._log_base = math.log1p(precision)
+        self._growth = 1.0 + precision
+        self._bucket_count = int(math.log(max_ms / min_ms) / self._log_base) + 2
+        self.counts: List[int] = [0] * self._bucket_count
+        self.reset()
+
+    def reset(self):
+        """모든 기록 초기화"""
+        for i in range(self._bucket_count):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        index = int(math.log(value_ms / self.min_ms) / self._log_base) + 1
+        return min(index, self._bucket_count - 1)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_ms * self._growth ** index
+
+    def record(self, value_ms: float):
+        """값 기록 (ms)"""
+        self.counts[self._index(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram"):
+        """같은 설정의 다른 히스토그램 합산"""
+        if other._bucket_count != self._bucket_count:
+            raise ValueError("Histogram layouts differ")
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, q: float) -> float:
+        """
+        백분위 값 (ms)
+
+        Args:
+            q: 0~100
+
+        Returns:
+            float: 해당 버킷 상한 (실제 max로 클램프)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self._upper_bound(i), self.max)
+        return self.max
+
+    def fraction_below(self, threshold_ms: float) -> float:
+        """threshold_ms 미만 비율 (0~1, 버킷 단위 근사)"""
+        if self.count == 0:
+            return 0.0
+        limit = self._index(threshold_ms)
+        return sum(self.counts[:limit]) / self.count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """요약 통계"""
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min or 0.0,
+            "max_ms": self.max or 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+class RollingHistogram:
+    """
+    롤링 윈도우 히스토그램
+
+    window_seconds 를 slots 개 구간으로 나눈 LatencyHistogram 링.
+    오래된 구간은 재사용 시 초기화 → 이벤트 수와 무관하게 메모리 고정
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        slots: int = 10,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            window_seconds: 통계 윈도우 길이 (초)
+            slots: 윈도우 분할 수 (클수록 윈도우 경계가 매끄러움)
+            clock: 시계 함수 (테스트용 주입)
+        """
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / slots
+        self.slots = [LatencyHistogram() for _ in range(slots)]
+        self._epochs = [-1] * slots
+        self._clock = clock
+        self.total_count = 0  # 윈도우와 무관한 누적 기록 수
+
+    def _epoch(self) -> int:
+        return int(self._clock() / self.slot_seconds)
+
+    def record(self, value_ms: float):
+        """값 기록 (ms)"""
+        epoch = self._epoch()
+        position = epoch % len(self.slots)
+        if self._epochs[position] != epoch:
+            self.slots[position].reset()
+            self._epochs[position] = epoch
+        self.slots[position].record(value_ms)
+        self.total_count += 1
+
+    def merged(self) -> LatencyHistogram:
+        """윈도우 내 구간 합산 히스토그램"""
+        oldest = self._epoch() - len(self.slots) + 1
+        result = LatencyHistogram()
+        for histogram, epoch in zip(self.slots, self._epochs):
+            if epoch >= oldest and histogram.count:
+                result.merge(histogram)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """윈도우 요약 통계"""
+        stats = self.merged().snapshot()
+        stats["window_seconds"] = self.window_seconds
+        stats["total_count"] = self.total_count
+        return stats
+
+
+# ============================================
+# Process CPU
+# ============================================
+
+class CpuSampler:
+    """
+    프로세스 CPU 사용률 측정
+
+    pull 시점마다 직전 pull 이후 (CPU 시간 / 경과 시간) 계산
+    """
+
+    def __init__(self):
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self._last_wall = self.started_wall
+        self._last_cpu = self.started_cpu
+
+    def sample(self) -> Dict[str, Any]:
+        """CPU 통계 (누적 + 직전 구간)"""
+        now_wall = time.perf_counter()
+        now_cpu = time.process_time()
+
+        interval_wall = now_wall - self._last_wall
+        interval_cpu = now_cpu - self._last_cpu
+        total_wall = now_wall - self.started_wall
+        total_cpu = now_cpu - self.started_cpu
+
+        self._last_wall = now_wall
+        self._last_cpu = now_cpu
+
+        stats = {
+            "cpu_seconds": total_cpu,
+            "wall_seconds": total_wall,
+            "cpu_percent": (total_cpu / total_wall) * 100 if total_wall > 0 else 0.0,
+            "cpu_percent_interval": (interval_cpu / interval_wall) * 100 if interval_wall > 0 else 0.0,
+        }
+
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            stats["user_cpu_seconds"] = usage.ru_utime
+            stats["system_cpu_seconds"] = usage.ru_stime
+            stats["max_rss_kb"] = usage.ru_maxrss
+
+        return stats
+
+
+# ============================================
+# Labeled Metrics
+# ============================================
+
+class HistogramSet:
+    """라벨별 히스토그램 묶음 (예: (event_type, priority) → 히스토그램)"""
+
+    def __init__(self, factory: Callable[[], Any] = LatencyHistogram):
+        """
+        Args:
+            factory: 라벨별 히스토그램 생성 함수 (LatencyHistogram / RollingHistogram)
+        """
+        self.factory = factory
+        self.histograms: Dict[Hashable, Any] = {}
+
+    def record(self, label: Hashable, value_ms: float):
+        histogram = self.histograms.get(label)
+        if histogram is None:
+            histogram = self.histograms[label] = self.factory()
+        histogram.record(value_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            _label_key(label): histogram.snapshot()
+            for label, histogram in self.histograms.items()
+        }
+
+
+class CounterSet:
+    """라벨별 카운터 + 직전 pull 이후 처리량"""
+
+    def __init__(self):
+        self.counts: Dict[Hashable, int] = {}
+        self._last_counts: Dict[Hashable, int] = {}
+        self._last_pull = time.perf_counter()
+
+    def incr(self, label: Hashable, n: int = 1):
+        self.counts[label] = self.counts.get(label, 0) + n
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = time.perf_counter()
+        elapsed = now - self._last_pull
+        result = {}
+        for label, count in self.counts.items():
+            delta = count - self._last_counts.get(label, 0)
+            result[_label_key(label)] = {
+                "total": count,
+                "per_second": delta / elapsed if elapsed > 0 else 0.0,
+            }
+        self._last_counts = dict(self.counts)
+        self._last_pull = now
+        return result
+
+
+def _label_key(label: Hashable) -> str:
+    """JSON 직렬화 가능한 라벨 문자열"""
+    if isinstance(label, tuple):
+        return ":".join(str(part) for part in label)
+    return str(label)
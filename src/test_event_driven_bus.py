@@ -0,0 +1,522 @@
+"""
+Mulberry Phase 4-B - Event-Driven Bus Tests
+이벤트 버스 스케줄링/디스패치 검증
+
+Tests:
+1. Priority Scheduler (우선순위 스케줄러)
+2. Backpressure & Dead Letters (백프레셔 / 데드레터)
+3. Telemetry (핫패스 계측)
+4. Batch Publish / Subscribe (배치 발행 / 구독)
+5. Transports (멀티 프로세스 / Redis Streams 백엔드)
+"""
+
+import asyncio
+import multiprocessing
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from event_driven_bus import Event, EventDrivenBus, EventScheduler, EventType
+from event_transport import LocalStreamBroker, MultiprocessTransport, RedisStreamTransport, partition_for
+from telemetry import LatencyHistogram
+
+
+def run(coro):
+    """코루틴 실행 헬퍼"""
+    return asyncio.run(coro)
+
+
+# ============================================
+# Test: Priority Scheduler
+# ============================================
+
+class TestPriorityScheduler:
+    """우선순위 스케줄러 테스트"""
+
+    def test_higher_priority_first(self):
+        """우선순위 높은 이벤트 먼저 처리"""
+        async def scenario():
+            scheduler = EventScheduler(aging_interval=60.0)
+            await scheduler.put(Event(EventType.SCHEDULE_DAILY, {"n": 1}, priority=9))
+            await scheduler.put(Event(EventType.WEBHOOK_PAYMENT, {"n": 2}, priority=1))
+            await scheduler.put(Event(EventType.WEBHOOK_ORDER, {"n": 3}, priority=5))
+            return [(await scheduler.get()).payload["n"] for _ in range(3)]
+
+        assert run(scenario()) == [2, 3, 1]
+
+    def test_aging_prevents_starvation(self):
+        """오래 대기한 priority 10 이벤트가 새 priority 1 이벤트보다 먼저 처리"""
+        async def scenario():
+            scheduler = EventScheduler(aging_interval=0.001)
+            await scheduler.put(Event(EventType.SCHEDULE_DAILY, {"n": "old"}, priority=10))
+            await asyncio.sleep(0.05)
+            await scheduler.put(Event(EventType.WEBHOOK_PAYMENT, {"n": "new"}, priority=1))
+            return (await scheduler.get()).payload["n"]
+
+        assert run(scenario()) == "old"
+
+    def test_depth_per_priority(self):
+        """우선순위별 대기 수 집계"""
+        async def scenario():
+            scheduler = EventScheduler()
+            for priority in (1, 1, 7):
+                await scheduler.put(Event(EventType.WEBHOOK_ORDER, {}, priority=priority))
+            before = scheduler.get_depth_stats()
+            await scheduler.get()
+            return before, scheduler.get_depth_stats()
+
+        before, after = run(scenario())
+        assert before[1] == 2 and before[7] == 1
+        assert after[1] == 1 and after[7] == 1
+
+    def test_idle_worker_wakes_on_publish(self):
+        """유휴 워커가 폴링 없이 발행 즉시 처리"""
+        async def scenario():
+            bus = EventDrivenBus(workers=2)
+            received = asyncio.Event()
+
+            async def listener(event):
+                received.set()
+
+            bus.subscribe(EventType.WEBHOOK_PAYMENT, listener)
+            runner = asyncio.create_task(bus.process_events())
+            await asyncio.sleep(0.01)
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await bus.publish(Event(EventType.WEBHOOK_PAYMENT, {"amount": 1000}, priority=3))
+            await asyncio.wait_for(received.wait(), timeout=1.0)
+            elapsed = loop.time() - start
+
+            runner.cancel()
+            return elapsed
+
+        assert run(scenario()) < 0.05
+
+    def test_invalid_worker_count(self):
+        """워커 수 검증"""
+        with pytest.raises(ValueError):
+            EventDrivenBus(workers=0)
+
+
+# ============================================
+# Test: Backpressure & Dead Letters
+# ============================================
+
+class TestBackpressure:
+    """백프레셔 / 리스너 격리 테스트"""
+
+    def test_publish_rejects_when_queue_full(self):
+        """큐 포화 시 논블로킹 publish는 거절"""
+        async def scenario():
+            bus = EventDrivenBus(max_queue_size=2, block_on_full=False)
+            results = [
+                await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": i}))
+                for i in range(3)
+            ]
+            return results, bus.rejected_count
+
+        results, rejected = run(scenario())
+        assert results == [True, True, False]
+        assert rejected == 1
+
+    def test_blocking_publish_waits_for_space(self):
+        """블로킹 publish는 워커가 소비할 때까지 대기"""
+        async def scenario():
+            bus = EventDrivenBus(max_queue_size=1)
+            await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": 1}))
+            pending = asyncio.create_task(bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": 2})))
+            await asyncio.sleep(0.01)
+            blocked = not pending.done()
+            await bus.scheduler.get()
+            return blocked, await pending
+
+        blocked, accepted = run(scenario())
+        assert blocked and accepted
+
+    def test_slow_listener_times_out_to_dead_letter(self):
+        """타임아웃/예외 리스너는 데드레터로, 정상 리스너는 그대로 실행"""
+        async def scenario():
+            bus = EventDrivenBus(listener_timeout=0.02)
+            delivered = []
+
+            async def slow(event):
+                await asyncio.sleep(1)
+
+            async def broken(event):
+                raise RuntimeError("boom")
+
+            async def ok(event):
+                delivered.append(event.payload["n"])
+
+            for listener in (slow, broken, ok):
+                bus.subscribe(EventType.WEBHOOK_PAYMENT, listener)
+
+            await bus._dispatch_event(Event(EventType.WEBHOOK_PAYMENT, {"n": 7}))
+            return bus, delivered
+
+        bus, delivered = run(scenario())
+        assert delivered == [7]
+        assert bus.failed_listener_count == 2
+        errors = sorted(letter.error for letter in bus.drain_dead_letters())
+        assert errors[0].startswith("RuntimeError") and errors[1].startswith("timeout")
+        assert not bus.dead_letters
+
+    def test_in_flight_cap(self):
+        """동시 디스패치 수가 max_in_flight를 넘지 않음"""
+        async def scenario():
+            bus = EventDrivenBus(workers=4, max_in_flight=2)
+            active = 0
+            peak = 0
+
+            async def listener(event):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+            bus.subscribe(EventType.WEBHOOK_ORDER, listener)
+            runner = asyncio.create_task(bus.process_events())
+            for i in range(10):
+                await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": i}))
+            await asyncio.sleep(0.1)
+            runner.cancel()
+            return peak
+
+        assert run(scenario()) == 2
+
+    def test_saturated_bus_leaves_events_queued(self):
+        """슬롯이 없으면 워커가 이벤트를 미리 꺼내지 않음 → 나중에 온 높은 우선순위가 먼저"""
+        async def scenario():
+            bus = EventDrivenBus(workers=4, max_in_flight=1)
+            gate = asyncio.Event()
+            order = []
+
+            async def listener(event):
+                order.append(event.payload["n"])
+                await gate.wait()
+
+            bus.subscribe(EventType.WEBHOOK_ORDER, listener)
+            runner = asyncio.create_task(bus.process_events())
+            await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": "blocker"}, priority=5))
+            await asyncio.sleep(0.01)
+            for i in range(3):
+                await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": f"low-{i}"}, priority=9))
+            await asyncio.sleep(0.01)
+            depth = bus.scheduler.qsize()
+            await bus.publish(Event(EventType.WEBHOOK_ORDER, {"n": "urgent"}, priority=1))
+            gate.set()
+            await asyncio.sleep(0.05)
+            runner.cancel()
+            return depth, order
+
+        depth, order = run(scenario())
+        assert depth == 3
+        assert order[:2] == ["blocker", "urgent"]
+
+
+# ============================================
+# Test: Telemetry
+# ============================================
+
+class TestTelemetry:
+    """핫패스 계측 테스트"""
+
+    def test_histogram_percentiles_within_precision(self):
+        """히스토그램 백분위 오차 5% 이내"""
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        assert histogram.count == 1000
+        assert abs(histogram.percentile(50) - 500) / 500 < 0.05
+        assert abs(histogram.percentile(99) - 990) / 990 < 0.05
+        assert histogram.percentile(100) == 1000
+
+    def test_histogram_memory_is_fixed(self):
+        """기록 수와 무관하게 버킷 수 고정"""
+        histogram = LatencyHistogram()
+        buckets = len(histogram.counts)
+        for i in range(10000):
+            histogram.record(i * 0.37)
+        assert len(histogram.counts) == buckets
+
+    def test_bus_telemetry_snapshot(self):
+        """버스 계측: 이벤트 타입/우선순위별 지연 및 처리량"""
+        async def scenario():
+            bus = EventDrivenBus()
+
+            async def listener(event):
+                await asyncio.sleep(0.005)
+
+            bus.subscribe(EventType.WEBHOOK_PAYMENT, listener)
+            runner = asyncio.create_task(bus.process_events())
+            for _ in range(5):
+                await bus.publish(Event(EventType.WEBHOOK_PAYMENT, {}, priority=2))
+            await asyncio.sleep(0.1)
+            runner.cancel()
+            return bus.get_telemetry(), bus.get_server_load_stats()
+
+        telemetry, load = run(scenario())
+        assert telemetry["published"]["webhook.payment"]["total"] == 5
+        assert telemetry["dispatched"]["webhook.payment"]["total"] == 5
+        assert telemetry["queue_latency_ms"]["webhook.payment:2"]["count"] == 5
+        listener_stats = telemetry["listener_latency_ms"]
+        assert any(stats["p50_ms"] >= 4 for stats in listener_stats.values())
+        assert telemetry["queue"]["depth"] == 0
+        assert "cpu_seconds" in telemetry["cpu"]
+        assert load["total_events_dispatched"] == 5
+        assert load["dispatch_p99_ms"] >= load["dispatch_p50_ms"] > 0
+
+
+# ============================================
+# Test: Batch Publish / Subscribe
+# ============================================
+
+class TestBatching:
+    """배치 발행 / 배치 구독 테스트"""
+
+    def test_publish_many_respects_capacity(self):
+        """일괄 발행: 큐 용량만큼만 등록, 나머지는 거절 집계"""
+        async def scenario():
+            bus = EventDrivenBus(max_queue_size=3, block_on_full=False)
+            events = [Event(EventType.WEBHOOK_PAYMENT, {"n": i}, priority=2) for i in range(5)]
+            accepted = await bus.publish_many(events)
+            return accepted, bus
+
+        accepted, bus = run(scenario())
+        assert accepted == 3
+        assert bus.rejected_count == 2
+        assert bus.get_queue_depths()[2] == 3
+
+    def test_batch_listener_flushes_on_size_and_timer(self):
+        """배치 리스너: max_batch 도달 시 즉시, 나머지는 max_wait 후 전달"""
+        async def scenario():
+            bus = EventDrivenBus()
+            batches = []
+
+            async def settle(events):
+                batches.append([e.payload["n"] for e in events])
+
+            bus.subscribe_batch(EventType.WEBHOOK_ORDER, settle, max_batch=4, max_wait_ms=20)
+            runner = asyncio.create_task(bus.process_events())
+            await bus.publish_many(Event(EventType.WEBHOOK_ORDER, {"n": i}) for i in range(6))
+            await asyncio.sleep(0.01)
+            first = list(batches)
+            await asyncio.sleep(0.05)
+            runner.cancel()
+            return first, batches
+
+        first, batches = run(scenario())
+        assert first == [[0, 1, 2, 3]]
+        assert batches == [[0, 1, 2, 3], [4, 5]]
+
+    def test_flush_batches_on_shutdown(self):
+        """종료 시 남은 배치 강제 전달"""
+        async def scenario():
+            bus = EventDrivenBus()
+            batches = []
+
+            async def writer(events):
+                batches.append(len(events))
+
+            bus.subscribe_batch(EventType.WEBHOOK_ORDER, writer, max_batch=100, max_wait_ms=10_000)
+            for i in range(3):
+                await bus._dispatch_event(Event(EventType.WEBHOOK_ORDER, {"n": i}))
+            await bus.flush_batches()
+            return batches
+
+        assert run(scenario()) == [3]
+
+    def test_event_timestamp_is_monotonic_ns(self):
+        """이벤트 시각은 monotonic ns 정수, 필요 시 ISO 변환"""
+        event = Event(EventType.WEBHOOK_PAYMENT, {})
+        assert isinstance(event.timestamp, int)
+        assert abs(datetime.fromisoformat(event.isoformat()) - datetime.now()).total_seconds() < 5
+
+
+# ============================================
+# Test: Transports
+# ============================================
+
+# fork 된 파티션 워커가 상속하는 결과 큐
+_RESULTS = None
+
+
+def _recording_bus():
+    """파티션 워커용 버스 팩토리 (모듈 최상위 함수)"""
+    bus = EventDrivenBus()
+
+    async def record(event):
+        _RESULTS.put((event.payload["agent_id"], event.payload["seq"]))
+
+    bus.subscribe(EventType.WEBHOOK_ORDER, record)
+    return bus
+
+
+def _batching_bus():
+    """파티션 워커용 버스 팩토리 - 배치 리스너 (max_wait 타이머로만 전달)"""
+    bus = EventDrivenBus()
+
+    async def record(events):
+        _RESULTS.put([(event.payload["agent_id"], event.payload["seq"]) for event in events])
+
+    bus.subscribe_batch(EventType.WEBHOOK_ORDER, record, max_batch=1000, max_wait_ms=20)
+    return bus
+
+
+def order_events(agents, per_agent):
+    return [
+        Event(EventType.WEBHOOK_ORDER, {"agent_id": agent, "seq": seq})
+        for seq in range(per_agent)
+        for agent in agents
+    ]
+
+
+class TestTransports:
+    """전송 백엔드 테스트"""
+
+    def test_partition_is_stable_per_key(self):
+        """같은 agent_id는 항상 같은 파티션"""
+        a = Event(EventType.WEBHOOK_ORDER, {"agent_id": "AGENT_001", "n": 1})
+        b = Event(EventType.WEBHOOK_PAYMENT, {"agent_id": "AGENT_001", "n": 2})
+        assert partition_for(a, 8) == partition_for(b, 8)
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="fork start method required"
+    )
+    def test_multiprocess_transport_orders_per_agent(self):
+        """멀티 프로세스: 전 이벤트 ack + agent_id별 순서 유지"""
+        global _RESULTS
+        ctx = multiprocessing.get_context("fork")
+        _RESULTS = ctx.Queue()
+
+        async def scenario():
+            transport = MultiprocessTransport(_recording_bus, partitions=3, start_method="fork")
+            bus = EventDrivenBus(transport=transport)
+            accepted = await bus.publish_many(order_events(["A", "B", "C", "D"], 25))
+            drained = await transport.drain(timeout=10)
+            stats = transport.get_stats()
+            await transport.close()
+            return accepted, drained, stats
+
+        accepted, drained, stats = run(scenario())
+        assert accepted == 100 and drained
+        assert stats["acked"] == 100
+
+        received = [_RESULTS.get(timeout=5) for _ in range(100)]
+        for agent in "ABCD":
+            assert [seq for a, seq in received if a == agent] == list(range(25))
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="fork start method required"
+    )
+    def test_multiprocess_batches_flush_on_timer_before_ack(self):
+        """멀티 프로세스 + 배치 리스너: 수신 대기 중에도 타이머로 전달, 전달 후에만 ack"""
+        global _RESULTS
+        ctx = multiprocessing.get_context("fork")
+        _RESULTS = ctx.Queue()
+
+        async def scenario():
+            transport = MultiprocessTransport(_batching_bus, partitions=2, start_method="fork")
+            bus = EventDrivenBus(transport=transport)
+            await bus.publish_many(order_events(["A", "B", "C"], 10))
+            drained = await transport.drain(timeout=10)
+            # 종료(flush_batches) 전에 이미 전달되어 있어야 함
+            delivered = []
+            while len(delivered) < 30:
+                delivered += _RESULTS.get(timeout=5)
+            stats = transport.get_stats()
+            await transport.close()
+            return drained, delivered, stats
+
+        drained, delivered, stats = run(scenario())
+        assert drained and stats["acked"] == 30
+        for agent in "ABC":
+            assert [seq for a, seq in delivered if a == agent] == list(range(10))
+
+    def test_redis_stream_transport_consumer_group(self):
+        """Redis Streams: 그룹 내 두 레플리카가 파티션을 나눠 순서대로 소비"""
+        async def scenario():
+            broker = LocalStreamBroker()
+            port = await broker.start()
+
+            received = []
+            done = asyncio.Event()
+
+            async def deliver(event):
+                received.append((event.payload["agent_id"], event.payload["seq"]))
+                if len(received) == 40:
+                    done.set()
+
+            consumers = [
+                RedisStreamTransport(port=port, consumer=f"c{i}", partitions=4,
+                                     owned_partitions=[i, i + 2], block_ms=50)
+                for i in range(2)
+            ]
+            tasks = [asyncio.create_task(c.consume(deliver)) for c in consumers]
+            await asyncio.sleep(0.05)
+
+            producer = RedisStreamTransport(port=port, partitions=4)
+            bus = EventDrivenBus(transport=producer)
+            await bus.publish_many(order_events(["A", "B", "C", "D"], 5))
+            for event in order_events(["E", "F", "G", "H"], 5):
+                await bus.publish(event)
+
+            await asyncio.wait_for(done.wait(), timeout=5)
+            for task in tasks:
+                task.cancel()
+            for transport in consumers + [producer]:
+                await transport.close()
+            await broker.stop()
+            return received
+
+        received = run(scenario())
+        assert len(received) == 40
+        for agent in "ABCDEFGH":
+            assert [seq for a, seq in received if a == agent] == list(range(5))
+
+    def test_redis_stream_redelivers_unacked(self):
+        """Redis Streams: ack 전에 죽은 컨슈머의 이벤트는 재시작 시 재전달"""
+        async def scenario():
+            broker = LocalStreamBroker()
+            port = await broker.start()
+            producer = RedisStreamTransport(port=port, partitions=1)
+
+            started = asyncio.Event()
+
+            async def crash(event):
+                started.set()
+                await asyncio.sleep(3600)
+
+            first = RedisStreamTransport(port=port, consumer="c1", partitions=1, block_ms=50)
+            task = asyncio.create_task(first.consume(crash))
+            await asyncio.sleep(0.05)
+            await producer.send(Event(EventType.WEBHOOK_PAYMENT, {"agent_id": "A", "seq": 0}))
+            await asyncio.wait_for(started.wait(), timeout=5)
+            task.cancel()
+            await first.close()
+
+            redelivered = []
+            got = asyncio.Event()
+
+            async def record(event):
+                redelivered.append(event.payload["seq"])
+                got.set()
+
+            second = RedisStreamTransport(port=port, consumer="c1", partitions=1, block_ms=50)
+            task = asyncio.create_task(second.consume(record))
+            await asyncio.wait_for(got.wait(), timeout=5)
+            task.cancel()
+            await second.close()
+            await producer.close()
+            await broker.stop()
+            return redelivered
+
+        assert run(scenario()) == [0]
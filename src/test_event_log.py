@@ -0,0 +1,197 @@
+"""
+Mulberry Phase 4-B - Durable Event Log Tests
+내구 로그 기록/재생/압축 및 재시작 복구 검증
+
+Tests:
+1. Event Log (세그먼트 로그)
+2. Recovery (이벤트 버스 / 웹훅 엔진 재시작 복구)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from event_driven_bus import Event, EventDrivenBus, EventType
+from event_log import FSYNC_INTERVAL, EventLog
+from webhook_engine import WebhookEngine, WebhookEventType
+
+
+def run(coro):
+    """코루틴 실행 헬퍼"""
+    return asyncio.run(coro)
+
+
+# ============================================
+# Test: Event Log
+# ============================================
+
+class TestEventLog:
+    """세그먼트 로그 테스트"""
+
+    def test_append_read_across_segments(self, tmp_path):
+        """세그먼트 롤오버 후에도 오프셋 순서대로 읽기"""
+        async def scenario():
+            log = EventLog(tmp_path, segment_max_bytes=256)
+            offsets = [await log.append(f"record-{i}".encode() * 4) for i in range(20)]
+            offsets += await log.append_many([b"tail-1", b"tail-2"])
+            await log.close()
+            return log, offsets
+
+        log, offsets = run(scenario())
+        assert offsets == list(range(22))
+        assert len(log.segments) > 1
+
+        reopened = EventLog(tmp_path, segment_max_bytes=256)
+        assert reopened.next_offset == 22
+        records = list(reopened.read(18))
+        assert [r.offset for r in records] == [18, 19, 20, 21]
+        assert records[-1].data == b"tail-2"
+
+    def test_concurrent_appends_share_fsync(self, tmp_path):
+        """동시 append 는 한 번의 fsync 로 그룹 커밋"""
+        async def scenario():
+            log = EventLog(tmp_path, fsync_mode=FSYNC_INTERVAL, fsync_interval_ms=5)
+            offsets = await asyncio.gather(*(log.append(b"x%d" % i) for i in range(50)))
+            await log.close()
+            return sorted(offsets), log.fsync_count
+
+        offsets, fsyncs = run(scenario())
+        assert offsets == list(range(50))
+        assert fsyncs == 1
+
+    def test_torn_tail_is_truncated(self, tmp_path):
+        """기록 중 끊긴 꼬리 레코드는 다음 오픈 시 잘라냄"""
+        async def scenario():
+            log = EventLog(tmp_path)
+            await log.append_many([b"a", b"b", b"c"])
+            await log.close()
+
+        run(scenario())
+        segment = next(tmp_path.glob("*.log"))
+        with open(segment, "ab") as fh:
+            fh.write(b"\x10\x00\x00\x00garbage")
+
+        log = EventLog(tmp_path)
+        assert log.next_offset == 3
+        assert [r.data for r in log.read()] == [b"a", b"b", b"c"]
+
+    def test_replay_from_timestamp(self, tmp_path):
+        """기록 시각 기준 재생"""
+        async def scenario():
+            log = EventLog(tmp_path, segment_max_bytes=64)
+            await log.append_many([b"old-1", b"old-2"])
+            await asyncio.sleep(0.01)
+            cutoff = time.time_ns()
+            await log.append_many([b"new-1", b"new-2"])
+            await log.close()
+            return log, cutoff
+
+        log, cutoff = run(scenario())
+        assert [r.data for r in log.replay(from_timestamp_ns=cutoff)] == [b"new-1", b"new-2"]
+
+    def test_compaction_removes_acknowledged_segments(self, tmp_path):
+        """모든 컨슈머가 처리한 세그먼트만 삭제"""
+        async def scenario():
+            log = EventLog(tmp_path, segment_max_bytes=32)
+            for i in range(10):
+                await log.append(b"payload-%02d" % i)
+            return log
+
+        log = run(scenario())
+        segments_before = len(log.segments)
+        log.commit("bus", 9)
+        log.commit("audit", 4)
+        removed = log.compact()
+
+        assert 0 < removed < segments_before
+        assert [r.offset for r in log.read(5)] == [5, 6, 7, 8, 9]
+
+    def test_invalid_fsync_mode(self, tmp_path):
+        """fsync 모드 검증"""
+        with pytest.raises(ValueError):
+            EventLog(tmp_path, fsync_mode="never")
+
+
+# ============================================
+# Test: Recovery
+# ============================================
+
+class TestRecovery:
+    """재시작 복구 테스트"""
+
+    def test_bus_redelivers_unprocessed_events(self, tmp_path):
+        """디스패치 전에 종료된 이벤트는 재시작 후 다시 처리"""
+        async def crashed_process():
+            log = EventLog(tmp_path)
+            bus = EventDrivenBus(event_log=log)
+            for amount in (1000, 2000, 3000):
+                await bus.publish(Event(EventType.WEBHOOK_PAYMENT, {"amount": amount}))
+            await log.close()  # 워커 실행 전 종료
+
+        async def restarted_process():
+            log = EventLog(tmp_path)
+            bus = EventDrivenBus(event_log=log)
+            received = []
+
+            async def settle(event):
+                received.append(event.payload["amount"])
+
+            bus.subscribe(EventType.WEBHOOK_PAYMENT, settle)
+            runner = asyncio.create_task(bus.process_events())
+            recovered = await bus.recover()
+            await asyncio.sleep(0.05)
+            runner.cancel()
+            committed = log.committed("event-bus")
+            await log.close()
+            return recovered, received, committed
+
+        run(crashed_process())
+        recovered, received, committed = run(restarted_process())
+        assert recovered == 3
+        assert received == [1000, 2000, 3000]
+        assert committed == 2
+
+        # 커밋 이후에는 재전달 없음
+        assert EventLog(tmp_path).committed("event-bus") == 2
+
+    def test_webhook_engine_recovers_queued_webhooks(self, tmp_path):
+        """웹훅 엔진: 응답 후 처리 전 종료된 결제 웹훅 재처리"""
+        async def crashed_process():
+            log = EventLog(tmp_path)
+            engine = WebhookEngine(event_log=log)
+            engine.create_endpoint("AGENT_001", "Payment Agent")
+
+            async def stuck(event):
+                await asyncio.sleep(3600)  # 처리 도중 프로세스 종료
+
+            engine.register_handler(WebhookEventType.PAYMENT_SUCCESS, stuck)
+            result = await engine.process_webhook(
+                "AGENT_001", WebhookEventType.PAYMENT_SUCCESS, {"transaction_id": "TX-1", "amount": 5000}
+            )
+            await log.close()
+            return result
+
+        async def restarted_process():
+            log = EventLog(tmp_path)
+            engine = WebhookEngine(event_log=log)
+            handled = []
+
+            async def settle(event):
+                handled.append(event["payload"]["transaction_id"])
+
+            engine.register_handler(WebhookEventType.PAYMENT_SUCCESS, settle)
+            recovered = await engine.recover()
+            await asyncio.sleep(0.01)
+            await log.close()
+            return recovered, handled, log.committed("webhook-engine")
+
+        assert run(crashed_process())["success"]
+        recovered, handled, committed = run(restarted_process())
+        assert recovered == 1 and handled == ["TX-1"]
+        assert committed == 0
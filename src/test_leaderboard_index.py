@@ -0,0 +1,205 @@
+"""
+Mulberry - Leaderboard Index Tests
+메모리 리더보드 인덱스 검증
+
+Tests:
+1. Ordering (정렬 기준 / 순번 / 동점 공동 순위)
+2. Windows (상위 k명, 페이지, 내 주변)
+3. Updates (갱신/삭제, 늦게 도착한 갱신 무시, 무작위 대조)
+4. Snapshot (저장/복원, 변경 없으면 저장 생략)
+5. Vendored Copy (v1 컨테이너용 사본이 원본과 같은지)
+"""
+
+import random
+import re
+import sys
+import threading
+from pathlib import Path
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+V1_COPY = Path(__file__).parent.parent / "Initial commit - Spirit Score v1.0.0" / "src" / "leaderboard_index.py"
+
+from leaderboard_index import LeaderboardIndex
+
+
+def reference(scores):
+    """정답: 점수 내림차순, 동점은 ID 오름차순"""
+    return [member_id for _, member_id in sorted((-score, member_id) for member_id, score in scores.items())]
+
+
+# ============================================
+# Test: Ordering
+# ============================================
+
+class TestOrdering:
+    """정렬 / 순위 테스트"""
+
+    def test_positions_match_sort(self):
+        """순번은 (점수 ↓, ID ↑) 정렬 위치와 같음"""
+        rng = random.Random(3)
+        scores = {f"AGENT-{i:04d}": round(rng.uniform(0, 100), 2) for i in range(1000)}
+        index = LeaderboardIndex(seed=1)
+        index.load(scores.items())
+
+        for position, member_id in enumerate(reference(scores), start=1):
+            assert index.position(member_id) == position
+        assert len(index) == 1000
+        assert index.position("nobody") is None
+        assert index.rank("nobody") is None
+
+    def test_ties_share_rank(self):
+        """동점은 같은 순위, 다음 순위는 건너뜀 (SQL RANK())"""
+        index = LeaderboardIndex(seed=1)
+        index.load([("a", 5.0), ("b", 3.0), ("c", 5.0), ("d", 1.0), ("e", 3.0)])
+
+        assert [index.rank(m) for m in "abcde"] == [1, 3, 1, 5, 3]
+        assert [index.position(m) for m in "acbed"] == [1, 2, 3, 4, 5]
+        assert [(e.position, e.rank, e.member_id) for e in index.top(5)] == [
+            (1, 1, "a"), (2, 1, "c"), (3, 3, "b"), (4, 3, "e"), (5, 5, "d")
+        ]
+
+
+# ============================================
+# Test: Windows
+# ============================================
+
+class TestWindows:
+    """상위 k명 / 내 주변 테스트"""
+
+    def setup_method(self):
+        self.scores = {f"U{i:03d}": float(i % 37) for i in range(200)}
+        self.index = LeaderboardIndex(seed=2)
+        self.index.load(self.scores.items())
+        self.order = reference(self.scores)
+
+    def test_top_and_offset(self):
+        assert [e.member_id for e in self.index.top(10)] == self.order[:10]
+        page = self.index.top(10, offset=95)
+        assert [e.member_id for e in page] == self.order[95:105]
+        assert page[0].position == 96
+        # 페이지 중간에서 시작해도 동점 공동 순위는 정확
+        assert all(e.rank == self.index.rank(e.member_id) for e in page)
+        assert self.index.top(10, offset=500) == []
+
+    def test_around_me(self):
+        member_id = self.order[50]
+        window = self.index.around(member_id, radius=3)
+        assert [e.member_id for e in window] == self.order[47:54]
+        assert window[3].member_id == member_id
+
+    def test_around_clipped_at_edges(self):
+        assert [e.member_id for e in self.index.around(self.order[1], radius=5)] == self.order[:7]
+        assert [e.member_id for e in self.index.around(self.order[-1], radius=2)] == self.order[-3:]
+        assert self.index.around("nobody") == []
+
+
+# ============================================
+# Test: Updates
+# ============================================
+
+class TestUpdates:
+    """갱신 / 삭제 테스트"""
+
+    def test_random_operations_match_reference(self):
+        """무작위 추가/갱신/삭제 후에도 전체 순서가 정답과 같음"""
+        rng = random.Random(11)
+        index = LeaderboardIndex(seed=5)
+        scores = {}
+
+        for step in range(5000):
+            member_id = f"M{rng.randrange(300)}"
+            if rng.random() < 0.15:
+                assert index.remove(member_id) == (scores.pop(member_id, None) is not None)
+            else:
+                scores[member_id] = rng.choice([rng.uniform(-1, 1), float(rng.randrange(5))])
+                index.update(member_id, scores[member_id])
+
+            if step % 500 == 0:
+                order = reference(scores)
+                assert [e.member_id for e in index.top(len(scores) + 1)] == order
+                for position, member_id in enumerate(order[::17], start=0):
+                    assert index.position(member_id) == position * 17 + 1
+
+    def test_stale_version_ignored(self):
+        """이미 더 새로운 버전이 반영됐으면 늦게 도착한 갱신은 무시"""
+        index = LeaderboardIndex()
+        assert index.update("A", 1.0, version=2)
+        assert not index.update("A", 0.5, version=1)
+        assert index.score("A") == 1.0
+        assert index.update("A", 2.0, version=3)
+        assert index.get_stats()["stale_updates"] == 1
+
+    def test_concurrent_updates(self):
+        """여러 스레드가 동시에 갱신해도 구조가 깨지지 않음"""
+        index = LeaderboardIndex(seed=9)
+
+        def worker(offset):
+            rng = random.Random(offset)
+            for i in range(2000):
+                index.update(f"T{offset}-{i % 50}", rng.random())
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(index) == 400
+        assert [e.member_id for e in index.top(400)] == reference(index._scores)
+
+
+# ============================================
+# Test: Snapshot
+# ============================================
+
+class TestSnapshot:
+    """스냅샷 저장 / 복원 테스트"""
+
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "leaderboard.json"
+        index = LeaderboardIndex()
+        index.load([("a", 3.0, 7), ("b", 1.5, 2), ("c", 3.0, 1)])
+        assert index.save_snapshot(path)
+
+        restored = LeaderboardIndex()
+        assert restored.load_snapshot(path) is not None
+        assert [(e.member_id, e.score) for e in restored.top(3)] == [("a", 3.0), ("c", 3.0), ("b", 1.5)]
+        # 버전도 복원 → 스냅샷 이전 갱신은 무시
+        assert not restored.update("a", 0.0, version=7)
+
+    def test_skips_unchanged(self, tmp_path):
+        path = tmp_path / "leaderboard.json"
+        index = LeaderboardIndex()
+        index.update("a", 1.0)
+        assert index.save_snapshot(path)
+        assert not index.save_snapshot(path)
+        index.update("a", 2.0)
+        assert index.save_snapshot(path)
+        assert index.get_stats()["snapshots"] == 2
+
+    def test_missing_file(self, tmp_path):
+        assert LeaderboardIndex().load_snapshot(tmp_path / "none.json") is None
+
+
+# ============================================
+# Test: Vendored Copy
+# ============================================
+
+def normalize(source: str) -> str:
+    """로그 출력 차이 (loguru ↔ print) 와 사본 안내 문단 제거"""
+    source = re.sub(r"\n\n저장소 루트 src/leaderboard_index\.py 사본.*?(?=\n\"\"\")", "", source, flags=re.S)
+    source = source.replace("from loguru import logger\n\n", "")
+    return re.sub(r'(?:logger\.warning\(f"|print\(f"⚠️ )', 'log(f"', source)
+
+
+class TestVendoredCopy:
+    """v1 사본 동기화 테스트"""
+
+    def test_v1_copy_matches_source(self):
+        """v1 사본은 로그 출력만 다르고 원본과 같음 (원본만 고치고 다시 복사)"""
+        source = (Path(__file__).parent / "leaderboard_index.py").read_text(encoding="utf-8")
+        vendored = V1_COPY.read_text(encoding="utf-8")
+        assert source != vendored
+        assert normalize(vendored) == normalize(source)
@@ -0,0 +1,267 @@
+"""
+Mulberry Phase 4-B - Outbound Delivery Tests
+로컬 스텁 HTTP 서버로 전송 엔진 검증
+
+Tests:
+1. Retry (백오프 재시도, 재시도 불가 응답)
+2. Circuit Breaker (연속 실패 시 즉시 거절 → half-open 복구)
+3. Connection Pool (keep-alive 재사용, 호스트별 동시성 제한)
+4. Retry Queue (영속 재시도 큐, 재시작 후 발송)
+"""
+
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from outbound_delivery import (
+    NO_RETRY,
+    CircuitOpenError,
+    DeliveryEngine,
+    DeliveryError,
+    RetryPolicy,
+)
+
+
+FAST_RETRY = RetryPolicy(max_attempts=4, backoff_base=0.01, backoff_max=0.02)
+
+
+class StubServer:
+    """
+    스크립트된 응답을 돌려주는 로컬 HTTP/1.1 서버
+
+    statuses 를 앞에서부터 소비하고, 비면 default_status 응답
+    """
+
+    def __init__(self, statuses=(), default_status=200, delay=0.0):
+        self.statuses = list(statuses)
+        self.default_status = default_status
+        self.delay = delay
+        self.requests = []
+        self.client_ports = set()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, body))
+                    stub.client_ports.add(self.client_address[1])
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                    status = stub.statuses.pop(0) if stub.statuses else stub.default_status
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    payload = b'{"ok": true}'
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            do_GET = _respond
+            do_POST = _respond
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = DeliveryEngine(retry=FAST_RETRY, breaker_threshold=3, breaker_reset_seconds=0.2)
+    yield engine
+    engine.close()
+
+
+# ============================================
+# Test: Retry
+# ============================================
+
+class TestRetry:
+    """재시도 테스트"""
+
+    def test_retries_server_errors_then_succeeds(self, engine):
+        """5xx 는 백오프 후 재시도"""
+        with StubServer(statuses=[503, 502]) as stub:
+            response = engine.request_sync("POST", f"{stub.url}/events", json={"eventType": "fall"})
+
+        assert response.status_code == 200
+        assert response.attempts == 3
+        assert response.json() == {"ok": True}
+        assert len(stub.requests) == 3
+        assert stub.requests[0][2] == b'{"eventType":"fall"}'
+
+    def test_client_error_not_retried(self, engine):
+        """4xx 는 재시도 없이 실패"""
+        with StubServer(default_status=400) as stub:
+            with pytest.raises(DeliveryError) as exc_info:
+                engine.request_sync("POST", f"{stub.url}/claims", json={})
+
+        assert exc_info.value.status_code == 400
+        assert not exc_info.value.retryable
+        assert len(stub.requests) == 1
+
+    def test_async_callers_share_engine(self, engine):
+        """다른 이벤트 루프의 비동기 호출도 같은 엔진 사용"""
+        with StubServer() as stub:
+            async def scenario():
+                return await asyncio.gather(*(
+                    engine.request("GET", f"{stub.url}/health") for _ in range(5)
+                ))
+
+            responses = asyncio.run(scenario())
+
+        assert [r.status_code for r in responses] == [200] * 5
+
+
+# ============================================
+# Test: Circuit Breaker
+# ============================================
+
+class TestCircuitBreaker:
+    """서킷 브레이커 테스트"""
+
+    def test_open_circuit_fails_fast_then_recovers(self, engine):
+        """연속 실패 → 즉시 거절 → reset 후 탐침 성공 시 복구"""
+        with StubServer(statuses=[500, 500, 500]) as stub:
+            with pytest.raises(DeliveryError):
+                engine.request_sync("GET", f"{stub.url}/health", retry=RetryPolicy(max_attempts=3, backoff_base=0))
+            with pytest.raises(CircuitOpenError):
+                engine.request_sync("GET", f"{stub.url}/health", retry=NO_RETRY)
+            assert len(stub.requests) == 3
+
+            time.sleep(0.25)
+            assert engine.request_sync("GET", f"{stub.url}/health", retry=NO_RETRY).status_code == 200
+
+        host = engine.get_stats()["hosts"][stub.url]
+        assert host["circuit"] == "closed"
+        assert host["circuit_opened"] == 1
+        assert host["rejected_open"] == 1
+
+
+# ============================================
+# Test: Connection Pool
+# ============================================
+
+class TestConnectionPool:
+    """연결 풀 테스트"""
+
+    def test_keep_alive_reuses_connection(self, engine):
+        """순차 요청은 keep-alive 연결 하나를 재사용"""
+        with StubServer() as stub:
+            for _ in range(10):
+                engine.request_sync("GET", f"{stub.url}/status")
+
+        assert len(stub.requests) == 10
+        assert len(stub.client_ports) == 1
+
+    def test_per_host_concurrency_limit(self):
+        """호스트당 동시 요청 수 제한"""
+        engine = DeliveryEngine(max_connections_per_host=2)
+        try:
+            with StubServer(delay=0.05) as stub:
+                async def scenario():
+                    await asyncio.gather(*(engine.request("GET", f"{stub.url}/slow") for _ in range(8)))
+
+                asyncio.run(scenario())
+        finally:
+            engine.close()
+
+        assert len(stub.requests) == 8
+        assert stub.max_active == 2
+
+
+# ============================================
+# Test: Retry Queue
+# ============================================
+
+class TestRetryQueue:
+    """영속 재시도 큐 테스트"""
+
+    def test_queued_delivery_survives_restart(self, tmp_path):
+        """발송 실패 항목은 재시작 후 재시도"""
+        store = tmp_path / "outbound.db"
+        queue_retry = RetryPolicy(max_attempts=5, backoff_base=0.01, backoff_max=0.01)
+
+        with StubServer(default_status=503) as down:
+            # 첫 실패 후 긴 백오프 → 종료 시점에 pending 으로 남음
+            slow_retry = RetryPolicy(max_attempts=5, backoff_base=60, backoff_max=60)
+            engine = DeliveryEngine(retry_store_path=store, queue_retry=slow_retry, queue_poll_seconds=0.01)
+            engine.enqueue_sync("POST", f"{down.url}/statuses", json={"status": "공동구매 오픈"})
+            deadline = time.time() + 2
+            while not down.requests and time.time() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            engine.close()
+        assert down.requests
+
+        with StubServer() as up:
+            # 복구된 수신 서버는 새 포트 → 저장된 항목의 URL 만 옮겨 재시작 복구 검증
+            db = sqlite3.connect(str(store))
+            assert db.execute("SELECT COUNT(*) FROM outbound_retry WHERE status = 'pending'").fetchone()[0] == 1
+            db.execute("UPDATE outbound_retry SET url = ?, next_attempt_at = 0", (f"{up.url}/statuses",))
+            db.commit()
+            db.close()
+
+            engine = DeliveryEngine(retry_store_path=store, queue_retry=queue_retry, queue_poll_seconds=0.01)
+            engine.start()
+            deadline = time.time() + 2
+            while not up.requests and time.time() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            stats = engine.get_stats()
+            engine.close()
+
+        assert up.requests[0][2] == '{"status": "공동구매 오픈"}'.encode()
+        assert stats["queue"]["delivered"] == 1
+        assert stats["queue"]["pending"] == 0
+
+    def test_exhausted_delivery_goes_dead(self):
+        """재시도 한도 초과 시 dead 처리"""
+        queue_retry = RetryPolicy(max_attempts=2, backoff_base=0.01, backoff_max=0.01)
+        engine = DeliveryEngine(queue_retry=queue_retry, queue_poll_seconds=0.01, breaker_threshold=100)
+        try:
+            with StubServer(default_status=500) as stub:
+                engine.enqueue_sync("POST", f"{stub.url}/webhook", json={"n": 1})
+                deadline = time.time() + 2
+                while not engine.queue_stats["dead"] and time.time() < deadline:
+                    time.sleep(0.01)
+            dead = engine.dead_letters()
+        finally:
+            engine.close()
+
+        assert len(stub.requests) == 2
+        assert len(dead) == 1 and dead[0]["attempts"] == 2
@@ -0,0 +1,388 @@
+"""
+Mulberry Phase 4-B - Webhook Engine Tests
+웹훅 엔진 워커 풀 / 지연 통계 검증
+
+Tests:
+1. Rolling Histogram (롤링 윈도우 히스토그램)
+2. Worker Pool (동시 처리 및 에이전트별 순서 보장)
+3. Performance Stats (p50/p95/p99, 이벤트 타입별 목표 달성률)
+4. Signature Verifier (사전 키잉 HMAC, 시크릿 교체, 빠른 거절)
+5. Dedup Index (재시도 웹훅 중복 차단)
+"""
+
+import asyncio
+import hashlib
+import hmac
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# src 디렉터리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dedup_index import DedupIndex
+from signature_verifier import SignatureVerifier
+from telemetry import RollingHistogram
+from webhook_engine import INVALID_SIGNATURE, WebhookEngine, WebhookEventType
+
+
+def run(coro):
+    """코루틴 실행 헬퍼"""
+    return asyncio.run(coro)
+
+
+# ============================================
+# Test: Rolling Histogram
+# ============================================
+
+class TestRollingHistogram:
+    """롤링 윈도우 히스토그램 테스트"""
+
+    def test_old_slots_expire(self):
+        """윈도우를 벗어난 구간은 통계에서 제외"""
+        now = [0.0]
+        histogram = RollingHistogram(window_seconds=10, slots=5, clock=lambda: now[0])
+
+        for _ in range(100):
+            histogram.record(500.0)
+        now[0] = 6.0
+        for _ in range(100):
+            histogram.record(5.0)
+
+        assert histogram.merged().count == 200
+        now[0] = 11.0
+        window = histogram.merged()
+        assert window.count == 100
+        assert window.max == 5.0
+        assert histogram.snapshot()["total_count"] == 200
+
+    def test_memory_stays_flat(self):
+        """기록 수와 무관하게 구간 수 고정"""
+        now = [0.0]
+        histogram = RollingHistogram(window_seconds=1, slots=4, clock=lambda: now[0])
+        for i in range(10_000):
+            now[0] = i * 0.01
+            histogram.record(float(i % 50))
+
+        assert len(histogram.slots) == 4
+        assert histogram.total_count == 10_000
+        assert histogram.merged().count <= 100
+
+
+# ============================================
+# Test: Worker Pool
+# ============================================
+
+class TestWorkerPool:
+    """워커 풀 테스트"""
+
+    def test_workers_process_concurrently(self):
+        """여러 워커가 느린 핸들러를 병렬 처리"""
+        async def scenario():
+            engine = WebhookEngine(workers=8)
+            engine.create_endpoint("AGENT_001", "Payment Agent")
+
+            async def slow(event):
+                await asyncio.sleep(0.05)
+
+            engine.register_handler(WebhookEventType.PAYMENT_SUCCESS, slow)
+            started = time.perf_counter()
+            for i in range(8):
+                await engine.process_webhook("AGENT_001", WebhookEventType.PAYMENT_SUCCESS, {"n": i})
+            await engine.drain()
+            elapsed = time.perf_counter() - started
+            await engine.stop_workers()
+            return elapsed
+
+        assert run(scenario()) < 0.3
+
+    def test_ordered_by_agent(self):
+        """순서 보장 모드: 같은 agent_id 이벤트는 수신 순서대로 처리"""
+        async def scenario():
+            engine = WebhookEngine(workers=4, ordered_by_agent=True)
+            agents = [f"AGENT_{i:03d}" for i in range(6)]
+            for agent_id in agents:
+                engine.create_endpoint(agent_id, agent_id)
+
+            processed = {agent_id: [] for agent_id in agents}
+
+            async def record(event):
+                await asyncio.sleep(random.random() / 1000)
+                processed[event["agent_id"]].append(event["payload"]["seq"])
+
+            engine.register_handler(WebhookEventType.EXTERNAL_ORDER, record)
+            for seq in range(20):
+                for agent_id in agents:
+                    await engine.process_webhook(agent_id, WebhookEventType.EXTERNAL_ORDER, {"seq": seq})
+            await engine.drain()
+            await engine.stop_workers()
+            return processed
+
+        processed = run(scenario())
+        assert all(seqs == list(range(20)) for seqs in processed.values())
+
+    def test_invalid_worker_count(self):
+        """워커 수 검증"""
+        with pytest.raises(ValueError):
+            WebhookEngine(workers=0)
+
+
+# ============================================
+# Test: Performance Stats
+# ============================================
+
+class TestPerformanceStats:
+    """성능 통계 테스트"""
+
+    def test_percentiles_per_event_type(self):
+        """이벤트 타입별 p50/p95/p99 및 100ms 목표 달성률"""
+        async def scenario():
+            engine = WebhookEngine(workers=2)
+            engine.create_endpoint("AGENT_001", "Payment Agent")
+
+            async def noop(event):
+                pass
+
+            engine.register_handler(WebhookEventType.PAYMENT_SUCCESS, noop)
+            for i in range(50):
+                await engine.process_webhook("AGENT_001", WebhookEventType.PAYMENT_SUCCESS, {"n": i})
+            for i in range(10):
+                await engine.process_webhook("AGENT_001", WebhookEventType.EMAIL_RECEIVED, {"n": i})
+            await engine.drain()
+            await engine.stop_workers()
+            return engine.get_performance_stats()
+
+        stats = run(scenario())
+        assert stats["total_events"] == 60
+        assert stats["p50_processing_time_ms"] <= stats["p99_processing_time_ms"]
+        assert stats["target_met"] == 100.0
+        assert stats["by_event_type"]["payment.success"]["count"] == 50
+        assert stats["by_event_type"]["email.received"]["count"] == 10
+        assert stats["handler_latency"]["payment.success"]["count"] == 50
+        assert stats["queue_depth"] == 0
+
+    def test_empty_stats(self):
+        """이벤트 없을 때 기본값"""
+        stats = WebhookEngine().get_performance_stats()
+        assert stats["total_events"] == 0
+        assert stats["avg_processing_time_ms"] == 0.0
+        assert stats["by_event_type"] == {}
+
+
+# ============================================
+# Test: Signature Verifier
+# ============================================
+
+def sign(secret: str, body: bytes) -> str:
+    """기존 방식 HMAC-SHA256 서명"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class TestSignatureVerifier:
+    """서명 검증기 테스트"""
+
+    def test_matches_hmac_new(self):
+        """캐시된 키잉 결과는 hmac.new 와 동일 (긴 키 포함)"""
+        verifier = SignatureVerifier()
+        for secret in ("short", "k" * 64, "long-" * 40):
+            verifier.set_secret("AGENT_001", secret)
+            body = b'{"amount": 5000}'
+            assert verifier.verify("AGENT_001", body, sign(secret, body))
+            assert not verifier.verify("AGENT_001", body + b" ", sign(secret, body))
+
+    def test_rotation_accepts_two_secrets(self):
+        """교체 유예 중에는 이전/새 시크릿 모두 허용"""
+        engine = WebhookEngine()
+        endpoint = engine.create_endpoint("AGENT_001", "Payment Agent")
+        old_secret = endpoint.webhook_secret
+        body = b'{"transaction_id": "TX-1"}'
+
+        new_secret = engine.rotate_secret("AGENT_001")
+        assert engine.verify_signature("AGENT_001", body, sign(old_secret, body))
+        assert engine.verify_signature("AGENT_001", body, sign(new_secret, body))
+        assert engine.verifier.stats["verified_previous_secret"] == 1
+
+        engine.retire_previous_secret("AGENT_001")
+        assert not engine.verify_signature("AGENT_001", body, sign(old_secret, body))
+        assert engine.verify_signature("AGENT_001", body, sign(new_secret, body))
+
+    def test_process_webhook_verifies_raw_body(self):
+        """원문 본문이 주어지면 처리 전에 서명 검증 (불일치는 큐에 넣지 않음)"""
+        async def scenario():
+            engine = WebhookEngine()
+            endpoint = engine.create_endpoint("AGENT_001", "Payment Agent")
+            body = b'{"transaction_id": "TX-9", "amount": 5000}'
+            payload = {"transaction_id": "TX-9", "amount": 5000}
+            forged = await engine.process_webhook(
+                "AGENT_001", WebhookEventType.PAYMENT_SUCCESS, payload,
+                signature=sign("wrong", body), raw_body=body
+            )
+            missing = await engine.process_webhook(
+                "AGENT_001", WebhookEventType.PAYMENT_SUCCESS, payload, raw_body=body
+            )
+            signed = await engine.process_webhook(
+                "AGENT_001", WebhookEventType.PAYMENT_SUCCESS, payload,
+                signature=sign(endpoint.webhook_secret, body), raw_body=body
+            )
+            await engine.drain()
+            await engine.stop_workers()
+            return engine, forged, missing, signed
+
+        engine, forged, missing, signed = run(scenario())
+        assert not forged["success"] and forged["error"] == INVALID_SIGNATURE
+        assert not missing["success"] and missing["error"] == INVALID_SIGNATURE
+        # 위조 요청이 중복 키를 남기지 않아 정상 요청은 처리됨
+        assert signed["success"] and not signed.get("duplicate")
+        assert engine.verifier.stats["rejected_mismatch"] == 1
+        assert engine.verifier.stats["rejected_malformed"] == 1
+
+    def test_fast_reject(self):
+        """미등록 키 / 크기 초과 / 서명 형식 오류는 해싱 전에 거절"""
+        verifier = SignatureVerifier(max_body_bytes=16)
+        verifier.set_secret("AGENT_001", "secret")
+
+        assert not verifier.verify("AGENT_404", b"{}", sign("secret", b"{}"))
+        assert not verifier.verify("AGENT_001", b"x" * 17, sign("secret", b"x" * 17))
+        assert not verifier.verify("AGENT_001", b"{}", "zz" * 32)
+        assert not verifier.verify("AGENT_001", b"{}", sign("secret", b"{}")[:-2])
+        assert not verifier.verify("AGENT_001", b"{}", None)
+
+        stats = verifier.get_stats()
+        assert stats["rejected_unknown_key"] == 1
+        assert stats["rejected_oversize"] == 1
+        assert stats["rejected_malformed"] == 3
+        assert stats["rejected_mismatch"] == 0
+
+    def test_rejects_non_canonical_hex(self):
+        """대문자 / 공백 / 접두어가 섞인 서명은 디코딩 전에 거절"""
+        verifier = SignatureVerifier()
+        verifier.set_secret("AGENT_001", "secret")
+        signature = sign("secret", b"{}")
+
+        assert verifier.verify("AGENT_001", b"{}", signature)
+        for variant in (signature.upper(), f" {signature}", f"{signature}\n",
+                        " ".join([signature[:32], signature[32:]]), "sha256=" + signature[7:]):
+            assert not verifier.verify("AGENT_001", b"{}", variant)
+
+        stats = verifier.get_stats()
+        assert stats["rejected_malformed"] == 5
+        assert stats["rejected_mismatch"] == 0
+
+    def test_large_body_offloaded(self):
+        """임계값 이상 본문은 스레드 풀에서 검증"""
+        verifier = SignatureVerifier(offload_threshold_bytes=1024)
+        verifier.set_secret("AGENT_001", "secret")
+        small, large = b"x" * 100, b"x" * 4096
+
+        async def scenario():
+            return (
+                await verifier.verify_async("AGENT_001", small, sign("secret", small)),
+                await verifier.verify_async("AGENT_001", large, sign("secret", large)),
+            )
+
+        assert run(scenario()) == (True, True)
+        assert verifier.stats["offloaded"] == 1
+
+
+# ============================================
+# Test: Dedup Index
+# ============================================
+
+class TestDedupIndex:
+    """중복 인덱스 테스트"""
+
+    def test_retried_payment_settles_once(self):
+        """재시도 결제 웹훅은 큐에 넣지 않고 성공 응답"""
+        async def scenario():
+            engine = WebhookEngine()
+            engine.create_endpoint("AGENT_001", "Payment Agent")
+            settled = []
+
+            async def settle(event):
+                settled.append(event["event_type"].value)
+
+            engine.register_handler(WebhookEventType.PAYMENT_SUCCESS, settle)
+            engine.register_handler(WebhookEventType.PAYMENT_REFUND, settle)
+
+            payload = {"transaction_id": "TX-1", "amount": 5000}
+            first = await engine.process_webhook("AGENT_001", WebhookEventType.PAYMENT_SUCCESS, payload)
+            retry = await engine.process_webhook("AGENT_001", WebhookEventType.PAYMENT_SUCCESS, payload)
+            refund = await engine.process_webhook("AGENT_001", WebhookEventType.PAYMENT_REFUND, payload)
+            await engine.drain()
+            await engine.stop_workers()
+            return engine, first, retry, refund, settled
+
+        engine, first, retry, refund, settled = run(scenario())
+        assert first["success"] and not first.get("duplicate")
+        assert retry["success"] and retry["duplicate"]
+        assert refund["success"] and not refund.get("duplicate")
+        assert settled == ["payment.success", "payment.refund"]
+        assert engine.endpoints["AGENT_001"].duplicate_events == 1
+        assert engine.get_performance_stats()["total_events"] == 2
+
+    def test_ttl_expiry(self):
+        """TTL 경과 후에는 같은 키도 새 이벤트"""
+        now = [1_000.0]
+        index = DedupIndex(ttl_seconds=60, buckets=6, clock=lambda: now[0])
+
+        assert index.check_and_add(("AGENT_001", "TX-1"))
+        now[0] += 30
+        assert not index.check_and_add(("AGENT_001", "TX-1"))
+        now[0] += 61
+        assert index.check_and_add(("AGENT_001", "TX-1"))
+
+    def test_max_keys_bound(self):
+        """최대 키 수를 넘으면 가장 오래된 구간부터 만료"""
+        now = [0.0]
+        index = DedupIndex(ttl_seconds=100, buckets=10, max_keys=50, clock=lambda: now[0])
+        for i in range(200):
+            now[0] = i * 0.5
+            index.check_and_add(f"TX-{i}")
+
+        assert len(index) <= 50
+        assert index.stats["evicted_early"] > 0
+        assert index.contains("TX-199")
+
+    def test_burst_within_one_window_keeps_recent_keys(self, tmp_path):
+        """한 구간 안에서 상한을 넘겨도 오래된 키만 하나씩 만료 (영속 저장소도 함께)"""
+        path = tmp_path / "dedup.db"
+        index = DedupIndex(ttl_seconds=3600, buckets=6, max_keys=100, persist_path=path, clock=lambda: 1_000.0)
+        for i in range(250):
+            assert index.check_and_add(f"TX-{i}")
+
+        assert len(index) == 100
+        assert index.stats["evicted_early"] == 150
+        assert all(index.contains(f"TX-{i}") for i in range(150, 250))
+        assert not any(index.contains(f"TX-{i}") for i in range(150))
+        assert not index.check_and_add("TX-249")
+        index.close()
+
+        reopened = DedupIndex(ttl_seconds=3600, buckets=6, max_keys=100, persist_path=path, clock=lambda: 1_000.0)
+        assert len(reopened) == 100
+        assert reopened.contains("TX-150") and not reopened.contains("TX-149")
+        reopened.close()
+
+    def test_persisted_across_restart(self, tmp_path):
+        """SQLite 영속화: 재시작 후에도 TTL 내 중복 차단"""
+        now = [1_000.0]
+        path = tmp_path / "dedup.db"
+
+        index = DedupIndex(ttl_seconds=3600, persist_path=path, clock=lambda: now[0])
+        index.check_and_add(("AGENT_001", "payment.success", "TX-1"))
+        index.check_and_add(("AGENT_001", "payment.success", "TX-2"))
+        index.discard(("AGENT_001", "payment.success", "TX-2"))
+        index.close()
+
+        now[0] += 600
+        reopened = DedupIndex(ttl_seconds=3600, persist_path=path, clock=lambda: now[0])
+        assert reopened.contains(("AGENT_001", "payment.success", "TX-1"))
+        assert not reopened.contains(("AGENT_001", "payment.success", "TX-2"))
+        reopened.close()
+
+        now[0] += 7200
+        expired = DedupIndex(ttl_seconds=3600, persist_path=path, clock=lambda: now[0])
+        assert len(expired) == 0
+        expired.close()
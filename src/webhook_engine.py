@@ -7,11 +7,11 @@ Target: 100ms 이내 에이전트 상태 업데이트
 """
 
 import asyncio
+import json
 import uuid
-import hmac
-import hashlib
 import time
-from typing import Dict, Any, Optional, List
+import zlib
+from typing import Dict, Any, Optional, List, Callable, Union
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass, field
@@ -19,6 +19,13 @@ from loguru import logger
 from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
+from dedup_index import DedupIndex
+from event_log import EventLog, LogCursor
+from signature_verifier import SignatureVerifier
+from telemetry import HistogramSet, RollingHistogram
+
+
+INVALID_SIGNATURE = "Invalid signature"  # 라우트가 401 로 매핑
 
 # ============================================
 # Webhook Event Types
@@ -97,6 +104,7 @@ class WebhookEndpoint:
     total_events: int = 0
     success_events: int = 0
     failed_events: int = 0
+    duplicate_events: int = 0
     
     # 설정
     is_active: bool = True
@@ -110,24 +118,72 @@ class WebhookEngine:
     에이전트별 웹훅 엔드포인트 관리 및 이벤트 처리
     """
     
-    def __init__(self, base_url: str = "https://mulberry.ai"):
+    TARGET_MS = 100.0  # 수신 확인 목표 (ms)
+    
+    def __init__(
+        self,
+        base_url: str = "https://mulberry.ai",
+        event_log: Optional[EventLog] = None,
+        workers: int = 4,
+        ordered_by_agent: bool = False,
+        max_queue_size: int = 0,
+        stats_window_seconds: float = 300.0,
+        verifier: Optional[SignatureVerifier] = None,
+        dedup_index: Optional[DedupIndex] = None
+    ):
         """
         웹훅 엔진 초기화
         
         Args:
             base_url: 기본 URL
+            event_log: 내구 로그 (지정 시 응답 전에 fsync, 재시작 시 recover())
+            workers: 이벤트 큐를 소비하는 워커 태스크 수
+            ordered_by_agent: True 이면 같은 agent_id 이벤트를 한 워커가 순서대로 처리
+            max_queue_size: 큐 최대 크기 (0 = 무제한, 가득 차면 수신 응답이 대기)
+            stats_window_seconds: 지연 통계 롤링 윈도우 (초)
+            verifier: 서명 검증기 (None = 기본 설정 SignatureVerifier)
+            dedup_index: 재시도 웹훅 중복 인덱스 (None = 메모리 전용 24시간 TTL)
         """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        
         self.base_url = base_url
         self.endpoints: Dict[str, WebhookEndpoint] = {}
         
+        # 엔드포인트별 키잉 완료 HMAC 캐시
+        self.verifier = verifier or SignatureVerifier()
+        
+        # 재시도 웹훅 중복 차단 (agent_id, event_type, transaction_id/order_id)
+        self.dedup_index = dedup_index if dedup_index is not None else DedupIndex()
+        
         # 이벤트 큐 (100ms 목표)
-        self.event_queue = asyncio.Queue()
+        # 순서 보장 모드: 워커별 파티션 큐 (agent_id 해시), 기본: 공유 큐 하나
+        self.workers = workers
+        self.ordered_by_agent = ordered_by_agent
+        self._queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=max_queue_size)
+            for _ in range(workers if ordered_by_agent else 1)
+        ]
+        self.event_queue = self._queues[0]
+        self._worker_tasks: List[asyncio.Task] = []
+        
+        # 내구 로그 (응답 전 기록 → 재시작 후 재처리)
+        self.event_log = event_log
+        self._log_cursor = LogCursor(event_log, "webhook-engine") if event_log else None
         
         # 이벤트 핸들러 등록
         self.event_handlers: Dict[WebhookEventType, List[callable]] = {}
         
-        # 성능 모니터링
-        self.processing_times: List[float] = []
+        # 성능 모니터링 (고정 메모리 롤링 히스토그램, 이벤트 수와 무관)
+        def window() -> RollingHistogram:
+            return RollingHistogram(window_seconds=stats_window_seconds)
+        
+        self.processing_latency = window()  # 수신 → 응답 (전체)
+        self.ack_latency = HistogramSet(factory=window)  # 이벤트 타입별
+        self.handler_latency = HistogramSet(factory=window)  # 큐 대기 + 핸들러 실행
+        
+        # 외부 계측 소스 (예: EventDrivenBus.get_telemetry)
+        self.telemetry_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
         
         logger.info("✅ Webhook Engine initialized")
     
@@ -165,6 +221,7 @@ class WebhookEngine:
         
         # 저장
         self.endpoints[agent_id] = endpoint
+        self.verifier.set_secret(agent_id, webhook_secret)
         
         logger.info(f"✅ Webhook endpoint created for {agent_name}")
         logger.info(f"📡 URL: {webhook_url}")
@@ -176,10 +233,35 @@ class WebhookEngine:
         """웹훅 시크릿 생성"""
         return uuid.uuid4().hex
     
+    def rotate_secret(self, agent_id: str) -> str:
+        """
+        웹훅 시크릿 교체
+        
+        이전 시크릿은 retire_previous_secret() 호출 전까지 함께 유효
+        (외부 발신자가 새 시크릿으로 전환하는 동안 무중단)
+        
+        Args:
+            agent_id: 에이전트 ID
+            
+        Returns:
+            str: 새 시크릿
+        """
+        endpoint = self.endpoints.get(agent_id)
+        if not endpoint:
+            raise ValueError(f"Endpoint not found: {agent_id}")
+        
+        endpoint.webhook_secret = self._generate_secret()
+        self.verifier.rotate_secret(agent_id, endpoint.webhook_secret)
+        return endpoint.webhook_secret
+    
+    def retire_previous_secret(self, agent_id: str):
+        """시크릿 교체 유예 종료"""
+        self.verifier.retire_previous(agent_id)
+    
     def verify_signature(
         self,
         agent_id: str,
-        payload: str,
+        payload: Union[str, bytes],
         signature: str
     ) -> bool:
         """
@@ -193,26 +275,24 @@ class WebhookEngine:
         Returns:
             bool: 검증 성공 여부
         """
-        endpoint = self.endpoints.get(agent_id)
-        if not endpoint:
-            return False
-        
-        # HMAC-SHA256 계산
-        expected_signature = hmac.new(
-            endpoint.webhook_secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        # 서명 비교
-        return hmac.compare_digest(signature, expected_signature)
+        return self.verifier.verify(agent_id, payload, signature)
+    
+    async def verify_signature_async(
+        self,
+        agent_id: str,
+        payload: Union[str, bytes],
+        signature: str
+    ) -> bool:
+        """웹훅 서명 검증 (큰 본문은 스레드 풀에서)"""
+        return await self.verifier.verify_async(agent_id, payload, signature)
     
     async def process_webhook(
         self,
         agent_id: str,
         event_type: WebhookEventType,
         payload: Dict[str, Any],
-        signature: Optional[str] = None
+        signature: Optional[str] = None,
+        raw_body: Optional[bytes] = None
     ) -> Dict[str, Any]:
         """
         웹훅 이벤트 처리
@@ -224,11 +304,13 @@ class WebhookEngine:
             event_type: 이벤트 타입
             payload: 페이로드
             signature: HMAC 서명
+            raw_body: 서명 대상 원문 본문 (HTTP 수신 시 필수 - 주어지면 서명 검증)
             
         Returns:
             dict: 처리 결과
         """
         start_time = time.perf_counter()
+        dedup_key = None
         
         try:
             # 1. 엔드포인트 확인 (1ms)
@@ -239,11 +321,27 @@ class WebhookEngine:
             if not endpoint.is_active:
                 raise ValueError(f"Endpoint inactive: {agent_id}")
             
-            # 2. 서명 검증 생략 (개발 중) - 실제로는 필수!
-            # if signature and not self.verify_signature(agent_id, json.dumps(payload), signature):
-            #     raise ValueError("Invalid signature")
+            # 2. 서명 검증 (원문 본문 기준, 크기/형식 오류는 해싱 전 거절)
+            if raw_body is not None and not await self.verify_signature_async(agent_id, raw_body, signature):
+                raise ValueError(INVALID_SIGNATURE)
             
-            # 3. 이벤트 큐에 추가 (즉시)
+            # 3. 재시도 중복 차단 (큐에 넣지 않고 즉시 성공 응답)
+            dedup_key = self._dedup_key(agent_id, event_type, payload)
+            if dedup_key is not None and not self.dedup_index.check_and_add(dedup_key):
+                dedup_key = None  # 기존 키 유지 (아래 실패 처리에서 삭제 금지)
+                endpoint.duplicate_events += 1
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                logger.info(f"🔁 Duplicate webhook ignored: {agent_id} ({elapsed_ms:.1f}ms)")
+                return {
+                    "success": True,
+                    "duplicate": True,
+                    "agent_id": agent_id,
+                    "event_type": event_type.value,
+                    "processing_time_ms": elapsed_ms,
+                    "message": "Duplicate event ignored"
+                }
+            
+            # 4. 이벤트 큐에 추가 (즉시)
             event = {
                 "agent_id": agent_id,
                 "event_type": event_type,
@@ -251,16 +349,22 @@ class WebhookEngine:
                 "timestamp": datetime.now().isoformat()
             }
             
-            # 백그라운드에서 처리 (논블로킹)
-            asyncio.create_task(self._handle_event(event))
+            # 내구 모드: 로그 기록(group commit fsync) 후에만 수신 확인
+            if self.event_log is not None:
+                event["offset"] = await self.event_log.append(self._encode_event(event))
+                self._log_cursor.track(event["offset"])
+            
+            # 워커 풀에서 처리 (논블로킹)
+            await self._enqueue(event)
             
-            # 4. 즉시 응답
+            # 5. 즉시 응답
             elapsed_ms = (time.perf_counter() - start_time) * 1000
             
             # 통계 업데이트
             endpoint.total_events += 1
             endpoint.success_events += 1
-            self.processing_times.append(elapsed_ms)
+            self.processing_latency.record(elapsed_ms)
+            self.ack_latency.record(event_type.value, elapsed_ms)
             
             logger.info(f"⚡ Webhook processed: {agent_id} ({elapsed_ms:.1f}ms)")
             
@@ -277,6 +381,10 @@ class WebhookEngine:
             
             logger.error(f"❌ Webhook error: {str(e)} ({elapsed_ms:.1f}ms)")
             
+            # 수신 실패 → 발신자 재시도가 중복으로 거절되지 않도록
+            if dedup_key is not None:
+                self.dedup_index.discard(dedup_key)
+            
             if agent_id in self.endpoints:
                 self.endpoints[agent_id].failed_events += 1
             
@@ -286,6 +394,72 @@ class WebhookEngine:
                 "processing_time_ms": elapsed_ms
             }
     
+    @staticmethod
+    def _dedup_key(
+        agent_id: str,
+        event_type: WebhookEventType,
+        payload: Dict[str, Any]
+    ) -> Optional[tuple]:
+        """
+        중복 판정 키 (거래/주문 ID 없는 이벤트는 판정 안 함)
+        
+        같은 거래의 결제 성공과 환불은 별개 이벤트이므로 이벤트 타입 포함
+        """
+        reference = payload.get("transaction_id") or payload.get("order_id")
+        if not reference:
+            return None
+        return (agent_id, event_type.value, reference)
+    
+    # ============================================
+    # Worker Pool
+    # ============================================
+    
+    def start_workers(self):
+        """워커 태스크 시작 (첫 이벤트 수신 시 자동 호출)"""
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        if self._worker_tasks:
+            return
+        
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(self._queues[i % len(self._queues)]))
+            for i in range(self.workers)
+        ]
+        
+        mode = "ordered by agent" if self.ordered_by_agent else "shared queue"
+        logger.info(f"👷 Webhook workers started: {self.workers} ({mode})")
+    
+    async def stop_workers(self):
+        """워커 태스크 종료 (큐에 남은 이벤트는 처리하지 않음)"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+    
+    async def drain(self):
+        """큐에 들어간 이벤트가 모두 처리될 때까지 대기"""
+        for queue in self._queues:
+            await queue.join()
+    
+    def _queue_for(self, agent_id: str) -> asyncio.Queue:
+        if len(self._queues) == 1:
+            return self._queues[0]
+        # 프로세스 간 일관된 파티션을 위해 hash() 대신 crc32
+        return self._queues[zlib.crc32(agent_id.encode()) % len(self._queues)]
+    
+    async def _enqueue(self, event: Dict[str, Any]):
+        self.start_workers()
+        event["enqueued_at"] = time.perf_counter()
+        await self._queue_for(event["agent_id"]).put(event)
+    
+    async def _worker_loop(self, queue: asyncio.Queue):
+        """큐 소비 워커"""
+        while True:
+            event = await queue.get()
+            try:
+                await self._handle_event(event)
+            finally:
+                queue.task_done()
+    
     async def _handle_event(self, event: Dict[str, Any]):
         """
         백그라운드 이벤트 처리
@@ -307,6 +481,44 @@ class WebhookEngine:
             
         except Exception as e:
             logger.error(f"❌ Event handling error: {str(e)}")
+        finally:
+            enqueued_at = event.pop("enqueued_at", None)
+            if enqueued_at is not None:
+                self.handler_latency.record(
+                    event["event_type"].value, (time.perf_counter() - enqueued_at) * 1000
+                )
+            if event.get("offset") is not None and self._log_cursor is not None:
+                self._log_cursor.ack(event["offset"])
+    
+    @staticmethod
+    def _encode_event(event: Dict[str, Any]) -> bytes:
+        return json.dumps({
+            **event,
+            "event_type": event["event_type"].value
+        }, ensure_ascii=False, separators=(",", ":")).encode()
+    
+    async def recover(self) -> int:
+        """
+        로그에서 미처리 이벤트 재처리 (재시작 직후 호출)
+        
+        Returns:
+            int: 재처리 예약한 이벤트 수
+        """
+        if self._log_cursor is None:
+            return 0
+        
+        count = 0
+        for record in self._log_cursor.pending():
+            event = json.loads(record.data)
+            event["event_type"] = WebhookEventType(event["event_type"])
+            event["offset"] = record.offset
+            self._log_cursor.track(record.offset)
+            await self._enqueue(event)
+            count += 1
+        
+        if count:
+            logger.info(f"♻️ Recovered {count} webhook events from log")
+        return count
     
     def register_handler(
         self,
@@ -327,21 +539,70 @@ class WebhookEngine:
         
         logger.info(f"✅ Handler registered for {event_type.value}")
     
+    def register_telemetry_source(
+        self,
+        name: str,
+        source: Callable[[], Dict[str, Any]]
+    ):
+        """
+        계측 소스 등록
+        
+        Args:
+            name: 소스 이름 (예: "event_bus")
+            source: 호출 시 계측 스냅샷 dict를 반환하는 함수
+        """
+        self.telemetry_sources[name] = source
+        
+        logger.info(f"✅ Telemetry source registered: {name}")
+    
+    def get_telemetry(self) -> Dict[str, Any]:
+        """등록된 계측 소스 전체 조회 (pull)"""
+        return {name: source() for name, source in self.telemetry_sources.items()}
+    
     def get_performance_stats(self) -> Dict[str, Any]:
-        """성능 통계"""
-        if not self.processing_times:
-            return {
-                "avg_processing_time_ms": 0,
-                "max_processing_time_ms": 0,
-                "total_events": 0
-            }
+        """
+        성능 통계 (롤링 윈도우)
+        
+        히스토그램 버킷 수가 고정이라 이벤트 수와 무관하게 O(1)
+        
+        Returns:
+            dict: 전체/이벤트 타입별 p50/p95/p99 및 100ms 목표 달성률(%)
+        """
+        window = self.processing_latency.merged()
         
         return {
-            "avg_processing_time_ms": sum(self.processing_times) / len(self.processing_times),
-            "max_processing_time_ms": max(self.processing_times),
-            "min_processing_time_ms": min(self.processing_times),
-            "total_events": len(self.processing_times),
-            "target_met": sum(1 for t in self.processing_times if t < 100) / len(self.processing_times) * 100
+            "avg_processing_time_ms": window.total / window.count if window.count else 0.0,
+            "max_processing_time_ms": window.max or 0.0,
+            "min_processing_time_ms": window.min or 0.0,
+            "p50_processing_time_ms": window.percentile(50),
+            "p95_processing_time_ms": window.percentile(95),
+            "p99_processing_time_ms": window.percentile(99),
+            "total_events": self.processing_latency.total_count,
+            "window_events": window.count,
+            "window_seconds": self.processing_latency.window_seconds,
+            "target_ms": self.TARGET_MS,
+            "target_met": window.fraction_below(self.TARGET_MS) * 100,
+            "by_event_type": {
+                event_type: self._latency_summary(histogram)
+                for event_type, histogram in self.ack_latency.histograms.items()
+            },
+            "handler_latency": {
+                event_type: self._latency_summary(histogram)
+                for event_type, histogram in self.handler_latency.histograms.items()
+            },
+            "queue_depth": sum(queue.qsize() for queue in self._queues),
+            "workers": self.workers,
+            "ordered_by_agent": self.ordered_by_agent
+        }
+    
+    def _latency_summary(self, histogram: RollingHistogram) -> Dict[str, Any]:
+        window = histogram.merged()
+        return {
+            "count": window.count,
+            "p50_ms": window.percentile(50),
+            "p95_ms": window.percentile(95),
+            "p99_ms": window.percentile(99),
+            "target_met": window.fraction_below(self.TARGET_MS) * 100
         }
 
 
@@ -372,11 +633,13 @@ async def payment_webhook(
         agent_id=agent_id,
         event_type=WebhookEventType.PAYMENT_SUCCESS if payload.status == "success" else WebhookEventType.PAYMENT_FAILED,
         payload=payload.dict(),
-        signature=signature
+        signature=signature,
+        raw_body=await request.body()
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        status_code = 401 if result["error"] == INVALID_SIGNATURE else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
     
     return result
 
@@ -398,11 +661,13 @@ async def email_webhook(
         agent_id=agent_id,
         event_type=WebhookEventType.EMAIL_RECEIVED,
         payload=payload.dict(),
-        signature=signature
+        signature=signature,
+        raw_body=await request.body()
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        status_code = 401 if result["error"] == INVALID_SIGNATURE else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
     
     return result
 
@@ -424,11 +689,13 @@ async def external_order_webhook(
         agent_id=agent_id,
         event_type=WebhookEventType.EXTERNAL_ORDER,
         payload=payload.dict(),
-        signature=signature
+        signature=signature,
+        raw_body=await request.body()
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        status_code = 401 if result["error"] == INVALID_SIGNATURE else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
     
     return result
 
@@ -448,11 +715,23 @@ async def get_webhook_stats(agent_id: str):
         "total_events": endpoint.total_events,
         "success_events": endpoint.success_events,
         "failed_events": endpoint.failed_events,
+        "duplicate_events": endpoint.duplicate_events,
         "is_active": endpoint.is_active,
         "performance": webhook_engine.get_performance_stats()
     }
 
 
+@app.get("/stats/telemetry")
+async def get_telemetry_stats():
+    """핫패스 계측 조회 (이벤트 버스 등 등록된 소스)"""
+    return {
+        "webhook": webhook_engine.get_performance_stats(),
+        "signatures": webhook_engine.verifier.get_stats(),
+        "dedup": webhook_engine.dedup_index.get_stats(),
+        **webhook_engine.get_telemetry()
+    }
+
+
 @app.get("/health")
 async def health_check():
     """헬스 체크"""